@@ -4,9 +4,10 @@ from __future__ import annotations
 import logging
 import os
 import re
-from collections.abc import Generator, Iterator
+from collections.abc import AsyncIterator, Generator, Iterator
 from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from fastapi import Request
 from sqlalchemy import create_engine, event, text
@@ -14,6 +15,9 @@ from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.config.settings import settings
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
@@ -137,21 +141,114 @@ SessionLocal: sessionmaker[Session] = sessionmaker(
 
 
 # ---------------------------------------------------------------------------
-# Async session shim for tests (patch target)
+# Motor async (asyncpg / aiosqlite) para código async fuera de una request
 # ---------------------------------------------------------------------------
-@asynccontextmanager
-async def get_db_session():  # pragma: no cover - used as patch target in tests
+# Los handlers `async def` que usan la Session síncrona bloquean el event loop
+# durante cada query. Los que no hacen I/O async se declaran `def` (FastAPI los
+# ejecuta en el threadpool); el código async fuera de una request (use cases,
+# tareas async) usa `get_db_session`. El motor se crea bajo demanda: Celery,
+# scripts y tests SQLite no lo necesitan.
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def make_async_db_url(url: str) -> str:
+    """Traduce la URL síncrona a su driver async.
+
+    asyncpg no entiende ``sslmode``: se traduce a ``ssl`` (mismos valores).
     """
-    Async context manager placeholder to satisfy imports in modules that expect
-    an async DB session provider. Unit tests patch this symbol with an
-    AsyncMock that implements the async context manager protocol.
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    parsed = parsed.set(drivername=driver)
+    if driver.endswith("+asyncpg") and "sslmode" in parsed.query:
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed.render_as_string(hide_password=False)
+
+
+class AsyncSyncSession(Session):
+    """Session síncrona subyacente de cada AsyncSession (hooks RLS propios)."""
+
+
+_async_engine = None
+_async_sessionmaker = None
+
 
-    In production, use the synchronous dependencies (get_db/session_scope) or
-    provide a real AsyncSession provider.
+def get_async_engine():
+    """AsyncEngine compartido (se crea en la primera llamada)."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url = make_async_db_url(_db_url)
+        try:
+            if IS_SQLITE:
+                _async_engine = create_async_engine(url, echo=(settings.LOG_LEVEL == "DEBUG"))
+            else:
+                _async_engine = create_async_engine(
+                    url,
+                    pool_size=settings.POOL_SIZE,
+                    max_overflow=settings.MAX_OVERFLOW,
+                    pool_timeout=settings.POOL_TIMEOUT,
+                    pool_pre_ping=True,
+                    echo=(settings.LOG_LEVEL == "DEBUG"),
+                    connect_args={
+                        "server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}
+                    },
+                )
+        except ImportError as exc:
+            raise RuntimeError(
+                f"Async DB driver not installed for {_mask(url)} (pip install asyncpg)"
+            ) from exc
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    """``async_sessionmaker`` con los mismos hooks que `SessionLocal`."""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            sync_session_class=AsyncSyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_sessionmaker
+
+
+@asynccontextmanager
+async def get_db_session(
+    tenant_id: str | None = None,
+    user_id: str | None = None,
+    *,
+    bypass_rls: bool = False,
+) -> AsyncIterator[AsyncSession]:
     """
-    raise NotImplementedError(
-        "get_db_session is a test-time placeholder; patch it or provide an async provider"
-    )
+    AsyncSession fuera de una request (use cases, tareas async):
+        async with get_db_session(tenant_id) as db:
+            ...  # commit/rollback automático
+    """
+    async with get_async_sessionmaker()() as db:
+        db.info["tenant_id"] = str(tenant_id) if tenant_id else None
+        db.info["user_id"] = str(user_id) if user_id else None
+        db.info["bypass_rls"] = bypass_rls
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
 
 # ---------------------------------------------------------------------------
@@ -211,6 +308,7 @@ def _apply_rls_gucs(
 # incluidas las que arrancan tras un db.rollback(). Esto garantiza que
 # bypass_rls nunca se pierde independientemente de cuántos rollbacks ocurran.
 # ---------------------------------------------------------------------------
+@event.listens_for(AsyncSyncSession, "after_begin")
 @event.listens_for(SessionLocal, "after_begin")
 def _session_after_begin(session: Session, transaction, connection):
     if connection.dialect.name != "postgresql":
@@ -284,6 +382,7 @@ def get_db(request: Request) -> Iterator[Session]:
 # ---------------------------------------------------------------------------
 # ORM hook: auto-fill tenant_id cuando falta (best-effort)
 # ---------------------------------------------------------------------------
+@event.listens_for(AsyncSyncSession, "before_flush")
 @event.listens_for(SessionLocal, "before_flush")
 def _auto_fill_multitenant_fields(session: Session, flush_context, instances):
     try:
@@ -523,6 +622,7 @@ try:
     from app.core.auto_audit import register_auto_audit  # noqa: E402
 
     register_auto_audit(SessionLocal)
+    register_auto_audit(AsyncSyncSession)
     logger.debug("[database] Auto-auditoría ORM registrada sobre SessionLocal")
 except Exception as _auto_audit_exc:
     logger.warning("[database] No se pudo registrar auto_audit: %s", _auto_audit_exc)
@@ -49,6 +49,14 @@ def _validate_tenant_slug_header(request: Request, claims: dict[str, Any]) -> No
         raise HTTPException(status_code=403, detail="tenant_slug_mismatch")
 
 
+def _decode_access_token(request: Request, token: str) -> dict[str, Any]:
+    """Decodifica el access token reutilizando el resultado de RequestContextMiddleware."""
+    ctx = request.scope.get("state", {}).get("request_context")
+    if ctx is not None:
+        return ctx.decode_access(token)
+    return token_service.decode_and_validate(token, expected_type="access")
+
+
 def with_access_claims(request: Request) -> dict[str, Any]:
     import logging
 
@@ -61,7 +69,7 @@ def with_access_claims(request: Request) -> dict[str, Any]:
         if auth_hdr.startswith("Bearer "):
             token = auth_hdr.split(" ", 1)[1].strip()
             try:
-                claims = token_service.decode_and_validate(token, expected_type="access")
+                claims = _decode_access_token(request, token)
                 _validate_tenant_slug_header(request, claims)
                 request.state.access_claims = claims
                 return claims
@@ -102,7 +110,7 @@ def with_access_claims(request: Request) -> dict[str, Any]:
 
     try:
         logger.debug(f"Attempting to decode token, token_service_id={id(token_service)}")
-        claims = token_service.decode_and_validate(token, expected_type="access")
+        claims = _decode_access_token(request, token)
         logger.debug(f"Token decoded successfully, claims_keys={list(claims.keys())}")
     except ExpiredSignatureError as e:
         logger.error(f"Token expired: {e}")
@@ -1,11 +1,17 @@
 # File: app/core/cache.py
 """
-Módulo de cache con Redis para GestiqCloud.
+Módulo de cache de dos niveles para GestiqCloud.
 
 Proporciona:
-- Decorador @cached para endpoints
-- Funciones de invalidación por patrón
-- Soporte para cache por tenant
+- L1 en proceso (LRU acotado, ``CACHE_L1_MAX_ENTRIES``) delante de Redis (L2)
+- Generaciones por (tenant, dominio) embebidas en las claves: invalidar es un
+  ``INCR`` + ``PUBLISH`` (sin ``SCAN``); cada pod descarta su L1 al recibirlo
+- Single-flight por clave (una sola carga concurrente por proceso)
+- ``cache_get_or_load`` (async) / ``cache_get_or_load_sync`` (endpoints sync)
+- Decorador @cached e ``invalidate_on_commit`` para modelos SQLAlchemy
+
+Sin Redis funciona solo con L1 y generaciones locales; la obsolescencia entre
+procesos queda acotada por ``CACHE_L1_TTL_SECONDS``.
 """
 
 from __future__ import annotations
@@ -15,7 +21,12 @@ import functools
 import hashlib
 import json
 import logging
-from collections.abc import Callable
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
 from enum import IntEnum
 from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
 
@@ -40,6 +51,7 @@ class CacheTTL(IntEnum):
     EMPRESA_CONFIG = 600  # 10 minutos
     PERMISOS = 300  # 5 minutos
     TIPOS_CAMBIO = 900  # 15 minutos
+    DASHBOARD_KPIS = 30  # 30 segundos
     SHORT = 60  # 1 minuto
     MEDIUM = 300  # 5 minutos
     LONG = 3600  # 1 hora
@@ -117,6 +129,15 @@ def _reset_redis_client_on_loop_error(exc: Exception) -> None:
     _redis_client_loop = None
 
 
+def _tenant_key(tenant_id: str | UUID) -> str:
+    """Forma canónica del tenant en claves (UUID normalizado si lo es)."""
+    raw = str(tenant_id)
+    try:
+        return str(uuid.UUID(raw))
+    except ValueError:
+        return raw
+
+
 def build_cache_key(tenant_id: str | UUID, domain: str, *parts: str) -> str:
     """
     Construye una clave de cache con formato consistente.
@@ -129,7 +150,7 @@ def build_cache_key(tenant_id: str | UUID, domain: str, *parts: str) -> str:
     Returns:
         Clave formateada: cache:v1:tenant:{tenant_id}:{domain}:{parts...}
     """
-    key_parts = [CACHE_PREFIX, "tenant", str(tenant_id), domain]
+    key_parts = [CACHE_PREFIX, "tenant", _tenant_key(tenant_id), domain]
     key_parts.extend(str(p) for p in parts)
     return ":".join(key_parts)
 
@@ -255,33 +276,537 @@ async def invalidate_pattern(pattern: str) -> int:
         return 0
 
 
+# ---------------------------------------------------------------------------
+# L1 en proceso + generaciones
+# ---------------------------------------------------------------------------
+
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "5000"))
+L1_TTL_SECONDS = float(os.getenv("CACHE_L1_TTL_SECONDS", "30"))
+GENERATION_TTL_SECONDS = float(os.getenv("CACHE_GENERATION_TTL_SECONDS", "30"))
+# Tras un fallo de conexión el cliente síncrono se reintenta pasado este tiempo
+# (un worker que arranca antes que Redis no queda sin Redis para siempre).
+SYNC_REDIS_RETRY_SECONDS = float(os.getenv("CACHE_SYNC_REDIS_RETRY_SECONDS", "30"))
+INVALIDATION_CHANNEL = f"{CACHE_PREFIX}:invalidate"
+TENANT_WIDE = "*"
+
+_MISSING = object()
+
+
+class _LocalLRU:
+    """LRU acotado con expiración por entrada, seguro entre hilos."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def drop_prefix(self, prefix: str) -> int:
+        with self._lock:
+            doomed = [k for k in self._data if k.startswith(prefix)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+_l1 = _LocalLRU(L1_MAX_ENTRIES)
+_generations = _LocalLRU(max(L1_MAX_ENTRIES, 1000))
+# Contadores de generación sin Redis (no expiran: son la fuente de verdad local)
+_local_generations: dict[str, int] = {}
+_local_generations_lock = threading.Lock()
+
+_sync_redis_client: Any | None = None
+# False solo si Redis está deshabilitado por configuración
+_sync_redis_available: bool | None = None
+_sync_redis_retry_at = 0.0
+
+_inflight: dict[tuple[int, str], asyncio.Future] = {}
+_sync_inflight: dict[str, _Flight] = {}
+_sync_inflight_lock = threading.Lock()
+
+_listener_task: asyncio.Task | None = None
+
+
+def get_sync_redis_client():
+    """Cliente Redis síncrono para endpoints ``def`` (None si no hay Redis).
+
+    Si la conexión falla se devuelve None y se reintenta pasado
+    ``SYNC_REDIS_RETRY_SECONDS``.
+    """
+    global _sync_redis_client, _sync_redis_available, _sync_redis_retry_at
+    if _sync_redis_available is False:
+        return None
+    if _sync_redis_client is not None:
+        return _sync_redis_client
+    if os.getenv("DISABLE_REDIS") == "1":
+        _sync_redis_available = False
+        return None
+    if time.monotonic() < _sync_redis_retry_at:
+        return None
+    try:
+        from app.config.settings import get_settings
+
+        url = get_settings().REDIS_URL or os.getenv("DEV_REDIS_URL")
+        if not url:
+            _sync_redis_available = False
+            return None
+
+        import redis
+
+        client = redis.Redis.from_url(
+            url, decode_responses=True, socket_connect_timeout=2, socket_timeout=2
+        )
+        client.ping()
+        _sync_redis_client = client
+        _sync_redis_available = True
+        return client
+    except Exception as e:
+        _sync_redis_retry_at = time.monotonic() + SYNC_REDIS_RETRY_SECONDS
+        logger.warning(
+            f"Redis síncrono no disponible: {e}. Solo L1; "
+            f"reintento en {SYNC_REDIS_RETRY_SECONDS:.0f}s."
+        )
+        return None
+
+
+def _generation_key(tenant_id: str | UUID, domain: str) -> str:
+    return f"{CACHE_PREFIX}:gen:{_tenant_key(tenant_id)}:{domain}"
+
+
+def _domain_prefix(tenant_id: str | UUID, domain: str) -> str:
+    if domain == TENANT_WIDE:
+        return f"{CACHE_PREFIX}:tenant:{_tenant_key(tenant_id)}:"
+    return build_cache_key(tenant_id, domain) + ":"
+
+
+def _local_generation(key: str) -> int:
+    with _local_generations_lock:
+        return _local_generations.get(key, 0)
+
+
+def _bump_local_generation(key: str) -> int:
+    with _local_generations_lock:
+        _local_generations[key] = _local_generations.get(key, 0) + 1
+        return _local_generations[key]
+
+
+def _generation_token(values: Sequence[int]) -> str:
+    return "g" + ".".join(str(int(v)) for v in values)
+
+
+def _known_generations(keys: list[str]) -> tuple[list[Any], list[str]]:
+    values = [_generations.get(k) for k in keys]
+    return values, [k for k, v in zip(keys, values, strict=True) if v is _MISSING]
+
+
+def _remember_generations(keys: list[str], values: list[Any], fetched: dict[str, int]) -> list[int]:
+    out: list[int] = []
+    for k, v in zip(keys, values, strict=True):
+        if v is _MISSING:
+            v = fetched.get(k, 0)
+            _generations.set(k, v, GENERATION_TTL_SECONDS)
+        out.append(int(v))
+    return out
+
+
+async def _async_generation_token(tenant_id: str | UUID, domain: str) -> str:
+    keys = [_generation_key(tenant_id, TENANT_WIDE), _generation_key(tenant_id, domain)]
+    values, missing = _known_generations(keys)
+    fetched: dict[str, int] = {}
+    if missing:
+        client = await get_redis_client()
+        if client is not None:
+            try:
+                raw = await client.mget(missing)
+                fetched = {k: int(v or 0) for k, v in zip(missing, raw, strict=True)}
+            except Exception as e:
+                _reset_redis_client_on_loop_error(e)
+                logger.warning(f"Error leyendo generaciones de cache: {e}")
+                fetched = {k: _local_generation(k) for k in missing}
+        else:
+            fetched = {k: _local_generation(k) for k in missing}
+    return _generation_token(_remember_generations(keys, values, fetched))
+
+
+def _sync_generation_token(tenant_id: str | UUID, domain: str) -> str:
+    keys = [_generation_key(tenant_id, TENANT_WIDE), _generation_key(tenant_id, domain)]
+    values, missing = _known_generations(keys)
+    fetched: dict[str, int] = {}
+    if missing:
+        client = get_sync_redis_client()
+        if client is not None:
+            try:
+                raw = client.mget(missing)
+                fetched = {k: int(v or 0) for k, v in zip(missing, raw, strict=True)}
+            except Exception as e:
+                logger.warning(f"Error leyendo generaciones de cache: {e}")
+                fetched = {k: _local_generation(k) for k in missing}
+        else:
+            fetched = {k: _local_generation(k) for k in missing}
+    return _generation_token(_remember_generations(keys, values, fetched))
+
+
+def _apply_invalidation(tenant_id: str, domain: str, generation: int | None) -> int:
+    """Aplica en este proceso una invalidación (propia o recibida por pub/sub)."""
+    gen_key = _generation_key(tenant_id, domain)
+    if generation is None:
+        generation = _bump_local_generation(gen_key)
+    current = _generations.get(gen_key)
+    if current is _MISSING or int(current) < generation:
+        _generations.set(gen_key, generation, GENERATION_TTL_SECONDS)
+    _l1.drop_prefix(_domain_prefix(tenant_id, domain))
+    return generation
+
+
+def _invalidation_message(tenant_id: str, domain: str, generation: int) -> str:
+    return json.dumps({"t": tenant_id, "d": domain, "g": generation})
+
+
+def handle_invalidation_message(raw: str | bytes) -> None:
+    """Procesa un mensaje del canal de invalidación (otro pod incrementó una generación)."""
+    try:
+        msg = json.loads(raw)
+        _apply_invalidation(str(msg["t"]), str(msg["d"]), int(msg["g"]))
+    except Exception as e:
+        logger.debug(f"Mensaje de invalidación ignorado ({e}): {raw!r}")
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def _l1_ttl(ttl: int) -> float:
+    return min(float(ttl), L1_TTL_SECONDS)
+
+
+async def cache_get_or_load(
+    tenant_id: str | UUID,
+    domain: str,
+    parts: Sequence[Any],
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int = CacheTTL.MEDIUM,
+) -> Any:
+    """
+    Lee de L1 → L2 (Redis) → ``loader`` con single-flight por clave.
+
+    El valor devuelto es siempre la forma JSON del resultado (igual en hit y
+    en miss). ``None`` no se cachea.
+    """
+    token = await _async_generation_token(tenant_id, domain)
+    key = build_cache_key(tenant_id, domain, token, *(str(p) for p in parts))
+    hit = _l1.get(key)
+    if hit is not _MISSING:
+        return json.loads(hit)
+
+    loop = asyncio.get_running_loop()
+    flight_key = (id(loop), key)
+    pending = _inflight.get(flight_key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future: asyncio.Future = loop.create_future()
+    _inflight[flight_key] = future
+    try:
+        raw = None
+        client = await get_redis_client()
+        if client is not None:
+            try:
+                raw = await client.get(key)
+            except Exception as e:
+                _reset_redis_client_on_loop_error(e)
+                logger.warning(f"Error leyendo cache [{key}]: {e}")
+        if raw is None:
+            loaded = await loader()
+            if loaded is not None:
+                raw = _encode(loaded)
+                if client is not None:
+                    try:
+                        await client.setex(key, max(1, int(ttl)), raw)
+                    except Exception as e:
+                        _reset_redis_client_on_loop_error(e)
+                        logger.warning(f"Error escribiendo cache [{key}]: {e}")
+        if raw is not None:
+            _l1.set(key, raw, _l1_ttl(ttl))
+        value = json.loads(raw) if raw is not None else None
+        future.set_result(value)
+        return value
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # marcado como recuperado aunque no haya esperas
+        raise
+    finally:
+        _inflight.pop(flight_key, None)
+
+
+def cache_get_or_load_sync(
+    tenant_id: str | UUID,
+    domain: str,
+    parts: Sequence[Any],
+    loader: Callable[[], Any],
+    ttl: int = CacheTTL.MEDIUM,
+) -> Any:
+    """Variante síncrona de `cache_get_or_load` para endpoints ``def`` (threadpool)."""
+    token = _sync_generation_token(tenant_id, domain)
+    key = build_cache_key(tenant_id, domain, token, *(str(p) for p in parts))
+    hit = _l1.get(key)
+    if hit is not _MISSING:
+        return json.loads(hit)
+
+    with _sync_inflight_lock:
+        flight = _sync_inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _sync_inflight[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return json.loads(flight.value) if flight.value is not None else None
+
+    try:
+        raw = None
+        client = get_sync_redis_client()
+        if client is not None:
+            try:
+                raw = client.get(key)
+            except Exception as e:
+                logger.warning(f"Error leyendo cache [{key}]: {e}")
+        if raw is None:
+            loaded = loader()
+            if loaded is not None:
+                raw = _encode(loaded)
+                if client is not None:
+                    try:
+                        client.setex(key, max(1, int(ttl)), raw)
+                    except Exception as e:
+                        logger.warning(f"Error escribiendo cache [{key}]: {e}")
+        if raw is not None:
+            _l1.set(key, raw, _l1_ttl(ttl))
+        flight.value = raw
+        return json.loads(raw) if raw is not None else None
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _sync_inflight_lock:
+            _sync_inflight.pop(key, None)
+        flight.done.set()
+
+
 async def invalidate_tenant_domain(tenant_id: str | UUID, domain: str) -> int:
     """
     Invalida todo el cache de un dominio para un tenant.
 
+    Incrementa la generación del dominio (las claves antiguas dejan de leerse y
+    expiran por TTL) y lo publica para que el resto de pods vacíe su L1.
+
     Args:
         tenant_id: ID del tenant
         domain: Dominio (productos, catalogos, empresa, etc.)
 
     Returns:
-        Número de claves eliminadas
+        Nueva generación del dominio
     """
-    pattern = build_cache_key(tenant_id, domain, "*")
-    return await invalidate_pattern(pattern)
+    tid = _tenant_key(tenant_id)
+    generation = None
+    client = await get_redis_client()
+    if client is not None:
+        try:
+            gen_key = _generation_key(tid, domain)
+            generation = int(await client.incr(gen_key))
+            await client.publish(
+                INVALIDATION_CHANNEL, _invalidation_message(tid, domain, generation)
+            )
+        except Exception as e:
+            _reset_redis_client_on_loop_error(e)
+            logger.warning(f"Error invalidando cache [{tid}:{domain}]: {e}")
+    generation = _apply_invalidation(tid, domain, generation)
+    logger.debug(f"Cache INVALIDATE: {tid}:{domain} -> g{generation}")
+    return generation
+
+
+def invalidate_tenant_domain_sync(tenant_id: str | UUID, domain: str) -> int:
+    """Variante síncrona de `invalidate_tenant_domain`."""
+    tid = _tenant_key(tenant_id)
+    generation = None
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            generation = int(client.incr(_generation_key(tid, domain)))
+            client.publish(INVALIDATION_CHANNEL, _invalidation_message(tid, domain, generation))
+        except Exception as e:
+            logger.warning(f"Error invalidando cache [{tid}:{domain}]: {e}")
+    generation = _apply_invalidation(tid, domain, generation)
+    logger.debug(f"Cache INVALIDATE: {tid}:{domain} -> g{generation}")
+    return generation
 
 
 async def invalidate_tenant_all(tenant_id: str | UUID) -> int:
     """
-    Invalida TODO el cache de un tenant.
+    Invalida TODO el cache de un tenant (generación a nivel tenant).
 
     Args:
         tenant_id: ID del tenant
 
     Returns:
-        Número de claves eliminadas
+        Nueva generación del tenant
     """
-    pattern = f"{CACHE_PREFIX}:tenant:{tenant_id}:*"
-    return await invalidate_pattern(pattern)
+    return await invalidate_tenant_domain(tenant_id, TENANT_WIDE)
+
+
+def invalidate_local_caches() -> None:
+    """Vacía L1 y las generaciones conocidas de este proceso (tests)."""
+    _l1.clear()
+    _generations.clear()
+    with _local_generations_lock:
+        _local_generations.clear()
+
+
+def cache_stats() -> dict[str, int]:
+    return {"l1_entries": len(_l1), "generations": len(_generations)}
+
+
+async def _invalidation_listener() -> None:
+    import redis.asyncio as redis
+
+    from app.config.settings import get_settings
+
+    backoff = 1.0
+    while True:
+        client = redis.from_url(
+            get_settings().REDIS_URL, decode_responses=True, socket_connect_timeout=5
+        )
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            backoff = 1.0
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    handle_invalidation_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Listener de invalidación de cache caído: {e}; reintentando")
+            # Lo publicado mientras tanto se pierde: descartar L1 y generaciones
+            _l1.clear()
+            _generations.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
+
+
+async def start_invalidation_listener() -> bool:
+    """Suscribe este pod al canal de invalidación (no-op sin Redis)."""
+    global _listener_task
+    if _listener_task is not None and not _listener_task.done():
+        return True
+    if await get_redis_client() is None:
+        return False
+    _listener_task = asyncio.create_task(_invalidation_listener())
+    return True
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener_task
+    task, _listener_task = _listener_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Invalidación al hacer commit de modelos SQLAlchemy
+# ---------------------------------------------------------------------------
+
+_PENDING_INFO_KEY = "_cache_invalidations"
+_session_hooks_installed = False
+
+
+def _on_after_commit(session: Any) -> None:
+    pending = session.info.pop(_PENDING_INFO_KEY, None)
+    for tenant_id, domain in pending or ():
+        try:
+            invalidate_tenant_domain_sync(tenant_id, domain)
+        except Exception as e:  # pragma: no cover - invalidación best-effort
+            logger.warning(f"Error invalidando cache tras commit [{tenant_id}:{domain}]: {e}")
+
+
+def _on_after_rollback(session: Any) -> None:
+    session.info.pop(_PENDING_INFO_KEY, None)
+
+
+def invalidate_on_commit(
+    model: type, domain: str, *, tenant_attr: str | None = "tenant_id", tenant_id: str = "global"
+) -> None:
+    """
+    Invalida ``domain`` cuando se confirma un INSERT/UPDATE/DELETE de ``model``.
+
+    El tenant sale de ``tenant_attr`` de la fila; con ``tenant_attr=None`` se
+    usa ``tenant_id`` fijo (catálogos globales). La invalidación se difiere a
+    ``after_commit`` para no re-cachear datos aún sin confirmar.
+    """
+    global _session_hooks_installed
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session, object_session
+
+    if not _session_hooks_installed:
+        event.listen(Session, "after_commit", _on_after_commit)
+        event.listen(Session, "after_rollback", _on_after_rollback)
+        _session_hooks_installed = True
+
+    def _mark(_mapper: Any, _connection: Any, target: Any) -> None:
+        session = object_session(target)
+        if session is None:
+            return
+        tid = getattr(target, tenant_attr, None) if tenant_attr else tenant_id
+        if tid is None:
+            return
+        session.info.setdefault(_PENDING_INFO_KEY, set()).add((str(tid), domain))
+
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, event_name, _mark)
 
 
 P = ParamSpec("P")
@@ -296,7 +821,10 @@ def cached(
     exclude_params: list[str] | None = None,
 ):
     """
-    Decorador para cachear resultados de funciones/endpoints.
+    Decorador para cachear resultados de funciones/endpoints async.
+
+    Usa `cache_get_or_load` (L1 + Redis + single-flight); el resultado se
+    devuelve en su forma JSON.
 
     Args:
         ttl: Tiempo de vida en segundos
@@ -333,8 +861,7 @@ def cached(
 
             # Construir clave
             if key_builder:
-                key_suffix = key_builder(tenant_id=tenant_id, **kwargs)
-                cache_key = build_cache_key(tenant_id, domain, key_suffix)
+                parts = [key_builder(tenant_id=tenant_id, **kwargs)]
             else:
                 # Filtrar parámetros
                 cache_params = dict(kwargs)
@@ -348,21 +875,11 @@ def cached(
                     }
 
                 param_hash = hash_params(**cache_params) if cache_params else "default"
-                cache_key = build_cache_key(tenant_id, domain, func.__name__, param_hash)
-
-            # Intentar obtener del cache
-            cached_value = await cache_get(cache_key)
-            if cached_value is not None:
-                return cached_value
-
-            # Ejecutar función y cachear resultado
-            result = await func(*args, **kwargs)
-
-            # Solo cachear si hay resultado
-            if result is not None:
-                await cache_set(cache_key, result, ttl)
+                parts = [func.__name__, param_hash]
 
-            return result
+            return await cache_get_or_load(
+                tenant_id, domain, parts, lambda: func(*args, **kwargs), ttl
+            )
 
         return wrapper
 
@@ -388,9 +905,7 @@ class CacheInvalidator:
 
     async def catalogos(self, tipo: str | None = None) -> int:
         """Invalida cache de catálogos (todos o uno específico)."""
-        if tipo:
-            key = build_cache_key(self.tenant_id, "catalogos", tipo)
-            return 1 if await cache_delete(key) else 0
+        # Con generaciones por dominio, invalidar un tipo invalida el dominio entero.
         return await invalidate_tenant_domain(self.tenant_id, "catalogos")
 
     async def empresa(self) -> int:
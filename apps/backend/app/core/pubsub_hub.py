@@ -0,0 +1,257 @@
+# File: app/core/pubsub_hub.py
+"""
+Hub de pub/sub por proceso para streams (SSE).
+
+Cada stream abierto se suscribía con su propia conexión Redis. El hub mantiene
+un único ``PubSub`` por proceso API: el primer suscriptor de un canal hace
+``SUBSCRIBE``, el último ``UNSUBSCRIBE``, y una tarea lectora reparte cada
+mensaje a colas ``asyncio`` en memoria (una por suscriptor).
+
+Si una cola se llena (cliente lento) o se cae la conexión con Redis, la
+suscripción queda marcada y ``Subscription.get`` lanza ``MessagesLost``: el
+stream debe resincronizar (snapshot o reenvío desde su último número de
+secuencia) en lugar de seguir con huecos.
+
+Sin Redis (dev, tests) ``publish`` entrega solo dentro del propio proceso.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+# Como mucho un aviso por intervalo cuando se publica sin Redis y sin
+# suscriptores locales
+LOCAL_ONLY_WARN_INTERVAL = 60.0
+
+_local_only_warned_at = float("-inf")
+
+
+class MessagesLost(Exception):
+    """La suscripción perdió mensajes; el consumidor debe resincronizar."""
+
+
+class Subscription:
+    """Cola de mensajes de un canal para un consumidor."""
+
+    def __init__(self, channel: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.channel = channel
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.lost = False
+        self._wakeup = asyncio.Event()
+
+    def deliver(self, data: str) -> None:
+        if self.lost:
+            return
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.mark_lost()
+            return
+        self._wakeup.set()
+
+    def mark_lost(self) -> None:
+        self.lost = True
+        self._wakeup.set()
+
+    async def get(self, timeout: float | None = None) -> str | None:
+        """Siguiente mensaje o ``None`` si no llega ninguno en ``timeout``."""
+        while True:
+            if self.lost:
+                # Descartar lo encolado: el consumidor se resincroniza desde cero
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.lost = False
+                raise MessagesLost(self.channel)
+            if not self.queue.empty():
+                return self.queue.get_nowait()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                return None
+
+
+class PubSubHub:
+    """Una conexión ``PubSub`` de Redis compartida por todos los streams del proceso."""
+
+    def __init__(self, *, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: Any | None = None
+        self._pubsub: Any | None = None
+        self._reader_task: asyncio.Task | None = None
+
+    @property
+    def channels(self) -> set[str]:
+        return set(self._subscriptions)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        sub = Subscription(channel, self.queue_size)
+        subs = self._subscriptions.setdefault(channel, set())
+        subs.add(sub)
+        if len(subs) == 1:
+            pubsub = await self._ensure_pubsub()
+            if pubsub is not None:
+                try:
+                    await pubsub.subscribe(channel)
+                except Exception as e:
+                    logger.warning(f"SUBSCRIBE {channel} falló: {e}")
+                    sub.mark_lost()
+        return sub
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscriptions.get(sub.channel)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if subs:
+            return
+        del self._subscriptions[sub.channel]
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(sub.channel)
+            except Exception as e:
+                logger.debug(f"UNSUBSCRIBE {sub.channel} falló: {e}")
+
+    @asynccontextmanager
+    async def subscription(self, channel: str) -> AsyncIterator[Subscription]:
+        sub = await self.subscribe(channel)
+        try:
+            yield sub
+        finally:
+            await self.unsubscribe(sub)
+
+    def dispatch(self, channel: str, data: str) -> None:
+        """Reparte ``data`` a los suscriptores locales (en el loop del hub)."""
+        for sub in list(self._subscriptions.get(channel, ())):
+            sub.deliver(data)
+
+    def dispatch_threadsafe(self, channel: str, data: str) -> None:
+        """``dispatch`` desde cualquier hilo (endpoints ``def`` en el threadpool)."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or channel not in self._subscriptions:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.dispatch(channel, data)
+        else:
+            loop.call_soon_threadsafe(self.dispatch, channel, data)
+
+    def _mark_all_lost(self) -> None:
+        for subs in self._subscriptions.values():
+            for sub in subs:
+                sub.mark_lost()
+
+    async def _ensure_pubsub(self) -> Any | None:
+        if self._reader_task is not None and not self._reader_task.done():
+            # Reconectando: al volver, _connect suscribe todos los canales
+            return self._pubsub
+        from app.core.cache import get_redis_client
+
+        if await get_redis_client() is None:
+            return None
+        await self._connect()
+        self._reader_task = asyncio.create_task(self._reader())
+        return self._pubsub
+
+    async def _connect(self) -> None:
+        import redis.asyncio as redis
+
+        from app.config.settings import get_settings
+
+        self._client = redis.from_url(
+            get_settings().REDIS_URL, decode_responses=True, socket_connect_timeout=5
+        )
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        if self._subscriptions:
+            await self._pubsub.subscribe(*self._subscriptions)
+
+    async def _disconnect(self) -> None:
+        pubsub, client = self._pubsub, self._client
+        self._pubsub = self._client = None
+        try:
+            if pubsub is not None:
+                await pubsub.aclose()
+            if client is not None:
+                await client.aclose()
+        except Exception:
+            pass
+
+    async def _reader(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._connect()
+                if not self._subscriptions:
+                    await asyncio.sleep(1.0)
+                    continue
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                backoff = 1.0
+                if message and message.get("type") == "message":
+                    self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Hub pub/sub caído: {e}; reintentando")
+                # Lo publicado mientras tanto se pierde: que cada stream resincronice
+                self._mark_all_lost()
+                await self._disconnect()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def close(self) -> None:
+        task, self._reader_task = self._reader_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._disconnect()
+
+
+hub = PubSubHub()
+
+
+def publish(channel: str, data: str) -> None:
+    """Publica ``data`` en ``channel`` (Redis si hay; si no, solo este proceso)."""
+    global _local_only_warned_at
+    from app.core.cache import get_sync_redis_client
+
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            client.publish(channel, data)
+            return
+        except Exception as e:
+            logger.warning(f"PUBLISH {channel} falló: {e}; entrega solo local")
+    if channel not in hub.channels:
+        # Proceso sin streams (worker Celery): la entrega local no llega a nadie
+        now = time.monotonic()
+        if now - _local_only_warned_at >= LOCAL_ONLY_WARN_INTERVAL:
+            _local_only_warned_at = now
+            logger.warning(
+                f"Sin Redis para publicar en {channel}: ningún suscriptor en este "
+                "proceso, los streams de otros procesos no recibirán el mensaje"
+            )
+    hub.dispatch_threadsafe(channel, data)
+
+
+async def stop_pubsub_hub() -> None:
+    await hub.close()
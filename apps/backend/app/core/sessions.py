@@ -12,9 +12,11 @@ from dataclasses import dataclass
 from typing import Any, Protocol
 
 from itsdangerous import BadSignature, Signer
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.request_context import request_context_from_scope
 
 _UNSET = object()  # sentinel to distinguish "not passed" from None
 
@@ -94,10 +96,10 @@ class RedisSessionStore:
         await self._redis.delete(self._k(sid))
 
 
-class SessionMiddlewareServerSide(BaseHTTPMiddleware):
+class SessionMiddlewareServerSide:
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         cookie_name: str,
         secret_key: str,
         https_only: bool = True,
@@ -107,7 +109,7 @@ class SessionMiddlewareServerSide(BaseHTTPMiddleware):
         cookie_domain: str | None | object = _UNSET,
         fallback_window_seconds: int = 30,
     ):
-        super().__init__(app)
+        self.app = app
         self.signer = Signer(secret_key)
         # Build config – explicit constructor args always win; fall back to
         # Django/app settings only for values the caller did not provide.
@@ -160,8 +162,27 @@ class SessionMiddlewareServerSide(BaseHTTPMiddleware):
         # For backward compatibility with any external references
         self.store = self._primary_store
 
-    async def dispatch(self, request: Request, call_next):
-        raw = request.cookies.get(self.cfg.cookie_name)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        raw = request_context_from_scope(scope).cookies.get(self.cfg.cookie_name)
+        sid, session = await self._load(raw)
+        state = scope["state"]
+        state["session"] = session
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Persist session if it's dirty or a known sid with content
+                current = state.get("session")
+                if state.get("session_dirty", False) or (sid and current):
+                    cookie = await self._persist(sid, dict(current or {}))
+                    MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _load(self, raw: str | None) -> tuple[str | None, dict[str, Any]]:
         sid = None
         session: dict[str, Any] = {}
         store_for_read = self._fallback_store if self._using_fallback() else self._primary_store
@@ -191,35 +212,32 @@ class SessionMiddlewareServerSide(BaseHTTPMiddleware):
                     else:
                         sid = None
                         session = {}
+        return sid, session
 
-        request.state.session = session
-        response: Response = await call_next(request)
-
-        # Persist session if it's dirty or a known sid with content
-        if getattr(request.state, "session_dirty", False) or (sid and request.state.session):
-            data = dict(request.state.session)
-            if not sid:
-                sid = secrets.token_urlsafe(32)
-            store_for_write = (
-                self._fallback_store if self._using_fallback() else self._primary_store
-            )
-            try:
-                await store_for_write.set(sid, data, self.cfg.ttl_seconds)
-            except Exception as exc:  # pragma: no cover - depends on store backend
-                self._handle_store_error("set", exc)
-                store_for_write = self._fallback_store
-                await store_for_write.set(sid, data, self.cfg.ttl_seconds)
-            signed = self.signer.sign(sid.encode()).decode()
-            response.set_cookie(
-                key=self.cfg.cookie_name,
-                value=signed,
-                httponly=self.cfg.cookie_httponly,
-                secure=self.cfg.cookie_secure,
-                samesite=self.cfg.cookie_samesite.lower(),
-                path="/",
-                domain=self.cfg.cookie_domain,
-            )
-        return response
+    async def _persist(self, sid: str | None, data: dict[str, Any]) -> str:
+        """Guarda la sesión y devuelve el valor del header ``Set-Cookie``."""
+        if not sid:
+            sid = secrets.token_urlsafe(32)
+        store_for_write = self._fallback_store if self._using_fallback() else self._primary_store
+        try:
+            await store_for_write.set(sid, data, self.cfg.ttl_seconds)
+        except Exception as exc:  # pragma: no cover - depends on store backend
+            self._handle_store_error("set", exc)
+            store_for_write = self._fallback_store
+            await store_for_write.set(sid, data, self.cfg.ttl_seconds)
+        signed = self.signer.sign(sid.encode()).decode()
+        # Response.set_cookie garantiza el mismo formato de cookie que antes.
+        carrier = Response()
+        carrier.set_cookie(
+            key=self.cfg.cookie_name,
+            value=signed,
+            httponly=self.cfg.cookie_httponly,
+            secure=self.cfg.cookie_secure,
+            samesite=self.cfg.cookie_samesite.lower(),
+            path="/",
+            domain=self.cfg.cookie_domain,
+        )
+        return carrier.headers["set-cookie"]
 
     def _using_fallback(self) -> bool:
         return time.time() < self._fallback_until
@@ -2,16 +2,20 @@
 
 from __future__ import annotations
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from . import get_lang_from_header
 
 
-class I18nMiddleware(BaseHTTPMiddleware):
+class I18nMiddleware:
     """Middleware that extracts language from Accept-Language header."""
 
-    async def dispatch(self, request: Request, call_next):
-        accept_lang = request.headers.get("Accept-Language")
-        request.state.lang = get_lang_from_header(accept_lang)
-        return await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            accept_lang = Headers(scope=scope).get("Accept-Language")
+            scope.setdefault("state", {})["lang"] = get_lang_from_header(accept_lang)
+        await self.app(scope, receive, send)
@@ -49,8 +49,11 @@ from .config.settings import settings
 from .core.sessions import SessionMiddlewareServerSide
 from .core.startup_validation import ConfigValidationError, validate_critical_config
 from .middleware.rate_limit import RateLimitMiddleware
+from .middleware.request_context import RequestContextMiddleware
 from .middleware.request_log import RequestLogMiddleware
-from .middleware.security_headers import security_headers_middleware
+from .middleware.security_headers import SecurityHeadersMiddleware
+from .middleware.utf8_json import UTF8JSONMiddleware
+from .middleware.v1_rewrite import V1PathRewriteMiddleware
 from .services.ai.startup import initialize_ai_providers
 
 # Rate limiting configuration: increased for development, stricter for production
@@ -261,6 +264,16 @@ async def lifespan(app: FastAPI):
     # OLD imports runner disabled (module renamed to _old_imports)
     logging.getLogger("app.startup").info("Imports runner skipped (old module disabled)")
 
+    # Invalidación de L1 entre pods (pub/sub de generaciones de cache)
+    try:
+        from app.core.cache import start_invalidation_listener
+
+        await start_invalidation_listener()
+    except Exception:
+        logging.getLogger("app.startup").warning(
+            "Cache invalidation listener not started; continuing startup", exc_info=True
+        )
+
     yield
 
     # Shutdown
@@ -272,6 +285,33 @@ async def lifespan(app: FastAPI):
                 "Error stopping imports runner during shutdown", exc_info=True
             )
 
+    try:
+        from app.modules.webhooks.infrastructure.http_client import close_webhook_http_client
+
+        await close_webhook_http_client()
+    except Exception:
+        logging.getLogger("app.startup").warning(
+            "Error closing webhook HTTP client during shutdown", exc_info=True
+        )
+
+    try:
+        from app.core.pubsub_hub import stop_pubsub_hub
+
+        await stop_pubsub_hub()
+    except Exception:
+        logging.getLogger("app.startup").warning(
+            "Error stopping pub/sub hub during shutdown", exc_info=True
+        )
+
+    try:
+        from app.core.cache import stop_invalidation_listener
+
+        await stop_invalidation_listener()
+    except Exception:
+        logging.getLogger("app.startup").warning(
+            "Error stopping cache invalidation listener during shutdown", exc_info=True
+        )
+
 
 # ============================================================================
 # FASTAPI APPLICATION
@@ -435,28 +475,10 @@ async def custom_redoc() -> Response:
 # (2026-06-11) ningún frontend debería emitir /v1; este middleware queda como red de
 # seguridad. Retirar cuando los logs confirmen 0 tráfico /v1 (y quitar también la
 # reescritura /v1 del Cloudflare Worker, workers/edge-gateway.js).
-@app.middleware("http")
-async def _rewrite_v1_to_api_v1(request: Request, call_next):
-    path = request.scope.get("path", "")
-    if path == "/v1" or path.startswith("/v1/"):
-        new_path = "/api" + path
-        request.scope["path"] = new_path
-        raw_path = request.scope.get("raw_path")
-        if isinstance(raw_path, (bytes, bytearray)) and raw_path.startswith(b"/v1"):
-            request.scope["raw_path"] = b"/api" + raw_path
-        elif isinstance(raw_path, str) and raw_path.startswith("/v1"):
-            request.scope["raw_path"] = "/api" + raw_path
-    response = await call_next(request)
-    return response
-
+app.add_middleware(V1PathRewriteMiddleware)
 
 # UTF-8 middleware
-@app.middleware("http")
-async def force_utf8_response(request, call_next):
-    response = await call_next(request)
-    if "application/json" in response.headers.get("content-type", ""):
-        response.headers["content-type"] = "application/json; charset=utf-8"
-    return response
+app.add_middleware(UTF8JSONMiddleware)
 
 
 # CSRF (double-submit cookie). Se registra ANTES que SessionMiddleware para que
@@ -594,12 +616,18 @@ except Exception as e:
     logging.getLogger("app.startup").warning(f"Could not enable endpoint rate limiting: {e}")
     pass
 
+# Contexto de request compartido (request id, cookies, token decodificado una
+# sola vez). Va por fuera de los limitadores para que puedan usar los claims.
+app.add_middleware(RequestContextMiddleware)
+
 # Security headers
-app.middleware("http")(security_headers_middleware)
+app.add_middleware(SecurityHeadersMiddleware)
 
+# Todo el stack propio es ASGI puro (sin BaseHTTPMiddleware): no añade una
+# tarea ni un memory stream por respuesta y no rompe StreamingResponse/SSE.
 # CORS debe ser el último add_middleware (= más exterior) para que su header
 # aparezca en TODAS las respuestas, incluidas las de EndpointRateLimiter (429)
-# y security_headers_middleware. En Starlette, el último add_middleware es el
+# y SecurityHeadersMiddleware. En Starlette, el último add_middleware es el
 # middleware más exterior en el stack.
 app.add_middleware(
     CORSMiddleware,
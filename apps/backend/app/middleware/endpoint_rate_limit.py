@@ -3,13 +3,15 @@
 Protege endpoints concretos (login, password-reset, etc.) con límites
 declarativos `{ruta: (max_requests, window_seconds)}`.
 
-Storage: **Redis** si `REDIS_URL` está disponible (consistente entre procesos
-uvicorn/Celery), con **fallback a memoria local** si no hay Redis (p.ej. tests).
+Storage: **Redis** si `REDIS_URL` está disponible (token bucket en un script
+Lua, consistente entre procesos uvicorn/Celery; ver `token_bucket.py`), con
+**fallback a memoria local** (sliding window) si no hay Redis (p.ej. tests).
 Usar memoria local en producción multi-proceso permitiría evadir el límite
 repartiendo requests entre procesos, por eso Redis es el modo preferente.
 
 Arquitectura de rate limiting del backend (ver docs/seguridad.md):
-  - `RateLimitMiddleware`  → límite GLOBAL de tráfico por user/tenant/IP (Redis).
+  - `RateLimitMiddleware`  → límite GLOBAL de tráfico por user/tenant/IP (Redis,
+    token bucket con pre-check local; clases por ruta y por tenant).
   - `EndpointRateLimiter`  → límites por endpoint crítico (esta clase).
   - `SimpleRateLimiter` / `core/login_rate_limit` → lockout anti-fuerza-bruta por
     fallos de login (Redis). Propósito distinto (cuenta fallos, no requests).
@@ -25,7 +27,10 @@ from collections.abc import Callable
 
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.token_bucket import LimitRule, RedisBucketBackend, TokenBucketLimiter
 
 try:
     from redis import asyncio as aioredis
@@ -35,22 +40,23 @@ except Exception:  # pragma: no cover - redis optional
 logger = logging.getLogger("app.rate_limit")
 
 
-class EndpointRateLimiter(BaseHTTPMiddleware):
+class EndpointRateLimiter:
     """Rate limiter configurable por endpoint con backend Redis (+ fallback memoria)."""
 
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         limits: dict[str, tuple[int, int]] | None = None,
         key_func: Callable[[Request], str] | None = None,
         redis_url: str | None = None,
     ):
-        super().__init__(app)
+        self.app = app
         # limits = {endpoint: (max_requests, window_seconds)}
         self.limits = limits or self._default_limits()
         self.key_func = key_func or self._default_key_func
         self.redis_url = redis_url or os.getenv("REDIS_URL")
         self.redis = None
+        self._bucket: TokenBucketLimiter | None = None
         # Fallback en memoria: {key: [(timestamp, endpoint), ...]}
         self._store: dict[str, list[tuple[float, str]]] = defaultdict(list)
 
@@ -88,19 +94,14 @@ class EndpointRateLimiter(BaseHTTPMiddleware):
     async def _check_redis(
         self, r, key: str, path: str, max_requests: int, window: int
     ) -> tuple[bool, int, int]:
-        """Fixed-window counter en Redis. Devuelve (allowed, retry_after, remaining)."""
-        now = int(time.time())
-        bucket = now // window
-        rkey = f"erl:{key}:{path}:{bucket}"
-        async with r.pipeline(transaction=True) as pipe:
-            pipe.incr(rkey)
-            pipe.expire(rkey, window + 5)
-            count, _ = await pipe.execute()
-        count = int(count)
-        if count > max_requests:
-            retry_after = window - (now % window) + 1
-            return False, retry_after, 0
-        return True, 0, max(0, max_requests - count)
+        """Token bucket atómico (Lua) en Redis. Devuelve (allowed, retry_after, remaining).
+
+        Sin pre-check local: son endpoints críticos y el límite debe ser exacto.
+        """
+        if self._bucket is None:
+            self._bucket = TokenBucketLimiter(RedisBucketBackend(r, prefix="erl:"), local_share=0)
+        result = await self._bucket.hit(f"{key}:{path}", LimitRule(max_requests, window))
+        return result.allowed, result.retry_after, result.remaining
 
     def _check_memory(
         self, key: str, path: str, max_requests: int, window: int
@@ -118,15 +119,15 @@ class EndpointRateLimiter(BaseHTTPMiddleware):
         self._store[unique_key].append((now, path))
         return True, 0, max(0, max_requests - len(current) - 1)
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Solo aplicar rate limit si el endpoint está en la lista
-        if path not in self.limits:
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] not in self.limits:
+            await self.app(scope, receive, send)
+            return
 
+        path = scope["path"]
         max_requests, window = self.limits[path]
-        key = self.key_func(request)
+        key = self.key_func(Request(scope))
 
         try:
             r = await self._get_redis()
@@ -140,14 +141,15 @@ class EndpointRateLimiter(BaseHTTPMiddleware):
                 )
         except Exception:
             # Fail-open ante errores del limiter (no bloquear tráfico legítimo)
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         if not allowed:
             logger.warning(
                 "Rate limit exceeded",
                 extra={"key": key, "path": path, "max": max_requests, "window": window},
             )
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "error": "rate_limit_exceeded",
@@ -156,9 +158,15 @@ class EndpointRateLimiter(BaseHTTPMiddleware):
                 },
                 headers={"Retry-After": str(retry_after)},
             )
-
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Window"] = str(window)
-        return response
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(max_requests)
+                headers["X-RateLimit-Remaining"] = str(remaining)
+                headers["X-RateLimit-Window"] = str(window)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,14 +1,26 @@
 # app/middleware/i18n_header.py
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.i18n import detect_lang
 
 
-class ContentLanguageMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        resp = await call_next(request)
-        try:
-            resp.headers["Content-Language"] = detect_lang(request)
-        except Exception:
-            pass
-        return resp
+class ContentLanguageMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                try:
+                    MutableHeaders(scope=message)["Content-Language"] = detect_lang(Request(scope))
+                except Exception:
+                    pass
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
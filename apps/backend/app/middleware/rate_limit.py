@@ -1,80 +1,174 @@
+"""Límite GLOBAL de tráfico por user/tenant/IP (token bucket en Redis).
+
+Cada identidad tiene un bucket de ``limit_per_minute`` tokens que se recarga de
+forma continua (ver `app.middleware.token_bucket`). Las clases de límite se
+resuelven por orden:
+
+1. ``route_limits``: ``{prefijo_ruta: (max_requests, window_seconds)}`` — mismo
+   formato que `EndpointRateLimiter`; cada prefijo tiene su propio bucket.
+2. ``tenant_limits``: ``{tenant_id: limit_per_minute}`` — override por tenant
+   (env ``RATE_LIMIT_TENANT_LIMITS`` como JSON si no se pasa explícito).
+3. ``limit_per_minute`` por defecto.
+
+Sin Redis deja pasar (fail-open), igual que ante errores del limitador.
+"""
+
 from __future__ import annotations
 
+import json
+import logging
 import os
-import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.request_context import request_context_from_scope
+from app.middleware.token_bucket import (
+    LimitRule,
+    RedisBucketBackend,
+    TokenBucketLimiter,
+    rate_limit_headers,
+)
 
 try:
     from redis import asyncio as aioredis
 except Exception:  # pragma: no cover
     aioredis = None
 
+logger = logging.getLogger("app.rate_limit")
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, *, redis_url: str | None = None, limit_per_minute: int = 120):
-        super().__init__(app)
+_EXEMPT_PATHS = ("/health", "/healthz", "/")
+# Skip admin config/catalog endpoints in dev to avoid throttling the Admin UI bootstrap.
+# Large-file chunked upload endpoints are exempt to allow many small requests during
+# a single file upload.
+_EXEMPT_PREFIXES = (
+    "/api/v1/admin/config",
+    "/api/v1/imports/uploads/chunk",
+    "/api/v1/tenant/imports/uploads/chunk",
+    "/api/v1/importador/uploads/chunk",
+)
+
+
+def _tenant_limits_from_env() -> dict[str, int]:
+    raw = (os.getenv("RATE_LIMIT_TENANT_LIMITS") or "").strip()
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+        return {str(k): max(1, int(v)) for k, v in parsed.items()}
+    except Exception:
+        logger.warning("Invalid RATE_LIMIT_TENANT_LIMITS, ignoring: %r", raw)
+        return {}
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        redis_url: str | None = None,
+        limit_per_minute: int = 120,
+        route_limits: dict[str, tuple[int, int]] | None = None,
+        tenant_limits: dict[str, int] | None = None,
+        local_share: float | None = None,
+        limiter: TokenBucketLimiter | None = None,
+    ):
+        self.app = app
         self.limit = max(1, int(limit_per_minute))
         self.redis_url = redis_url or os.getenv("REDIS_URL")
         self.redis = None
+        self.default_rule = LimitRule(self.limit, 60)
+        # Prefijos más largos primero para que gane el más específico
+        self.route_rules = sorted(
+            ((prefix, LimitRule(*rule)) for prefix, rule in (route_limits or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.tenant_rules = {
+            tid: LimitRule(limit, 60)
+            for tid, limit in (
+                tenant_limits if tenant_limits is not None else _tenant_limits_from_env()
+            ).items()
+        }
+        if local_share is None:
+            local_share = float(os.getenv("RATE_LIMIT_LOCAL_SHARE", "0.1"))
+        self.local_share = local_share
+        self.limiter = limiter
 
     async def _get_redis(self):
         if self.redis is None and self.redis_url and aioredis is not None:
             self.redis = aioredis.from_url(self.redis_url, encoding="utf-8", decode_responses=True)
         return self.redis
 
-    async def dispatch(self, request: Request, call_next):
-        # Skip health
-        if request.url.path in ("/health", "/healthz", "/"):
-            return await call_next(request)
+    async def _get_limiter(self) -> TokenBucketLimiter | None:
+        if self.limiter is None:
+            r = await self._get_redis()
+            if r is None:
+                return None
+            self.limiter = TokenBucketLimiter(
+                RedisBucketBackend(r, prefix="rl:"), local_share=self.local_share
+            )
+        return self.limiter
 
-        # Skip admin config/catalog endpoints in dev to avoid throttling the Admin UI bootstrap
-        try:
-            path = request.url.path or ""
-            if path.startswith("/api/v1/admin/config"):
-                return await call_next(request)
-        except Exception:
-            pass
+    def _resolve(self, path: str, ident: str, tenant_id: str | None) -> tuple[str, LimitRule]:
+        for prefix, rule in self.route_rules:
+            if path.startswith(prefix):
+                return f"{ident}:{prefix}", rule
+        if tenant_id and tenant_id in self.tenant_rules:
+            return ident, self.tenant_rules[tenant_id]
+        return ident, self.default_rule
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Exempt large-file chunked upload endpoints from generic rate limiting
-        # to allow many small requests during a single file upload.
+        path = scope.get("path") or ""
+        if path in _EXEMPT_PATHS or path.startswith(_EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        result = None
         try:
-            path = request.url.path or ""
-            if path.startswith(
-                ("/api/v1/imports/uploads/chunk", "/api/v1/tenant/imports/uploads/chunk")
-            ):
-                return await call_next(request)
+            limiter = await self._get_limiter()
         except Exception:
-            pass
-
+            limiter = None
         # If no Redis, allow
-        r = await self._get_redis()
-        if r is None:
-            return await call_next(request)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
 
         try:
             # Build key: prefer user_id, fallback tenant_id, then IP
-            user_id = None
-            tenant_id = None
-            claims = getattr(request.state, "access_claims", None) or {}
-            if isinstance(claims, dict):
-                user_id = claims.get("user_id")
-                tenant_id = claims.get("tenant_id")
-            ident = user_id or tenant_id or (request.client.host if request.client else "anon")
-            bucket = int(time.time() // 60)  # per-minute window
-            key = f"rl:{ident}:{bucket}"
-            ttl = 120  # seconds (1m window + slack)
-            # Increment and set TTL atomically via pipeline
-            async with r.pipeline(transaction=True) as pipe:
-                pipe.incr(key)
-                pipe.expire(key, ttl)
-                count, _ = await pipe.execute()
-            if int(count) > self.limit:
-                return JSONResponse({"detail": "rate_limit_exceeded"}, status_code=429)
+            ctx = request_context_from_scope(scope)
+            claims = ctx.claims or {}
+            tenant_id = claims.get("tenant_id")
+            tenant_id = str(tenant_id) if tenant_id else None
+            ident = str(claims.get("user_id") or tenant_id or ctx.client_host or "anon")
+            key, rule = self._resolve(path, ident, tenant_id)
+            result = await limiter.hit(key, rule)
         except Exception:
             # Fail-open on limiter errors
-            return await call_next(request)
+            pass
+
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = rate_limit_headers(result)
+        if not result.allowed:
+            response = JSONResponse(
+                {"detail": "rate_limit_exceeded"}, status_code=429, headers=headers
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                mutable = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    mutable.setdefault(name, value)
+            await send(message)
 
-        return await call_next(request)
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,129 @@
+"""Contexto de request compartido por el stack de middlewares ASGI.
+
+`RequestContextMiddleware` se monta por fuera de los limitadores y del resto
+de middlewares propios y parsea **una sola vez** lo que todos necesitan:
+request id, IP, cookies y token de acceso (header ``Authorization`` o cookie
+``access_token``). El token se decodifica de forma perezosa y el resultado
+(claims o excepción) queda cacheado, así `RateLimitMiddleware`,
+`RequestLogMiddleware` y `with_access_claims` no vuelven a validar el JWT.
+
+El contexto vive en ``scope["state"]["request_context"]``, es decir, también
+es accesible como ``request.state.request_context`` desde los endpoints.
+Los middlewares que lo consumen usan `request_context_from_scope`, que lo
+construye al vuelo si la app no monta `RequestContextMiddleware` (tests).
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+STATE_KEY = "request_context"
+
+
+class RequestContext:
+    """Datos de la request parseados una vez y compartidos entre middlewares."""
+
+    __slots__ = (
+        "headers",
+        "request_id",
+        "client_host",
+        "_cookies",
+        "_token",
+        "_token_read",
+        "_claims",
+        "_error",
+        "_decoded",
+    )
+
+    def __init__(self, scope: Scope) -> None:
+        self.headers = Headers(scope=scope)
+        self.request_id: str = self.headers.get("x-request-id") or uuid.uuid4().hex
+        client = scope.get("client")
+        self.client_host: str | None = client[0] if client else None
+        self._cookies: dict[str, str] | None = None
+        self._token: str | None = None
+        self._token_read = False
+        self._claims: dict[str, Any] | None = None
+        self._error: Exception | None = None
+        self._decoded = False
+
+    @property
+    def cookies(self) -> dict[str, str]:
+        if self._cookies is None:
+            self._cookies = cookie_parser(self.headers.get("cookie", ""))
+        return self._cookies
+
+    @property
+    def access_token(self) -> str | None:
+        """Bearer del header o, en su defecto, cookie ``access_token``."""
+        if not self._token_read:
+            self._token_read = True
+            auth = self.headers.get("authorization", "")
+            if auth.startswith("Bearer "):
+                self._token = auth.split(" ", 1)[1].strip() or None
+            else:
+                self._token = (self.cookies.get("access_token") or "").strip() or None
+        return self._token
+
+    def decode_access(self, token: str) -> dict[str, Any]:
+        """Decodifica ``token`` como access token (una sola vez por request).
+
+        Si ``token`` es el mismo que el de la request, reutiliza el resultado
+        cacheado; si la validación falló, relanza la misma excepción.
+        """
+        if token != self.access_token:
+            from app.core.jwt_provider import get_token_service
+
+            return get_token_service().decode_and_validate(token, expected_type="access")
+        if not self._decoded:
+            self._decoded = True
+            try:
+                from app.core.jwt_provider import get_token_service
+
+                self._claims = get_token_service().decode_and_validate(
+                    token, expected_type="access"
+                )
+            except Exception as exc:
+                self._error = exc
+        if self._error is not None:
+            raise self._error
+        return self._claims  # type: ignore[return-value]
+
+    @property
+    def claims(self) -> dict[str, Any] | None:
+        """Claims del token de la request, o None si no hay token o no es válido."""
+        token = self.access_token
+        if not token:
+            return None
+        try:
+            claims = self.decode_access(token)
+        except Exception:
+            return None
+        return claims if isinstance(claims, dict) else None
+
+
+def request_context_from_scope(scope: Scope) -> RequestContext:
+    """Devuelve el contexto de la request, creándolo si aún no existe."""
+    state = scope.setdefault("state", {})
+    ctx = state.get(STATE_KEY)
+    if ctx is None:
+        ctx = RequestContext(scope)
+        state[STATE_KEY] = ctx
+    return ctx
+
+
+class RequestContextMiddleware:
+    """Publica un `RequestContext` en el scope antes del resto del stack."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            request_context_from_scope(scope)
+        await self.app(scope, receive, send)
@@ -4,14 +4,13 @@ import json
 import logging
 import os
 import time
-import uuid
 from typing import Any
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.log_context import clear_context, set_request_context, set_tenant_context
+from app.middleware.request_context import request_context_from_scope
 from app.telemetry.metrics import record_request
 
 logger = logging.getLogger("app.request")
@@ -33,36 +32,49 @@ def _json(obj: dict[str, Any]) -> str:
         return str(obj)
 
 
-class RequestLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class RequestLogMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start = time.perf_counter()
-        req_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
-        client_rev = request.headers.get("X-Client-Revision")
-        client_ver = request.headers.get("X-Client-Version")
+        ctx = request_context_from_scope(scope)
+        req_id = ctx.request_id
+        client_rev = ctx.headers.get("X-Client-Revision")
+        client_ver = ctx.headers.get("X-Client-Version")
         tenant_id = None
         user_id = None
+        status_code = 500
         # expone en request.state y propaga en respuesta
-        try:
-            request.state.request_id = req_id
-        except Exception:
-            pass
+        scope["state"]["request_id"] = req_id
         set_request_context(req_id)
 
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("X-Request-ID", req_id)
+                if client_rev:
+                    headers.setdefault("X-Client-Revision", client_rev)
+                if client_ver:
+                    headers.setdefault("X-Client-Version", client_ver)
+            await send(message)
+
         try:
-            resp: Response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception:
             clear_context()
             raise
 
         dur_ms = int((time.perf_counter() - start) * 1000)
-        resp.headers.setdefault("X-Request-ID", req_id)
-        if client_rev:
-            resp.headers.setdefault("X-Client-Revision", client_rev)
-        if client_ver:
-            resp.headers.setdefault("X-Client-Version", client_ver)
 
         try:
-            claims = getattr(request.state, "access_claims", None) or {}
+            claims = scope["state"].get("access_claims") or {}
             if isinstance(claims, dict):
                 tenant_id = claims.get("tenant_id")
                 user_id = claims.get("user_id")
@@ -72,15 +84,16 @@ class RequestLogMiddleware(BaseHTTPMiddleware):
             set_tenant_context(str(tenant_id))
 
         try:
-            record_request(request.method, request.url.path, resp.status_code, dur_ms / 1000)
+            path = scope.get("path", "")
+            record_request(scope["method"], path, status_code, dur_ms / 1000)
 
             log_data: dict[str, Any] = {
                 "req_id": req_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status": resp.status_code,
+                "method": scope["method"],
+                "path": path,
+                "status": status_code,
                 "dur_ms": dur_ms,
-                "ip": request.client.host if request.client else None,
+                "ip": ctx.client_host,
                 "tenant_id": tenant_id,
                 "user_id": user_id,
             }
@@ -89,12 +102,12 @@ class RequestLogMiddleware(BaseHTTPMiddleware):
             if client_ver:
                 log_data["client_ver"] = client_ver
 
-            if resp.status_code < _request_log_min_status():
+            if status_code < _request_log_min_status():
                 pass
-            elif resp.status_code >= 500:
+            elif status_code >= 500:
                 log_data["level"] = "error"
                 logger.error(_json(log_data))
-            elif resp.status_code >= 400:
+            elif status_code >= 400:
                 log_data["level"] = "warning"
                 logger.warning(_json(log_data))
             else:
@@ -105,5 +118,3 @@ class RequestLogMiddleware(BaseHTTPMiddleware):
             pass
         finally:
             clear_context()
-
-        return resp
@@ -1,8 +1,10 @@
 # app/middleware/require_csrf.py
 import os
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middleware.request_context import request_context_from_scope
 
 SAFE = {"GET", "HEAD", "OPTIONS"}
 
@@ -20,48 +22,52 @@ EXEMPT_PATH_SEGMENTS = ("/webhook/",)
 HEADER_NAMES = ("X-CSRF-Token", "X-CSRF")  # acepta ambos
 
 
-class RequireCSRFMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        method = request.method.upper()
-        path = request.url.path
+class RequireCSRFMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._is_allowed(scope):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse({"detail": "CSRF token missing/invalid"}, status_code=403)
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _is_allowed(scope: Scope) -> bool:
+        method = scope["method"].upper()
+        path = scope["path"]
 
         # Bypass bajo pytest (coherente con with_access_claims). Los tests
         # específicos de CSRF pueden forzar la validación con
         # PYTEST_DISABLE_CSRF_BYPASS=1.
         if "PYTEST_CURRENT_TEST" in os.environ and os.getenv("PYTEST_DISABLE_CSRF_BYPASS") != "1":
-            return await call_next(request)
+            return True
 
         # Métodos seguros: no requieren CSRF
         if method in SAFE:
-            return await call_next(request)
+            return True
 
         # Exenciones por sufijo (sirve para /api/v1/admin/auth/login y /api/v1/tenant/auth/login)
         if path.endswith(EXEMPT_SUFFIXES):
-            return await call_next(request)
+            return True
 
         # Webhooks entrantes externos (firma/secret propio, sin cookies de sesión)
         if any(seg in path for seg in EXEMPT_PATH_SEGMENTS) or path.endswith("/webhook"):
-            return await call_next(request)
+            return True
 
         # Lee cookie, session y header
-        cookie = request.cookies.get("csrf_token")
-        session_token = getattr(getattr(request, "state", object()), "session", {}).get("csrf")
+        ctx = request_context_from_scope(scope)
+        cookie = ctx.cookies.get("csrf_token")
+        session_token = (scope["state"].get("session") or {}).get("csrf")
         sent = None
         for hname in HEADER_NAMES:
-            v = request.headers.get(hname)
+            v = ctx.headers.get(hname)
             if v:
                 sent = v
                 break
 
-        ok = False
-        # Coincide con sesión (si existe)
+        # Coincide con sesión (si existe) o con cookie (double-submit)
         if sent and session_token and sent == session_token:
-            ok = True
-        # O coincide con cookie (double-submit)
-        elif sent and cookie and sent == cookie:
-            ok = True
-
-        if not ok:
-            return JSONResponse({"detail": "CSRF token missing/invalid"}, status_code=403)
-
-        return await call_next(request)
+            return True
+        return bool(sent and cookie and sent == cookie)
@@ -1,6 +1,7 @@
 # app/core/security_headers.py
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config.settings import settings
 
@@ -77,30 +78,48 @@ def _csp_for_request(request: Request) -> str:
         )
 
 
-async def security_headers_middleware(request: Request, call_next):
-    resp: Response = await call_next(request)
+_HTML_MEDIA_TYPES = ("text/html", "application/xhtml+xml")
 
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _apply_security_headers(MutableHeaders(scope=message), scope)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _apply_security_headers(headers: MutableHeaders, scope: Scope) -> None:
     # X-Frame-Options: mantenlo por compat (CSP frame-ancestors manda)
-    resp.headers["X-Frame-Options"] = "SAMEORIGIN" if settings.ALLOW_EMBED else "DENY"
-    resp.headers["X-Content-Type-Options"] = "nosniff"
-    resp.headers["Referrer-Policy"] = settings.REFERRER_POLICY
-    resp.headers["Content-Security-Policy"] = _csp_for_request(request)
+    headers["X-Frame-Options"] = "SAMEORIGIN" if settings.ALLOW_EMBED else "DENY"
+    headers["X-Content-Type-Options"] = "nosniff"
+    headers["Referrer-Policy"] = settings.REFERRER_POLICY
+    headers["Content-Security-Policy"] = _csp_for_request(Request(scope))
 
     # HSTS solo prod + https
-    if settings.ENV == "production" and settings.HSTS_ENABLED and request.url.scheme == "https":
-        resp.headers["Strict-Transport-Security"] = "max-age=15552000; includeSubDomains; preload"
+    if settings.ENV == "production" and settings.HSTS_ENABLED and scope.get("scheme") == "https":
+        headers["Strict-Transport-Security"] = "max-age=15552000; includeSubDomains; preload"
 
     # Opcionales según settings
     if settings.COOP_ENABLED:
-        resp.headers["Cross-Origin-Opener-Policy"] = "same-origin"
+        headers["Cross-Origin-Opener-Policy"] = "same-origin"
     if settings.COEP_ENABLED:
-        resp.headers["Cross-Origin-Embedder-Policy"] = "require-corp"
+        headers["Cross-Origin-Embedder-Policy"] = "require-corp"
     if settings.CORP_POLICY:
-        resp.headers["Cross-Origin-Resource-Policy"] = settings.CORP_POLICY
+        headers["Cross-Origin-Resource-Policy"] = settings.CORP_POLICY
 
     # Evita cache agresiva en HTML dinámico
-    if resp.media_type in ("text/html", "application/xhtml+xml"):
-        resp.headers.setdefault("Cache-Control", "no-store")
+    media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if media_type in _HTML_MEDIA_TYPES:
+        headers.setdefault("Cache-Control", "no-store")
 
-    resp.headers["Permissions-Policy"] = settings.PERMISSIONS_POLICY
-    return resp
+    headers["Permissions-Policy"] = settings.PERMISSIONS_POLICY
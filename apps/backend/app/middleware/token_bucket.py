@@ -0,0 +1,202 @@
+"""Token bucket compartido por los limitadores HTTP.
+
+El estado de cada bucket vive en Redis (hash ``tokens``/``ts``) y se actualiza
+con **un único script Lua** (lectura, recarga, consumo y expiración atómicos,
+con el reloj del servidor Redis para que todos los procesos compartan reloj).
+Frente a la ventana fija anterior (``INCR``+``EXPIRE`` por minuto) no permite
+ráfagas 2× en el borde de la ventana: la recarga es continua.
+
+Pre-check local (opcional, ``local_share > 0``): cada proceso guarda la última
+lectura del bucket y admite peticiones sin ir a Redis mientras su estimación
+quede holgadamente por encima del umbral ``sync_threshold``. Lo consumido en
+local se acumula como deuda y se cobra en la siguiente sincronización, que
+ocurre al agotar el presupuesto local o al acercarse al límite. El exceso
+máximo entre sincronizaciones es ``procesos × local_share × capacidad``; los
+limitadores de endpoints críticos (login, reset) usan ``local_share=0``.
+
+`MemoryBucketBackend` implementa la misma aritmética en Python (tests y
+benchmark sin Redis).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+TOKEN_BUCKET_LUA = """
+if redis.replicate_commands then redis.replicate_commands() end
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = math.max(0, tokens - debt)
+local allowed = 0
+local retry_ms = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_ms = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return {allowed, tostring(tokens), retry_ms}
+"""
+
+
+class LimitRule(NamedTuple):
+    """``max_requests`` por ``window_seconds``: capacidad y ritmo de recarga del bucket."""
+
+    max_requests: int
+    window_seconds: int
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.max_requests / (self.window_seconds * 1000.0)
+
+
+class BucketResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: int  # segundos (0 si allowed)
+    limit: int
+    window: int
+
+
+def _result(rule: LimitRule, allowed: bool, tokens: float, retry_ms: float) -> BucketResult:
+    return BucketResult(
+        allowed=bool(allowed),
+        remaining=max(0, int(math.floor(tokens))),
+        retry_after=0 if allowed else max(1, int(math.ceil(retry_ms / 1000.0))),
+        limit=rule.max_requests,
+        window=rule.window_seconds,
+    )
+
+
+class RedisBucketBackend:
+    """Ejecuta el script Lua (EVALSHA con fallback a EVAL vía ``register_script``)."""
+
+    def __init__(self, redis: Any, prefix: str = "tb:") -> None:
+        self._redis = redis
+        self._script = redis.register_script(TOKEN_BUCKET_LUA)
+        self.prefix = prefix
+        self.calls = 0
+
+    async def take(self, key: str, rule: LimitRule, *, debt: int = 0) -> BucketResult:
+        self.calls += 1
+        allowed, tokens, retry_ms = await self._script(
+            keys=[f"{self.prefix}{key}"],
+            args=[rule.max_requests, repr(rule.rate_per_ms), int(debt), 1],
+        )
+        return _result(rule, int(allowed) == 1, float(tokens), float(retry_ms))
+
+
+class MemoryBucketBackend:
+    """Misma aritmética que el script Lua, en memoria del proceso."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._state: dict[str, tuple[float, float]] = {}
+        self.calls = 0
+
+    async def take(self, key: str, rule: LimitRule, *, debt: int = 0) -> BucketResult:
+        self.calls += 1
+        now = self._clock() * 1000.0
+        rate = rule.rate_per_ms
+        tokens, ts = self._state.get(key, (float(rule.max_requests), now))
+        tokens = min(float(rule.max_requests), tokens + max(0.0, now - ts) * rate)
+        tokens = max(0.0, tokens - debt)
+        retry_ms = 0.0
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            retry_ms = math.ceil((1 - tokens) / rate)
+        self._state[key] = (tokens, now)
+        return _result(rule, allowed, tokens, retry_ms)
+
+
+class _LocalView:
+    __slots__ = ("tokens", "synced_at", "pending")
+
+    def __init__(self, tokens: float, synced_at: float) -> None:
+        self.tokens = tokens
+        self.synced_at = synced_at
+        self.pending = 0
+
+
+class TokenBucketLimiter:
+    """Token bucket distribuido con pre-check local aproximado."""
+
+    def __init__(
+        self,
+        backend: RedisBucketBackend | MemoryBucketBackend,
+        *,
+        local_share: float = 0.1,
+        sync_threshold: float = 0.5,
+        max_local_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.backend = backend
+        self.local_share = max(0.0, min(1.0, float(local_share)))
+        self.sync_threshold = max(0.0, min(1.0, float(sync_threshold)))
+        self._max_local_keys = max(1, int(max_local_keys))
+        self._clock = clock
+        self._local: OrderedDict[str, _LocalView] = OrderedDict()
+        self.local_hits = 0
+
+    def _local_budget(self, rule: LimitRule) -> int:
+        return int(rule.max_requests * self.local_share)
+
+    def _try_local(self, key: str, rule: LimitRule) -> BucketResult | None:
+        budget = self._local_budget(rule)
+        view = self._local.get(key)
+        if budget < 1 or view is None or view.pending >= budget:
+            return None
+        elapsed_ms = (self._clock() - view.synced_at) * 1000.0
+        estimate = min(rule.max_requests, view.tokens + elapsed_ms * rule.rate_per_ms)
+        estimate -= view.pending + 1
+        if estimate < rule.max_requests * self.sync_threshold:
+            return None
+        view.pending += 1
+        self._local.move_to_end(key)
+        self.local_hits += 1
+        return _result(rule, True, estimate, 0)
+
+    async def hit(self, key: str, rule: LimitRule) -> BucketResult:
+        local = self._try_local(key, rule)
+        if local is not None:
+            return local
+
+        view = self._local.pop(key, None)
+        debt = view.pending if view is not None else 0
+        result = await self.backend.take(key, rule, debt=debt)
+        if self._local_budget(rule) >= 1:
+            self._local[key] = _LocalView(float(result.remaining), self._clock())
+            while len(self._local) > self._max_local_keys:
+                self._local.popitem(last=False)
+        return result
+
+
+def rate_limit_headers(result: BucketResult) -> dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Window": str(result.window),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(result.retry_after)
+    return headers
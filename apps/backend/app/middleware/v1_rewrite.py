@@ -0,0 +1,21 @@
+# app/middleware/v1_rewrite.py
+"""COMPAT (retirable): reescribe /v1 → /api/v1 antes del router."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class V1PathRewriteMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path = scope.get("path", "")
+            if path == "/v1" or path.startswith("/v1/"):
+                scope["path"] = "/api" + path
+                raw_path = scope.get("raw_path")
+                if isinstance(raw_path, (bytes, bytearray)) and raw_path.startswith(b"/v1"):
+                    scope["raw_path"] = b"/api" + raw_path
+                elif isinstance(raw_path, str) and raw_path.startswith("/v1"):
+                    scope["raw_path"] = "/api" + raw_path
+        await self.app(scope, receive, send)
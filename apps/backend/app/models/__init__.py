@@ -2,6 +2,7 @@
 
 # Core models
 # Sistema IA + Incidencias + Alertas
+from app.models.accounting.balance_snapshot import AccountPeriodBalance
 from app.models.accounting.period import AccountingPeriod
 from app.models.accounting.pos_settings import PaymentMethod, TenantAccountingSettings
 from app.models.ai import Incident, NotificationChannel, NotificationLog, StockAlert
@@ -70,7 +71,7 @@ from app.models.core.ui_config import (
 from app.models.expenses import Expense, ExpenseCategory
 from app.models.finance import BankMovement, CashClosing, CashMovement, Payment
 from app.models.hr import Employee, TimeEntry, VacationRequest
-from app.models.hr.payroll import Payroll, PayrollDetail, PayrollTax
+from app.models.hr.payroll import Payroll, PayrollDetail, PayrollRun, PayrollTax
 from app.models.imports import ImportColumnMapping
 
 # Inventory
@@ -91,7 +92,7 @@ from app.models.printing.printer_label_configuration import PrinterLabelConfigur
 from app.models.production import DailyProductionLog, ProductionOrder, ProductionOrderLine
 from app.models.purchases import Purchase, PurchaseLine
 from app.models.quotes import Quote, QuoteStatus
-from app.models.recipes import Recipe, RecipeIngredient
+from app.models.recipes import ProductPackInfo, Recipe, RecipeIngredient
 from app.models.sales.delivery import Delivery
 from app.models.sales.order import SalesOrder, SalesOrderItem
 from app.models.security.auth_audit import AuthAudit
@@ -120,6 +121,7 @@ __all__ = [
     "Product",
     "Recipe",
     "RecipeIngredient",
+    "ProductPackInfo",
     "ProductCategory",
     "CountryIdType",
     "CountryTaxCode",
@@ -187,6 +189,7 @@ __all__ = [
     "TenantAccountingSettings",
     "PaymentMethod",
     "AccountingPeriod",
+    "AccountPeriodBalance",
     # IA & Notificaciones
     "Incident",
     "StockAlert",
@@ -202,6 +205,7 @@ __all__ = [
     "Payroll",
     "PayrollDetail",
     "PayrollTax",
+    "PayrollRun",
     # Production
     "ProductionOrder",
     "ProductionOrderLine",
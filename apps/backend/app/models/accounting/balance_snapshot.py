@@ -0,0 +1,55 @@
+"""
+AccountPeriodBalance — totales mensuales por cuenta congelados al cerrar período.
+
+Al cerrar un período (`close_period`) se guardan los débitos/créditos POSTED de
+cada cuenta en ese mes. Como un período CLOSED no admite asientos nuevos ni
+cancelaciones, los reportes suman estas filas en vez de releer las líneas de
+meses cerrados. Reabrir el período borra su snapshot.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import TIMESTAMP, ForeignKey, Integer, Numeric, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config.database import Base, schema_column, schema_table_args
+
+
+class AccountPeriodBalance(Base):
+    """Movimiento (debe/haber) de una cuenta en un mes cerrado."""
+
+    __tablename__ = "account_period_balances"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "account_id", "year", "month", name="uq_account_period_balances"
+        ),
+        schema_table_args(),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    account_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey(schema_column("chart_of_accounts"), ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    month: Mapped[int] = mapped_column(Integer, nullable=False)
+    debit: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    credit: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    frozen_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
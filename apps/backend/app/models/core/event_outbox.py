@@ -32,6 +32,8 @@ class EventOutbox(Base):
     retry_count = mapped_column(Integer, default=0)
     last_error = mapped_column(Text, nullable=True)
     scheduled_at = mapped_column(DateTime(timezone=True), nullable=True)
+    # Siguiente reintento tras un fallo (backoff exponencial en EventService)
+    next_attempt_at = mapped_column(DateTime(timezone=True), nullable=True)
 
     __table_args__ = (
         Index(
@@ -41,4 +43,16 @@ class EventOutbox(Base):
         ),
         Index("ix_event_outbox_tenant_event_type", "tenant_id", "event_type"),
         Index("ix_event_outbox_created_at", "created_at"),
+        # Reclamo FOR UPDATE SKIP LOCKED: pendientes por antigüedad, global y por lane
+        Index(
+            "ix_event_outbox_pending_created",
+            "created_at",
+            postgresql_where=text("published_at IS NULL"),
+        ),
+        Index(
+            "ix_event_outbox_pending_type_created",
+            "event_type",
+            "created_at",
+            postgresql_where=text("published_at IS NULL"),
+        ),
     )
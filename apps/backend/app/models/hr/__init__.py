@@ -10,7 +10,7 @@ Incluye:
 
 from .attendance import TimeEntry, VacationRequest
 from .employee import Employee, EmployeeDeduction, EmployeeSalary
-from .payroll import Payroll, PayrollDetail, PayrollTax
+from .payroll import Payroll, PayrollDetail, PayrollRun, PayrollTax
 from .payslip import PaymentSlip
 
 __all__ = [
@@ -22,5 +22,6 @@ __all__ = [
     "Payroll",
     "PayrollDetail",
     "PayrollTax",
+    "PayrollRun",
     "PaymentSlip",
 ]
@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from sqlalchemy import TIMESTAMP, Date
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import ForeignKey, Integer, Numeric, String, Text, Uuid, func
+from sqlalchemy import ForeignKey, Index, Integer, Numeric, String, Text, Uuid, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.config.database import Base, schema_column, schema_table_args
@@ -249,3 +249,57 @@ class PayrollTax(Base):
 
     # Relations
     payroll: Mapped["Payroll"] = relationship("Payroll", back_populates="taxes", lazy="select")
+
+
+class PayrollRun(Base):
+    """
+    Ejecución en segundo plano de la generación de una nómina.
+
+    Attributes:
+        status: pending, running, done, failed
+        processed / total: empleados procesados sobre el total (progreso)
+        payroll_id: nómina generada (al terminar)
+    """
+
+    __tablename__ = "payroll_runs"
+    __table_args__ = (
+        # Una sola ejecución activa por mes y tenant
+        Index(
+            "uq_payroll_runs_tenant_month_active",
+            "tenant_id",
+            "payroll_month",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')"),
+        ),
+        schema_table_args(),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(MODULE_UUID, primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(
+        TENANT_UUID,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    payroll_month: Mapped[str] = mapped_column(String(7), nullable=False)
+    payroll_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    payroll_id: Mapped[uuid.UUID | None] = mapped_column(
+        MODULE_UUID,
+        ForeignKey(schema_column("payrolls"), ondelete="SET NULL"),
+        nullable=True,
+    )
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[uuid.UUID | None] = mapped_column(MODULE_UUID, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=lambda: datetime.now(UTC),
+    )
@@ -3,7 +3,7 @@
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import ForeignKey, Numeric, String, Text
+from sqlalchemy import ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,7 +18,16 @@ class POSReceipt(BaseTransactionalModel):
     """POS sales receipt"""
 
     __tablename__ = "pos_receipts"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "uq_pos_receipts_tenant_register_number",
+            "tenant_id",
+            "register_id",
+            "number",
+            unique=True,
+        ),
+        {"extend_existing": True},
+    )
     register_id: Mapped[uuid.UUID] = mapped_column(
         TENANT_UUID, ForeignKey("pos_registers.id"), nullable=False, index=True
     )
@@ -56,6 +65,9 @@ class POSReceipt(BaseTransactionalModel):
     tax_total: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
     currency: Mapped[str] = mapped_column(String(3), nullable=False)
     paid_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Factura/venta complementarias: pending | done | failed (NULL si no aplica)
+    documents_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    documents_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(nullable=False, default=lambda: datetime.now(UTC))
 
     # Relationships
@@ -2,6 +2,7 @@
 SQLAlchemy Models - Recipe System
 """
 
+from uuid import UUID as PyUUID
 from uuid import uuid4
 
 from sqlalchemy import (
@@ -15,13 +16,19 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    delete,
+    event,
+    insert,
+    inspect,
+    select,
     text,
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.sql import func
 
 from app.config.database import Base as BaseModel
+from app.models.base import TENANT_UUID
 
 
 class Recipe(BaseModel):
@@ -179,3 +186,92 @@ class RecipeIngredient(BaseModel):
 
     def __repr__(self):
         return f"<RecipeIngredient {self.qty} {self.unit}>"
+
+
+class ProductPackInfo(BaseModel):
+    """
+    Presentación de compra por producto, derivada de recipe_ingredients.
+
+    Un producto puede aparecer en varias recetas; se guarda el MAX de cada campo
+    (la mayoría aparece en ≤1). Se recalcula al hacer flush de ingredientes para
+    que el listado de stock no agregue recipe_ingredients en cada llamada.
+    """
+
+    __tablename__ = "product_pack_info"
+
+    # Mismo tipo que products.id / stock_items.product_id (String(36) en SQLite)
+    product_id = Column(
+        TENANT_UUID,
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tenant_id = Column(
+        TENANT_UUID,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    pack_size = Column(Numeric(12, 4))
+    pack_label = Column(String(100))
+    pack_unit = Column(String(10))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = ({"extend_existing": True},)
+
+
+_PACK_DIRTY_KEY = "product_pack_info_dirty"
+
+
+def refresh_product_pack_info(connection, product_ids) -> None:
+    """Recalcula ``product_pack_info`` de los productos indicados."""
+    ids = list({PyUUID(str(pid)) for pid in product_ids if pid is not None})
+    if not ids:
+        return
+    rows = connection.execute(
+        select(
+            RecipeIngredient.product_id,
+            Recipe.tenant_id,
+            func.max(RecipeIngredient.qty_per_package),
+            func.max(RecipeIngredient.purchase_packaging),
+            func.max(RecipeIngredient.package_unit),
+        )
+        .join(Recipe, Recipe.id == RecipeIngredient.recipe_id)
+        .where(RecipeIngredient.product_id.in_(ids), RecipeIngredient.qty_per_package > 0)
+        .group_by(RecipeIngredient.product_id, Recipe.tenant_id)
+    ).all()
+    connection.execute(delete(ProductPackInfo).where(ProductPackInfo.product_id.in_(ids)))
+    if rows:
+        connection.execute(
+            insert(ProductPackInfo),
+            [
+                {
+                    "product_id": PyUUID(str(product_id)),
+                    "tenant_id": PyUUID(str(tenant_id)),
+                    "pack_size": pack_size,
+                    "pack_label": pack_label,
+                    "pack_unit": pack_unit,
+                }
+                for product_id, tenant_id, pack_size, pack_label, pack_unit in rows
+            ],
+        )
+
+
+def _mark_pack_info_dirty(_mapper, _connection, target: RecipeIngredient) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        return
+    dirty = session.info.setdefault(_PACK_DIRTY_KEY, set())
+    dirty.add(target.product_id)
+    # Si cambió el producto del ingrediente, el anterior también pierde la fila
+    dirty.update(inspect(target).attrs.product_id.history.deleted or ())
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(RecipeIngredient, _event_name, _mark_pack_info_dirty)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_dirty_pack_info(session: Session, _flush_context) -> None:
+    dirty = session.info.pop(_PACK_DIRTY_KEY, None)
+    if dirty:
+        refresh_product_pack_info(session.connection(), dirty)
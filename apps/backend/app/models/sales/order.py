@@ -33,6 +33,10 @@ class SalesOrder(BaseTransactionalModel):
     deposit_amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
     deposit_paid: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     payment_method: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    # Set once the order's lines are folded into the profit snapshots.
+    profit_snapshot_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
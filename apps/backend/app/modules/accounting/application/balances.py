@@ -0,0 +1,286 @@
+"""Saldos de cuentas: mantenimiento incremental y snapshots por período.
+
+- `apply_entry_to_balances`: suma/resta las líneas de un asiento a los saldos
+  acumulados de `chart_of_accounts` con un ``UPDATE col = col + delta`` por
+  cuenta, dentro de la transacción del caller (sin releer el histórico).
+- `freeze_period` / `unfreeze_period`: al cerrar un mes se guardan sus totales
+  por cuenta en `account_period_balances`; al reabrirlo se borran.
+- `account_totals`: débito/crédito por cuenta en un rango, combinando los
+  snapshots de los meses CLOSED contiguos desde el inicio del rango con las
+  líneas del resto (período abierto).
+- `rebuild_account_balances`: recalcula todo desde las líneas (verificación de
+  consistencia; ver ``scripts/rebuild_account_balances.py``).
+"""
+
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.accounting.balance_snapshot import AccountPeriodBalance
+from app.models.accounting.chart_of_accounts import ChartOfAccounts, JournalEntry, JournalEntryLine
+from app.models.accounting.period import AccountingPeriod
+
+ZERO = Decimal("0")
+
+Totals = dict[UUID, tuple[Decimal, Decimal]]
+
+
+def _dec(v: Any) -> Decimal:
+    if v is None:
+        return ZERO
+    return v if isinstance(v, Decimal) else Decimal(str(v))
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _next_month(year: int, month: int) -> tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+# ---------------------------------------------------------------------------
+# Saldos acumulados (incremental)
+# ---------------------------------------------------------------------------
+
+
+def apply_entry_to_balances(db: Session, lines: Iterable[Any], *, sign: int = 1) -> None:
+    """Aplica (``sign=1``) o revierte (``sign=-1``) las líneas de un asiento POSTED.
+
+    ``lines`` son objetos con ``account_id``, ``debit`` y ``credit``
+    (`JournalEntryLine` o `JournalLineIn`).
+    """
+    deltas: dict[UUID, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    for line in lines:
+        acc = deltas[line.account_id]
+        acc[0] += _dec(line.debit) * sign
+        acc[1] += _dec(line.credit) * sign
+
+    for account_id, (d, c) in deltas.items():
+        if not d and not c:
+            continue
+        db.execute(
+            update(ChartOfAccounts)
+            .where(ChartOfAccounts.id == account_id)
+            .values(
+                debit_balance=ChartOfAccounts.debit_balance + d,
+                credit_balance=ChartOfAccounts.credit_balance + c,
+                balance=ChartOfAccounts.debit_balance + d - (ChartOfAccounts.credit_balance + c),
+            )
+        )
+
+
+# ---------------------------------------------------------------------------
+# Snapshots por período
+# ---------------------------------------------------------------------------
+
+
+def _line_totals_stmt(tenant_id: UUID):
+    return (
+        select(
+            JournalEntryLine.account_id,
+            func.coalesce(func.sum(JournalEntryLine.debit), ZERO),
+            func.coalesce(func.sum(JournalEntryLine.credit), ZERO),
+        )
+        .join(JournalEntry, JournalEntry.id == JournalEntryLine.entry_id)
+        .where(JournalEntry.tenant_id == tenant_id)
+        .group_by(JournalEntryLine.account_id)
+    )
+
+
+def freeze_period(db: Session, tenant_id: UUID, year: int, month: int) -> int:
+    """Guarda los totales POSTED del mes por cuenta. Devuelve nº de cuentas."""
+    unfreeze_period(db, tenant_id, year, month)
+    stmt = _line_totals_stmt(tenant_id).where(
+        JournalEntry.status == "POSTED",
+        JournalEntry.date >= date(year, month, 1),
+        JournalEntry.date <= _month_end(year, month),
+    )
+    rows = db.execute(stmt).all()
+    for account_id, debit, credit in rows:
+        db.add(
+            AccountPeriodBalance(
+                tenant_id=tenant_id,
+                account_id=account_id,
+                year=year,
+                month=month,
+                debit=_dec(debit),
+                credit=_dec(credit),
+            )
+        )
+    db.flush()
+    return len(rows)
+
+
+def unfreeze_period(db: Session, tenant_id: UUID, year: int, month: int) -> None:
+    db.execute(
+        delete(AccountPeriodBalance).where(
+            AccountPeriodBalance.tenant_id == tenant_id,
+            AccountPeriodBalance.year == year,
+            AccountPeriodBalance.month == month,
+        )
+    )
+
+
+def _closed_months(db: Session, tenant_id: UUID) -> set[tuple[int, int]]:
+    rows = db.execute(
+        select(AccountingPeriod.year, AccountingPeriod.month).where(
+            AccountingPeriod.tenant_id == tenant_id,
+            AccountingPeriod.status == "CLOSED",
+        )
+    ).all()
+    return {(int(y), int(m)) for y, m in rows}
+
+
+def _covered_until(
+    closed: set[tuple[int, int]], start: date, date_to: date
+) -> tuple[tuple[int, int], date] | None:
+    """Meses CLOSED contiguos desde ``start`` (día 1) sin pasar de ``date_to``."""
+    if start.day != 1:
+        return None
+    ym = (start.year, start.month)
+    first, last_end = ym, None
+    while ym in closed and _month_end(*ym) <= date_to:
+        last_end = _month_end(*ym)
+        ym = _next_month(*ym)
+    return (first, last_end) if last_end is not None else None
+
+
+def account_totals(
+    db: Session,
+    tenant_id: UUID,
+    *,
+    date_to: date,
+    date_from: date | None = None,
+    account_types: Iterable[str] | None = None,
+    account_ids: Iterable[UUID] | None = None,
+    include_draft: bool = False,
+) -> Totals:
+    """Débito/crédito por cuenta de los asientos POSTED en ``[date_from, date_to]``.
+
+    ``date_from=None`` acumula desde el primer asiento (balance, saldo inicial).
+    Con ``include_draft`` se suman además las líneas DRAFT del rango.
+    """
+    account_filter = []
+    if account_types is not None:
+        account_filter.append(ChartOfAccounts.type.in_(list(account_types)))
+    if account_ids is not None:
+        account_filter.append(ChartOfAccounts.id.in_(list(account_ids)))
+
+    start = date_from
+    if start is None:
+        start = db.execute(
+            select(func.min(JournalEntry.date)).where(
+                JournalEntry.tenant_id == tenant_id, JournalEntry.status == "POSTED"
+            )
+        ).scalar()
+        if start is None and not include_draft:
+            return {}
+        start = start.replace(day=1) if start is not None else None
+
+    totals: dict[UUID, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    lines_from = start
+    covered = _covered_until(_closed_months(db, tenant_id), start, date_to) if start else None
+    if covered is not None:
+        (y0, m0), covered_end = covered
+        period_key = AccountPeriodBalance.year * 100 + AccountPeriodBalance.month
+        snap_stmt = (
+            select(
+                AccountPeriodBalance.account_id,
+                func.sum(AccountPeriodBalance.debit),
+                func.sum(AccountPeriodBalance.credit),
+            )
+            .join(ChartOfAccounts, ChartOfAccounts.id == AccountPeriodBalance.account_id)
+            .where(
+                AccountPeriodBalance.tenant_id == tenant_id,
+                period_key >= y0 * 100 + m0,
+                period_key <= covered_end.year * 100 + covered_end.month,
+                *account_filter,
+            )
+            .group_by(AccountPeriodBalance.account_id)
+        )
+        for account_id, d, c in db.execute(snap_stmt).all():
+            totals[account_id][0] += _dec(d)
+            totals[account_id][1] += _dec(c)
+        lines_from = covered_end + timedelta(days=1)
+
+    posted = [JournalEntry.status == "POSTED", JournalEntry.date <= date_to]
+    if lines_from is not None:
+        posted.append(JournalEntry.date >= lines_from)
+    status_filter = and_(*posted)
+    if include_draft:
+        draft = [JournalEntry.status == "DRAFT", JournalEntry.date <= date_to]
+        if date_from is not None:
+            draft.append(JournalEntry.date >= date_from)
+        status_filter = or_(status_filter, and_(*draft))
+
+    lines_stmt = (
+        _line_totals_stmt(tenant_id)
+        .join(ChartOfAccounts, ChartOfAccounts.id == JournalEntryLine.account_id)
+        .where(status_filter, *account_filter)
+    )
+    for account_id, d, c in db.execute(lines_stmt).all():
+        totals[account_id][0] += _dec(d)
+        totals[account_id][1] += _dec(c)
+
+    return {k: (v[0], v[1]) for k, v in totals.items()}
+
+
+# ---------------------------------------------------------------------------
+# Verificación / reconstrucción
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class BalanceMismatch:
+    account_id: UUID
+    code: str
+    stored: tuple[Decimal, Decimal]
+    expected: tuple[Decimal, Decimal]
+
+
+def rebuild_account_balances(
+    db: Session, tenant_id: UUID, *, fix: bool = False
+) -> tuple[list[BalanceMismatch], int]:
+    """Compara los saldos guardados con la suma de las líneas POSTED.
+
+    Con ``fix=True`` reescribe los saldos divergentes y regenera los snapshots
+    de todos los períodos CLOSED. Devuelve ``(mismatches, snapshots_regenerados)``.
+    """
+    expected: Totals = {
+        account_id: (_dec(d), _dec(c))
+        for account_id, d, c in db.execute(
+            _line_totals_stmt(tenant_id).where(JournalEntry.status == "POSTED")
+        ).all()
+    }
+    accounts = db.execute(
+        select(ChartOfAccounts).where(ChartOfAccounts.tenant_id == tenant_id)
+    ).scalars()
+
+    mismatches: list[BalanceMismatch] = []
+    for acct in accounts:
+        stored = (_dec(acct.debit_balance), _dec(acct.credit_balance))
+        want = expected.get(acct.id, (ZERO, ZERO))
+        if stored != want or _dec(acct.balance) != want[0] - want[1]:
+            mismatches.append(BalanceMismatch(acct.id, acct.code, stored, want))
+            if fix:
+                acct.debit_balance, acct.credit_balance = want
+                acct.balance = want[0] - want[1]
+
+    regenerated = 0
+    if fix:
+        for year, month in sorted(_closed_months(db, tenant_id)):
+            freeze_period(db, tenant_id, year, month)
+            regenerated += 1
+        db.flush()
+    return mismatches, regenerated
@@ -10,8 +10,9 @@ from sqlalchemy import select, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.models.accounting.chart_of_accounts import ChartOfAccounts, JournalEntry, JournalEntryLine
+from app.models.accounting.chart_of_accounts import JournalEntry, JournalEntryLine
 from app.models.accounting.period import AccountingPeriod
+from app.modules.accounting.application.balances import apply_entry_to_balances
 
 
 @dataclass(frozen=True)
@@ -212,13 +213,7 @@ def create_posted_entry(
             )
         )
 
-        # Update account balances incrementally for POSTED entries.
-        acct = db.get(ChartOfAccounts, line.account_id)
-        if acct:
-            acct.debit_balance = _as_dec(acct.debit_balance or 0) + _as_dec(line.debit)
-            acct.credit_balance = _as_dec(acct.credit_balance or 0) + _as_dec(line.credit)
-            acct.balance = _as_dec(acct.debit_balance or 0) - _as_dec(acct.credit_balance or 0)
-            db.add(acct)
-
+    # Update account balances incrementally for POSTED entries.
     db.flush()
+    apply_entry_to_balances(db, lines)
     return entry
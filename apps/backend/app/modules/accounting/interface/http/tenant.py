@@ -16,7 +16,7 @@ MIGRADO DE:
 """
 
 import logging
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from math import ceil
 from uuid import UUID
@@ -44,6 +44,12 @@ from app.models.accounting.chart_of_accounts import JournalEntryLine as AsientoL
 from app.models.accounting.period import AccountingPeriod
 from app.models.accounting.pos_settings import PaymentMethod, TenantAccountingSettings
 from app.models.core.global_catalogs import PaymentMethodTemplate
+from app.modules.accounting.application.balances import (
+    account_totals,
+    apply_entry_to_balances,
+    freeze_period,
+    unfreeze_period,
+)
 from app.modules.accounting.application.journal_service import (
     assert_period_open,
     generate_entry_number,
@@ -92,7 +98,11 @@ def _generate_numero_asiento(db: Session, tenant_id: UUID, ano: int) -> str:
 
 
 def _recalcular_saldos_cuenta(db: Session, cuenta_id: UUID):
-    """Recalcula saldos de una cuenta desde sus líneas contabilizadas"""
+    """Recalcula saldos de una cuenta desde sus líneas contabilizadas.
+
+    Solo para reparaciones puntuales: el post/cancel mantiene los saldos con
+    `apply_entry_to_balances` (ver `balances.rebuild_account_balances`).
+    """
     stmt = select(PlanCuentas).where(PlanCuentas.id == cuenta_id)
     cuenta = db.execute(stmt).scalar_one_or_none()
     if not cuenta:
@@ -249,7 +259,7 @@ def _map_tipo_to_account_type(tipo: str) -> str:
 
 
 @router.get("/chart-of-accounts", response_model=PlanCuentasList)
-async def list_cuentas(
+def list_cuentas(
     nivel: int | None = Query(None, ge=1, le=4),
     tipo: str | None = Query(None, pattern="^(ACTIVO|PASIVO|PATRIMONIO|INGRESO|GASTO)$"),
     activo: bool | None = None,
@@ -291,7 +301,7 @@ async def list_cuentas(
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ACCOUNT_MANAGE))],
 )
-async def create_cuenta(
+def create_cuenta(
     data: PlanCuentasCreate,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -389,7 +399,7 @@ _SEED_ACCOUNTS = [
     status_code=200,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ACCOUNT_MANAGE))],
 )
-async def seed_chart_of_accounts(
+def seed_chart_of_accounts(
     force: bool = Query(default=False, description="Crear cuentas aunque ya existan algunas"),
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -501,7 +511,7 @@ async def seed_chart_of_accounts(
 
 
 @router.get("/chart-of-accounts/{cuenta_id}/ledger", response_model=CuentaMayorResponse)
-async def get_cuenta_mayor(
+def get_cuenta_mayor(
     cuenta_id: UUID,
     fecha_desde: date | None = Query(None),
     fecha_hasta: date | None = Query(None),
@@ -525,21 +535,13 @@ async def get_cuenta_mayor(
     if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_date_range")
 
-    initial_stmt = (
-        select(func.coalesce(func.sum(AsientoLinea.debit - AsientoLinea.credit), 0))
-        .join(AsientoContable, AsientoContable.id == AsientoLinea.entry_id)
-        .where(
-            AsientoLinea.account_id == cuenta_id,
-            AsientoContable.tenant_id == tenant_id,
-            AsientoContable.status == "POSTED",
-        )
-    )
+    saldo_inicial = Decimal("0")
     if fecha_desde:
-        initial_stmt = initial_stmt.where(AsientoContable.date < fecha_desde)
-    else:
-        initial_stmt = initial_stmt.where(False)
-
-    saldo_inicial = db.execute(initial_stmt).scalar_one() or Decimal("0")
+        # Snapshots de meses cerrados + líneas del resto hasta el día anterior
+        debe_ini, haber_ini = account_totals(
+            db, tenant_id, date_to=fecha_desde - timedelta(days=1), account_ids=[cuenta_id]
+        ).get(cuenta_id, (Decimal("0"), Decimal("0")))
+        saldo_inicial = debe_ini - haber_ini
     saldo = saldo_inicial
 
     movimientos_stmt = (
@@ -602,7 +604,7 @@ async def get_cuenta_mayor(
 
 
 @router.get("/chart-of-accounts/{cuenta_id}", response_model=PlanCuentasResponse)
-async def get_cuenta(
+def get_cuenta(
     cuenta_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -622,7 +624,7 @@ async def get_cuenta(
     response_model=PlanCuentasResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ACCOUNT_MANAGE))],
 )
-async def update_cuenta(
+def update_cuenta(
     cuenta_id: UUID,
     data: PlanCuentasUpdate,
     db: Session = Depends(get_db),
@@ -658,7 +660,7 @@ async def update_cuenta(
 
 
 @router.delete("/chart-of-accounts/{cuenta_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_cuenta(
+def delete_cuenta(
     cuenta_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -689,7 +691,7 @@ async def delete_cuenta(
 
 
 @router.get("/pos/settings", response_model=AccountingPOSSettingsOut)
-async def get_pos_accounting_settings(
+def get_pos_accounting_settings(
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
 ):
@@ -737,7 +739,7 @@ async def get_pos_accounting_settings(
 
 
 @router.put("/pos/settings", response_model=AccountingPOSSettingsOut, status_code=200)
-async def upsert_pos_accounting_settings(
+def upsert_pos_accounting_settings(
     payload: AccountingSettingsPayload,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -783,7 +785,7 @@ async def upsert_pos_accounting_settings(
 
 
 @router.get("/pos/payment-methods", response_model=list[PaymentMethodOut])
-async def list_payment_methods(
+def list_payment_methods(
     limit: int = Query(200, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
@@ -832,7 +834,7 @@ async def list_payment_methods(
 
 
 @router.post("/pos/payment-methods", response_model=PaymentMethodOut, status_code=201)
-async def create_payment_method(
+def create_payment_method(
     payload: PaymentMethodPayload,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -862,7 +864,7 @@ async def create_payment_method(
 
 
 @router.put("/pos/payment-methods/{method_id}", response_model=PaymentMethodOut)
-async def update_payment_method(
+def update_payment_method(
     method_id: UUID,
     payload: PaymentMethodPayload,
     db: Session = Depends(get_db),
@@ -902,7 +904,7 @@ async def update_payment_method(
 
 
 @router.delete("/pos/payment-methods/{method_id}", status_code=204)
-async def delete_payment_method(
+def delete_payment_method(
     method_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -921,7 +923,7 @@ async def delete_payment_method(
 
 
 @router.get("/journal-entries", response_model=AsientoContableList)
-async def list_asientos(
+def list_asientos(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=500),
     fecha_desde: date | None = None,
@@ -973,7 +975,7 @@ async def list_asientos(
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ENTRY_CREATE))],
 )
-async def create_asiento(
+def create_asiento(
     data: AsientoContableCreate,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1027,7 +1029,7 @@ async def create_asiento(
 
 
 @router.get("/journal-entries/{asiento_id}", response_model=AsientoContableResponse)
-async def get_asiento(
+def get_asiento(
     asiento_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1052,7 +1054,7 @@ async def get_asiento(
     response_model=AsientoContableResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ENTRY_CREATE))],
 )
-async def update_asiento(
+def update_asiento(
     asiento_id: UUID,
     data: AsientoContableUpdate,
     db: Session = Depends(get_db),
@@ -1090,7 +1092,7 @@ async def update_asiento(
     response_model=AsientoContableResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ENTRY_POST))],
 )
-async def contabilizar_asiento(
+def contabilizar_asiento(
     asiento_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1113,17 +1115,18 @@ async def contabilizar_asiento(
     if not asiento.is_balanced:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Asiento no cuadrado")
 
+    # Un período cerrado tiene sus saldos congelados: no admite nuevos POSTED.
+    assert_period_open(db, UUID(str(tenant_id)), asiento.date)
+
     asiento.status = "POSTED"
     asiento.posted_by = user_id
     asiento.posted_at = datetime.now()
 
-    # Update saldos de cuentas
+    # Update saldos de cuentas (delta del asiento, misma transacción)
     lineas = (
         db.execute(select(AsientoLinea).where(AsientoLinea.entry_id == asiento.id)).scalars().all()
     )
-
-    for linea in lineas:
-        _recalcular_saldos_cuenta(db, linea.account_id)
+    apply_entry_to_balances(db, lineas)
 
     db.commit()
     db.refresh(asiento)
@@ -1137,7 +1140,7 @@ async def contabilizar_asiento(
     response_model=AsientoContableResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_ENTRY_CANCEL))],
 )
-async def cancelar_asiento(
+def cancelar_asiento(
     asiento_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1206,8 +1209,7 @@ async def cancelar_asiento(
 
     # Marcar el asiento original como CANCELLED y revertir sus saldos de cuenta.
     asiento.status = "CANCELLED"
-    for linea in lineas_originales:
-        _recalcular_saldos_cuenta(db, linea.account_id)
+    apply_entry_to_balances(db, lineas_originales, sign=-1)
 
     db.commit()
     db.refresh(asiento)
@@ -1218,7 +1220,7 @@ async def cancelar_asiento(
 
 # Alias for frontend compatibility
 @router.get("/transactions", response_model=AsientoContableList)
-async def list_movimientos(
+def list_movimientos(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=500),
     fecha_desde: date | None = None,
@@ -1227,7 +1229,7 @@ async def list_movimientos(
     claims: dict = Depends(with_access_claims),
 ):
     """Alias para list_asientos - compatibilidad con frontend"""
-    return await list_asientos(
+    return list_asientos(
         page=page,
         page_size=page_size,
         fecha_desde=fecha_desde,
@@ -1245,12 +1247,47 @@ async def list_movimientos(
 _MAX_REPORT_DAYS = 366
 
 
+class _ReportRow(BaseModel):
+    id: UUID
+    code: str
+    name: str
+    type: str
+    sum_debit: Decimal
+    sum_credit: Decimal
+
+
+def _report_rows(db: Session, tenant_id: UUID, totals: dict) -> list[_ReportRow]:
+    """Cuentas activas con movimiento en ``totals`` (ordenadas por código)."""
+    if not totals:
+        return []
+    cuentas = db.execute(
+        select(PlanCuentas)
+        .where(
+            PlanCuentas.tenant_id == tenant_id,
+            PlanCuentas.id.in_(list(totals)),
+            PlanCuentas.active == True,  # noqa: E712
+        )
+        .order_by(PlanCuentas.code)
+    ).scalars()
+    return [
+        _ReportRow(
+            id=c.id,
+            code=c.code,
+            name=c.name,
+            type=c.type,
+            sum_debit=totals[c.id][0],
+            sum_credit=totals[c.id][1],
+        )
+        for c in cuentas
+    ]
+
+
 @router.get(
     "/reports/profit-loss",
     response_model=ProfitLossReportResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_REPORTS_READ))],
 )
-async def get_profit_loss(
+def get_profit_loss(
     date_from: date = Query(..., description="Fecha inicio del período"),
     date_to: date = Query(..., description="Fecha fin del período"),
     include_draft: bool = Query(False, description="Incluir asientos en borrador"),
@@ -1277,37 +1314,16 @@ async def get_profit_loss(
 
     tenant_id = UUID(str(claims["tenant_id"]))
 
-    # Statuses a incluir
-    allowed_statuses = ["POSTED"]
-    if include_draft:
-        allowed_statuses.append("DRAFT")
-
-    # Query: suma de débitos y créditos por cuenta en el rango, para INCOME y EXPENSE
-    stmt = (
-        select(
-            PlanCuentas.id,
-            PlanCuentas.code,
-            PlanCuentas.name,
-            PlanCuentas.type,
-            func.coalesce(func.sum(AsientoLinea.debit), Decimal("0")).label("sum_debit"),
-            func.coalesce(func.sum(AsientoLinea.credit), Decimal("0")).label("sum_credit"),
-        )
-        .join(AsientoLinea, AsientoLinea.account_id == PlanCuentas.id)
-        .join(AsientoContable, AsientoContable.id == AsientoLinea.entry_id)
-        .where(
-            PlanCuentas.tenant_id == tenant_id,
-            PlanCuentas.type.in_(["INCOME", "EXPENSE"]),
-            PlanCuentas.active == True,  # noqa: E712
-            AsientoContable.tenant_id == tenant_id,
-            AsientoContable.status.in_(allowed_statuses),
-            AsientoContable.date >= date_from,
-            AsientoContable.date <= date_to,
-        )
-        .group_by(PlanCuentas.id, PlanCuentas.code, PlanCuentas.name, PlanCuentas.type)
-        .order_by(PlanCuentas.code)
+    # Totales por cuenta: snapshots de meses cerrados + líneas del período abierto
+    totals = account_totals(
+        db,
+        tenant_id,
+        date_from=date_from,
+        date_to=date_to,
+        account_types=["INCOME", "EXPENSE"],
+        include_draft=include_draft,
     )
-
-    rows = db.execute(stmt).all()
+    rows = _report_rows(db, tenant_id, totals)
 
     income_lines: list[ReportAccountLine] = []
     expense_lines: list[ReportAccountLine] = []
@@ -1351,7 +1367,7 @@ async def get_profit_loss(
     response_model=BalanceSheetReportResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_REPORTS_READ))],
 )
-async def get_balance_sheet(
+def get_balance_sheet(
     as_of_date: date = Query(default=None, description="Fecha de corte (default: hoy)"),
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1369,31 +1385,11 @@ async def get_balance_sheet(
 
     tenant_id = UUID(str(claims["tenant_id"]))
 
-    # Query: suma de débitos y créditos por cuenta hasta as_of_date
-    stmt = (
-        select(
-            PlanCuentas.id,
-            PlanCuentas.code,
-            PlanCuentas.name,
-            PlanCuentas.type,
-            func.coalesce(func.sum(AsientoLinea.debit), Decimal("0")).label("sum_debit"),
-            func.coalesce(func.sum(AsientoLinea.credit), Decimal("0")).label("sum_credit"),
-        )
-        .join(AsientoLinea, AsientoLinea.account_id == PlanCuentas.id)
-        .join(AsientoContable, AsientoContable.id == AsientoLinea.entry_id)
-        .where(
-            PlanCuentas.tenant_id == tenant_id,
-            PlanCuentas.type.in_(["ASSET", "LIABILITY", "EQUITY"]),
-            PlanCuentas.active == True,  # noqa: E712
-            AsientoContable.tenant_id == tenant_id,
-            AsientoContable.status == "POSTED",
-            AsientoContable.date <= as_of_date,
-        )
-        .group_by(PlanCuentas.id, PlanCuentas.code, PlanCuentas.name, PlanCuentas.type)
-        .order_by(PlanCuentas.code)
+    # Saldos acumulados hasta as_of_date (snapshots + líneas del período abierto)
+    totals = account_totals(
+        db, tenant_id, date_to=as_of_date, account_types=["ASSET", "LIABILITY", "EQUITY"]
     )
-
-    rows = db.execute(stmt).all()
+    rows = _report_rows(db, tenant_id, totals)
 
     asset_lines: list[ReportAccountLine] = []
     liability_lines: list[ReportAccountLine] = []
@@ -1510,7 +1506,7 @@ def _serialize_period(p: AccountingPeriod) -> PeriodOut:
     response_model=PeriodOut,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_PERIOD_MANAGE))],
 )
-async def close_period(
+def close_period(
     payload: PeriodActionPayload,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1521,6 +1517,8 @@ async def close_period(
     period = _get_or_create_period(db, tenant_id, payload.year, payload.month)
     if period.status == "CLOSED":
         raise HTTPException(status_code=409, detail="periodo_ya_cerrado")
+    # Congelar los totales del mes: los reportes ya no releen sus líneas
+    freeze_period(db, tenant_id, payload.year, payload.month)
     period.status = "CLOSED"
     period.closed_at = datetime.now()
     period.closed_by = UUID(str(user_id)) if user_id else None
@@ -1534,7 +1532,7 @@ async def close_period(
     response_model=PeriodOut,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_PERIOD_MANAGE))],
 )
-async def open_period(
+def open_period(
     payload: PeriodActionPayload,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1544,6 +1542,7 @@ async def open_period(
     period = _get_or_create_period(db, tenant_id, payload.year, payload.month)
     if period.status == "OPEN":
         raise HTTPException(status_code=409, detail="periodo_ya_abierto")
+    unfreeze_period(db, tenant_id, payload.year, payload.month)
     period.status = "OPEN"
     period.closed_at = None
     period.closed_by = None
@@ -1564,7 +1563,7 @@ class RegularizePayload(BaseModel):
     response_model=AsientoContableResponse,
     dependencies=[Depends(require_permission(PERM_ACCOUNTING_PERIOD_MANAGE))],
 )
-async def regularize_period(
+def regularize_period(
     payload: RegularizePayload,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
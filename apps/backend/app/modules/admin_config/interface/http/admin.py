@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel as PydanticModel
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
 from app.core.access_guard import with_access_claims
 from app.core.authz import require_scope
-from app.models.core.country_catalogs import CountryIdType
+from app.core.cache import CacheTTL, cache_get_or_load_sync, invalidate_on_commit
+from app.models.company.company import Country, Currency, Language, RefLocale, RefTimezone
+from app.models.core.country_catalogs import CountryIdType, CountryTaxCode
+from app.models.core.global_catalogs import DocumentType, UnitOfMeasure
 from app.modules.admin_config.application.categorias_gasto.dto import CategoriaGastoIn
 from app.modules.admin_config.application.categorias_gasto.use_cases import (
     CreateExpenseCategory,
@@ -213,6 +219,32 @@ router = APIRouter(
     dependencies=[Depends(with_access_claims), Depends(require_scope("admin"))],
 )
 
+# Catálogos globales de lectura frecuente (bootstrap del Admin UI): cache de dos
+# niveles bajo el tenant "global", invalidado al confirmar cambios del modelo.
+_CATALOG_CACHE_TENANT = "global"
+_CATALOG_CACHE_MODELS = {
+    "catalog:currency": Currency,
+    "catalog:country": Country,
+    "catalog:language": Language,
+    "catalog:timezone": RefTimezone,
+    "catalog:locale": RefLocale,
+    "catalog:tax_type": CountryTaxCode,
+    "catalog:unit": UnitOfMeasure,
+    "catalog:doc_type": DocumentType,
+}
+for _domain, _model in _CATALOG_CACHE_MODELS.items():
+    invalidate_on_commit(_model, _domain, tenant_attr=None, tenant_id=_CATALOG_CACHE_TENANT)
+
+
+def _cached_catalog(domain: str, load: Callable[[], Iterable[Any]]) -> list[Any]:
+    return cache_get_or_load_sync(
+        _CATALOG_CACHE_TENANT,
+        domain,
+        ["list"],
+        lambda: [jsonable_encoder(item) for item in load()],
+        CacheTTL.CATALOGOS,
+    )
+
 
 def _currency_repo(db: Session) -> SqlAlchemyMonedaRepo:
     return SqlAlchemyMonedaRepo(db)
@@ -453,9 +485,10 @@ def _locales_in_from_update(data: dict, current) -> LocaleIn:
 
 @router.get("/language", response_model=list[IdiomaRead])
 def list_languages(db: Session = Depends(get_db)):
-    use = ListLanguages(_language_repo(db))
-    items = use.execute()
-    return [_language_schema(item) for item in items]
+    return _cached_catalog(
+        "catalog:language",
+        lambda: [_language_schema(i) for i in ListLanguages(_language_repo(db)).execute()],
+    )
 
 
 @router.post("/language", response_model=IdiomaRead)
@@ -490,9 +523,10 @@ def delete_language(id: int, db: Session = Depends(get_db)):
 # Currencies
 @router.get("/currency", response_model=list[MonedaRead])
 def list_currencies(db: Session = Depends(get_db)):
-    use = ListCurrencies(_currency_repo(db))
-    items = use.execute()
-    return [_currency_schema(item) for item in items]
+    return _cached_catalog(
+        "catalog:currency",
+        lambda: [_currency_schema(i) for i in ListCurrencies(_currency_repo(db)).execute()],
+    )
 
 
 @router.post("/currency", response_model=MonedaRead)
@@ -537,9 +571,10 @@ def delete_currency(id: int, db: Session = Depends(get_db)):
 # Countries
 @router.get("/country", response_model=list[PaisRead])
 def list_countries(db: Session = Depends(get_db)):
-    use = ListCountries(_country_repo(db))
-    items = use.execute()
-    return [_country_schema(item) for item in items]
+    return _cached_catalog(
+        "catalog:country",
+        lambda: [_country_schema(i) for i in ListCountries(_country_repo(db)).execute()],
+    )
 
 
 @router.post("/country", response_model=PaisRead)
@@ -574,9 +609,10 @@ def delete_country(id: int, db: Session = Depends(get_db)):
 # Timezones (CRUD simple)
 @router.get("/timezone")
 def list_timezones(db: Session = Depends(get_db)):
-    use = ListTimezones(_timezones_repo(db))
-    items = use.execute()
-    return [_timezones_schema(item) for item in items]
+    return _cached_catalog(
+        "catalog:timezone",
+        lambda: [_timezones_schema(i) for i in ListTimezones(_timezones_repo(db)).execute()],
+    )
 
 
 @router.post("/timezone")
@@ -611,9 +647,10 @@ def delete_timezone(name: str, db: Session = Depends(get_db)):
 # Locales (CRUD simple)
 @router.get("/locale")
 def list_locales(db: Session = Depends(get_db)):
-    use = ListLocales(_locales_repo(db))
-    items = use.execute()
-    return [_locales_schema(item) for item in items]
+    return _cached_catalog(
+        "catalog:locale",
+        lambda: [_locales_schema(i) for i in ListLocales(_locales_repo(db)).execute()],
+    )
 
 
 @router.post("/locale")
@@ -903,8 +940,10 @@ def _tax_type_in_from_update(payload: TipoImpuestoUpdate, current) -> TipoImpues
 
 @router.get("/tax-type", response_model=list[TipoImpuestoRead])
 def list_tax_types(db: Session = Depends(get_db)):
-    items = ListTaxTypes(_tax_type_repo(db)).execute()
-    return [_tax_type_schema(i) for i in items]
+    return _cached_catalog(
+        "catalog:tax_type",
+        lambda: [_tax_type_schema(i) for i in ListTaxTypes(_tax_type_repo(db)).execute()],
+    )
 
 
 @router.post("/tax-type", response_model=TipoImpuestoRead)
@@ -973,8 +1012,10 @@ def _unit_in_from_update(payload: UnidadMedidaUpdate, current) -> UnidadMedidaIn
 
 @router.get("/unit", response_model=list[UnidadMedidaRead])
 def list_units(db: Session = Depends(get_db)):
-    items = ListUnits(_unit_repo(db)).execute()
-    return [_unit_schema(i) for i in items]
+    return _cached_catalog(
+        "catalog:unit",
+        lambda: [_unit_schema(i) for i in ListUnits(_unit_repo(db)).execute()],
+    )
 
 
 @router.post("/unit", response_model=UnidadMedidaRead)
@@ -1043,8 +1084,10 @@ def _doc_type_in_from_update(payload: TipoDocumentoUpdate, current) -> TipoDocum
 
 @router.get("/doc-type", response_model=list[TipoDocumentoRead])
 def list_doc_types(db: Session = Depends(get_db)):
-    items = ListDocTypes(_doc_type_repo(db)).execute()
-    return [_doc_type_schema(i) for i in items]
+    return _cached_catalog(
+        "catalog:doc_type",
+        lambda: [_doc_type_schema(i) for i in ListDocTypes(_doc_type_repo(db)).execute()],
+    )
 
 
 @router.post("/doc-type", response_model=TipoDocumentoRead)
@@ -27,7 +27,7 @@ router = APIRouter(
 
 
 @router.get("/", summary="List business categories")
-async def list_business_categories(db: Session = Depends(get_db)):
+def list_business_categories(db: Session = Depends(get_db)):
     """
     Get all active business categories from DB.
 
@@ -68,7 +68,7 @@ async def list_business_categories(db: Session = Depends(get_db)):
 
 
 @router.get("/{code}", summary="Get category by code")
-async def get_business_category_by_code(code: str, db: Session = Depends(get_db)):
+def get_business_category_by_code(code: str, db: Session = Depends(get_db)):
     """
     Get a specific category by its code.
 
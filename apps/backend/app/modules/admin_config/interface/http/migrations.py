@@ -154,7 +154,7 @@ class MigrationExecuteResponse(BaseModel):
 
 
 @router.get("/history", response_model=list[MigrationRecord])
-async def get_migration_history(
+def get_migration_history(
     limit: int = 50,
     db: Session = Depends(get_db),
 ):
@@ -187,7 +187,7 @@ async def get_migration_history(
 
 
 @router.get("/status")
-async def get_migration_status(
+def get_migration_status(
     db: Session = Depends(get_db),
 ):
     """
@@ -241,7 +241,7 @@ async def get_migration_status(
 
 
 @router.post("/execute", response_model=MigrationExecuteResponse)
-async def execute_migrations(
+def execute_migrations(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
@@ -264,7 +264,7 @@ async def execute_migrations(
 
 
 @router.get("/pending")
-async def get_pending_migrations(
+def get_pending_migrations(
     db: Session = Depends(get_db),
 ):
     """Get pending migrations."""
@@ -303,7 +303,7 @@ class MigrationMarkResponse(BaseModel):
 
 
 @router.post("/mark", response_model=MigrationMarkResponse)
-async def mark_migration_status(
+def mark_migration_status(
     body: MigrationMarkRequest,
     db: Session = Depends(get_db),
 ):
@@ -24,7 +24,7 @@ router = APIRouter(prefix="/api/v1/sectors", tags=["Sector Templates"])
 
 
 @router.get("/", summary="List available sector templates")
-async def list_sector_templates(db: Session = Depends(get_db)):
+def list_sector_templates(db: Session = Depends(get_db)):
     """
     Gets all available sector templates.
 
@@ -39,7 +39,7 @@ async def list_sector_templates(db: Session = Depends(get_db)):
 
 
 @router.get("/ui-plantillas", summary="List available UI templates")
-async def list_ui_templates(db: Session = Depends(get_db)):
+def list_ui_templates(db: Session = Depends(get_db)):
     rows = (
         db.query(UiTemplate)
         .filter(UiTemplate.active == True)  # noqa: E712
@@ -73,7 +73,7 @@ class UiTemplateIn(BaseModel):
     summary="Create UI template",
     dependencies=[Depends(with_access_claims), Depends(require_scope("admin"))],
 )
-async def create_ui_template(payload: UiTemplateIn, db: Session = Depends(get_db)):
+def create_ui_template(payload: UiTemplateIn, db: Session = Depends(get_db)):
     exists = db.query(UiTemplate).filter(UiTemplate.slug == payload.slug).first()
     if exists:
         raise HTTPException(status_code=400, detail="slug_exists")
@@ -106,7 +106,7 @@ async def create_ui_template(payload: UiTemplateIn, db: Session = Depends(get_db
     summary="Update UI template",
     dependencies=[Depends(with_access_claims), Depends(require_scope("admin"))],
 )
-async def update_ui_template(slug: str, payload: UiTemplateIn, db: Session = Depends(get_db)):
+def update_ui_template(slug: str, payload: UiTemplateIn, db: Session = Depends(get_db)):
     row = db.query(UiTemplate).filter(UiTemplate.slug == slug).first()
     if not row:
         raise HTTPException(status_code=404, detail="not_found")
@@ -136,7 +136,7 @@ async def update_ui_template(slug: str, payload: UiTemplateIn, db: Session = Dep
     summary="Delete UI template",
     dependencies=[Depends(with_access_claims), Depends(require_scope("admin"))],
 )
-async def delete_ui_template(slug: str, db: Session = Depends(get_db)):
+def delete_ui_template(slug: str, db: Session = Depends(get_db)):
     row = db.query(UiTemplate).filter(UiTemplate.slug == slug).first()
     if not row:
         raise HTTPException(status_code=404, detail="not_found")
@@ -146,7 +146,7 @@ async def delete_ui_template(slug: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{sector_plantilla_id}", summary="View template detail")
-async def get_sector_template_detail(sector_plantilla_id: int, db: Session = Depends(get_db)):
+def get_sector_template_detail(sector_plantilla_id: int, db: Session = Depends(get_db)):
     """
     Gets detailed preview of a sector template.
 
@@ -167,9 +167,7 @@ async def get_sector_template_detail(sector_plantilla_id: int, db: Session = Dep
 
 
 @router.post("/apply", summary="Apply sector template (design only)")
-async def apply_template_to_tenant(
-    request: ApplySectorTemplateRequest, db: Session = Depends(get_db)
-):
+def apply_template_to_tenant(request: ApplySectorTemplateRequest, db: Session = Depends(get_db)):
     """
     Applies a sector template to an existing tenant in design-only mode.
 
@@ -0,0 +1,319 @@
+"""
+KPI rollups - Agregados por hora para los dashboards sectoriales.
+
+``kpi_hourly`` guarda, por (tenant, día, hora), los totales aditivos que antes
+se recalculaban sobre ``pos_receipts``/``production_orders`` en cada carga del
+dashboard:
+
+- ventas POS (``sales_total``/``receipts_count``): +1 al cobrar un recibo
+  (checkout) y -1 al reembolsarlo. El bucket es la hora de ``created_at`` del
+  recibo, igual que el ``DATE(created_at)`` que usaban los dashboards.
+- producción (``batches_completed``/``produced_qty``/``waste_qty``/
+  ``waste_value``): al completar una orden, bucket de ``completed_at``.
+
+Las actualizaciones son un UPSERT ``col = col + delta`` dentro de la
+transacción del caller, así el rollup nunca diverge de la operación que lo
+origina. ``kpi_daily`` guarda una foto diaria del stock crítico (no aditiva).
+
+Los dashboards leen los días cerrados de aquí y calculan en vivo solo el día
+en curso (`live_today`) con predicados de rango sobre índices. La tarea
+nocturna ``reconcile_kpi_rollups`` reconstruye el día anterior desde las
+tablas de origen (`rebuild_day`) y toma la foto de stock.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+CRITICAL_STOCK_THRESHOLD = 10
+
+_METRICS = (
+    "sales_total",
+    "receipts_count",
+    "batches_completed",
+    "produced_qty",
+    "waste_qty",
+    "waste_value",
+)
+
+_UPSERT_SQL = text(
+    """
+    INSERT INTO kpi_hourly (
+        tenant_id, day, hour, sales_total, receipts_count,
+        batches_completed, produced_qty, waste_qty, waste_value, updated_at
+    )
+    VALUES (
+        :tenant_id, :day, :hour, :sales_total, :receipts_count,
+        :batches_completed, :produced_qty, :waste_qty, :waste_value, CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (tenant_id, day, hour) DO UPDATE SET
+        sales_total = kpi_hourly.sales_total + excluded.sales_total,
+        receipts_count = kpi_hourly.receipts_count + excluded.receipts_count,
+        batches_completed = kpi_hourly.batches_completed + excluded.batches_completed,
+        produced_qty = kpi_hourly.produced_qty + excluded.produced_qty,
+        waste_qty = kpi_hourly.waste_qty + excluded.waste_qty,
+        waste_value = kpi_hourly.waste_value + excluded.waste_value,
+        updated_at = CURRENT_TIMESTAMP
+    """
+)
+
+
+class KpiTotals(NamedTuple):
+    sales_total: float = 0.0
+    receipts_count: int = 0
+    batches_completed: int = 0
+    produced_qty: float = 0.0
+    waste_qty: float = 0.0
+    waste_value: float = 0.0
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    """``[inicio, fin)`` del día para predicados de rango (usan índice)."""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _as_datetime(value: Any) -> datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, str):  # SQLite devuelve texto en consultas crudas
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is not None:
+        # Misma referencia que date.today() en los dashboards
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _bucket(at: Any) -> tuple[date, int]:
+    ts = _as_datetime(at) or datetime.now()
+    return ts.date(), ts.hour
+
+
+def _f(value: Any) -> float:
+    return float(value) if value is not None else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Mantenimiento incremental
+# ---------------------------------------------------------------------------
+
+
+def record_kpis(db: Session, tenant_id: str | UUID, at: Any, **deltas: float) -> None:
+    """Suma ``deltas`` (nombres de `KpiTotals`) al bucket horario de ``at``."""
+    unknown = set(deltas) - set(_METRICS)
+    if unknown:
+        raise ValueError(f"unknown_kpi_metrics:{sorted(unknown)}")
+    day, hour = _bucket(at)
+    params = {m: deltas.get(m, 0) for m in _METRICS}
+    params.update(tenant_id=str(tenant_id), day=day, hour=hour)
+    db.execute(_UPSERT_SQL, params)
+
+
+def record_receipt_paid(
+    db: Session, tenant_id: str | UUID, created_at: Any, total: Decimal | float, *, sign: int = 1
+) -> None:
+    """Recibo POS cobrado (``sign=1``) o reembolsado (``sign=-1``)."""
+    record_kpis(db, tenant_id, created_at, sales_total=_f(total) * sign, receipts_count=sign)
+
+
+def _waste_value(material_cost: float, produced: float, waste: float) -> float:
+    if waste <= 0 or material_cost <= 0 or produced + waste <= 0:
+        return 0.0
+    return material_cost / (produced + waste) * waste
+
+
+def record_production_completed(db: Session, order: Any) -> None:
+    """Orden de producción completada (tras calcular el coste de sus líneas)."""
+    produced = _f(order.qty_produced)
+    waste = _f(order.waste_qty)
+    material_cost = sum(_f(line.cost_total) for line in (order.lines or []))
+    record_kpis(
+        db,
+        order.tenant_id,
+        order.completed_at,
+        batches_completed=1,
+        produced_qty=produced,
+        waste_qty=waste,
+        waste_value=_waste_value(material_cost, produced, waste),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+
+def rollup_totals(db: Session, tenant_id: str | UUID, date_from: date, date_to: date) -> KpiTotals:
+    """Totales de ``kpi_hourly`` para los días ``[date_from, date_to]``."""
+    if date_to < date_from:
+        return KpiTotals()
+    row = db.execute(
+        text(
+            """
+            SELECT COALESCE(SUM(sales_total), 0), COALESCE(SUM(receipts_count), 0),
+                   COALESCE(SUM(batches_completed), 0), COALESCE(SUM(produced_qty), 0),
+                   COALESCE(SUM(waste_qty), 0), COALESCE(SUM(waste_value), 0)
+            FROM kpi_hourly
+            WHERE tenant_id = :tid AND day >= :date_from AND day <= :date_to
+            """
+        ),
+        {"tid": str(tenant_id), "date_from": date_from, "date_to": date_to},
+    ).first()
+    if row is None:
+        return KpiTotals()
+    return KpiTotals(
+        sales_total=_f(row[0]),
+        receipts_count=int(row[1] or 0),
+        batches_completed=int(row[2] or 0),
+        produced_qty=_f(row[3]),
+        waste_qty=_f(row[4]),
+        waste_value=_f(row[5]),
+    )
+
+
+def _receipts_in(db: Session, tenant_id: str | UUID, start: datetime, end: datetime):
+    return db.execute(
+        text(
+            """
+            SELECT created_at, gross_total
+            FROM pos_receipts
+            WHERE tenant_id = :tid
+              AND created_at >= :start AND created_at < :end
+              AND status IN ('paid', 'invoiced')
+            """
+        ),
+        {"tid": str(tenant_id), "start": start, "end": end},
+    ).fetchall()
+
+
+def _completed_orders_in(db: Session, tenant_id: str | UUID, start: datetime, end: datetime):
+    """(completed_at, qty_produced, waste_qty, coste de materiales) por orden."""
+    return db.execute(
+        text(
+            """
+            SELECT po.completed_at, po.qty_produced, po.waste_qty,
+                   COALESCE(SUM(pol.cost_total), 0)
+            FROM production_orders po
+            LEFT JOIN production_order_lines pol ON pol.order_id = po.id
+            WHERE po.tenant_id = :tid
+              AND po.status = 'COMPLETED'
+              AND po.completed_at >= :start AND po.completed_at < :end
+            GROUP BY po.id, po.completed_at, po.qty_produced, po.waste_qty
+            """
+        ),
+        {"tid": str(tenant_id), "start": start, "end": end},
+    ).fetchall()
+
+
+def live_today(db: Session, tenant_id: str | UUID, today: date | None = None) -> KpiTotals:
+    """Totales del día en curso calculados en vivo (predicados de rango)."""
+    start, end = day_bounds(today or date.today())
+    sales = db.execute(
+        text(
+            """
+            SELECT COALESCE(SUM(gross_total), 0), COUNT(*)
+            FROM pos_receipts
+            WHERE tenant_id = :tid
+              AND created_at >= :start AND created_at < :end
+              AND status IN ('paid', 'invoiced')
+            """
+        ),
+        {"tid": str(tenant_id), "start": start, "end": end},
+    ).first()
+    orders = _completed_orders_in(db, tenant_id, start, end)
+    return KpiTotals(
+        sales_total=_f(sales[0]) if sales else 0.0,
+        receipts_count=int(sales[1] or 0) if sales else 0,
+        batches_completed=len(orders),
+        produced_qty=sum(_f(o[1]) for o in orders),
+        waste_qty=sum(_f(o[2]) for o in orders),
+        waste_value=sum(_waste_value(_f(o[3]), _f(o[1]), _f(o[2])) for o in orders),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Reconciliación
+# ---------------------------------------------------------------------------
+
+
+def rebuild_day(db: Session, tenant_id: str | UUID, day: date) -> int:
+    """Recalcula ``kpi_hourly`` de ``day`` desde las tablas de origen.
+
+    Devuelve el nº de horas con actividad escritas.
+    """
+    start, end = day_bounds(day)
+    hours: dict[int, dict[str, float]] = defaultdict(lambda: dict.fromkeys(_METRICS, 0.0))
+    for created_at, total in _receipts_in(db, tenant_id, start, end):
+        bucket = hours[_bucket(created_at)[1]]
+        bucket["sales_total"] += _f(total)
+        bucket["receipts_count"] += 1
+    for completed_at, produced, waste, cost in _completed_orders_in(db, tenant_id, start, end):
+        bucket = hours[_bucket(completed_at)[1]]
+        bucket["batches_completed"] += 1
+        bucket["produced_qty"] += _f(produced)
+        bucket["waste_qty"] += _f(waste)
+        bucket["waste_value"] += _waste_value(_f(cost), _f(produced), _f(waste))
+
+    db.execute(
+        text("DELETE FROM kpi_hourly WHERE tenant_id = :tid AND day = :day"),
+        {"tid": str(tenant_id), "day": day},
+    )
+    for hour, metrics in hours.items():
+        record_kpis(db, tenant_id, datetime.combine(day, time(hour)), **metrics)
+    return len(hours)
+
+
+def snapshot_daily_stock(db: Session, tenant_id: str | UUID, day: date) -> dict[str, int]:
+    """Foto del stock crítico (productos con existencias < umbral) del día."""
+    row = db.execute(
+        text(
+            """
+            SELECT
+                COUNT(DISTINCT p.id),
+                COUNT(DISTINCT CASE WHEN COALESCE(p.is_raw_material, FALSE) THEN NULL
+                                    ELSE p.id END),
+                COUNT(DISTINCT CASE WHEN COALESCE(p.is_raw_material, FALSE) THEN p.id
+                                    ELSE NULL END)
+            FROM products p
+            LEFT JOIN stock_items si ON si.product_id = p.id AND si.tenant_id = :tid
+            WHERE p.tenant_id = :tid
+              AND COALESCE(si.qty, 0) < :threshold
+            """
+        ),
+        {"tid": str(tenant_id), "threshold": CRITICAL_STOCK_THRESHOLD},
+    ).first()
+    snapshot = {
+        "critical_stock_items": int(row[0] or 0) if row else 0,
+        "critical_sale_items": int(row[1] or 0) if row else 0,
+        "critical_raw_items": int(row[2] or 0) if row else 0,
+    }
+    db.execute(
+        text(
+            """
+            INSERT INTO kpi_daily (
+                tenant_id, day, critical_stock_items, critical_sale_items,
+                critical_raw_items, updated_at
+            )
+            VALUES (
+                :tid, :day, :critical_stock_items, :critical_sale_items,
+                :critical_raw_items, CURRENT_TIMESTAMP
+            )
+            ON CONFLICT (tenant_id, day) DO UPDATE SET
+                critical_stock_items = excluded.critical_stock_items,
+                critical_sale_items = excluded.critical_sale_items,
+                critical_raw_items = excluded.critical_raw_items,
+                updated_at = CURRENT_TIMESTAMP
+            """
+        ),
+        {"tid": str(tenant_id), "day": day, **snapshot},
+    )
+    return snapshot
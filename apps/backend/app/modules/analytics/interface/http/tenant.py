@@ -14,10 +14,12 @@ from sqlalchemy.orm import Session
 from app.config.database import get_db
 from app.core.access_guard import with_access_claims
 from app.core.authz import require_scope
-from app.db.rls import ensure_rls, set_tenant_guc, tenant_id_sql_expr_text
+from app.core.cache import CacheTTL, cache_get_or_load_sync
+from app.db.rls import ensure_rls, set_tenant_guc
 from app.models.company.company import SectorTemplate
 from app.models.company.company_settings import CompanySettings
 from app.models.tenant import Tenant
+from app.modules.analytics.application.kpi_rollups import day_bounds, live_today, rollup_totals
 
 router = APIRouter(
     prefix="/dashboard/kpis",
@@ -70,17 +72,29 @@ def _resolve_sector_currency(
     return defaults.get("currency") or None
 
 
+def _cached_sector_kpis(
+    sector: str, tenant_id: str, db: Session, currency: str | None
+) -> dict[str, Any]:
+    """Cache corto delante del payload: varias aperturas del dashboard en el
+    mismo minuto comparten el cálculo (la clave incluye el día)."""
+    return cache_get_or_load_sync(
+        tenant_id,
+        "dashboard_kpis",
+        [sector, currency or "-", date.today().isoformat()],
+        lambda: _sector_kpis_payload(sector, tenant_id, db, currency),
+        ttl=CacheTTL.DASHBOARD_KPIS,
+    )
+
+
 def _sector_kpis_payload(
     sector: str,
     tenant_id: str,
     db: Session,
     currency: str | None,
 ) -> dict[str, Any]:
-    tenant_expr = tenant_id_sql_expr_text()
-
     def tenant_clause(field: str = "tenant_id") -> str:
-        # Asegura comparación uuid = uuid incluso si el campo viene con ::text
-        return f"CAST({field} AS uuid) = {tenant_expr}"
+        # Columna desnuda (sin ::text/DATE()) para que el predicado use índices
+        return f"{field} = CAST(:tid AS uuid)"
 
     def tenant_params(**extra: Any) -> dict[str, Any]:
         params = {"tid": tenant_id}
@@ -96,38 +110,13 @@ def _sector_kpis_payload(
     week_ago = today - timedelta(days=7)
     next_week = today + timedelta(days=7)
     month_start = today.replace(day=1)
+    day_start, day_end = day_bounds(today)
 
     if sector == "panaderia":
-        # COUNTER SALES (from pos_receipts + invoices)
-        sales_today = scalar_float(
-            db.execute(
-                text(
-                    f"""
-            SELECT COALESCE(SUM(gross_total), 0) as total
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) = :today
-            AND status IN ('paid', 'invoiced')
-        """
-                ),
-                tenant_params(today=today),
-            ).scalar()
-        )
-
-        sales_yesterday = scalar_float(
-            db.execute(
-                text(
-                    f"""
-            SELECT COALESCE(SUM(gross_total), 0) as total
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) = :yesterday
-            AND status IN ('paid', 'invoiced')
-        """
-                ),
-                tenant_params(yesterday=yesterday),
-            ).scalar()
-        )
+        # COUNTER SALES: hoy en vivo, ayer desde el rollup
+        live = live_today(db, tenant_id, today)
+        sales_today = live.sales_total
+        sales_yesterday = rollup_totals(db, tenant_id, yesterday, yesterday).sales_total
 
         variation = (
             ((sales_today - sales_yesterday) / sales_yesterday * 100)
@@ -155,8 +144,8 @@ def _sector_kpis_payload(
             FROM products p
             LEFT JOIN stock_items si
               ON si.product_id = p.id
-             AND {tenant_clause('si.tenant_id::text')}
-            WHERE {tenant_clause('p.tenant_id::text')}
+             AND {tenant_clause('si.tenant_id')}
+            WHERE {tenant_clause('p.tenant_id')}
             AND COALESCE(si.qty, 0) < 10
             LIMIT 10
         """
@@ -164,69 +153,26 @@ def _sector_kpis_payload(
             tenant_params(),
         ).first()
 
-        # WASTE (completed production orders with waste on the day)
-        waste = db.execute(
-            text(
-                f"""
-            SELECT
-                COALESCE(SUM(po.waste_qty), 0) as total_qty,
-                COALESCE(
-                    SUM(
-                        CASE
-                            WHEN COALESCE(po.waste_qty, 0) <= 0 THEN 0
-                            WHEN COALESCE(order_costs.total_material_cost, 0) <= 0 THEN 0
-                            ELSE (
-                                order_costs.total_material_cost
-                                / NULLIF(COALESCE(po.qty_produced, 0) + COALESCE(po.waste_qty, 0), 0)
-                            ) * COALESCE(po.waste_qty, 0)
-                        END
-                    ),
-                    0
-                ) as estimated_value
-            FROM production_orders po
-            LEFT JOIN (
-                SELECT order_id, COALESCE(SUM(cost_total), 0) as total_material_cost
-                FROM production_order_lines
-                GROUP BY order_id
-            ) order_costs ON order_costs.order_id = po.id
-            WHERE {tenant_clause('po.tenant_id::text')}
-            AND po.status = 'COMPLETED'
-            AND DATE(po.completed_at) = :today
-        """
-            ),
-            tenant_params(today=today),
-        ).first()
-
-        production = db.execute(
-            text(
-                f"""
-            SELECT
-                COALESCE(
-                    SUM(
-                        CASE
-                            WHEN status = 'COMPLETED' AND DATE(completed_at) = :today THEN 1
-                            ELSE 0
-                        END
-                    ),
-                    0
-                ) as batches_completed,
-                COALESCE(
-                    SUM(
-                        CASE
-                            WHEN DATE(COALESCE(scheduled_date, created_at)) = :today
-                              AND status IN ('SCHEDULED', 'IN_PROGRESS', 'COMPLETED')
-                            THEN 1
-                            ELSE 0
-                        END
-                    ),
-                    0
-                ) as batches_scheduled
+        # WASTE + PRODUCTION: lotes completados hoy salen de live_today; los
+        # programados para hoy se cuentan con rangos sobre las fechas.
+        batches_scheduled_today = (
+            db.execute(
+                text(
+                    f"""
+            SELECT COUNT(*)
             FROM production_orders
-            WHERE {tenant_clause('tenant_id::text')}
+            WHERE {tenant_clause('tenant_id')}
+            AND status IN ('SCHEDULED', 'IN_PROGRESS', 'COMPLETED')
+            AND (
+                (scheduled_date >= :day_start AND scheduled_date < :day_end)
+                OR (scheduled_date IS NULL AND created_at >= :day_start AND created_at < :day_end)
+            )
         """
-            ),
-            tenant_params(today=today),
-        ).first()
+                ),
+                tenant_params(day_start=day_start, day_end=day_end),
+            ).scalar()
+            or 0
+        )
 
         expiring_ingredients = db.execute(
             text(
@@ -236,7 +182,7 @@ def _sector_kpis_payload(
                 MIN(si.expires_at) as next_expiry
             FROM stock_items si
             JOIN products p ON p.id = si.product_id
-            WHERE {tenant_clause('si.tenant_id::text')}
+            WHERE {tenant_clause('si.tenant_id')}
               AND COALESCE(si.qty, 0) > 0
               AND si.expires_at IS NOT NULL
               AND si.expires_at >= :today
@@ -249,8 +195,8 @@ def _sector_kpis_payload(
             tenant_params(today=today, next_week=next_week),
         ).fetchall()
 
-        batches_completed = int(production[0]) if production and production[0] is not None else 0
-        batches_scheduled = int(production[1]) if production and production[1] is not None else 0
+        batches_completed = live.batches_completed
+        batches_scheduled = int(batches_scheduled_today)
         progress = (
             round((batches_completed / batches_scheduled) * 100, 1)
             if batches_scheduled > 0
@@ -269,7 +215,7 @@ def _sector_kpis_payload(
                     AND required_date >= CURRENT_DATE
                 ) as pendientes_entrega
             FROM sales_orders
-            WHERE {tenant_clause('tenant_id::text')}
+            WHERE {tenant_clause('tenant_id')}
             AND status NOT IN ('cancelled')
         """
             ),
@@ -284,7 +230,7 @@ def _sector_kpis_payload(
             SELECT COUNT(DISTINCT so.id)
             FROM sales_orders so
             JOIN sales_order_items soi ON soi.sales_order_id = so.id
-            WHERE {tenant_clause('so.tenant_id::text')}
+            WHERE {tenant_clause('so.tenant_id')}
               AND so.status = 'draft'
               AND EXISTS (
                   SELECT 1 FROM recipes r
@@ -308,9 +254,9 @@ def _sector_kpis_payload(
             FROM pos_receipt_lines prl
             JOIN pos_receipts pr ON prl.receipt_id = pr.id
             JOIN products p ON prl.product_id = p.id
-            WHERE {tenant_clause('pr.tenant_id::text')}
+            WHERE {tenant_clause('pr.tenant_id')}
             AND pr.status IN ('paid', 'invoiced')
-            AND DATE(pr.created_at) >= :month_start
+            AND pr.created_at >= :month_start
             GROUP BY p.id, p.name
             ORDER BY revenue DESC
             LIMIT 3
@@ -340,9 +286,9 @@ def _sector_kpis_payload(
                 },
             },
             "waste": {
-                "today": float(waste[0]) if waste else 0.0,
+                "today": live.waste_qty,
                 "unit": "uds",
-                "estimated_value": float(waste[1]) if waste else 0.0,
+                "estimated_value": live.waste_value,
                 "currency": currency,
             },
             "production": {
@@ -381,8 +327,8 @@ def _sector_kpis_payload(
                     f"""
             SELECT COALESCE(SUM(total), 0) as total
             FROM invoices
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(issue_date) >= :month_start
+            WHERE {tenant_clause('tenant_id')}
+            AND issue_date >= :month_start
             AND status IN ('posted', 'einvoice_sent', 'paid')
         """
                 ),
@@ -396,12 +342,12 @@ def _sector_kpis_payload(
                 text(
                     f"""
             SELECT COUNT(*) FROM invoices
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(issue_date) = :today
+            WHERE {tenant_clause('tenant_id')}
+            AND issue_date >= :day_start AND issue_date < :day_end
             AND status IN ('posted', 'einvoice_sent', 'paid')
         """
                 ),
-                tenant_params(today=today),
+                tenant_params(day_start=day_start, day_end=day_end),
             ).scalar()
             or 0
         )
@@ -411,8 +357,8 @@ def _sector_kpis_payload(
                 text(
                     f"""
             SELECT COUNT(*) FROM invoices
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(issue_date) >= :month_start
+            WHERE {tenant_clause('tenant_id')}
+            AND issue_date >= :month_start
             AND status IN ('posted', 'einvoice_sent', 'paid')
         """
                 ),
@@ -430,7 +376,7 @@ def _sector_kpis_payload(
                 ARRAY_AGG(DISTINCT p.name) FILTER (WHERE p.name IS NOT NULL) as names
             FROM products p
             LEFT JOIN stock_items si ON si.product_id = p.id
-            WHERE {tenant_clause('p.tenant_id::text')}
+            WHERE {tenant_clause('p.tenant_id')}
             AND COALESCE(si.qty, 0) < 5
             LIMIT 10
         """
@@ -466,40 +412,21 @@ def _sector_kpis_payload(
         }
 
     elif sector == "todoa100" or sector == "retail":
-        # DAILY SALES
-        daily_sales = db.execute(
-            text(
-                f"""
-            SELECT
-                COALESCE(SUM(gross_total), 0) as total,
-                COUNT(*) as tickets
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) = :today
-            AND status IN ('paid', 'invoiced')
-        """
-            ),
-            tenant_params(today=today),
-        ).first()
-
-        total_today = float(daily_sales[0]) if daily_sales else 0.0
-        tickets_today = int(daily_sales[1]) if daily_sales else 0
+        # DAILY SALES (hoy en vivo)
+        live = live_today(db, tenant_id, today)
+        total_today = live.sales_total
+        tickets_today = live.receipts_count
         average_ticket = (total_today / tickets_today) if tickets_today > 0 else 0.0
 
-        # WEEKLY COMPARISON
-        weekly_sales = scalar_float(
-            db.execute(
-                text(
-                    f"""
-            SELECT COALESCE(SUM(gross_total), 0) as total
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) >= :week_ago
-            AND status IN ('paid', 'invoiced')
-        """
-                ),
-                tenant_params(week_ago=week_ago),
-            ).scalar()
+        # WEEKLY COMPARISON: días cerrados desde el rollup + hoy en vivo
+        weekly_sales = rollup_totals(db, tenant_id, week_ago, yesterday).sales_total + total_today
+        previous_week_sales = rollup_totals(
+            db, tenant_id, week_ago - timedelta(days=8), week_ago - timedelta(days=1)
+        ).sales_total
+        weekly_variation = (
+            (weekly_sales - previous_week_sales) / previous_week_sales * 100
+            if previous_week_sales > 0
+            else 0.0
         )
 
         # STOCK ROTATION (ventas últimas 4 semanas + stock disponible)
@@ -510,9 +437,9 @@ def _sector_kpis_payload(
             SELECT prl.product_id, SUM(prl.qty) AS units
             FROM pos_receipt_lines prl
             JOIN pos_receipts pr ON pr.id = prl.receipt_id
-            WHERE {tenant_clause('pr.tenant_id::text')}
+            WHERE {tenant_clause('pr.tenant_id')}
               AND pr.status IN ('paid', 'invoiced')
-              AND DATE(pr.created_at) >= :month_start
+              AND pr.created_at >= :month_start
             GROUP BY prl.product_id
         ),
         buckets AS (
@@ -536,7 +463,7 @@ def _sector_kpis_payload(
             SELECT COUNT(*) FROM (
               SELECT product_id, COALESCE(SUM(qty), 0) AS qty
               FROM stock_items
-              WHERE {tenant_clause('tenant_id::text')}
+              WHERE {tenant_clause('tenant_id')}
               GROUP BY product_id
             ) s
             WHERE qty < :min_stock
@@ -561,28 +488,16 @@ def _sector_kpis_payload(
             },
             "weekly_comparison": {
                 "current": float(weekly_sales),
-                "previous": 0.0,
-                "variation": 0.0,
+                "previous": float(previous_week_sales),
+                "variation": round(weekly_variation, 1),
                 "currency": currency,
             },
         }
 
     else:  # default - generic real data
         # Total daily sales (POS + Invoices)
-        pos_sales = scalar_float(
-            db.execute(
-                text(
-                    f"""
-            SELECT COALESCE(SUM(gross_total), 0)
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) = :today
-            AND status IN ('paid', 'invoiced')
-        """
-                ),
-                tenant_params(today=today),
-            ).scalar()
-        )
+        live = live_today(db, tenant_id, today)
+        pos_sales = live.sales_total
 
         invoice_sales = scalar_float(
             db.execute(
@@ -590,30 +505,16 @@ def _sector_kpis_payload(
                     f"""
             SELECT COALESCE(SUM(total), 0)
             FROM invoices
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(issue_date) = :today
+            WHERE {tenant_clause('tenant_id')}
+            AND issue_date >= :day_start AND issue_date < :day_end
             AND status IN ('posted', 'einvoice_sent', 'paid')
         """
                 ),
-                tenant_params(today=today),
+                tenant_params(day_start=day_start, day_end=day_end),
             ).scalar()
         )
 
-        tickets_count = (
-            db.execute(
-                text(
-                    f"""
-            SELECT COUNT(*)
-            FROM pos_receipts
-            WHERE {tenant_clause('tenant_id::text')}
-            AND DATE(created_at) = :today
-            AND status IN ('paid', 'invoiced')
-        """
-                ),
-                tenant_params(today=today),
-            ).scalar()
-            or 0
-        )
+        tickets_count = live.receipts_count
 
         return {
             "sales_today": {
@@ -646,7 +547,7 @@ def get_current_sector_kpis(
     set_tenant_guc(db, tenant_id)
     currency = _resolve_sector_currency(db, sector_code, tenant_id=str(tenant_id))
 
-    return _sector_kpis_payload(sector_code, str(tenant_id), db, currency)
+    return _cached_sector_kpis(sector_code, str(tenant_id), db, currency)
 
 
 @router.get("/{sector}")
@@ -669,4 +570,4 @@ def get_sector_kpis(
     sector_code = _resolve_sector(sector, tenant)
     currency = _resolve_sector_currency(db, sector_code, tenant_id=str(tenant_id))
 
-    return _sector_kpis_payload(sector_code, str(tenant_id), db, currency)
+    return _cached_sector_kpis(sector_code, str(tenant_id), db, currency)
@@ -869,7 +869,7 @@ def _decode_data_url(data: str) -> tuple[bytes, str | None]:
 
 
 @router.post("/full-json")
-async def create_company_full_json(
+def create_company_full_json(
     payload: CompanyFullIn,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -56,7 +56,7 @@ async def get_einvoice_status_use_case(
     Retrieves the status of an e-invoice submission from the database.
     Handles both SRI (EC) and SII (ES) submissions.
     """
-    ctx = get_db_session()
+    ctx = get_db_session(str(tenant_id))
     if inspect.isawaitable(ctx):  # support AsyncMock patched in tests
         ctx = await ctx
     async with ctx as db:
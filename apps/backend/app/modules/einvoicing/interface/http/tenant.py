@@ -92,7 +92,7 @@ class SendInvoiceResponse(BaseModel):
 
 
 @router.get("/facturae/{invoice_id}/export")
-async def export_facturae_xml(
+def export_facturae_xml(
     invoice_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -154,7 +154,7 @@ async def export_facturae_xml(
 
 
 @router.post("/send-sii", response_model=SendInvoiceResponse, status_code=status.HTTP_201_CREATED)
-async def send_invoice_to_sii(
+def send_invoice_to_sii(
     request: SendInvoiceRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -225,7 +225,7 @@ async def send_invoice_to_sii(
 
 
 @router.get("/einvoice/{einvoice_id}/status", response_model=EInvoiceStatusResponse)
-async def get_einvoice_status(
+def get_einvoice_status(
     einvoice_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -283,7 +283,7 @@ class SendSRIRequest(BaseModel):
 
 
 @router.post("/sri/send", status_code=status.HTTP_202_ACCEPTED)
-async def send_invoice_to_sri(
+def send_invoice_to_sri(
     request: SendSRIRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -318,7 +318,7 @@ async def send_invoice_to_sri(
 
 
 @router.get("/sri/{invoice_id}/status", response_model=SRIStatusResponse)
-async def get_sri_status(
+def get_sri_status(
     invoice_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -356,7 +356,7 @@ async def get_sri_status(
 
 
 @router.get("/sri/{invoice_id}/ride")
-async def download_ride_xml(
+def download_ride_xml(
     invoice_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -400,7 +400,7 @@ async def download_ride_xml(
 
 
 @router.post("/einvoice/{einvoice_id}/retry", response_model=SendInvoiceResponse)
-async def retry_einvoice(
+def retry_einvoice(
     einvoice_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
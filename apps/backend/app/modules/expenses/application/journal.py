@@ -25,6 +25,7 @@ from sqlalchemy.orm import Session
 from app.models.accounting.chart_of_accounts import ChartOfAccounts, JournalEntry
 from app.models.accounting.pos_settings import PaymentMethod
 from app.models.expenses.expense import Expense
+from app.modules.accounting.application.balances import apply_entry_to_balances
 from app.modules.accounting.application.journal_service import JournalLineIn, create_posted_entry
 
 logger = logging.getLogger(__name__)
@@ -151,16 +152,8 @@ def _find_existing_entry(db: Session, expense_id: UUID) -> JournalEntry | None:
 
 def _reverse_entry(db: Session, entry: JournalEntry) -> None:
     """Revierte un asiento: invierte saldos en las cuentas y lo marca CANCELLED."""
-    from app.modules.accounting.application.journal_service import _as_dec
-
     entry.status = "CANCELLED"
-    for line in entry.lines:
-        acct = db.get(ChartOfAccounts, line.account_id)
-        if acct:
-            acct.debit_balance = _as_dec(acct.debit_balance or 0) - _as_dec(line.debit)
-            acct.credit_balance = _as_dec(acct.credit_balance or 0) - _as_dec(line.credit)
-            acct.balance = _as_dec(acct.debit_balance or 0) - _as_dec(acct.credit_balance or 0)
-            db.add(acct)
+    apply_entry_to_balances(db, entry.lines, sign=-1)
     db.flush()
 
 
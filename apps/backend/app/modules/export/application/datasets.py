@@ -0,0 +1,154 @@
+"""Datasets exportables del módulo export.
+
+Cada dataset describe su SQL (filtrado por ``:tid``) y sus columnas; lo usan
+tanto los endpoints en streaming como los jobs en segundo plano.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import IO, Any
+
+from sqlalchemy.orm import Session
+
+from app.modules.export.application.streaming import (
+    csv_chunks,
+    iter_rows,
+    sanitize_cell,
+    write_xlsx,
+)
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    name: str
+    sql: str
+    header: tuple[str, ...]
+    # CSV: subconjunto inicial de columnas (por defecto todas)
+    csv_header: tuple[str, ...] | None = None
+    # XLSX
+    sheet_title: str = "Export"
+    xlsx_header: tuple[str, ...] | None = None
+    widths: tuple[float, ...] = ()
+    numeric_columns: tuple[int, ...] = ()
+
+    def query(self, limit: int | None) -> tuple[str, dict[str, Any]]:
+        if limit is None:
+            return self.sql, {}
+        return f"{self.sql} LIMIT :limit", {"limit": limit}
+
+    @property
+    def csv_columns(self) -> tuple[str, ...]:
+        return self.csv_header or self.header
+
+    def csv_rows(self, rows: Iterable[Sequence[Any]]) -> Iterable[Sequence[Any]]:
+        n = len(self.csv_columns)
+        if n == len(self.header):
+            return rows
+        return (row[:n] for row in rows)
+
+    def xlsx_row(self, row: Sequence[Any]) -> list[Any]:
+        return [
+            float(v or 0) if i in self.numeric_columns else _xlsx_value(v)
+            for i, v in enumerate(row)
+        ]
+
+
+def _xlsx_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return sanitize_cell(value)
+    if isinstance(value, (int, float, Decimal, date, datetime)):
+        return value
+    return str(value)  # UUID y demás tipos que openpyxl no serializa
+
+
+DATASETS: dict[str, ExportDataset] = {
+    "products": ExportDataset(
+        name="products",
+        sql=(
+            "SELECT id, COALESCE(sku,'') AS sku, name, price, unit "
+            "FROM products WHERE tenant_id=:tid ORDER BY id"
+        ),
+        header=("id", "sku", "name", "price", "unit"),
+        sheet_title="Productos",
+        numeric_columns=(3,),
+    ),
+    "clients": ExportDataset(
+        name="clients",
+        sql=(
+            "SELECT id, nombre, COALESCE(email,'') AS email, "
+            "COALESCE(telefono,'') AS telefono FROM clients "
+            "WHERE tenant_id=:tid ORDER BY id"
+        ),
+        header=("id", "nombre", "email", "telefono"),
+        sheet_title="Clientes",
+    ),
+    "stock": ExportDataset(
+        name="stock",
+        sql=(
+            "SELECT w.code, p.sku, p.name, s.qty, p.price, (s.qty * p.price) as total "
+            "FROM stock_items s "
+            "LEFT JOIN warehouses w ON s.warehouse_id = w.id AND w.tenant_id = :tid "
+            "LEFT JOIN products p ON s.product_id = p.id AND p.tenant_id = :tid "
+            "WHERE s.tenant_id=:tid ORDER BY w.code, p.sku"
+        ),
+        header=("code", "sku", "name", "qty", "price", "total"),
+        csv_header=("code", "sku", "name", "qty"),
+        sheet_title="Existencias",
+        xlsx_header=("Almacén", "Código", "Producto", "Cantidad", "Precio Unit.", "Total Valor"),
+        widths=(15, 12, 30, 12, 12, 15),
+        numeric_columns=(3, 4, 5),
+    ),
+}
+
+
+def get_dataset(name: str) -> ExportDataset:
+    try:
+        return DATASETS[name]
+    except KeyError:
+        raise ValueError(f"unknown_export_dataset:{name}") from None
+
+
+def dataset_rows(
+    db: Session, dataset: ExportDataset, tenant_id: str, *, limit: int | None = None
+) -> Iterator[tuple]:
+    sql, params = dataset.query(limit)
+    return iter_rows(db, sql, {"tid": tenant_id, **params})
+
+
+def dataset_csv(
+    db: Session,
+    dataset: ExportDataset,
+    tenant_id: str,
+    *,
+    limit: int | None = None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    rows = dataset_rows(db, dataset, tenant_id, limit=limit)
+    return csv_chunks(dataset.csv_rows(rows), dataset.csv_columns, gzip=gzip)
+
+
+def dataset_xlsx(
+    db: Session,
+    dataset: ExportDataset,
+    tenant_id: str,
+    *,
+    limit: int | None = None,
+    out: IO[bytes] | None = None,
+) -> tuple[IO[bytes], int]:
+    return write_xlsx(
+        dataset_rows(db, dataset, tenant_id, limit=limit),
+        dataset.xlsx_header or dataset.header,
+        sheet_title=dataset.sheet_title,
+        widths=dataset.widths,
+        number_format="#,##0.00",
+        numeric_columns=dataset.numeric_columns,
+        convert=dataset.xlsx_row,
+        header_fill="4472C4",
+        out=out,
+    )
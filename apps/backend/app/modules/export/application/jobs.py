@@ -0,0 +1,159 @@
+"""Jobs de exportación en segundo plano.
+
+Para tenants grandes la exportación se genera fuera de la request y queda como
+fichero descargable en ``<uploads>/_exports/<tenant_id>/``. El estado de cada
+job vive en un ``<job_id>.json`` junto al fichero (escritura atómica), así que
+cualquier worker que comparta el directorio de uploads puede consultarlo.
+Los jobs caducan a las ``EXPORT_JOB_TTL_SECONDS`` y se purgan al crear otro.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.modules.export.application.datasets import dataset_rows, dataset_xlsx, get_dataset
+from app.modules.export.application.streaming import csv_chunks
+
+logger = logging.getLogger(__name__)
+
+EXPORT_JOB_TTL_SECONDS = 24 * 3600
+FORMATS = ("csv", "xlsx")
+
+
+def _exports_dir(tenant_id: str) -> Path:
+    return settings.uploads_path / "_exports" / str(uuid.UUID(str(tenant_id)))
+
+
+def _job_id(job_id: str) -> str:
+    # Normaliza y valida (evita path traversal con ids arbitrarios)
+    return uuid.UUID(str(job_id)).hex
+
+
+def _status_path(tenant_id: str, job_id: str) -> Path:
+    return _exports_dir(tenant_id) / f"{_job_id(job_id)}.json"
+
+
+def _write_status(tenant_id: str, job: dict[str, Any]) -> None:
+    path = _status_path(tenant_id, job["id"])
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(job), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def job_filename(dataset: str, fmt: str, gzip: bool) -> str:
+    return f"{dataset}.{fmt}" + (".gz" if gzip and fmt == "csv" else "")
+
+
+def create_export_job(tenant_id: str, dataset: str, fmt: str, *, gzip: bool = False) -> dict:
+    """Registra un job ``pending``; ejecutarlo con `run_export_job`."""
+    get_dataset(dataset)
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported_export_format:{fmt}")
+    _exports_dir(tenant_id).mkdir(parents=True, exist_ok=True)
+    purge_expired_jobs(tenant_id)
+    job = {
+        "id": uuid.uuid4().hex,
+        "dataset": dataset,
+        "format": fmt,
+        "gzip": bool(gzip and fmt == "csv"),
+        "status": "pending",
+        "rows": None,
+        "size": None,
+        "filename": job_filename(dataset, fmt, gzip),
+        "error": None,
+        "created_at": time.time(),
+        "finished_at": None,
+    }
+    _write_status(tenant_id, job)
+    return job
+
+
+def get_export_job(tenant_id: str, job_id: str) -> dict | None:
+    try:
+        path = _status_path(tenant_id, job_id)
+    except ValueError:
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def export_job_file(tenant_id: str, job: dict) -> Path:
+    suffix = ".gz" if job.get("gzip") else ""
+    return _exports_dir(tenant_id) / f"{_job_id(job['id'])}.{job['format']}{suffix}"
+
+
+def run_export_job(tenant_id: str, job_id: str, user_id: str | None = None) -> None:
+    """Genera el fichero del job con su propia sesión (apta para BackgroundTasks)."""
+    job = get_export_job(tenant_id, job_id)
+    if job is None:
+        return
+    job["status"] = "running"
+    _write_status(tenant_id, job)
+
+    dataset = get_dataset(job["dataset"])
+    target = export_job_file(tenant_id, job)
+    partial = target.with_name(target.name + ".part")
+    db = SessionLocal()
+    # after_begin aplica los GUCs de RLS a partir de db.info
+    db.info["tenant_id"] = str(tenant_id)
+    db.info["user_id"] = user_id
+    try:
+        with open(partial, "wb") as fh:
+            if job["format"] == "xlsx":
+                _, rows = dataset_xlsx(db, dataset, tenant_id, out=fh)
+            else:
+                counted = _Counter(dataset_rows(db, dataset, tenant_id))
+                chunks = csv_chunks(
+                    dataset.csv_rows(counted), dataset.csv_columns, gzip=job["gzip"]
+                )
+                for chunk in chunks:
+                    fh.write(chunk)
+                rows = counted.count
+        os.replace(partial, target)
+        job.update(status="done", rows=rows, size=target.stat().st_size)
+    except Exception as exc:
+        logger.exception("export job %s failed", job_id)
+        partial.unlink(missing_ok=True)
+        job.update(status="failed", error=str(exc)[:500])
+    finally:
+        db.close()
+        job["finished_at"] = time.time()
+        _write_status(tenant_id, job)
+
+
+class _Counter:
+    def __init__(self, rows):
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def purge_expired_jobs(tenant_id: str, *, now: float | None = None) -> int:
+    """Borra ficheros y estados de jobs más viejos que el TTL."""
+    base = _exports_dir(tenant_id)
+    if not base.exists():
+        return 0
+    cutoff = (now or time.time()) - EXPORT_JOB_TTL_SECONDS
+    purged = 0
+    for path in base.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                purged += path.suffix == ".json"
+        except OSError:
+            continue
+    return purged
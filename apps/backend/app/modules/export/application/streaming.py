@@ -0,0 +1,180 @@
+"""Motor de exportación en streaming (CSV / XLSX).
+
+La memoria se mantiene plana sin importar el nº de filas:
+
+- `iter_rows`: cursor del lado servidor (``stream_results`` → cursor con nombre
+  en psycopg2) leído en lotes de ``yield_per`` filas.
+- `csv_chunks`: genera el CSV por bloques de ~64 KB (opcionalmente gzip) para
+  un ``StreamingResponse``.
+- `write_xlsx`: openpyxl en modo ``write_only`` volcado a un
+  ``SpooledTemporaryFile`` (pasa a disco a partir de ``XLSX_SPOOL_BYTES``).
+- `iter_file`: lee el fichero resultante por bloques y lo cierra al terminar.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+import zlib
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import IO, Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+DEFAULT_BATCH_SIZE = 1000
+CSV_CHUNK_BYTES = 64 * 1024
+FILE_CHUNK_BYTES = 256 * 1024
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Caracteres que disparan evaluación de fórmulas en Excel/LibreOffice/Sheets.
+_FORMULA_TRIGGERS = ("=", "+", "-", "@", "\t", "\r")
+
+
+def sanitize_cell(value):
+    """Neutraliza CSV/formula injection.
+
+    Si un valor de texto empieza por un carácter que Excel interpretaría como
+    fórmula, se antepone un apóstrofo para forzar su tratamiento como texto.
+    Los valores no-string (números, fechas, None) se devuelven sin tocar.
+    """
+    if isinstance(value, str) and value and value[0] in _FORMULA_TRIGGERS:
+        return "'" + value
+    return value
+
+
+def iter_rows(
+    db: Session,
+    sql: str,
+    params: dict[str, Any],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[tuple]:
+    """Itera las filas de ``sql`` con un cursor del lado servidor."""
+    result = db.execute(
+        text(sql).execution_options(stream_results=True, yield_per=batch_size), params
+    )
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+def csv_chunks(
+    rows: Iterable[Sequence[Any]],
+    header: Sequence[str],
+    *,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    """Serializa ``rows`` como CSV UTF-8 en bloques de ~``CSV_CHUNK_BYTES``."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 → formato gzip
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def _drain() -> bytes:
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([sanitize_cell(v) for v in row])
+        if buf.tell() >= CSV_CHUNK_BYTES:
+            chunk = _drain()
+            if chunk:
+                yield chunk
+
+    tail = _drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+def write_xlsx(
+    rows: Iterable[Sequence[Any]],
+    header: Sequence[str],
+    *,
+    sheet_title: str = "Report",
+    widths: Sequence[float] | None = None,
+    number_format: str | None = None,
+    numeric_columns: Iterable[int] = (),
+    convert: Callable[[Sequence[Any]], Sequence[Any]] | None = None,
+    header_fill: str | None = None,
+    footer: Iterable[Sequence[Any]] = (),
+    out: IO[bytes] | None = None,
+) -> tuple[IO[bytes], int]:
+    """Escribe un XLSX fila a fila con openpyxl ``write_only``.
+
+    Devuelve ``(fichero, nº de filas de datos)`` con el fichero rebobinado. Si
+    no se pasa ``out`` se usa un ``SpooledTemporaryFile`` que el caller debe
+    cerrar (``iter_file`` lo hace).
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    for idx, width in enumerate(widths or (), start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+
+    font = Font(bold=True, color="FFFFFF" if header_fill else None)
+    fill = (
+        PatternFill(start_color=header_fill, end_color=header_fill, fill_type="solid")
+        if header_fill
+        else None
+    )
+    header_cells = []
+    for title in header:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = font
+        if fill is not None:
+            cell.fill = fill
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    numeric = set(numeric_columns) if number_format else set()
+    count = 0
+    for row in rows:
+        values = convert(row) if convert else row
+        if numeric:
+            values = [
+                _formatted(ws, WriteOnlyCell, v, number_format) if i in numeric else v
+                for i, v in enumerate(values)
+            ]
+        ws.append(values)
+        count += 1
+
+    footer_rows = list(footer)
+    if footer_rows:
+        ws.append([])
+        for row in footer_rows:
+            ws.append(list(row))
+
+    fh = out if out is not None else tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES)
+    wb.save(fh)
+    fh.seek(0)
+    return fh, count
+
+
+def _formatted(ws, cell_cls, value, number_format: str):
+    cell = cell_cls(ws, value=value)
+    cell.number_format = number_format
+    return cell
+
+
+def iter_file(fh: IO[bytes], chunk_size: int = FILE_CHUNK_BYTES) -> Iterator[bytes]:
+    """Lee ``fh`` por bloques y lo cierra al terminar (o si se aborta)."""
+    try:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+    finally:
+        fh.close()
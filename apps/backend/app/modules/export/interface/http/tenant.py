@@ -1,21 +1,24 @@
 from __future__ import annotations
 
-import csv
-import io
 from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
-from sqlalchemy import text
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
 from app.core.access_guard import with_access_claims
 from app.core.authz import require_scope
+from app.core.tenant_context import get_tenant_context
 from app.db.rls import ensure_rls, tenant_id_from_request
+from app.modules.export.application import jobs as export_jobs
+from app.modules.export.application.datasets import DATASETS, dataset_csv, dataset_xlsx
+from app.modules.export.application.streaming import XLSX_MEDIA_TYPE, iter_file
 
 try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Alignment, Font, PatternFill
+    import openpyxl  # noqa: F401
 
     HAS_OPENPYXL = True
 except ImportError:
@@ -32,185 +35,144 @@ router = APIRouter(
 )
 
 
-# Caracteres que disparan evaluación de fórmulas en Excel/LibreOffice/Sheets.
-_FORMULA_TRIGGERS = ("=", "+", "-", "@", "\t", "\r")
-
-
-def _sanitize_cell(value):
-    """Neutraliza CSV/formula injection.
-
-    Si un valor de texto empieza por un carácter que Excel interpretaría como
-    fórmula, se antepone un apóstrofo para forzar su tratamiento como texto.
-    Los valores no-string (números, fechas, None) se devuelven sin tocar.
-    """
-    if isinstance(value, str) and value and value[0] in _FORMULA_TRIGGERS:
-        return "'" + value
-    return value
+def _require_tenant(request: Request) -> str:
+    tenant_id = tenant_id_from_request(request)
+    if tenant_id is None:
+        raise HTTPException(status_code=403, detail="missing_tenant")
+    return tenant_id
 
 
-def _csv(rows, header):
-    buf = io.StringIO()
-    w = csv.writer(buf)
-    w.writerow(header)
-    for r in rows:
-        w.writerow([_sanitize_cell(r.get(h)) for h in header])
-    return buf.getvalue().encode("utf-8")
+def _csv_response(
+    db: Session, dataset: str, tenant_id: str, limit: int | None, gzip: bool
+) -> StreamingResponse:
+    """CSV en streaming: filas leídas con cursor de servidor, sin tope de filas."""
+    filename = f"{dataset}.csv" + (".gz" if gzip else "")
+    return StreamingResponse(
+        dataset_csv(db, DATASETS[dataset], tenant_id, limit=limit, gzip=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
-@router.get("/products.csv", response_class=Response)
+@router.get("/products.csv", response_class=StreamingResponse)
 def export_products(
     request: Request,
     db: Session = Depends(get_db),
-    limit: int = Query(default=5000, ge=1, le=5000),
+    limit: int | None = Query(default=None, ge=1),
+    gzip: bool = Query(default=False),
 ):
-    tenant_id = tenant_id_from_request(request)
-    if tenant_id is None:
-        raise HTTPException(status_code=403, detail="missing_tenant")
-    rows = db.execute(
-        text(
-            "SELECT id, COALESCE(sku,'') AS sku, name, price, unit "
-            "FROM products WHERE tenant_id=:tid ORDER BY id LIMIT :limit"
-        ),
-        {"tid": tenant_id, "limit": limit},
-    )
-    items = [dict(r) for r in rows.mappings().all()]
-    data = _csv(items, ["id", "sku", "name", "price", "unit"])
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=products.csv"},
-    )
+    return _csv_response(db, "products", _require_tenant(request), limit, gzip)
 
 
-@router.get("/clients.csv", response_class=Response)
+@router.get("/clients.csv", response_class=StreamingResponse)
 def export_clients(
     request: Request,
     db: Session = Depends(get_db),
-    limit: int = Query(default=5000, ge=1, le=5000),
+    limit: int | None = Query(default=None, ge=1),
+    gzip: bool = Query(default=False),
 ):
-    tenant_id = tenant_id_from_request(request)
-    if tenant_id is None:
-        raise HTTPException(status_code=403, detail="missing_tenant")
-    rows = db.execute(
-        text(
-            "SELECT id, nombre, COALESCE(email,'') AS email, "
-            "COALESCE(telefono,'') AS telefono FROM clients "
-            "WHERE tenant_id=:tid ORDER BY id LIMIT :limit"
-        ),
-        {"tid": tenant_id, "limit": limit},
-    )
-    items = [dict(r) for r in rows.mappings().all()]
-    data = _csv(items, ["id", "nombre", "email", "telefono"])
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=clients.csv"},
-    )
+    return _csv_response(db, "clients", _require_tenant(request), limit, gzip)
 
 
-@router.get("/stock.csv", response_class=Response)
+@router.get("/stock.csv", response_class=StreamingResponse)
 def export_stock(
     request: Request,
     db: Session = Depends(get_db),
-    limit: int = Query(default=5000, ge=1, le=5000),
+    limit: int | None = Query(default=None, ge=1),
+    gzip: bool = Query(default=False),
 ):
-    tenant_id = tenant_id_from_request(request)
-    if tenant_id is None:
-        raise HTTPException(status_code=403, detail="missing_tenant")
-    rows = db.execute(
-        text(
-            "SELECT w.code, p.sku, p.name, s.qty FROM stock_items s "
-            "LEFT JOIN warehouses w ON s.warehouse_id = w.id AND w.tenant_id = :tid "
-            "LEFT JOIN products p ON s.product_id = p.id AND p.tenant_id = :tid "
-            "WHERE s.tenant_id=:tid ORDER BY w.code, p.sku LIMIT :limit"
-        ),
-        {"tid": tenant_id, "limit": limit},
-    )
-    items = [dict(r) for r in rows.mappings().all()]
-    data = _csv(items, ["code", "sku", "name", "qty"])
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=stock.csv"},
-    )
+    return _csv_response(db, "stock", _require_tenant(request), limit, gzip)
 
 
-@router.get("/stock.xlsx", response_class=Response)
+@router.get("/stock.xlsx", response_class=StreamingResponse)
 def export_stock_xlsx(
     request: Request,
     db: Session = Depends(get_db),
-    limit: int = Query(default=5000, ge=1, le=5000),
+    limit: int | None = Query(default=None, ge=1),
 ):
-    """Export stock inventory as Excel"""
+    """Export stock inventory as Excel (write-only, volcado a fichero temporal)."""
     if not HAS_OPENPYXL:
         raise HTTPException(status_code=500, detail="Excel export not available")
 
-    tenant_id = tenant_id_from_request(request)
-    if tenant_id is None:
-        raise HTTPException(status_code=403, detail="missing_tenant")
-
-    rows = db.execute(
-        text(
-            "SELECT w.code, p.sku, p.name, s.qty, p.price, (s.qty * p.price) as total "
-            "FROM stock_items s "
-            "LEFT JOIN warehouses w ON s.warehouse_id = w.id AND w.tenant_id = :tid "
-            "LEFT JOIN products p ON s.product_id = p.id AND p.tenant_id = :tid "
-            "WHERE s.tenant_id=:tid ORDER BY w.code, p.sku LIMIT :limit"
-        ),
-        {"tid": tenant_id, "limit": limit},
-    ).fetchall()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Existencias"
-
-    # Headers
-    headers = ["Almacén", "Código", "Producto", "Cantidad", "Precio Unit.", "Total Valor"]
-    ws.append(headers)
-
-    # Style headers
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Data
-    for row in rows:
-        ws.append(
-            [
-                _sanitize_cell(row[0] or ""),
-                _sanitize_cell(row[1] or ""),
-                _sanitize_cell(row[2] or ""),
-                float(row[3] or 0),
-                float(row[4] or 0),
-                float(row[5] or 0),
-            ]
-        )
-
-    # Adjust column widths
-    ws.column_dimensions["A"].width = 15
-    ws.column_dimensions["B"].width = 12
-    ws.column_dimensions["C"].width = 30
-    ws.column_dimensions["D"].width = 12
-    ws.column_dimensions["E"].width = 12
-    ws.column_dimensions["F"].width = 15
-
-    # Format numbers
-    for row in ws.iter_rows(min_row=2, min_col=4, max_col=6):
-        for cell in row:
-            cell.number_format = "#,##0.00"
-
-    # Generate file
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-
+    tenant_id = _require_tenant(request)
+    fh, _ = dataset_xlsx(db, DATASETS["stock"], tenant_id, limit=limit)
     filename = f"Informe_de_Existencias_Actuales_{datetime.now().strftime('%Y%m%d')}.xlsx"
 
-    return Response(
-        content=buf.getvalue(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    return StreamingResponse(
+        iter_file(fh),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+# ---------------------------------------------------------------------------
+# Jobs en segundo plano (tenants grandes)
+# ---------------------------------------------------------------------------
+
+
+class ExportJobIn(BaseModel):
+    dataset: Literal["products", "clients", "stock"]
+    format: Literal["csv", "xlsx"] = "csv"
+    gzip: bool = False
+
+
+class ExportJobOut(BaseModel):
+    id: str
+    dataset: str
+    format: str
+    gzip: bool
+    status: str
+    rows: int | None = None
+    size: int | None = None
+    filename: str
+    error: str | None = None
+
+
+@router.post("/jobs", response_model=ExportJobOut, status_code=202)
+def create_export_job(
+    payload: ExportJobIn,
+    request: Request,
+    background_tasks: BackgroundTasks,
+):
+    """Encola una exportación completa; el fichero se descarga con `/jobs/{id}/download`."""
+    tenant_id = _require_tenant(request)
+    if payload.format == "xlsx" and not HAS_OPENPYXL:
+        raise HTTPException(status_code=500, detail="Excel export not available")
+    job = export_jobs.create_export_job(
+        tenant_id, payload.dataset, payload.format, gzip=payload.gzip
+    )
+    user_id = get_tenant_context(request).user_id
+    background_tasks.add_task(
+        export_jobs.run_export_job, tenant_id, job["id"], str(user_id) if user_id else None
+    )
+    return job
+
+
+def _get_job(request: Request, job_id: str) -> tuple[str, dict]:
+    tenant_id = _require_tenant(request)
+    job = export_jobs.get_export_job(tenant_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="export_job_not_found")
+    return tenant_id, job
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobOut)
+def get_export_job(job_id: str, request: Request):
+    return _get_job(request, job_id)[1]
+
+
+@router.get("/jobs/{job_id}/download", response_class=FileResponse)
+def download_export_job(job_id: str, request: Request):
+    tenant_id, job = _get_job(request, job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"export_job_{job['status']}")
+    path = export_jobs.export_job_file(tenant_id, job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="export_job_expired")
+    if job["gzip"]:
+        media_type = "application/gzip"
+    elif job["format"] == "xlsx":
+        media_type = XLSX_MEDIA_TYPE
+    else:
+        media_type = "text/csv"
+    return FileResponse(path, media_type=media_type, filename=job["filename"])
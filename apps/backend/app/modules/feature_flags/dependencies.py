@@ -2,22 +2,32 @@
 
 from __future__ import annotations
 
+import logging
+
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
 from app.db.rls import tenant_id_from_request
+from app.modules.settings.application.tenant_settings import get_request_tenant_settings
+
+from .service import ResolvedFlags, resolve_flags
 
-from .service import ResolvedFlags, get_tenant_flags, resolve_flags
+logger = logging.getLogger(__name__)
 
 
 def get_feature_flags(
     request: Request,
     db: Session = Depends(get_db),
 ) -> ResolvedFlags:
+    """Flags del tenant a partir del snapshot de configuración de la request."""
     tenant_id = tenant_id_from_request(request)
     if tenant_id:
-        return get_tenant_flags(db, tenant_id)
+        try:
+            return get_request_tenant_settings(request, db, tenant_id).flags()
+        except Exception:
+            logger.warning("Failed to load tenant config for flags", exc_info=True)
+            return resolve_flags(tenant_id=tenant_id)
     return resolve_flags()
 
 
@@ -137,25 +137,11 @@ def resolve_flags(
 
 
 def get_tenant_flags(db: Session, tenant_id: str) -> ResolvedFlags:
-    from sqlalchemy import text
-
-    country_code = None
-    tenant_features = None
+    """Flags del tenant (snapshot cacheado de ``tenants.config_json``)."""
+    from app.modules.settings.application.tenant_settings import load_tenant_settings
 
     try:
-        row = db.execute(
-            text("SELECT country_code, config_json FROM tenants WHERE id = :tid"),
-            {"tid": tenant_id},
-        ).first()
-        if row:
-            country_code = row[0]
-            config = row[1] or {}
-            tenant_features = config.get("features") if isinstance(config, dict) else None
+        return load_tenant_settings(db, tenant_id).flags()
     except Exception:
         logger.warning("Failed to load tenant config for flags", exc_info=True)
-
-    return resolve_flags(
-        tenant_id=tenant_id,
-        country_code=country_code,
-        tenant_features=tenant_features,
-    )
+        return resolve_flags(tenant_id=tenant_id)
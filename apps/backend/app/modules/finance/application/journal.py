@@ -22,6 +22,7 @@ from sqlalchemy.orm import Session
 from app.models.accounting.chart_of_accounts import ChartOfAccounts, JournalEntry
 from app.models.accounting.pos_settings import TenantAccountingSettings
 from app.models.finance.cash_management import CashMovement
+from app.modules.accounting.application.balances import apply_entry_to_balances
 from app.modules.accounting.application.journal_service import (
     JournalLineIn,
     _as_dec,
@@ -68,13 +69,7 @@ def _find_existing_entry(db: Session, movement_id: UUID) -> JournalEntry | None:
 
 def _reverse_entry(db: Session, entry: JournalEntry) -> None:
     entry.status = "CANCELLED"
-    for line in entry.lines:
-        acct = db.get(ChartOfAccounts, line.account_id)
-        if acct:
-            acct.debit_balance = _as_dec(acct.debit_balance or 0) - _as_dec(line.debit)
-            acct.credit_balance = _as_dec(acct.credit_balance or 0) - _as_dec(line.credit)
-            acct.balance = _as_dec(acct.debit_balance or 0) - _as_dec(acct.credit_balance or 0)
-            db.add(acct)
+    apply_entry_to_balances(db, entry.lines, sign=-1)
     db.flush()
 
 
@@ -83,7 +83,7 @@ class MultiDayPositionResponse(BaseModel):
 
 
 @router.get("/cash-position")
-async def get_cash_position(
+def get_cash_position(
     bank_account_id: UUID,
     position_date: date | None = None,
     db: Session = Depends(get_db),
@@ -123,7 +123,7 @@ async def get_cash_position(
 
 
 @router.get("/cash-position/range")
-async def get_cash_positions_range(
+def get_cash_positions_range(
     bank_account_id: UUID,
     start_date: date,
     end_date: date,
@@ -174,7 +174,7 @@ async def get_cash_positions_range(
 
 
 @router.get("/cash-forecast")
-async def get_cash_forecast(
+def get_cash_forecast(
     bank_account_id: UUID,
     days: int = Query(30, ge=7, le=365),
     scenario: str = "BASE",
@@ -88,29 +88,6 @@ def _resolve_column(df_columns: list[str], target: str) -> str | None:
     return None
 
 
-def _safe_decimal(value: Any) -> float:
-    if value is None:
-        return 0.0
-    try:
-        import math
-
-        v = float(value)
-        return v if math.isfinite(v) else 0.0
-    except (TypeError, ValueError):
-        return 0.0
-
-
-def _safe_str(value: Any, max_len: int = 500) -> str | None:
-    if value is None:
-        return None
-    import pandas as pd
-
-    if pd.isna(value):
-        return None
-    s = str(value).strip()
-    return s[:max_len] if s else None
-
-
 def _safe_date(value: Any) -> date | None:
     if value is None:
         return None
@@ -622,7 +599,8 @@ class UploadHistoricalFileUseCase:
             },
         ).first()
         import_id = imp_row[0]
-        self.db.flush()
+        # Commit the 'processing' row so chunk commits report progress on it.
+        self.db.commit()
 
         imported = 0
         failed = 0
@@ -662,292 +640,77 @@ class UploadHistoricalFileUseCase:
             .first()
         )
 
+    def _bulk_import(
+        self, tenant_id: UUID, import_id: UUID, df: Any, import_type: str
+    ) -> tuple[int, int, Any]:
+        from .bulk_loader import HIST_TABLE_SPECS, HistBulkLoader, prepare_frame
+
+        spec = HIST_TABLE_SPECS[import_type]
+        prepared = prepare_frame(df, spec)
+        imported, failed = HistBulkLoader(self.db).load(tenant_id, import_id, prepared, spec)
+        return imported, failed, prepared.frame
+
     def _import_sales(
         self, tenant_id: UUID, import_id: UUID, df: Any, cols: list[str]
     ) -> tuple[int, int]:
-        date_col = _resolve_column(cols, "date")
-        number_col = _resolve_column(cols, "number")
-        cust_code_col = _resolve_column(cols, "customer_code")
-        cust_name_col = _resolve_column(cols, "customer_name")
-        prod_code_col = _resolve_column(cols, "product_code")
-        prod_name_col = _resolve_column(cols, "product_name")
-        qty_col = _resolve_column(cols, "quantity")
-        price_col = _resolve_column(cols, "unit_price")
-        sub_col = _resolve_column(cols, "subtotal")
-        tax_col = _resolve_column(cols, "tax")
-        total_col = _resolve_column(cols, "total")
-        currency_col = _resolve_column(cols, "currency")
-
-        imported = 0
-        failed = 0
-
-        for _, row in df.iterrows():
-            try:
-                record_date = _safe_date(row.get(date_col) if date_col else None)
-                if not record_date:
-                    raise ValueError("missing_date")
-
-                self.db.execute(
-                    text(
-                        'INSERT INTO hist_sales (tenant_id, import_id, "date", number, '
-                        "customer_code, customer_name, product_code, product_name, "
-                        "quantity, unit_price, subtotal, tax, total, currency) "
-                        "VALUES (:tid, :iid, :f, :n, :cc, :cn, :pc, :pn, :ca, :pu, :st, :im, :tt, :mo)"
-                    ).bindparams(
-                        bindparam("tid", type_=PGUUID(as_uuid=True)),
-                        bindparam("iid", type_=PGUUID(as_uuid=True)),
-                    ),
-                    {
-                        "tid": tenant_id,
-                        "iid": import_id,
-                        "f": record_date,
-                        "n": _safe_str(row.get(number_col) if number_col else None, 100),
-                        "cc": _safe_str(row.get(cust_code_col) if cust_code_col else None, 100),
-                        "cn": _safe_str(row.get(cust_name_col) if cust_name_col else None, 500),
-                        "pc": _safe_str(row.get(prod_code_col) if prod_code_col else None, 100),
-                        "pn": _safe_str(row.get(prod_name_col) if prod_name_col else None, 500),
-                        "ca": _safe_decimal(row.get(qty_col) if qty_col else None),
-                        "pu": _safe_decimal(row.get(price_col) if price_col else None),
-                        "st": _safe_decimal(row.get(sub_col) if sub_col else None),
-                        "im": _safe_decimal(row.get(tax_col) if tax_col else None),
-                        "tt": _safe_decimal(row.get(total_col) if total_col else None),
-                        "mo": _safe_str(row.get(currency_col) if currency_col else None, 10)
-                        or "USD",
-                    },
-                )
-                imported += 1
-            except Exception:
-                logger.warning("Failed to import sales row", exc_info=True)
-                failed += 1
-
-        self._upsert_masters_from_sales(tenant_id, df, cols)
+        imported, failed, frame = self._bulk_import(tenant_id, import_id, df, "sales")
+        self._upsert_masters(
+            tenant_id,
+            frame,
+            [
+                ("product", "product_code", "product_name"),
+                ("client", "customer_code", "customer_name"),
+            ],
+        )
         return imported, failed
 
     def _import_purchases(
         self, tenant_id: UUID, import_id: UUID, df: Any, cols: list[str]
     ) -> tuple[int, int]:
-        date_col = _resolve_column(cols, "date")
-        number_col = _resolve_column(cols, "number")
-        supp_code_col = _resolve_column(cols, "supplier_code")
-        supp_name_col = _resolve_column(cols, "supplier_name")
-        prod_code_col = _resolve_column(cols, "product_code")
-        prod_name_col = _resolve_column(cols, "product_name")
-        qty_col = _resolve_column(cols, "quantity")
-        price_col = _resolve_column(cols, "unit_price")
-        sub_col = _resolve_column(cols, "subtotal")
-        tax_col = _resolve_column(cols, "tax")
-        total_col = _resolve_column(cols, "total")
-        currency_col = _resolve_column(cols, "currency")
-
-        imported = 0
-        failed = 0
-
-        for _, row in df.iterrows():
-            try:
-                record_date = _safe_date(row.get(date_col) if date_col else None)
-                if not record_date:
-                    raise ValueError("missing_date")
-
-                self.db.execute(
-                    text(
-                        'INSERT INTO hist_purchases (tenant_id, import_id, "date", number, '
-                        "supplier_code, supplier_name, product_code, product_name, "
-                        "quantity, unit_price, subtotal, tax, total, currency) "
-                        "VALUES (:tid, :iid, :f, :n, :vc, :vn, :pc, :pn, :ca, :pu, :st, :im, :tt, :mo)"
-                    ).bindparams(
-                        bindparam("tid", type_=PGUUID(as_uuid=True)),
-                        bindparam("iid", type_=PGUUID(as_uuid=True)),
-                    ),
-                    {
-                        "tid": tenant_id,
-                        "iid": import_id,
-                        "f": record_date,
-                        "n": _safe_str(row.get(number_col) if number_col else None, 100),
-                        "vc": _safe_str(row.get(supp_code_col) if supp_code_col else None, 100),
-                        "vn": _safe_str(row.get(supp_name_col) if supp_name_col else None, 500),
-                        "pc": _safe_str(row.get(prod_code_col) if prod_code_col else None, 100),
-                        "pn": _safe_str(row.get(prod_name_col) if prod_name_col else None, 500),
-                        "ca": _safe_decimal(row.get(qty_col) if qty_col else None),
-                        "pu": _safe_decimal(row.get(price_col) if price_col else None),
-                        "st": _safe_decimal(row.get(sub_col) if sub_col else None),
-                        "im": _safe_decimal(row.get(tax_col) if tax_col else None),
-                        "tt": _safe_decimal(row.get(total_col) if total_col else None),
-                        "mo": _safe_str(row.get(currency_col) if currency_col else None, 10)
-                        or "USD",
-                    },
-                )
-                imported += 1
-            except Exception:
-                logger.warning("Failed to import purchase row", exc_info=True)
-                failed += 1
-
-        self._upsert_masters_from_purchases(tenant_id, df, cols)
+        imported, failed, frame = self._bulk_import(tenant_id, import_id, df, "purchases")
+        self._upsert_masters(
+            tenant_id,
+            frame,
+            [
+                ("product", "product_code", "product_name"),
+                ("supplier", "supplier_code", "supplier_name"),
+            ],
+        )
         return imported, failed
 
     def _import_stock(
         self, tenant_id: UUID, import_id: UUID, df: Any, cols: list[str]
     ) -> tuple[int, int]:
-        date_col = _resolve_column(cols, "date")
-        prod_code_col = _resolve_column(cols, "product_code")
-        prod_name_col = _resolve_column(cols, "product_name")
-        qty_col = _resolve_column(cols, "quantity")
-        cost_col = _resolve_column(cols, "unit_cost")
-        value_col = _resolve_column(cols, "total_value")
-        wh_col = _resolve_column(cols, "warehouse")
-
-        imported = 0
-        failed = 0
-
-        for _, row in df.iterrows():
-            try:
-                record_date = _safe_date(row.get(date_col) if date_col else None)
-                if not record_date:
-                    raise ValueError("missing_date")
-
-                self.db.execute(
-                    text(
-                        'INSERT INTO hist_stock (tenant_id, import_id, "date", '
-                        "product_code, product_name, quantity, unit_cost, "
-                        "total_value, warehouse) "
-                        "VALUES (:tid, :iid, :f, :pc, :pn, :ca, :cu, :vt, :al)"
-                    ).bindparams(
-                        bindparam("tid", type_=PGUUID(as_uuid=True)),
-                        bindparam("iid", type_=PGUUID(as_uuid=True)),
-                    ),
-                    {
-                        "tid": tenant_id,
-                        "iid": import_id,
-                        "f": record_date,
-                        "pc": _safe_str(row.get(prod_code_col) if prod_code_col else None, 100),
-                        "pn": _safe_str(row.get(prod_name_col) if prod_name_col else None, 500),
-                        "ca": _safe_decimal(row.get(qty_col) if qty_col else None),
-                        "cu": _safe_decimal(row.get(cost_col) if cost_col else None),
-                        "vt": _safe_decimal(row.get(value_col) if value_col else None),
-                        "al": _safe_str(row.get(wh_col) if wh_col else None, 200),
-                    },
-                )
-                imported += 1
-            except Exception:
-                logger.warning("Failed to import stock row", exc_info=True)
-                failed += 1
-
+        imported, failed, _frame = self._bulk_import(tenant_id, import_id, df, "stock")
         return imported, failed
 
     def _import_daily_sales(
         self, tenant_id: UUID, import_id: UUID, df: Any, cols: list[str]
     ) -> tuple[int, int]:
-        date_col = _resolve_column(cols, "date")
-        sales_total_col = _resolve_column(cols, "sales_total")
-        items_col = _resolve_column(cols, "total_items")
-        avg_ticket_col = _resolve_column(cols, "avg_ticket")
-
-        imported = 0
-        failed = 0
+        imported, failed, _frame = self._bulk_import(tenant_id, import_id, df, "daily_sales")
+        return imported, failed
 
-        for _, row in df.iterrows():
-            try:
-                record_date = _safe_date(row.get(date_col) if date_col else None)
-                if not record_date:
-                    raise ValueError("missing_date")
+    def _upsert_masters(
+        self, tenant_id: UUID, frame: Any, pairs: list[tuple[str, str, str]]
+    ) -> None:
+        from .bulk_loader import iter_masters
 
+        masters = iter_masters(frame, pairs)
+        if not masters:
+            return
+        try:
+            with self.db.begin_nested():
                 self.db.execute(
                     text(
-                        'INSERT INTO hist_daily_sales (tenant_id, import_id, "date", '
-                        "sales_total, total_items, avg_ticket) "
-                        "VALUES (:tid, :iid, :f, :tv, :ti, :tp) "
-                        'ON CONFLICT (tenant_id, "date") DO UPDATE SET '
-                        "sales_total = EXCLUDED.sales_total, "
-                        "total_items = EXCLUDED.total_items, "
-                        "avg_ticket = EXCLUDED.avg_ticket, "
-                        "import_id = EXCLUDED.import_id"
-                    ).bindparams(
-                        bindparam("tid", type_=PGUUID(as_uuid=True)),
-                        bindparam("iid", type_=PGUUID(as_uuid=True)),
-                    ),
-                    {
-                        "tid": tenant_id,
-                        "iid": import_id,
-                        "f": record_date,
-                        "tv": _safe_decimal(row.get(sales_total_col) if sales_total_col else None),
-                        "ti": int(_safe_decimal(row.get(items_col) if items_col else None)),
-                        "tp": _safe_decimal(row.get(avg_ticket_col) if avg_ticket_col else None),
-                    },
+                        "INSERT INTO hist_masters (tenant_id, entity_type, code, name) "
+                        "VALUES (:tid, :et, :c, :n) "
+                        "ON CONFLICT (tenant_id, entity_type, code) DO NOTHING"
+                    ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
+                    [{"tid": tenant_id, **master} for master in masters],
                 )
-                imported += 1
-            except Exception:
-                logger.warning("Failed to import daily sales row", exc_info=True)
-                failed += 1
-
-        return imported, failed
-
-    def _upsert_masters_from_sales(self, tenant_id: UUID, df: Any, cols: list[str]) -> None:
-        prod_code_col = _resolve_column(cols, "product_code")
-        prod_name_col = _resolve_column(cols, "product_name")
-        cust_code_col = _resolve_column(cols, "customer_code")
-        cust_name_col = _resolve_column(cols, "customer_name")
-
-        seen: set[tuple[str, str]] = set()
-        for _, row in df.iterrows():
-            for entity_type, code_col, name_col in [
-                ("product", prod_code_col, prod_name_col),
-                ("client", cust_code_col, cust_name_col),
-            ]:
-                code = _safe_str(row.get(code_col) if code_col else None, 100)
-                name = _safe_str(row.get(name_col) if name_col else None, 500)
-                if not name:
-                    continue
-                key = (entity_type, code or name)
-                if key in seen:
-                    continue
-                seen.add(key)
-                try:
-                    self.db.execute(
-                        text(
-                            "INSERT INTO hist_masters (tenant_id, entity_type, code, name) "
-                            "VALUES (:tid, :et, :c, :n) "
-                            "ON CONFLICT (tenant_id, entity_type, code) DO NOTHING"
-                        ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-                        {"tid": tenant_id, "et": entity_type, "c": code or name, "n": name},
-                    )
-                except Exception:
-                    logger.warning(
-                        "Failed to upsert historical master from sales import",
-                        extra={"tenant_id": str(tenant_id), "entity_type": entity_type},
-                        exc_info=True,
-                    )
-
-    def _upsert_masters_from_purchases(self, tenant_id: UUID, df: Any, cols: list[str]) -> None:
-        prod_code_col = _resolve_column(cols, "product_code")
-        prod_name_col = _resolve_column(cols, "product_name")
-        supp_code_col = _resolve_column(cols, "supplier_code")
-        supp_name_col = _resolve_column(cols, "supplier_name")
-
-        seen: set[tuple[str, str]] = set()
-        for _, row in df.iterrows():
-            for entity_type, code_col, name_col in [
-                ("product", prod_code_col, prod_name_col),
-                ("supplier", supp_code_col, supp_name_col),
-            ]:
-                code = _safe_str(row.get(code_col) if code_col else None, 100)
-                name = _safe_str(row.get(name_col) if name_col else None, 500)
-                if not name:
-                    continue
-                key = (entity_type, code or name)
-                if key in seen:
-                    continue
-                seen.add(key)
-                try:
-                    self.db.execute(
-                        text(
-                            "INSERT INTO hist_masters (tenant_id, entity_type, code, name) "
-                            "VALUES (:tid, :et, :c, :n) "
-                            "ON CONFLICT (tenant_id, entity_type, code) DO NOTHING"
-                        ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-                        {"tid": tenant_id, "et": entity_type, "c": code or name, "n": name},
-                    )
-                except Exception:
-                    logger.warning(
-                        "Failed to upsert historical master from purchases import",
-                        extra={"tenant_id": str(tenant_id), "entity_type": entity_type},
-                        exc_info=True,
-                    )
+        except Exception:
+            logger.warning(
+                "Failed to upsert historical masters",
+                extra={"tenant_id": str(tenant_id), "count": len(masters)},
+                exc_info=True,
+            )
@@ -0,0 +1,100 @@
+"""
+Acceso a datos por lotes para la generación de nómina.
+
+`PayrollService.generate_payroll` precarga aquí, en unas pocas consultas
+agrupadas, lo que antes se consultaba por empleado (salario vigente y
+fichajes del mes) e inserta detalles y recibos en bloque.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from datetime import date
+from typing import Any, NamedTuple
+
+from sqlalchemy import desc, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.hr.attendance import TimeEntry
+from app.models.hr.employee import EmployeeSalary
+from app.models.hr.payroll import PayrollDetail
+from app.models.hr.payslip import PaymentSlip
+
+# Tamaño de los IN (...) y de cada INSERT multi-fila
+BATCH_SIZE = 500
+
+
+class SalaryRow(NamedTuple):
+    salary_amount: Any
+    notes: str | None
+
+
+class WorkEntryRow(NamedTuple):
+    entry_date: date
+    clock_in_time: Any
+    clock_out_time: Any
+
+
+def chunked(items: Sequence, size: int | None = None) -> Iterator[Sequence]:
+    size = size or BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def load_current_salaries(
+    db: Session, employee_ids: Sequence, period_end: date
+) -> dict[str, SalaryRow]:
+    """Salario vigente a ``period_end`` por empleado (mismo orden que la consulta unitaria)."""
+    salaries: dict[str, SalaryRow] = {}
+    for ids in chunked(employee_ids):
+        rows = db.execute(
+            select(EmployeeSalary.employee_id, EmployeeSalary.salary_amount, EmployeeSalary.notes)
+            .where(
+                EmployeeSalary.employee_id.in_(ids),
+                EmployeeSalary.effective_date <= period_end,
+            )
+            .order_by(
+                EmployeeSalary.employee_id,
+                EmployeeSalary.effective_date.desc(),
+                desc(EmployeeSalary.created_at),
+                desc(EmployeeSalary.id),
+            )
+        )
+        for employee_id, amount, notes in rows:
+            salaries.setdefault(str(employee_id), SalaryRow(amount, notes))
+    return salaries
+
+
+def load_work_entries(
+    db: Session, employee_ids: Sequence, month_start: date, month_end: date
+) -> dict[str, list[WorkEntryRow]]:
+    """Fichajes de trabajo del período agrupados por empleado."""
+    entries: dict[str, list[WorkEntryRow]] = defaultdict(list)
+    for ids in chunked(employee_ids):
+        rows = db.execute(
+            select(
+                TimeEntry.employee_id,
+                TimeEntry.entry_date,
+                TimeEntry.clock_in_time,
+                TimeEntry.clock_out_time,
+            ).where(
+                TimeEntry.employee_id.in_(ids),
+                TimeEntry.entry_type == "trabajo",
+                TimeEntry.entry_date >= month_start,
+                TimeEntry.entry_date <= month_end,
+            )
+        )
+        for employee_id, entry_date, clock_in, clock_out in rows:
+            entries[str(employee_id)].append(WorkEntryRow(entry_date, clock_in, clock_out))
+    return entries
+
+
+def insert_payroll_lines(
+    db: Session, details: list[dict[str, Any]], payslips: list[dict[str, Any]]
+) -> None:
+    """INSERT multi-fila de detalles y recibos (los ids ya vienen asignados)."""
+    for rows in chunked(details):
+        db.execute(insert(PayrollDetail), list(rows))
+    for rows in chunked(payslips):
+        db.execute(insert(PaymentSlip), list(rows))
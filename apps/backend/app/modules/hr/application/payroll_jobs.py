@@ -0,0 +1,148 @@
+"""
+Generación de nómina en segundo plano.
+
+`POST /hr/payroll/generate/jobs` registra un `PayrollRun` y lo ejecuta con
+`run_payroll_job` (BackgroundTasks). La nómina se genera en una transacción
+propia; el progreso se confirma aparte, en otra sesión, para que
+`GET /hr/payroll/generate/jobs/{id}` lo vea mientras avanza.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.models.hr.payroll import PayrollRun
+from app.modules.hr.application.payroll_service import PayrollService
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+# Una ejecución activa sin progreso en este tiempo se da por muerta (proceso
+# reiniciado a mitad): no debe bloquear el mes para siempre.
+STALE_RUN_AFTER = timedelta(minutes=30)
+
+
+def _tenant_session(tenant_id: str, user_id: str | None) -> Session:
+    db = SessionLocal()
+    # after_begin aplica los GUCs de RLS a partir de db.info
+    db.info["tenant_id"] = str(tenant_id)
+    db.info["user_id"] = user_id
+    return db
+
+
+def _is_stale(run: PayrollRun) -> bool:
+    updated_at = run.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC)
+    return updated_at < datetime.now(UTC) - STALE_RUN_AFTER
+
+
+def create_payroll_run(
+    db: Session,
+    tenant_id: UUID,
+    payroll_month: str,
+    payroll_date: date,
+    created_by: UUID | None = None,
+) -> PayrollRun:
+    """Registra una ejecución ``pending``; falla si el mes ya tiene nómina o ejecución activa.
+
+    Las ejecuciones activas sin progreso desde ``STALE_RUN_AFTER`` se marcan
+    ``failed`` antes de comprobarlo.
+    """
+    existing = PayrollService._existing_payroll_for_month(db, tenant_id, payroll_month)
+    if existing is not None:
+        raise ValueError(
+            f"Payroll already exists for {payroll_month} with status {existing.status}"
+        )
+    tenant_key = PayrollService._db_tenant_id(db, tenant_id)
+    active = (
+        db.execute(
+            select(PayrollRun).where(
+                PayrollRun.tenant_id == tenant_key,
+                PayrollRun.payroll_month == payroll_month,
+                PayrollRun.status.in_(ACTIVE_STATUSES),
+            )
+        )
+        .scalars()
+        .first()
+    )
+    if active is not None:
+        if not _is_stale(active):
+            raise ValueError(f"Payroll generation already running for {payroll_month}")
+        active.status = "failed"
+        active.error = "Stale run: no progress"
+        db.flush()
+    run = PayrollRun(
+        tenant_id=tenant_key,
+        payroll_month=payroll_month,
+        payroll_date=payroll_date,
+        status="pending",
+        created_by=created_by,
+    )
+    # Dos peticiones a la vez pasan la comprobación: decide el índice único
+    try:
+        with db.begin_nested():
+            db.add(run)
+            db.flush()
+    except IntegrityError:
+        raise ValueError(f"Payroll generation already running for {payroll_month}") from None
+    return run
+
+
+def _update_run(db: Session, run_id: UUID, **values) -> None:
+    run = db.get(PayrollRun, run_id)
+    if run is None:
+        return
+    for key, value in values.items():
+        setattr(run, key, value)
+    db.commit()
+
+
+def run_payroll_job(tenant_id: str, run_id: UUID, user_id: str | None = None) -> None:
+    """Genera la nómina de la ejecución con sesiones propias (apta para BackgroundTasks)."""
+    status_db = _tenant_session(tenant_id, user_id)
+    db = _tenant_session(tenant_id, user_id)
+    try:
+        run = status_db.get(PayrollRun, run_id)
+        if run is None or run.status != "pending":
+            return
+        payroll_month, payroll_date = run.payroll_month, run.payroll_date
+        _update_run(status_db, run_id, status="running")
+
+        def _progress(processed: int, total: int) -> None:
+            _update_run(status_db, run_id, processed=processed, total=total)
+
+        # SQLite no admite un segundo escritor mientras la nómina está en curso
+        is_sqlite = db.get_bind().dialect.name == "sqlite"
+        try:
+            payroll = PayrollService.generate_payroll(
+                db,
+                UUID(str(tenant_id)),
+                payroll_month,
+                payroll_date,
+                progress=None if is_sqlite else _progress,
+            )
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("payroll run %s failed", run_id)
+            _update_run(status_db, run_id, status="failed", error=str(exc)[:500])
+            return
+        _update_run(
+            status_db,
+            run_id,
+            status="done",
+            payroll_id=payroll.id,
+            processed=payroll.total_employees,
+            total=payroll.total_employees,
+        )
+    finally:
+        db.close()
+        status_db.close()
@@ -2,21 +2,22 @@
 
 import json
 import logging
+from collections.abc import Callable, Sequence
 from datetime import UTC, date, datetime
 from decimal import Decimal, InvalidOperation
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import desc, select, text
-from sqlalchemy.orm import Session
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session, lazyload
 
 from app.models.company.company_settings import CompanySettings
 from app.models.expenses.expense import Expense
-from app.models.hr.attendance import TimeEntry
-from app.models.hr.employee import Employee, EmployeeSalary
-from app.models.hr.payroll import Payroll, PayrollDetail, PayrollTax
+from app.models.hr.employee import Employee
+from app.models.hr.payroll import Payroll, PayrollTax
 from app.models.hr.payslip import PaymentSlip
 from app.models.tenant import Tenant
+from app.modules.hr.application import payroll_batch
 from app.modules.hr.application.compensation import (
     month_bounds,
     normalize_payment_mode,
@@ -666,16 +667,20 @@ class PayrollService:
         tenant_id: UUID,
         payroll_month: str,  # "2026-02"
         payroll_date: date,
+        *,
+        progress: Callable[[int, int], None] | None = None,
     ) -> Payroll:
         """
         Genera nómina para todos los empleados activos del mes.
 
         Proceso:
         1. Obtener empleados activos
-        2. Por cada empleado: calcular salario neto
-        3. Crear Payroll header
-        4. Crear PayrollDetail para cada empleado
+        2. Precargar salarios vigentes y fichajes (consultas agrupadas)
+        3. Calcular cada detalle en memoria
+        4. Insertar detalles y recibos en bloque
         5. Actualizar totales
+
+        ``progress(procesados, total)`` se invoca tras cada lote de empleados.
         """
         existing_payroll = PayrollService._existing_payroll_for_month(db, tenant_id, payroll_month)
         if existing_payroll is not None:
@@ -684,9 +689,12 @@ class PayrollService:
             )
 
         # 1. Obtener empleados activos
+        # (sin las relaciones selectin: fichajes y salarios se precargan filtrados)
         employees = (
             db.execute(
-                select(Employee).where(
+                select(Employee)
+                .options(lazyload("*"))
+                .where(
                     Employee.tenant_id == PayrollService._db_tenant_id(db, tenant_id),
                     Employee.status == "ACTIVE",
                 )
@@ -698,9 +706,42 @@ class PayrollService:
         if not employees:
             raise ValueError("No active employees found")
 
-        # 2. Crear Payroll header
+        year = int(payroll_month[:4])
+        month_start, month_end = month_bounds(payroll_month)
+        period_end = min(month_end, payroll_date)
+        tenant_context = PayrollService._tenant_payroll_context(db, tenant_id)
+        country_code = tenant_context["country_code"]
+        payroll_parameters = PayrollService.get_payroll_parameters(
+            db, tenant_id, country_code, year
+        )
+        payroll_rules = PayrollService._payroll_rules(
+            country_code,
+            tenant_context.get("payroll_settings"),
+            payroll_parameters,
+        )
+
+        # 2. Precarga: salario vigente y fichajes solo de quien cobra por día/hora
+        employee_ids = [employee.id for employee in employees]
+        salaries = payroll_batch.load_current_salaries(db, employee_ids, period_end)
+        payment_modes: dict[str, str] = {}
+        for employee in employees:
+            salary_rec = salaries.get(str(employee.id))
+            if salary_rec is None:
+                raise ValueError(f"No salary found for employee {employee.id}")
+            payment_modes[str(employee.id)] = normalize_payment_mode(
+                parse_salary_notes(salary_rec.notes).get("payment_mode")
+            )
+        entries = payroll_batch.load_work_entries(
+            db,
+            [e.id for e in employees if payment_modes[str(e.id)] != "monthly"],
+            month_start,
+            period_end,
+        )
+
+        # 3. Crear Payroll header
+        tenant_key = PayrollService._db_tenant_id(db, tenant_id)
         payroll = Payroll(
-            tenant_id=PayrollService._db_tenant_id(db, tenant_id),
+            tenant_id=tenant_key,
             payroll_month=payroll_month,
             payroll_date=payroll_date,
             status="DRAFT",
@@ -709,69 +750,71 @@ class PayrollService:
         db.add(payroll)
         db.flush()
 
-        # 3. Procesar cada empleado
         total_gross = Decimal("0")
         total_irpf = Decimal("0")
         total_ss_employee = Decimal("0")
-        total_ss_employer = Decimal("0")
         total_deductions = Decimal("0")
-
-        year = int(payroll_month[:4])
-        tenant_context = PayrollService._tenant_payroll_context(db, tenant_id)
-        payroll_parameters = PayrollService.get_payroll_parameters(
-            db, tenant_id, tenant_context["country_code"], year
-        )
-        payroll_rules = PayrollService._payroll_rules(
-            tenant_context["country_code"],
-            tenant_context.get("payroll_settings"),
-            payroll_parameters,
+        valid_until = date(
+            year if payroll_month.endswith("12") else year,
+            int(payroll_month[5:]) + 1 if not payroll_month.endswith("12") else 1,
+            1,
         )
 
-        for employee in employees:
-            detail = PayrollService._calculate_employee_payroll(
-                db,
-                employee,
-                payroll_month,
-                year,
-                payroll_date=payroll_date,
-                country_code=tenant_context["country_code"],
-                payroll_rules=payroll_rules,
-            )
-            detail.payroll_id = payroll.id
-
-            total_gross += detail.gross_salary
-            total_irpf += detail.irpf
-            total_ss_employee += detail.social_security
-            total_deductions += detail.total_deductions
-
-            db.add(detail)
-            db.flush()
-
-            # Crear PaymentSlip
-            payslip = PaymentSlip(
-                tenant_id=PayrollService._db_tenant_id(db, tenant_id),
-                payroll_detail_id=detail.id,
-                employee_id=employee.id,
-                access_token=f"slip_{detail.id}_{datetime.now(UTC).timestamp()}",
-                valid_until=date(
-                    year if payroll_month.endswith("12") else year,
-                    int(payroll_month[5:]) + 1 if not payroll_month.endswith("12") else 1,
-                    1,
-                ),
-                status="GENERATED",
-            )
-            db.add(payslip)
+        # 4. Calcular en memoria e insertar por lotes
+        processed = 0
+        for batch in payroll_batch.chunked(employees):
+            details: list[dict[str, Any]] = []
+            payslips: list[dict[str, Any]] = []
+            for employee in batch:
+                key = str(employee.id)
+                salary_rec = salaries[key]
+                detail = PayrollService._employee_detail_values(
+                    employee,
+                    Decimal(str(salary_rec.salary_amount or 0)),
+                    payment_modes[key],
+                    entries.get(key, []),
+                    month_start=month_start,
+                    month_end=period_end,
+                    year=year,
+                    country_code=country_code,
+                    payroll_rules=payroll_rules,
+                )
+                detail["id"] = uuid4()
+                detail["payroll_id"] = payroll.id
+                details.append(detail)
+
+                total_gross += detail["gross_salary"]
+                total_irpf += detail["irpf"]
+                total_ss_employee += detail["social_security"]
+                total_deductions += detail["total_deductions"]
+
+                # Crear PaymentSlip
+                payslips.append(
+                    {
+                        "id": uuid4(),
+                        "tenant_id": tenant_key,
+                        "payroll_detail_id": detail["id"],
+                        "employee_id": employee.id,
+                        "access_token": (f"slip_{detail['id']}_{datetime.now(UTC).timestamp()}"),
+                        "valid_until": valid_until,
+                        "status": "GENERATED",
+                    }
+                )
+            payroll_batch.insert_payroll_lines(db, details, payslips)
+            processed += len(batch)
+            if progress is not None:
+                progress(processed, len(employees))
 
         # Calcular SS empleador
         total_ss_employer = PayrollService._social_security_amount(
             total_gross,
-            country_code=tenant_context["country_code"],
+            country_code=country_code,
             year=year,
             employee=False,
             payroll_rules=payroll_rules,
         )
 
-        # 4. Actualizar totales en Payroll
+        # 5. Actualizar totales en Payroll
         payroll.total_gross = total_gross
         payroll.total_irpf = total_irpf
         payroll.total_social_security_employee = total_ss_employee
@@ -797,53 +840,31 @@ class PayrollService:
             db.add(tax)
 
         db.flush()
+        # Los detalles se insertaron fuera del ORM: que la relación se recargue
+        db.expire(payroll, ["details"])
         return payroll
 
     @staticmethod
-    def _calculate_employee_payroll(
-        db: Session,
+    def _employee_detail_values(
         employee: Employee,
-        payroll_month: str,
-        year: int,
+        rate_amount: Decimal,
+        payment_mode: str,
+        entries: Sequence[Any],
         *,
-        payroll_date: date,
+        month_start: date,
+        month_end: date,
+        year: int,
         country_code: str,
         payroll_rules: dict[str, Any],
-    ) -> PayrollDetail:
-        """Calcula salario neto para un empleado."""
-
-        # Obtener salary vigente
-        month_start, month_end = month_bounds(payroll_month)
-        period_end = min(month_end, payroll_date)
-        salary_rec = db.execute(
-            select(EmployeeSalary)
-            .where(
-                EmployeeSalary.employee_id == employee.id,
-                EmployeeSalary.effective_date <= period_end,
-            )
-            .order_by(
-                EmployeeSalary.effective_date.desc(),
-                desc(EmployeeSalary.created_at),
-                desc(EmployeeSalary.id),
-            )
-            .limit(1)
-        ).scalar_one_or_none()
-
-        if not salary_rec:
-            raise ValueError(f"No salary found for employee {employee.id}")
-
-        salary_amount = Decimal(str(salary_rec.salary_amount or 0))
-        payment_mode = normalize_payment_mode(
-            parse_salary_notes(salary_rec.notes).get("payment_mode")
-        )
-        gross = PayrollService._calculate_gross_salary(
-            db,
+    ) -> dict[str, Any]:
+        """Calcula salario neto para un empleado (columnas de PayrollDetail)."""
+        gross, notes = PayrollService._gross_salary_and_notes(
             employee=employee,
-            payroll_month=payroll_month,
             payment_mode=payment_mode,
-            rate_amount=salary_amount,
+            rate_amount=rate_amount,
+            entries=entries,
             month_start=month_start,
-            month_end=period_end,
+            month_end=month_end,
             payroll_rules=payroll_rules,
         )
 
@@ -869,112 +890,32 @@ class PayrollService:
         )
 
         total_deductions = irpf + ss_employee + mutual
-        net = gross - total_deductions
-
-        detail = PayrollDetail(
-            employee_id=employee.id,
-            gross_salary=gross,
-            irpf=irpf,
-            social_security=ss_employee,
-            mutual_insurance=mutual,
-            other_deductions=Decimal("0"),
-            total_deductions=total_deductions,
-            net_salary=net,
-            notes=PayrollService._payroll_detail_notes(
-                db,
-                employee=employee,
-                payment_mode=payment_mode,
-                rate_amount=salary_amount,
-                month_start=month_start,
-                month_end=period_end,
-                payroll_rules=payroll_rules,
-            ),
-        )
-
-        return detail
-
-    @staticmethod
-    def _work_entries(
-        db: Session,
-        *,
-        employee_id: UUID,
-        month_start: date,
-        month_end: date,
-    ) -> list[TimeEntry]:
-        return (
-            db.execute(
-                select(TimeEntry).where(
-                    TimeEntry.employee_id == employee_id,
-                    TimeEntry.entry_type == "trabajo",
-                    TimeEntry.entry_date >= month_start,
-                    TimeEntry.entry_date <= month_end,
-                )
-            )
-            .scalars()
-            .all()
-        )
+        return {
+            "employee_id": employee.id,
+            "gross_salary": gross,
+            "irpf": irpf,
+            "social_security": ss_employee,
+            "mutual_insurance": mutual,
+            "other_deductions": Decimal("0"),
+            "total_deductions": total_deductions,
+            "net_salary": gross - total_deductions,
+            "notes": notes,
+        }
 
     @staticmethod
-    def _calculate_gross_salary(
-        db: Session,
+    def _gross_salary_and_notes(
         *,
         employee: Employee,
-        payroll_month: str,
         payment_mode: str,
         rate_amount: Decimal,
+        entries: Sequence[Any],
         month_start: date,
         month_end: date,
         payroll_rules: dict[str, Any],
-    ) -> Decimal:
+    ) -> tuple[Decimal, str | None]:
         if payment_mode == "monthly":
-            return rate_amount
-
-        entries = PayrollService._work_entries(
-            db,
-            employee_id=employee.id,
-            month_start=month_start,
-            month_end=month_end,
-        )
-        if payment_mode == "daily":
-            days_worked = len({entry.entry_date for entry in entries})
-            if days_worked == 0:
-                strategy = payroll_rules.get("daily_without_entries_strategy", "none")
-                fallback_range = PayrollService._daily_fallback_range(
-                    employee, month_start, month_end
-                )
-                if fallback_range is None:
-                    return Decimal("0")
-                if strategy == "business_days":
-                    days_worked = PayrollService._count_business_days(*fallback_range)
-                elif strategy == "single_day":
-                    days_worked = 1
-                else:
-                    return Decimal("0")
-            return rate_amount * Decimal(days_worked)
-        if payment_mode == "hourly":
-            hours_worked = sum((time_entry_hours(entry) for entry in entries), Decimal("0"))
-            return rate_amount * hours_worked
-        raise ValueError(f"Unsupported payment mode {payment_mode} for employee {employee.id}")
+            return rate_amount, "Modalidad mensual"
 
-    @staticmethod
-    def _payroll_detail_notes(
-        db: Session,
-        *,
-        employee: Employee,
-        payment_mode: str,
-        rate_amount: Decimal,
-        month_start: date,
-        month_end: date,
-        payroll_rules: dict[str, Any],
-    ) -> str | None:
-        if payment_mode == "monthly":
-            return "Modalidad mensual"
-        entries = PayrollService._work_entries(
-            db,
-            employee_id=employee.id,
-            month_start=month_start,
-            month_end=month_end,
-        )
         if payment_mode == "daily":
             days_worked = len({entry.entry_date for entry in entries})
             if days_worked == 0:
@@ -983,20 +924,27 @@ class PayrollService:
                     employee, month_start, month_end
                 )
                 if fallback_range is None:
-                    return f"Modalidad diaria: 0 dias x {rate_amount}"
+                    return Decimal("0"), f"Modalidad diaria: 0 dias x {rate_amount}"
                 if strategy == "business_days":
                     days_worked = PayrollService._count_business_days(*fallback_range)
                     return (
-                        f"Modalidad diaria estimada: {days_worked} dias laborables x {rate_amount}"
+                        rate_amount * Decimal(days_worked),
+                        f"Modalidad diaria estimada: {days_worked} dias laborables x {rate_amount}",
                     )
                 if strategy == "single_day":
-                    return f"Modalidad diaria directa: 1 dia x {rate_amount}"
-                return f"Modalidad diaria: 0 dias x {rate_amount}"
-            return f"Modalidad diaria: {days_worked} dias x {rate_amount}"
+                    return rate_amount, f"Modalidad diaria directa: 1 dia x {rate_amount}"
+                return Decimal("0"), f"Modalidad diaria: 0 dias x {rate_amount}"
+            return (
+                rate_amount * Decimal(days_worked),
+                f"Modalidad diaria: {days_worked} dias x {rate_amount}",
+            )
         if payment_mode == "hourly":
             hours_worked = sum((time_entry_hours(entry) for entry in entries), Decimal("0"))
-            return f"Modalidad por hora: {hours_worked.normalize()} h x {rate_amount}"
-        return None
+            return (
+                rate_amount * hours_worked,
+                f"Modalidad por hora: {hours_worked.normalize()} h x {rate_amount}",
+            )
+        raise ValueError(f"Unsupported payment mode {payment_mode} for employee {employee.id}")
 
     @staticmethod
     def confirm_payroll(db: Session, payroll_id: UUID, confirmed_by: UUID) -> Payroll:
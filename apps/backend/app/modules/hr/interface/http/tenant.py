@@ -4,7 +4,7 @@ from datetime import UTC, date, datetime, time
 from decimal import Decimal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -16,9 +16,10 @@ from app.db.rls import ensure_rls
 from app.models.company.company_settings import CompanySettings
 from app.models.hr.attendance import TimeEntry, VacationRequest
 from app.models.hr.employee import Employee, EmployeeSalary
-from app.models.hr.payroll import Payroll, PayrollDetail
+from app.models.hr.payroll import Payroll, PayrollDetail, PayrollRun
 from app.models.hr.payslip import PaymentSlip
 from app.models.tenant import Tenant
+from app.modules.hr.application import payroll_jobs
 from app.modules.hr.application.compensation import (
     build_salary_notes,
     current_payment_mode,
@@ -244,6 +245,21 @@ class PayrollCreateRequest(BaseModel):
     payroll_date: date
 
 
+class PayrollRunResponse(BaseModel):
+    """Estado de una generación de nómina en segundo plano."""
+
+    id: UUID
+    payroll_month: str
+    payroll_date: date
+    status: str
+    processed: int
+    total: int
+    payroll_id: UUID | None = None
+    error: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class PayrollUpdateRequest(BaseModel):
     payroll_month: str | None = None
     payroll_date: date | None = None
@@ -507,7 +523,7 @@ class MyPayrollListResponse(BaseModel):
 
 
 @router.get("/me", response_model=MeEmployeeResponse)
-async def get_my_employee_profile(
+def get_my_employee_profile(
     request: Request,
     db: Session = Depends(get_db),
 ):
@@ -554,7 +570,7 @@ async def get_my_employee_profile(
 
 
 @router.get("/me/payroll", response_model=MyPayrollListResponse)
-async def get_my_payroll(
+def get_my_payroll(
     request: Request,
     db: Session = Depends(get_db),
 ):
@@ -617,7 +633,7 @@ async def get_my_payroll(
 
 
 @router.get("/employees", response_model=EmployeeListResponse)
-async def list_employees(
+def list_employees(
     search: str | None = None,
     estado: str | None = None,
     departamento_id: str | None = Query(default=None, alias="departmentId"),
@@ -648,7 +664,7 @@ async def list_employees(
 
 
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
-async def get_employee(
+def get_employee(
     employee_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -661,7 +677,7 @@ async def get_employee(
 
 
 @router.post("/employees", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
-async def create_employee(
+def create_employee(
     request: EmployeeCreateRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -711,7 +727,7 @@ async def create_employee(
 
 
 @router.put("/employees/{employee_id}", response_model=EmployeeResponse)
-async def update_employee(
+def update_employee(
     employee_id: UUID,
     request: EmployeeUpdateRequest,
     db: Session = Depends(get_db),
@@ -792,7 +808,7 @@ async def update_employee(
 
 
 @router.delete("/employees/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_employee(
+def delete_employee(
     employee_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -806,7 +822,7 @@ async def delete_employee(
 
 
 @router.get("/vacations", response_model=VacationListResponse)
-async def list_vacations(
+def list_vacations(
     empleadoId: UUID | None = None,
     status_filter: str | None = Query(default=None, alias="status"),
     startDate: date | None = None,
@@ -829,7 +845,7 @@ async def list_vacations(
 
 
 @router.get("/vacations/{vacation_id}", response_model=VacationResponse)
-async def get_vacation(
+def get_vacation(
     vacation_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -842,7 +858,7 @@ async def get_vacation(
 
 
 @router.post("/vacations", response_model=VacationResponse, status_code=status.HTTP_201_CREATED)
-async def create_vacation(
+def create_vacation(
     request: VacationCreateRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -871,7 +887,7 @@ async def create_vacation(
 
 
 @router.post("/vacations/{vacation_id}/approve", response_model=VacationResponse)
-async def approve_vacation(
+def approve_vacation(
     vacation_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -890,7 +906,7 @@ async def approve_vacation(
 
 
 @router.post("/vacations/{vacation_id}/reject", response_model=VacationResponse)
-async def reject_vacation(
+def reject_vacation(
     vacation_id: UUID,
     request: VacationRejectRequest,
     db: Session = Depends(get_db),
@@ -910,7 +926,7 @@ async def reject_vacation(
 
 
 @router.get("/timekeeping", response_model=TimeEntryListResponse)
-async def list_time_entries(
+def list_time_entries(
     empleadoId: UUID | None = None,
     fromDate: date | None = None,
     toDate: date | None = None,
@@ -940,7 +956,7 @@ async def list_time_entries(
 
 
 @router.post("/timekeeping", response_model=TimeEntryResponse, status_code=status.HTTP_201_CREATED)
-async def create_time_entry(
+def create_time_entry(
     request: TimeEntryCreateRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -984,7 +1000,7 @@ async def create_time_entry(
 
 
 @router.patch("/timekeeping/{entry_id}", response_model=TimeEntryResponse)
-async def update_time_entry(
+def update_time_entry(
     entry_id: UUID,
     request: TimeEntryUpdateRequest,
     db: Session = Depends(get_db),
@@ -1018,7 +1034,7 @@ async def update_time_entry(
 @router.post(
     "/payroll/generate", response_model=PayrollResponse, status_code=status.HTTP_201_CREATED
 )
-async def generate_payroll(
+def generate_payroll(
     request: PayrollCreateRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1051,8 +1067,54 @@ async def generate_payroll(
         )
 
 
+@router.post(
+    "/payroll/generate/jobs",
+    response_model=PayrollRunResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def generate_payroll_job(
+    request: PayrollCreateRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(with_access_claims),
+) -> PayrollRunResponse:
+    """
+    Genera la nómina del mes en segundo plano (plantillas grandes).
+
+    Consultar el progreso con ``GET /payroll/generate/jobs/{run_id}``.
+    """
+    tenant_id = _as_uuid(claims["tenant_id"])
+    user_id = _as_uuid(claims.get("user_id"))
+    try:
+        run = payroll_jobs.create_payroll_run(
+            db, tenant_id, request.payroll_month, request.payroll_date, created_by=user_id
+        )
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    background_tasks.add_task(
+        payroll_jobs.run_payroll_job, str(tenant_id), run.id, str(user_id) if user_id else None
+    )
+    return PayrollRunResponse.model_validate(run)
+
+
+@router.get("/payroll/generate/jobs/{run_id}", response_model=PayrollRunResponse)
+def get_payroll_job(
+    run_id: UUID,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(with_access_claims),
+) -> PayrollRunResponse:
+    tenant_id = _as_uuid(claims["tenant_id"])
+    run = db.get(PayrollRun, run_id)
+    if not run or not _same_identifier(run.tenant_id, tenant_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payroll run not found")
+    return PayrollRunResponse.model_validate(run)
+
+
 @router.get("/payroll", response_model=PayrollListResponse)
-async def list_payrolls(
+def list_payrolls(
     payroll_month: str | None = Query(default=None, alias="payrollMonth"),
     status_filter: str | None = Query(default=None, alias="status"),
     db: Session = Depends(get_db),
@@ -1073,7 +1135,7 @@ async def list_payrolls(
 
 
 @router.get("/payroll/{payroll_id}", response_model=PayrollResponse)
-async def get_payroll(
+def get_payroll(
     payroll_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1095,7 +1157,7 @@ async def get_payroll(
 
 
 @router.put("/payroll/{payroll_id}", response_model=PayrollResponse)
-async def update_payroll(
+def update_payroll(
     payroll_id: UUID,
     payload: PayrollUpdateRequest,
     db: Session = Depends(get_db),
@@ -1129,7 +1191,7 @@ async def update_payroll(
 
 
 @router.post("/payroll/{payroll_id}/confirm", response_model=PayrollResponse)
-async def confirm_payroll(
+def confirm_payroll(
     payroll_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1159,7 +1221,7 @@ async def confirm_payroll(
 
 
 @router.post("/payroll/{payroll_id}/mark-paid", response_model=PayrollResponse)
-async def mark_payroll_paid(
+def mark_payroll_paid(
     payroll_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1188,7 +1250,7 @@ async def mark_payroll_paid(
 
 
 @router.delete("/payroll/{payroll_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_payroll(
+def delete_payroll(
     payroll_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1215,7 +1277,7 @@ async def delete_payroll(
 
 
 @router.get("/payroll/{payroll_detail_id}/payslip", response_model=PaymentSlipResponse)
-async def get_payslip(
+def get_payslip(
     payroll_detail_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1250,7 +1312,7 @@ async def get_payslip(
 
 
 @router.get("/payroll/{payroll_detail_id}/payslip/download")
-async def download_payslip(
+def download_payslip(
     payroll_detail_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -115,7 +115,7 @@ def _seed_id_types_for_tenant(db: Session, tenant_id: UUID, country_code: str) -
 
 
 @router.get("/statuses")
-async def get_employee_statuses(
+def get_employee_statuses(
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
 ):
@@ -126,7 +126,7 @@ async def get_employee_statuses(
 
 
 @router.get("/contract-types")
-async def get_contract_types(
+def get_contract_types(
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
 ):
@@ -137,7 +137,7 @@ async def get_contract_types(
 
 
 @router.get("/deduction-types")
-async def get_deduction_types(
+def get_deduction_types(
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
 ):
@@ -148,7 +148,7 @@ async def get_deduction_types(
 
 
 @router.get("/gender-types")
-async def get_gender_types(
+def get_gender_types(
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
 ):
@@ -159,7 +159,7 @@ async def get_gender_types(
 
 
 @router.get("/document-id-types")
-async def get_document_id_types(
+def get_document_id_types(
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
     country_code: str | None = None,
@@ -177,7 +177,7 @@ async def get_document_id_types(
 
 
 @router.get("/document-id-types/{code}")
-async def get_document_id_type_by_code(
+def get_document_id_type_by_code(
     code: str,
     db: Session = Depends(get_db),
     tenant_id: UUID = Header(...),
@@ -206,7 +206,7 @@ def _operational_role_presets(sector: str | None) -> list[dict]:
 
 
 @router.get("", response_model=list[CompanyRoleOut])
-async def list_roles(
+def list_roles(
     db: Session = Depends(get_db),
     claims: dict = Depends(require_scope("tenant")),
 ):
@@ -232,7 +232,7 @@ async def list_roles(
 
 
 @router.post("/seed-operational", response_model=CompanyRoleSeedSummary)
-async def seed_operational_roles(
+def seed_operational_roles(
     db: Session = Depends(get_db),
     claims: dict = Depends(require_scope("tenant")),
 ):
@@ -298,7 +298,7 @@ async def seed_operational_roles(
 
 
 @router.get("/available-permissions", response_model=list[GlobalActionPermissionSchema])
-async def list_available_permissions(
+def list_available_permissions(
     db: Session = Depends(get_db),
     claims: dict = Depends(require_scope("tenant")),
 ):
@@ -307,7 +307,7 @@ async def list_available_permissions(
 
 
 @router.get("/{role_id}", response_model=CompanyRoleOut)
-async def get_role(
+def get_role(
     role_id: UUID,
     db: Session = Depends(get_db),
     _claims: dict = Depends(require_scope("tenant")),
@@ -321,7 +321,7 @@ async def get_role(
 
 
 @router.post("", response_model=CompanyRoleOut, status_code=status.HTTP_201_CREATED)
-async def create_role(
+def create_role(
     payload: CompanyRoleCreate,
     db: Session = Depends(get_db),
     claims: dict = Depends(require_scope("tenant")),
@@ -370,7 +370,7 @@ async def create_role(
 
 
 @router.patch("/{role_id}", response_model=CompanyRoleOut)
-async def update_role(
+def update_role(
     role_id: UUID,
     payload: CompanyRoleUpdate,
     db: Session = Depends(get_db),
@@ -417,7 +417,7 @@ async def update_role(
 
 
 @router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_role(
+def delete_role(
     role_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(require_scope("tenant")),
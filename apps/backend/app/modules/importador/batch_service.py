@@ -3,6 +3,8 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile
@@ -14,9 +16,17 @@ from app.models.importador import ImpBatchImport, ImpBatchItem
 
 from . import crud
 from .auto_recipe import should_reprocess_existing_document
-from .ocr_service import detect_file_type, iter_zip_entries
+from .ocr_service import (
+    detect_file_type,
+    extract_zip_entries_to_dir,
+    iter_zip_entries,
+    supported_import_extensions,
+)
 from .snapshot_learning import bootstrap_learning_from_existing_document
 
+if TYPE_CHECKING:
+    from .upload_service import UploadSession
+
 logger = logging.getLogger(__name__)
 
 
@@ -89,6 +99,21 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def validate_file_size(filename: str, file_size: int, tipo_archivo: str) -> None:
+    """413 si el fichero supera ``IMPORTS_MAX_FILE_SIZE_MB`` (Excel queda exento)."""
+    if tipo_archivo in ("XLSX", "XLS"):
+        return
+    max_file_size_mb = _env_int("IMPORTS_MAX_FILE_SIZE_MB", 16)
+    if file_size > max(1, max_file_size_mb) * 1024 * 1024:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Archivo '{filename}' excede el limite de {max_file_size_mb} MB "
+                f"({round(file_size / (1024 * 1024), 1)} MB)."
+            ),
+        )
+
+
 def _batch_tracking_schema_error() -> HTTPException:
     return HTTPException(
         status_code=503,
@@ -163,7 +188,8 @@ def _ensure_batch_tracking_storage(db: Session) -> bool:
 
 async def enqueue_async_batch(
     *,
-    files: list[UploadFile],
+    files: list[UploadFile] | None = None,
+    uploads: list[UploadSession] | None = None,
     tenant_id: UUID,
     user_id: str,
     force: bool,
@@ -171,20 +197,35 @@ async def enqueue_async_batch(
     reprocess_mode: str = "fast",
     db: Session,
 ) -> list[dict]:
-    from .tasks import decide_initial_lane, process_document_task, store_payload
+    """Crea el lote y encola sus documentos.
+
+    ``files`` llega como multipart (en memoria); ``uploads`` son subidas por
+    trozos ya en disco (``upload_service``): se hashean y expanden desde disco
+    y su fichero se mueve al directorio de payloads sin leerlo entero.
+    """
+    from .tasks import decide_initial_lane, process_document_task, store_payload, store_payload_file
+    from .upload_service import finalize_upload
+
+    files = files or []
+    uploads = uploads or []
+
+    def _store_payload(doc_id: str, payload: bytes | Path) -> None:
+        if isinstance(payload, Path):
+            # Subida por trozos: el fichero ya está en disco, se mueve sin leerlo
+            store_payload_file(doc_id, payload)
+        else:
+            store_payload(doc_id, payload)
 
     max_files_per_request = _env_int("IMPORTADOR_MAX_FILES_PER_REQUEST", 100)
     max_queue_per_tenant = _env_int("IMPORTADOR_MAX_QUEUE_PER_TENANT", 100)
-    max_file_size_mb = _env_int("IMPORTS_MAX_FILE_SIZE_MB", 16)
     max_batch_size_mb = _env_int("IMPORTS_MAX_UPLOAD_MB", 50)
-    max_file_size_bytes = max(1, max_file_size_mb) * 1024 * 1024
     max_batch_size_bytes = max(1, max_batch_size_mb) * 1024 * 1024
 
-    if len(files) > max_files_per_request:
+    if len(files) + len(uploads) > max_files_per_request:
         raise HTTPException(
             status_code=413,
             detail=(
-                f"Demasiados archivos en una sola subida ({len(files)}). "
+                f"Demasiados archivos en una sola subida ({len(files) + len(uploads)}). "
                 f"Limite actual: {max_files_per_request}."
             ),
         )
@@ -224,6 +265,17 @@ async def enqueue_async_batch(
     def _register_request_hash(file_hash: str, bucket_name: str, index: int) -> None:
         request_hash_map[file_hash] = (bucket_name, index)
 
+    def _append_empty_zip(filename: str, file_size: int, order: int) -> None:
+        failed_uploads.append(
+            {
+                "filename": filename,
+                "file_size": file_size,
+                "tipo_archivo": "ZIP",
+                "order": order,
+                "error_detalle": "ZIP vacio o sin ficheros soportados",
+            }
+        )
+
     def _iter_incoming_entries(
         filename: str,
         file_bytes: bytes,
@@ -234,15 +286,7 @@ async def enqueue_async_batch(
             return [(filename, file_bytes, tipo_archivo, order)]
         entries = list(iter_zip_entries(file_bytes, db=db))
         if not entries:
-            failed_uploads.append(
-                {
-                    "filename": filename,
-                    "file_size": len(file_bytes),
-                    "tipo_archivo": tipo_archivo,
-                    "order": order,
-                    "error_detalle": "ZIP vacio o sin ficheros soportados",
-                }
-            )
+            _append_empty_zip(filename, len(file_bytes), order)
             return []
         return [
             (
@@ -254,160 +298,209 @@ async def enqueue_async_batch(
             for index, (inner_name, inner_bytes) in enumerate(entries)
         ]
 
-    for file in files:
-        filename = (file.filename or "unknown").strip()
-        if _should_skip_import_file(filename):
-            logger.info("Ignorando archivo temporal/no valido en importador: %s", filename)
-            continue
-
-        file_bytes = await file.read()
-        file_size = len(file_bytes)
-        if file_size <= 0:
-            logger.info("Ignorando archivo vacio en importador: %s", filename)
-            continue
-
-        tipo_archivo = detect_file_type(filename, db)
-        _es_excel = tipo_archivo in ("XLSX", "XLS")
-        if not _es_excel and file_size > max_file_size_bytes:
-            raise HTTPException(
-                status_code=413,
-                detail=(
-                    f"Archivo '{filename}' excede el limite de {max_file_size_mb} MB "
-                    f"({round(file_size / (1024 * 1024), 1)} MB)."
-                ),
+    async def _iter_upload_entries(
+        upload: UploadSession, tipo_archivo: str, order: int
+    ) -> list[tuple[str, Path, int, str, str, int]]:
+        file_hash = await finalize_upload(upload)
+        if tipo_archivo != "ZIP":
+            return [
+                (upload.filename, upload.data_path, upload.size, file_hash, tipo_archivo, order)
+            ]
+        entries = await asyncio.to_thread(
+            extract_zip_entries_to_dir,
+            upload.data_path,
+            upload.dir / "entries",
+            supported_import_extensions(db),
+        )
+        if not entries:
+            _append_empty_zip(upload.filename, upload.size, order)
+            return []
+        return [
+            (
+                f"{upload.filename}::{inner_name}",
+                inner_path,
+                inner_size,
+                inner_hash,
+                detect_file_type(inner_name, db),
+                order + index,
             )
+            for index, (inner_name, inner_path, inner_size, inner_hash) in enumerate(entries)
+        ]
 
-        incoming_entries = _iter_incoming_entries(filename, file_bytes, tipo_archivo, order_counter)
-        order_counter += max(1, len(incoming_entries))
-
-        for entry_filename, entry_bytes, entry_tipo_archivo, entry_order in incoming_entries:
-            entry_size = len(entry_bytes)
-            entry_is_excel = entry_tipo_archivo in ("XLSX", "XLS")
-            if not entry_is_excel:
-                batch_size_bytes += entry_size
-                if batch_size_bytes > max_batch_size_bytes:
-                    raise HTTPException(
-                        status_code=413,
-                        detail=(
-                            f"El lote excede el limite de {max_batch_size_mb} MB. "
-                            "Divide la importacion en bloques mas pequenos."
-                        ),
-                    )
+    async def _incoming_entries():
+        """``(nombre, payload, tamaño, sha256, tipo, orden)`` de cada fichero a importar.
 
-            entry_hash = hashlib.sha256(entry_bytes).hexdigest()
-            if _append_request_duplicate(
-                entry_hash,
-                _alias_payload(entry_filename, entry_size, entry_hash, entry_order),
-            ):
+        ``payload`` son los bytes (multipart) o la ruta en disco (subida por trozos).
+        """
+        nonlocal order_counter
+        for file in files:
+            filename = (file.filename or "unknown").strip()
+            if _should_skip_import_file(filename):
+                logger.info("Ignorando archivo temporal/no valido en importador: %s", filename)
                 continue
 
-            existing = (
-                None
-                if force and not entry_hash
-                else crud.find_existing_documento(
-                    db,
-                    tenant_id,
+            file_bytes = await file.read()
+            file_size = len(file_bytes)
+            if file_size <= 0:
+                logger.info("Ignorando archivo vacio en importador: %s", filename)
+                continue
+
+            tipo_archivo = detect_file_type(filename, db)
+            validate_file_size(filename, file_size, tipo_archivo)
+
+            incoming = _iter_incoming_entries(filename, file_bytes, tipo_archivo, order_counter)
+            order_counter += max(1, len(incoming))
+            for entry_filename, entry_bytes, entry_tipo_archivo, entry_order in incoming:
+                yield (
                     entry_filename,
-                    entry_size,
-                    entry_hash,
-                    usuario_id=user_id,
+                    entry_bytes,
+                    len(entry_bytes),
+                    hashlib.sha256(entry_bytes).hexdigest(),
+                    entry_tipo_archivo,
+                    entry_order,
                 )
-            )
-            exact_hash_match = bool(existing and existing.hash_sha256 == entry_hash)
-            if existing:
-                if (
-                    isinstance(getattr(existing, "datos_confirmados", None), dict)
-                    and existing.datos_confirmados
-                ):
-                    bootstrap_learning_from_existing_document(db, existing, user_id)
-                learning_reprocess_needed = bool(
-                    exact_hash_match
-                    and existing.estado in ("CONFIRMED", "REVIEW")
-                    and should_reprocess_existing_document(db, existing)
+
+        for upload in uploads:
+            tipo_archivo = detect_file_type(upload.filename, db)
+            validate_file_size(upload.filename, upload.size, tipo_archivo)
+            incoming_uploads = await _iter_upload_entries(upload, tipo_archivo, order_counter)
+            order_counter += max(1, len(incoming_uploads))
+            for entry in incoming_uploads:
+                yield entry
+
+    async for (
+        entry_filename,
+        entry_payload,
+        entry_size,
+        entry_hash,
+        entry_tipo_archivo,
+        entry_order,
+    ) in _incoming_entries():
+        entry_is_excel = entry_tipo_archivo in ("XLSX", "XLS")
+        if not entry_is_excel:
+            batch_size_bytes += entry_size
+            if batch_size_bytes > max_batch_size_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=(
+                        f"El lote excede el limite de {max_batch_size_mb} MB. "
+                        "Divide la importacion en bloques mas pequenos."
+                    ),
                 )
 
-                if existing.estado in ("PENDING", "PROCESSING"):
-                    existing_matches.append(
-                        {
-                            "existing": existing,
-                            "filename": entry_filename,
-                            "file_size": entry_size,
-                            "file_hash": entry_hash,
-                            "order": entry_order,
-                            "aliases": [],
-                        }
-                    )
-                    _register_request_hash(entry_hash, "existing", len(existing_matches) - 1)
-                    continue
-
-                if learning_reprocess_needed and not force:
-                    rerun_existing.append(
-                        {
-                            "existing": existing,
-                            "filename": entry_filename,
-                            "file_bytes": entry_bytes,
-                            "file_size": entry_size,
-                            "file_hash": entry_hash,
-                            "tipo_archivo": entry_tipo_archivo,
-                            "rerun_reason": "learning_update",
-                            "order": entry_order,
-                            "aliases": [],
-                        }
-                    )
-                    _register_request_hash(entry_hash, "rerun", len(rerun_existing) - 1)
-                    continue
-
-                if existing.estado in ("CONFIRMED", "REVIEW") and not force:
-                    existing_matches.append(
-                        {
-                            "existing": existing,
-                            "filename": entry_filename,
-                            "file_size": entry_size,
-                            "file_hash": entry_hash,
-                            "order": entry_order,
-                            "aliases": [],
-                        }
-                    )
-                    _register_request_hash(entry_hash, "existing", len(existing_matches) - 1)
-                    continue
-
-                if exact_hash_match and existing.estado in ("FAILED", "REVIEW", "CONFIRMED"):
-                    rerun_existing.append(
-                        {
-                            "existing": existing,
-                            "filename": entry_filename,
-                            "file_bytes": entry_bytes,
-                            "file_size": entry_size,
-                            "file_hash": entry_hash,
-                            "tipo_archivo": entry_tipo_archivo,
-                            "rerun_reason": "manual",
-                            "order": entry_order,
-                            "aliases": [],
-                        }
-                    )
-                    _register_request_hash(entry_hash, "rerun", len(rerun_existing) - 1)
-                    continue
+        if _append_request_duplicate(
+            entry_hash,
+            _alias_payload(entry_filename, entry_size, entry_hash, entry_order),
+        ):
+            continue
 
-            predecessor = crud.find_latest_documento_by_name(
+        existing = (
+            None
+            if force and not entry_hash
+            else crud.find_existing_documento(
                 db,
                 tenant_id,
                 entry_filename,
-                exclude_hash_sha256=entry_hash,
+                entry_size,
+                entry_hash,
                 usuario_id=user_id,
             )
-            staged_uploads.append(
-                {
-                    "filename": entry_filename,
-                    "file_bytes": entry_bytes,
-                    "file_size": entry_size,
-                    "file_hash": entry_hash,
-                    "tipo_archivo": entry_tipo_archivo,
-                    "predecessor": predecessor,
-                    "order": entry_order,
-                    "aliases": [],
-                }
+        )
+        exact_hash_match = bool(existing and existing.hash_sha256 == entry_hash)
+        if existing:
+            if (
+                isinstance(getattr(existing, "datos_confirmados", None), dict)
+                and existing.datos_confirmados
+            ):
+                bootstrap_learning_from_existing_document(db, existing, user_id)
+            learning_reprocess_needed = bool(
+                exact_hash_match
+                and existing.estado in ("CONFIRMED", "REVIEW")
+                and should_reprocess_existing_document(db, existing)
             )
-            _register_request_hash(entry_hash, "staged", len(staged_uploads) - 1)
+
+            if existing.estado in ("PENDING", "PROCESSING"):
+                existing_matches.append(
+                    {
+                        "existing": existing,
+                        "filename": entry_filename,
+                        "file_size": entry_size,
+                        "file_hash": entry_hash,
+                        "order": entry_order,
+                        "aliases": [],
+                    }
+                )
+                _register_request_hash(entry_hash, "existing", len(existing_matches) - 1)
+                continue
+
+            if learning_reprocess_needed and not force:
+                rerun_existing.append(
+                    {
+                        "existing": existing,
+                        "filename": entry_filename,
+                        "payload": entry_payload,
+                        "file_size": entry_size,
+                        "file_hash": entry_hash,
+                        "tipo_archivo": entry_tipo_archivo,
+                        "rerun_reason": "learning_update",
+                        "order": entry_order,
+                        "aliases": [],
+                    }
+                )
+                _register_request_hash(entry_hash, "rerun", len(rerun_existing) - 1)
+                continue
+
+            if existing.estado in ("CONFIRMED", "REVIEW") and not force:
+                existing_matches.append(
+                    {
+                        "existing": existing,
+                        "filename": entry_filename,
+                        "file_size": entry_size,
+                        "file_hash": entry_hash,
+                        "order": entry_order,
+                        "aliases": [],
+                    }
+                )
+                _register_request_hash(entry_hash, "existing", len(existing_matches) - 1)
+                continue
+
+            if exact_hash_match and existing.estado in ("FAILED", "REVIEW", "CONFIRMED"):
+                rerun_existing.append(
+                    {
+                        "existing": existing,
+                        "filename": entry_filename,
+                        "payload": entry_payload,
+                        "file_size": entry_size,
+                        "file_hash": entry_hash,
+                        "tipo_archivo": entry_tipo_archivo,
+                        "rerun_reason": "manual",
+                        "order": entry_order,
+                        "aliases": [],
+                    }
+                )
+                _register_request_hash(entry_hash, "rerun", len(rerun_existing) - 1)
+                continue
+
+        predecessor = crud.find_latest_documento_by_name(
+            db,
+            tenant_id,
+            entry_filename,
+            exclude_hash_sha256=entry_hash,
+            usuario_id=user_id,
+        )
+        staged_uploads.append(
+            {
+                "filename": entry_filename,
+                "payload": entry_payload,
+                "file_size": entry_size,
+                "file_hash": entry_hash,
+                "tipo_archivo": entry_tipo_archivo,
+                "predecessor": predecessor,
+                "order": entry_order,
+                "aliases": [],
+            }
+        )
+        _register_request_hash(entry_hash, "staged", len(staged_uploads) - 1)
 
     if not staged_uploads and not existing_matches and not rerun_existing and not failed_uploads:
         raise HTTPException(status_code=400, detail="No hay archivos validos para importar.")
@@ -561,7 +654,7 @@ async def enqueue_async_batch(
     for item in sorted(rerun_existing, key=lambda current: int(current["order"])):
         existing = item["existing"]
         filename = str(item["filename"])
-        file_bytes = bytes(item["file_bytes"])
+        payload = item["payload"]
         file_size = int(item["file_size"])
         file_hash = str(item["file_hash"])
         tipo_archivo = str(item["tipo_archivo"])
@@ -613,7 +706,7 @@ async def enqueue_async_batch(
         )
         db.commit()
 
-        await asyncio.to_thread(store_payload, str(existing.id), file_bytes)
+        await asyncio.to_thread(_store_payload, str(existing.id), payload)
         if process_document_task:
             _rerun_snap_id = (
                 str(recipe_snapshot_id)
@@ -680,7 +773,7 @@ async def enqueue_async_batch(
 
     for item in sorted(staged_uploads, key=lambda current: int(current["order"])):
         filename = str(item["filename"])
-        file_bytes = bytes(item["file_bytes"])
+        payload = item["payload"]
         file_size = int(item["file_size"])
         file_hash = str(item["file_hash"])
         tipo_archivo = str(item["tipo_archivo"])
@@ -721,7 +814,7 @@ async def enqueue_async_batch(
         )
         db.commit()
 
-        await asyncio.to_thread(store_payload, str(doc.id), file_bytes)
+        await asyncio.to_thread(_store_payload, str(doc.id), payload)
         if process_document_task:
             _upload_snap_id = (
                 str(effective_recipe_snapshot_id) if effective_recipe_snapshot_id else None
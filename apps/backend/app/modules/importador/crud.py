@@ -309,23 +309,41 @@ def summarize_batch(db: Session, batch: ImpBatchImport) -> dict:
     }
 
 
+def serialize_batch_item(item: ImpBatchItem) -> dict:
+    return {
+        "id": item.id,
+        "batch_id": item.batch_id,
+        "documento_id": item.documento_id,
+        "nombre_archivo": item.nombre_archivo,
+        "tamanio_bytes": item.tamanio_bytes,
+        "estado": item.estado,
+        "error_detalle": item.error_detalle,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
+
+
 def serialize_batch_items(batch: ImpBatchImport) -> list[dict]:
     return [
-        {
-            "id": item.id,
-            "batch_id": item.batch_id,
-            "documento_id": item.documento_id,
-            "nombre_archivo": item.nombre_archivo,
-            "tamanio_bytes": item.tamanio_bytes,
-            "estado": item.estado,
-            "error_detalle": item.error_detalle,
-            "created_at": item.created_at,
-            "updated_at": item.updated_at,
-        }
+        serialize_batch_item(item)
         for item in sorted(batch.items, key=lambda current: current.orden)
     ]
 
 
+def serialize_batch_items_for_document(
+    db: Session, batch_id: UUID, documento_id: UUID
+) -> list[dict]:
+    """Ítems del lote ligados a un documento (delta de progreso, sin cargar el lote)."""
+    items = db.scalars(
+        select(ImpBatchItem)
+        .where(ImpBatchItem.batch_id == batch_id, ImpBatchItem.documento_id == documento_id)
+        .order_by(ImpBatchItem.orden)
+        # touch_batch_items_for_document actualiza con UPDATE directo
+        .execution_options(populate_existing=True)
+    ).all()
+    return [serialize_batch_item(item) for item in items]
+
+
 def serialize_batch_detail(db: Session, batch: ImpBatchImport) -> dict:
     return {
         **summarize_batch(db, batch),
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import csv
 import datetime
@@ -10,12 +11,17 @@ import io
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import re
+import tempfile
+import time
 import unicodedata
 import xml.etree.ElementTree as ET
 import zipfile
 from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from threading import Lock
 from typing import Any
@@ -29,7 +35,11 @@ except Exception:  # pragma: no cover - optional dependency
     pd = None
 
 from .ocr_quality import estimate_text_quality as _estimate_text_quality
-from .runtime_config import load_file_support_config, load_ocr_runtime_config
+from .runtime_config import (
+    load_file_support_config,
+    load_ocr_runtime_config,
+    prime_ocr_runtime_config,
+)
 from .utils import json_safe as _json_safe
 
 logger = logging.getLogger("importador.ocr")
@@ -52,6 +62,9 @@ OCR_EXTRACTION_CACHE_VERSION = (
 )
 _EASYOCR_READERS: dict[tuple[tuple[str, ...], bool], Any] = {}
 _EASYOCR_READER_LOCK = Lock()
+_PDF_OCR_POOL: ProcessPoolExecutor | None = None
+_PDF_OCR_POOL_WORKERS = 0
+_PDF_OCR_POOL_LOCK = Lock()
 
 # UBL 2.1 namespaces
 _UBL_NS = {
@@ -68,15 +81,28 @@ def _ocr_cache_dir() -> Path:
     return raw_dir
 
 
-def _ocr_cache_path(file_bytes: bytes, tenant_id: str | None = None) -> Path:
+def _ocr_cache_key(file_sha256: str, tenant_id: str | None = None) -> str:
     # VERIFICADO: cache OCR incluye tenant_id en la clave
     tenant_key = str(tenant_id or "global").strip() or "global"
-    cache_key = f"{tenant_key}:{hashlib.sha256(file_bytes).hexdigest()}"
-    file_hash = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
-    return _ocr_cache_dir() / f"{file_hash}.json"
+    cache_key = f"{tenant_key}:{file_sha256}"
+    return hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
+
+
+def _ocr_cache_path(file_bytes: bytes, tenant_id: str | None = None) -> Path:
+    """Ruta de metadatos de la entrada en el backend de ficheros."""
+    key = _ocr_cache_key(hashlib.sha256(file_bytes).hexdigest(), tenant_id)
+    return _ocr_cache_dir() / f"{key}.json"
+
+
+def _extraction_cache():
+    from .services.extraction_cache import get_extraction_cache
+
+    return get_extraction_cache(_ocr_cache_dir())
 
 
-def _serialize_cached_extraction(extraction: dict[str, Any]) -> dict[str, Any]:
+def _serialize_cached_extraction(
+    extraction: dict[str, Any],
+) -> tuple[dict[str, Any], dict[str, bytes]]:
     payload = {
         "version": OCR_EXTRACTION_CACHE_VERSION,
         "text": str(extraction.get("text") or ""),
@@ -88,13 +114,16 @@ def _serialize_cached_extraction(extraction: dict[str, Any]) -> dict[str, Any]:
         "sheet_metadata": _json_safe(extraction.get("sheet_metadata")),
         "sheet_used": extraction.get("sheet_used"),
     }
+    blobs: dict[str, bytes] = {}
     vision_image_bytes = extraction.get("vision_image_bytes")
     if isinstance(vision_image_bytes, (bytes, bytearray)):
-        payload["vision_image_b64"] = base64.b64encode(bytes(vision_image_bytes)).decode("ascii")
-    return payload
+        blobs["vision_image"] = bytes(vision_image_bytes)
+    return payload, blobs
 
 
-def _deserialize_cached_extraction(payload: dict[str, Any]) -> dict[str, Any]:
+def _deserialize_cached_extraction(
+    payload: dict[str, Any], blobs: dict[str, bytes] | None = None
+) -> dict[str, Any]:
     extraction = {
         "text": str(payload.get("text") or ""),
         "pages": int(payload.get("pages") or 1),
@@ -109,12 +138,20 @@ def _deserialize_cached_extraction(payload: dict[str, Any]) -> dict[str, Any]:
         extraction["sheet_metadata"] = payload.get("sheet_metadata")
     if payload.get("sheet_used") is not None:
         extraction["sheet_used"] = payload.get("sheet_used")
-    vision_image_b64 = payload.get("vision_image_b64")
-    if isinstance(vision_image_b64, str) and vision_image_b64:
-        try:
-            extraction["vision_image_bytes"] = base64.b64decode(vision_image_b64.encode("ascii"))
-        except Exception:
-            logger.warning("No se pudo decodificar vision_image_b64 de cache OCR", exc_info=True)
+    if blobs and blobs.get("vision_image"):
+        extraction["vision_image_bytes"] = blobs["vision_image"]
+    else:
+        # Entradas anteriores al cache por contenido: imagen en base64 dentro del JSON.
+        vision_image_b64 = payload.get("vision_image_b64")
+        if isinstance(vision_image_b64, str) and vision_image_b64:
+            try:
+                extraction["vision_image_bytes"] = base64.b64decode(
+                    vision_image_b64.encode("ascii")
+                )
+            except Exception:
+                logger.warning(
+                    "No se pudo decodificar vision_image_b64 de cache OCR", exc_info=True
+                )
     return _rehydrate_virtual_sheet_context(extraction)
 
 
@@ -139,17 +176,14 @@ def _can_cache_extraction(extraction: dict[str, Any]) -> bool:
 def _load_cached_extraction(
     file_bytes: bytes, tenant_id: str | None = None
 ) -> dict[str, Any] | None:
-    cache_path = _ocr_cache_path(file_bytes, tenant_id)
-    if not cache_path.exists():
-        return None
-    try:
-        payload = json.loads(cache_path.read_text(encoding="utf-8"))
-    except Exception:
-        logger.warning("No se pudo leer cache OCR %s", cache_path, exc_info=True)
+    key = _ocr_cache_key(hashlib.sha256(file_bytes).hexdigest(), tenant_id)
+    entry = _extraction_cache().get(key)
+    if entry is None:
         return None
+    payload, blobs = entry
     if payload.get("version") != OCR_EXTRACTION_CACHE_VERSION:
         return None
-    return _deserialize_cached_extraction(payload)
+    return _deserialize_cached_extraction(payload, blobs)
 
 
 def _store_cached_extraction(
@@ -157,18 +191,22 @@ def _store_cached_extraction(
 ) -> None:
     if not _can_cache_extraction(extraction):
         return
-    cache_path = _ocr_cache_path(file_bytes, tenant_id)
-    payload = _serialize_cached_extraction(extraction)
-    tmp_path = cache_path.with_suffix(".tmp")
-    try:
-        tmp_path.write_text(json.dumps(payload, ensure_ascii=True), encoding="utf-8")
-        tmp_path.replace(cache_path)
-    except Exception:
-        logger.warning("No se pudo guardar cache OCR %s", cache_path, exc_info=True)
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    key = _ocr_cache_key(hashlib.sha256(file_bytes).hexdigest(), tenant_id)
+    payload, blobs = _serialize_cached_extraction(extraction)
+    _extraction_cache().put(key, payload, blobs)
+
+
+def load_cached_vision_image(file_sha256: str | None, tenant_id: str | None = None) -> bytes | None:
+    """Imagen de visión cacheada para un fichero ya importado (por su SHA-256)."""
+    if not file_sha256:
+        return None
+    entry = _extraction_cache().get(_ocr_cache_key(file_sha256, tenant_id))
+    if entry is None:
+        return None
+    payload, blobs = entry
+    if payload.get("version") != OCR_EXTRACTION_CACHE_VERSION:
+        return None  # caché obsoleto — se regenerará en la próxima importación
+    return _deserialize_cached_extraction(payload, blobs).get("vision_image_bytes")
 
 
 def _image_to_jpeg_bytes(img: Image.Image, *, quality: int = 80) -> bytes:
@@ -842,6 +880,31 @@ async def extract_text_from_file(
     return extraction
 
 
+def supported_import_extensions(db: Any | None = None) -> set[str]:
+    return _get_file_support_sets(db)[0]
+
+
+def _iter_zip_infos(
+    zf: zipfile.ZipFile, max_files: int, max_size_bytes: int, supported_extensions: set[str]
+) -> Iterable[zipfile.ZipInfo]:
+    count = 0
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        if info.file_size <= 0 or info.file_size > max_size_bytes:
+            logger.warning("Zip entry %s skipped (size %s bytes)", info.filename, info.file_size)
+            continue
+        ext = Path(info.filename).suffix.lower()
+        if ext not in supported_extensions:
+            logger.warning("Zip entry %s skipped (ext %s no soportada)", info.filename, ext)
+            continue
+        yield info
+        count += 1
+        if count >= max_files:
+            logger.warning("Zip truncado a %s ficheros", max_files)
+            break
+
+
 def iter_zip_entries(
     file_bytes: bytes,
     max_files: int = 20,
@@ -854,27 +917,50 @@ def iter_zip_entries(
     - Limita número de entradas y tamaño por archivo para evitar OOM.
     - Solo devuelve extensiones soportadas.
     """
-    supported_extensions, _, _ = _get_file_support_sets(db)
+    supported_extensions = supported_import_extensions(db)
     with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
-        count = 0
-        for info in zf.infolist():
-            if info.is_dir():
-                continue
-            if info.file_size <= 0 or info.file_size > max_size_bytes:
-                logger.warning(
-                    "Zip entry %s skipped (size %s bytes)", info.filename, info.file_size
-                )
-                continue
-            ext = Path(info.filename).suffix.lower()
-            if ext not in supported_extensions:
-                logger.warning("Zip entry %s skipped (ext %s no soportada)", info.filename, ext)
-                continue
+        for info in _iter_zip_infos(zf, max_files, max_size_bytes, supported_extensions):
             with zf.open(info) as fp:
                 yield info.filename, fp.read()
-                count += 1
-                if count >= max_files:
-                    logger.warning("Zip truncado a %s ficheros", max_files)
-                    break
+
+
+def extract_zip_entries_to_dir(
+    zip_path: Path,
+    dest_dir: Path,
+    supported_extensions: set[str],
+    max_files: int = 20,
+    max_size_bytes: int = 8 * 1024 * 1024,
+    block_size: int = 1024 * 1024,
+) -> list[tuple[str, Path, int, str]]:
+    """Como ``iter_zip_entries`` pero desde disco y entrada a entrada.
+
+    Cada fichero se copia a ``dest_dir`` por bloques calculando su SHA-256 al
+    vuelo; devuelve ``(nombre, ruta, tamaño, sha256)``. La memoria usada no
+    depende del tamaño del ZIP ni de sus entradas. No usa la BD (se puede
+    llamar desde un hilo): las extensiones admitidas llegan resueltas.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    entries: list[tuple[str, Path, int, str]] = []
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = _iter_zip_infos(zf, max_files, max_size_bytes, supported_extensions)
+        for index, info in enumerate(infos):
+            target = dest_dir / f"{index:04d}.bin"
+            digest = hashlib.sha256()
+            size = 0
+            with zf.open(info) as src, target.open("wb") as dst:
+                while block := src.read(block_size):
+                    size += len(block)
+                    if size > max_size_bytes:
+                        # file_size declarado en el ZIP no coincide con el contenido
+                        break
+                    digest.update(block)
+                    dst.write(block)
+            if size > max_size_bytes:
+                logger.warning("Zip entry %s skipped (excede %s bytes)", info.filename, size)
+                target.unlink(missing_ok=True)
+                continue
+            entries.append((info.filename, target, size, digest.hexdigest()))
+    return entries
 
 
 def _extract_zip_summary(file_bytes: bytes, zip_name: str) -> dict[str, Any]:
@@ -989,32 +1075,191 @@ def _reconstruct_page_text_by_words(page: Any, *, y_tolerance: int = 3) -> str:
     return "\n".join(lines)
 
 
+def _pdf_ocr_pool_workers(config: dict[str, Any]) -> int:
+    raw = os.getenv("IMPORTADOR_OCR_PDF_WORKERS")
+    if raw is not None and str(raw).strip():
+        try:
+            return max(0, int(str(raw).strip()))
+        except ValueError:
+            logger.warning("IMPORTADOR_OCR_PDF_WORKERS invalido: %r", raw)
+    try:
+        return max(0, int(config.get("pdf_ocr_max_workers") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _get_pdf_ocr_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared OCR process pool, recreating it if the size changed."""
+    global _PDF_OCR_POOL, _PDF_OCR_POOL_WORKERS
+    with _PDF_OCR_POOL_LOCK:
+        if _PDF_OCR_POOL is None or _PDF_OCR_POOL_WORKERS != max_workers:
+            if _PDF_OCR_POOL is not None:
+                _PDF_OCR_POOL.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a worker that already loaded torch/easyocr threads can deadlock.
+            _PDF_OCR_POOL = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _PDF_OCR_POOL_WORKERS = max_workers
+        return _PDF_OCR_POOL
+
+
+def _discard_pdf_ocr_pool() -> None:
+    global _PDF_OCR_POOL, _PDF_OCR_POOL_WORKERS
+    with _PDF_OCR_POOL_LOCK:
+        if _PDF_OCR_POOL is not None:
+            _PDF_OCR_POOL.shutdown(wait=False, cancel_futures=True)
+        _PDF_OCR_POOL = None
+        _PDF_OCR_POOL_WORKERS = 0
+
+
+def _ocr_pdf_page(
+    page: Any,
+    *,
+    base_text: str,
+    dpis: tuple[int, ...],
+    allow_easyocr: bool,
+    allow_rescue_variants: bool,
+    capture_vision: bool,
+    ocr_runtime: dict[str, Any],
+) -> dict[str, Any]:
+    """Render one PDF page at increasing DPIs and keep the best OCR candidate."""
+    started_at = time.perf_counter()
+    candidates: list[str] = [base_text] if base_text else []
+    best_text = base_text
+    vision_image_bytes: bytes | None = None
+    for dpi in dpis:
+        pix = page.get_pixmap(dpi=dpi)
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        if capture_vision and vision_image_bytes is None:
+            vision_image_bytes = _image_to_jpeg_bytes(img)
+        candidate = _ocr_image_candidates(
+            img,
+            allow_easyocr=allow_easyocr,
+            allow_rescue_variants=allow_rescue_variants,
+        )
+        if candidate:
+            candidates.append(candidate)
+        best_text = _best_text_candidate(candidates, ocr_runtime=ocr_runtime)
+        if candidate and not _is_weak_ocr_text(candidate):
+            break
+    return {
+        "text": best_text,
+        "vision_image_bytes": vision_image_bytes,
+        "elapsed_ms": max(0, int(round((time.perf_counter() - started_at) * 1000))),
+    }
+
+
+def _ocr_pdf_page_in_worker(
+    pdf_path: str,
+    page_index: int,
+    ocr_config: dict[str, Any],
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    """Process-pool entry point: reopen the PDF from disk and OCR a single page."""
+    import fitz
+
+    prime_ocr_runtime_config(ocr_config)
+    doc = fitz.open(pdf_path)
+    try:
+        return _ocr_pdf_page(doc[page_index], **options)
+    finally:
+        doc.close()
+
+
+def _ocr_pdf_pages_serial(
+    pages: list[Any], jobs: list[tuple[int, dict[str, Any]]]
+) -> dict[int, dict[str, Any]]:
+    return {index: _ocr_pdf_page(pages[index], **options) for index, options in jobs}
+
+
+async def _ocr_pdf_pages(
+    file_bytes: bytes,
+    pages: list[Any],
+    jobs: list[tuple[int, dict[str, Any]]],
+    *,
+    config: dict[str, Any],
+) -> dict[int, dict[str, Any]]:
+    """OCR the given ``(page_index, options)`` jobs, fanning out to the process pool.
+
+    Small jobs (or a pool size below 2) run in a worker thread so the event loop
+    stays free. Pool failures fall back to the serial path. Results are keyed by
+    page index so callers keep page order.
+    """
+    if not jobs:
+        return {}
+    max_workers = _pdf_ocr_pool_workers(config)
+    min_pages = max(1, int(config.get("pdf_ocr_parallel_min_pages") or 2))
+    if max_workers < 2 or len(jobs) < min_pages:
+        return await asyncio.to_thread(_ocr_pdf_pages_serial, pages, jobs)
+
+    loop = asyncio.get_running_loop()
+    tmp_path: str | None = None
+    try:
+        with tempfile.NamedTemporaryFile(prefix="ocr_pdf_", suffix=".pdf", delete=False) as tmp:
+            tmp.write(file_bytes)
+            tmp_path = tmp.name
+        pool = _get_pdf_ocr_pool(max_workers)
+        futures = [
+            loop.run_in_executor(
+                pool, _ocr_pdf_page_in_worker, tmp_path, index, dict(config), options
+            )
+            for index, options in jobs
+        ]
+        results = await asyncio.gather(*futures)
+        return {index: result for (index, _), result in zip(jobs, results)}
+    except Exception as exc:
+        logger.warning("PDF OCR pool failed; falling back to serial OCR: %s", exc)
+        if isinstance(exc, BrokenProcessPool):
+            _discard_pdf_ocr_pool()
+        return await asyncio.to_thread(_ocr_pdf_pages_serial, pages, jobs)
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def _page_timings(results: dict[int, dict[str, Any]]) -> dict[str, int]:
+    return {
+        f"ocr_page_{index + 1:03d}": int(result.get("elapsed_ms") or 0)
+        for index, result in sorted(results.items())
+    }
+
+
 async def _extract_pdf(file_bytes: bytes) -> dict[str, Any]:
-    """PDF: intenta texto embebido con PyMuPDF, si no hay, usa OCR."""
+    """PDF: intenta texto embebido con PyMuPDF, si no hay, usa OCR.
+
+    Las páginas cuyo texto embebido ya es suficiente no pasan por OCR; el resto
+    se reparte en el pool de OCR (ver :func:`_ocr_pdf_pages`) conservando el
+    orden de ``page_texts``.
+    """
     config = _ocr_runtime_config()
     ocr_runtime = load_ocr_runtime_config(None)
     pdf_render_dpi = int(config["pdf_render_dpi"])
+    dpis = _pdf_render_dpi_candidates(pdf_render_dpi)
     try:
         import fitz
     except ImportError:
         raise RuntimeError("PyMuPDF (fitz) no disponible")
 
     doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text_parts = []
-    page_texts: list[str] = []
-    used_ocr = False
     vision_image_bytes: bytes | None = None
-    _page_quality_scores: list[float] = []
+    page_timings_ms: dict[str, int] = {}
 
     try:
-        selected_page_texts: list[str] = []
-        for page in doc:
+        pages_list = list(doc)
+        embedded_texts: list[str] = []
+        embedded_quality: list[dict[str, Any] | None] = []
+        ocr_jobs: list[tuple[int, dict[str, Any]]] = []
+        for index, page in enumerate(pages_list):
             page_text = _fix_pos_ticket_prices(
                 _fix_mojibake(_reconstruct_page_text_by_words(page) or page.get_text("text"))
             )
-            page_texts.append(page_text)
             page_text_clean = str(page_text or "").strip()
-            best_page_text = page_text_clean
+            embedded_texts.append(page_text_clean)
+            page_quality = None
             if page_text_clean:
                 page_quality = _estimate_text_quality(page_text_clean, ocr_runtime=ocr_runtime)
                 is_sufficient = page_quality["score"] >= float(
@@ -1023,28 +1268,41 @@ async def _extract_pdf(file_bytes: bytes) -> dict[str, Any]:
                     ocr_runtime.get("ocr_min_words_for_vision") or 18
                 )
                 if is_sufficient:
-                    text_parts.append(page_text_clean)
-                    selected_page_texts.append(page_text_clean)
-                    _page_quality_scores.append(float(page_quality.get("score") or 0.0))
+                    embedded_quality.append(page_quality)
                     continue
-
-            used_ocr = True
-            ocr_candidates: list[str] = [page_text_clean] if page_text_clean else []
-            for dpi in _pdf_render_dpi_candidates(pdf_render_dpi):
-                pix = page.get_pixmap(dpi=dpi)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                if vision_image_bytes is None:
-                    vision_image_bytes = _image_to_jpeg_bytes(img)
-                candidate = _ocr_image_candidates(
-                    img,
-                    allow_easyocr=_easyocr_enabled_for_pdf(config),
-                    allow_rescue_variants=False,
+            embedded_quality.append(page_quality)
+            ocr_jobs.append(
+                (
+                    index,
+                    {
+                        "base_text": page_text_clean,
+                        "dpis": dpis,
+                        "allow_easyocr": _easyocr_enabled_for_pdf(config),
+                        "allow_rescue_variants": False,
+                        "capture_vision": not ocr_jobs,
+                        "ocr_runtime": ocr_runtime,
+                    },
                 )
-                if candidate:
-                    ocr_candidates.append(candidate)
-                best_page_text = _best_text_candidate(ocr_candidates, ocr_runtime=ocr_runtime)
-                if candidate and not _is_weak_ocr_text(candidate):
-                    break
+            )
+
+        ocr_results = await _ocr_pdf_pages(file_bytes, pages_list, ocr_jobs, config=config)
+        page_timings_ms.update(_page_timings(ocr_results))
+        used_ocr = bool(ocr_jobs)
+
+        text_parts: list[str] = []
+        selected_page_texts: list[str] = []
+        _page_quality_scores: list[float] = []
+        for index, page_text_clean in enumerate(embedded_texts):
+            page_quality = embedded_quality[index]
+            result = ocr_results.get(index)
+            if result is None:
+                text_parts.append(page_text_clean)
+                selected_page_texts.append(page_text_clean)
+                _page_quality_scores.append(float(page_quality.get("score") or 0.0))
+                continue
+            if vision_image_bytes is None and result.get("vision_image_bytes"):
+                vision_image_bytes = result["vision_image_bytes"]
+            best_page_text = str(result.get("text") or "")
             if best_page_text:
                 text_parts.append(best_page_text)
                 selected_page_texts.append(best_page_text)
@@ -1052,7 +1310,7 @@ async def _extract_pdf(file_bytes: bytes) -> dict[str, Any]:
                 _page_quality_scores.append(float(selected_quality.get("score") or 0.0))
             else:
                 selected_page_texts.append(page_text_clean)
-                if page_text_clean:
+                if page_text_clean and page_quality is not None:
                     _page_quality_scores.append(float(page_quality.get("score") or 0.0))
 
         pages = len(doc)
@@ -1072,28 +1330,34 @@ async def _extract_pdf(file_bytes: bytes) -> dict[str, Any]:
             "page_texts": selected_page_texts,
             "vision_image_bytes": vision_image_bytes,
             "ocr_quality_score": _ocr_quality_score,
+            "page_timings_ms": page_timings_ms,
         }
 
     # Otherwise, convert pages to images and OCR
     # Strategy 1: Use PyMuPDF native rendering (no Poppler needed)
     doc2 = fitz.open(stream=file_bytes, filetype="pdf")
-    vision_image_bytes = None
     try:
-        ocr_texts = []
-        for page in doc2:
-            page_candidates: list[str] = []
-            for dpi in _pdf_render_dpi_candidates(pdf_render_dpi):
-                pix = page.get_pixmap(dpi=dpi)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                if vision_image_bytes is None:
-                    vision_image_bytes = _image_to_jpeg_bytes(img)
-                candidate = _ocr_image(img)
-                if candidate:
-                    page_candidates.append(candidate)
-                    if not _is_weak_ocr_text(candidate):
-                        break
-            best_page_text = _best_text_candidate(page_candidates, ocr_runtime=ocr_runtime)
-            ocr_texts.append(best_page_text)
+        pages_list = list(doc2)
+        rescue_jobs = [
+            (
+                index,
+                {
+                    "base_text": "",
+                    "dpis": dpis,
+                    "allow_easyocr": True,
+                    "allow_rescue_variants": True,
+                    "capture_vision": index == 0,
+                    "ocr_runtime": ocr_runtime,
+                },
+            )
+            for index in range(len(pages_list))
+        ]
+        rescue_results = await _ocr_pdf_pages(file_bytes, pages_list, rescue_jobs, config=config)
+        page_timings_ms.update(_page_timings(rescue_results))
+        ocr_texts = [
+            str(rescue_results[index].get("text") or "") for index in range(len(pages_list))
+        ]
+        vision_image_bytes = rescue_results[0].get("vision_image_bytes") if rescue_results else None
         combined = "\n\n".join(t for t in ocr_texts if t)
         if combined.strip():
             combined_quality = _estimate_text_quality(combined, ocr_runtime=ocr_runtime)
@@ -1105,6 +1369,7 @@ async def _extract_pdf(file_bytes: bytes) -> dict[str, Any]:
                 "vision_image_bytes": vision_image_bytes,
                 "page_texts": ocr_texts,
                 "ocr_quality_score": float(combined_quality.get("score") or 0.0),
+                "page_timings_ms": page_timings_ms,
             }
     except Exception as exc:
         logger.warning("PyMuPDF OCR fallback failed: %s", exc)
@@ -2190,6 +2190,8 @@ async def _process_run_document(
             raise
         extraction = await extract_text_fn(file_bytes, filename)
     _set_stage_timing(stage_timings, "ocr_extract", extraction_started_at)
+    for page_stage, page_ms in (extraction.get("page_timings_ms") or {}).items():
+        stage_timings[str(page_stage)] = int(page_ms or 0)
 
     text = extraction.get("text", "")
     structured = extraction.get("structured_data")
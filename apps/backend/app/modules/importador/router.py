@@ -10,7 +10,7 @@ from typing import Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
@@ -98,7 +98,7 @@ from .services.product_matching import (
     _get_line_values,
     _infer_pack_conversion_factor,
     _norm_import_text,
-    _score_product_candidate,
+    _rank_product_candidates,
 )
 from .snapshot_learning import build_snapshot_review_hints, learn_from_confirmed_payload
 from .utils import json_safe as _json_safe
@@ -1825,7 +1825,7 @@ def confirm_document(
         event="confirm",
         changed_fields=list(body.datos_confirmados.keys()),
     )
-    _sync_batch_projection(db, doc.id, "CONFIRMED")
+    batch_ids = _sync_batch_projection(db, doc.id, "CONFIRMED")
     crud.add_log(
         db,
         doc.id,
@@ -1840,6 +1840,7 @@ def confirm_document(
     _learn_from_confirmation(db, doc, body.datos_confirmados, user_id)
 
     db.commit()
+    _publish_batch_updates(db, batch_ids, doc.id)
     _attach_document_routing(doc, db)
     _attach_document_review_hints(doc, db)
     _attach_document_activity_meta(doc)
@@ -2240,7 +2241,7 @@ def save_document(
         target_table=result.target,
         target_id=primary_target_id,
     )
-    _sync_batch_projection(db, doc.id, new_estado)
+    batch_ids = _sync_batch_projection(db, doc.id, new_estado)
     crud.add_log(
         db,
         doc.id,
@@ -2279,6 +2280,7 @@ def save_document(
         },
     )
     db.commit()
+    _publish_batch_updates(db, batch_ids, doc.id)
     if destination == "supplier_invoice":
         _record_importador_save_warning(
             db,
@@ -2383,10 +2385,11 @@ def reject_document(doc_id: UUID, request: Request, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
     crud.update_documento(db, doc, {"estado": "FAILED"})
-    _sync_batch_projection(db, doc.id, "FAILED")
+    batch_ids = _sync_batch_projection(db, doc.id, "FAILED")
     _capture_routing_signal(doc, db, user_id, event="reject")
     crud.add_log(db, doc.id, "REJECT", user_id)
     db.commit()
+    _publish_batch_updates(db, batch_ids, doc.id)
     _attach_document_routing(doc, db)
     _attach_document_review_hints(doc, db)
     _attach_document_activity_meta(doc)
@@ -2473,7 +2476,7 @@ def save_document_as_products(
         target_table="products",
         target_id=primary_product_id,
     )
-    _sync_batch_projection(db, doc.id, "IMPORTED")
+    batch_ids = _sync_batch_projection(db, doc.id, "IMPORTED")
     crud.add_log(
         db,
         doc.id,
@@ -2490,6 +2493,7 @@ def save_document_as_products(
         },
     )
     db.commit()
+    _publish_batch_updates(db, batch_ids, doc.id)
 
     return SaveProductsFromDocumentResponse(
         sheet_name=resolved_sheet,
@@ -2641,11 +2645,13 @@ async def batch_status_stream(
     import asyncio
     import json
 
-    import redis.asyncio as aioredis  # type: ignore
     from fastapi.responses import StreamingResponse
 
     from app.config.database import SessionLocal
     from app.core.jwt_provider import get_token_service
+    from app.core.pubsub_hub import MessagesLost, hub
+
+    from .tasks import batch_channel, batch_snapshot
 
     try:
         claims = get_token_service().decode_and_validate(token, expected_type="access")
@@ -2660,30 +2666,32 @@ async def batch_status_stream(
     requester_user_id = str(claims.get("user_id", ""))
     can_view_all = _claims_can_view_all_importador(claims)
     terminal_states = {"COMPLETED", "FAILED", "PARTIAL"}
-    channel = f"imp:batch:{batch_id}"
-    redis_url = os.getenv("REDIS_URL") or os.getenv("DEV_REDIS_URL") or "redis://localhost:6379/0"
 
-    async def event_generator():
-        pubsub = None
-        redis_client = aioredis.from_url(redis_url, decode_responses=True)
-        try:
-            pubsub = redis_client.pubsub()
-            await pubsub.subscribe(channel)
+    def load_snapshot() -> dict | None:
+        with SessionLocal() as db_session:
+            batch = crud.get_batch(db_session, batch_id, tenant_id)
+            if batch is None:
+                return None
+            owner_id = str(getattr(batch, "usuario_id", "") or "").strip()
+            if not can_view_all and (not owner_id or owner_id != requester_user_id):
+                return None
+            return _json_safe(batch_snapshot(db_session, batch))
 
-            with SessionLocal() as db_session:
-                batch = crud.get_batch(db_session, batch_id, tenant_id)
-                if batch is None:
-                    yield 'event: error\ndata: {"detail":"not_found"}\n\n'
-                    return
-                owner_id = str(getattr(batch, "usuario_id", "") or "").strip()
-                if not can_view_all and (not owner_id or owner_id != requester_user_id):
-                    yield 'event: error\ndata: {"detail":"not_found"}\n\n'
-                    return
-                initial_payload = crud.serialize_batch_detail(db_session, batch)
+    def event(payload: dict) -> str:
+        return f"id: {payload['seq']}\ndata: {json.dumps(payload)}\n\n"
 
-            yield f"data: {json.dumps(_json_safe(initial_payload))}\n\n"
-            if initial_payload["estado"] in terminal_states:
+    async def event_generator():
+        # Suscripción compartida del proceso: la cola recibe los deltas
+        # publicados mientras se lee el snapshot.
+        async with hub.subscription(batch_channel(batch_id)) as sub:
+            snapshot = await asyncio.to_thread(load_snapshot)
+            if snapshot is None:
+                yield 'event: error\ndata: {"detail":"not_found"}\n\n'
+                return
+            yield event(snapshot)
+            if snapshot["estado"] in terminal_states:
                 return
+            last_seq = int(snapshot["seq"])
 
             max_wait_seconds = float(os.getenv("IMPORTADOR_BATCH_STREAM_MAX_WAIT_SECONDS", "7200"))
             loop = asyncio.get_running_loop()
@@ -2698,37 +2706,35 @@ async def batch_status_stream(
                     yield 'event: timeout\ndata: {"detail":"timeout"}\n\n'
                     return
 
-                message = await pubsub.get_message(
-                    ignore_subscribe_messages=True,
-                    timeout=min(15.0, remaining),
-                )
-                if message and message.get("type") == "message":
-                    data = message.get("data")
-                    if isinstance(data, bytes):
-                        data = data.decode("utf-8", errors="ignore")
-                    yield f"data: {data}\n\n"
+                resync = False
+                try:
+                    data = await sub.get(timeout=min(15.0, remaining))
+                except MessagesLost:
+                    data, resync = None, True
+                if data is None and not resync:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                parsed = None
+                if not resync:
                     try:
                         parsed = json.loads(data)
+                        seq = int(parsed["seq"])
                     except Exception:
-                        parsed = None
-                    if isinstance(parsed, dict) and parsed.get("estado") in terminal_states:
+                        continue
+                    if seq <= last_seq:
+                        continue
+                    # Hueco de secuencia: el delta no basta
+                    resync = seq > last_seq + 1 and parsed.get("type") != "snapshot"
+                if resync:
+                    parsed = await asyncio.to_thread(load_snapshot)
+                    if parsed is None:
+                        yield 'event: error\ndata: {"detail":"not_found"}\n\n'
                         return
-
-                yield ": keep-alive\n\n"
-        finally:
-            if pubsub is not None:
-                try:
-                    await pubsub.unsubscribe(channel)
-                except Exception:
-                    pass
-                try:
-                    await pubsub.close()
-                except Exception:
-                    pass
-            try:
-                await redis_client.aclose()
-            except Exception:
-                pass
+                last_seq = max(last_seq, int(parsed["seq"]))
+                yield event(parsed)
+                if parsed.get("estado") in terminal_states:
+                    return
 
     return StreamingResponse(
         event_generator(),
@@ -2743,17 +2749,23 @@ async def batch_status_stream(
 
 def _sync_batch_projection(
     db: Session, doc_id: UUID, estado: str, error_detalle: str | None = None
-) -> None:
-    from .tasks import publish_batch_update
-
-    for batch_id in crud.touch_batch_items_for_document(
+) -> list[UUID]:
+    """Actualiza los ítems/lotes del documento; el caller publica tras el commit."""
+    batch_ids = crud.touch_batch_items_for_document(
         db,
         doc_id,
         estado=estado,
         error_detalle=error_detalle,
-    ):
+    )
+    for batch_id in batch_ids:
         crud.refresh_batch_status(db, batch_id)
-        publish_batch_update(db, batch_id)
+    return batch_ids
+
+
+def _publish_batch_updates(db: Session, batch_ids: list[UUID], doc_id: UUID) -> None:
+    from .tasks import publish_batch_updates
+
+    publish_batch_updates(db, batch_ids, doc_id)
 
 
 @router.post(
@@ -2835,35 +2847,26 @@ def _match_product(
       [{"name": "HARINA TRADICION PREMIUM 50 KG", "factor": 50, "unit": "kg"}, ...]
     factor = how many inventory-units per 1 invoice-unit.
     """
-    from app.models.core.products import Product
+    from .services.product_match_index import get_product_match_index
 
     if not _norm_import_text(description):
         return None, 1.0
 
-    products = (
-        db.query(Product)
-        .filter(Product.tenant_id == str(tenant_id), Product.active == True)  # noqa: E712
-        .all()
+    ranked = _rank_product_candidates(
+        get_product_match_index(db, tenant_id),
+        description,
+        supplier_ref=supplier_ref,
     )
-    ranked: list[tuple[float, float, object]] = []
-    for product in products:
-        score, _reason, factor = _score_product_candidate(
-            description,
-            product,
-            supplier_ref=supplier_ref,
-        )
-        if score <= 0:
-            continue
-        ranked.append((score, factor, product))
-
     if not ranked:
         return None, 1.0
 
-    ranked.sort(key=lambda row: (-row[0], getattr(row[2], "name", "")))
-    top_score, top_factor, top_product = ranked[0]
+    top_score, _top_reason, top_factor, top_product = ranked[0]
     if top_score < 0.84:
         return None, 1.0
-    return top_product, float(top_factor or 1.0)
+    product = _find_product_by_id(db, tenant_id, top_product.id)
+    if product is None:
+        return None, 1.0
+    return product, float(top_factor or 1.0)
 
 
 # ---------------------------------------------------------------------------
@@ -2902,6 +2905,110 @@ async def run_async(
     )
 
 
+# ---------------------------------------------------------------------------
+# Subida reanudable por trozos (init / chunk / complete)
+# ---------------------------------------------------------------------------
+class UploadInitRequest(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(gt=0)
+    sha256: str | None = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: UUID
+    filename: str
+    size: int
+    received_bytes: int
+    chunk_size: int
+    complete: bool
+
+
+class UploadCompleteRequest(BaseModel):
+    upload_ids: list[UUID] = Field(min_length=1)
+    force: bool = False
+    recipe_snapshot_id: str | None = None
+    reprocess_mode: Literal["fast", "deep"] = "fast"
+
+
+@router.post(
+    "/uploads", response_model=UploadStatusResponse, status_code=201, dependencies=protected
+)
+def init_chunked_upload(body: UploadInitRequest, request: Request):
+    """Abre una subida por trozos; el fichero se escribe en disco según llega."""
+    from .batch_service import validate_file_size
+    from .ocr_service import detect_file_type
+    from .upload_service import create_upload
+
+    filename = body.filename.strip()
+    validate_file_size(filename, body.size, detect_file_type(filename))
+    session = create_upload(
+        tenant_id=_tenant_id(request),
+        user_id=_user_id(request),
+        filename=filename,
+        size=body.size,
+        sha256=body.sha256,
+    )
+    return session.status()
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatusResponse, dependencies=protected)
+def get_chunked_upload(upload_id: str, request: Request):
+    """Estado de la subida: ``received_bytes`` es el offset desde el que reanudar."""
+    from .upload_service import get_upload
+
+    return get_upload(upload_id, _tenant_id(request), _user_id(request)).status()
+
+
+@router.put(
+    "/uploads/chunk/{upload_id}", response_model=UploadStatusResponse, dependencies=protected
+)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+):
+    """Añade un trozo (cuerpo crudo) en ``offset``; requiere ``X-Chunk-SHA256``."""
+    from .upload_service import append_chunk, get_upload
+
+    chunk_sha256 = request.headers.get("x-chunk-sha256")
+    if not chunk_sha256:
+        raise HTTPException(status_code=400, detail="chunk_checksum_required")
+    session = get_upload(upload_id, _tenant_id(request), _user_id(request))
+    return await append_chunk(
+        session, offset=offset, chunk_sha256=chunk_sha256, body=request.stream()
+    )
+
+
+@router.post("/uploads/complete", response_model=list[RunAsyncResponse], dependencies=protected)
+async def complete_chunked_uploads(
+    body: UploadCompleteRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Encola como un lote las subidas terminadas (mismo resultado que ``run-async``)."""
+    from .batch_service import enqueue_async_batch
+    from .upload_service import discard_upload, get_upload
+
+    tenant_id = _tenant_id(request)
+    user_id = _user_id(request)
+    sessions = [
+        get_upload(str(upload_id), tenant_id, user_id)
+        for upload_id in dict.fromkeys(body.upload_ids)
+    ]
+    results = await enqueue_async_batch(
+        uploads=sessions,
+        tenant_id=tenant_id,
+        user_id=user_id,
+        force=body.force,
+        recipe_snapshot_id=body.recipe_snapshot_id,
+        reprocess_mode=body.reprocess_mode,
+        db=db,
+    )
+    for session in sessions:
+        discard_upload(session)
+    return results
+
+
 PURGE_OPERATIONS_HISTORY: list[tuple[str, str]] = [
     (
         "imp_log_cambios",
@@ -72,6 +72,8 @@ _DEFAULT_OCR_CONFIG: dict[str, Any] = {
     "weak_text_min_words": 4,
     "weak_text_min_chars": 24,
     "pdf_render_dpi": 300,
+    "pdf_ocr_max_workers": 2,
+    "pdf_ocr_parallel_min_pages": 2,
     "ocr_min_quality": 0.40,
     "ocr_min_words_for_vision": 18,
     "image_contrast": 1.8,
@@ -1007,6 +1009,8 @@ def load_ocr_runtime_config(db: Any | None = None) -> dict[str, Any]:
         "weak_text_min_words": int(_DEFAULT_OCR_CONFIG["weak_text_min_words"]),
         "weak_text_min_chars": int(_DEFAULT_OCR_CONFIG["weak_text_min_chars"]),
         "pdf_render_dpi": int(_DEFAULT_OCR_CONFIG["pdf_render_dpi"]),
+        "pdf_ocr_max_workers": int(_DEFAULT_OCR_CONFIG["pdf_ocr_max_workers"]),
+        "pdf_ocr_parallel_min_pages": int(_DEFAULT_OCR_CONFIG["pdf_ocr_parallel_min_pages"]),
         "ocr_min_quality": float(_DEFAULT_OCR_CONFIG["ocr_min_quality"]),
         "ocr_min_words_for_vision": int(_DEFAULT_OCR_CONFIG["ocr_min_words_for_vision"]),
         "image_contrast": float(_DEFAULT_OCR_CONFIG["image_contrast"]),
@@ -1159,7 +1163,12 @@ def load_ocr_runtime_config(db: Any | None = None) -> dict[str, Any]:
                 "excel_max_text_chars",
             }:
                 config[key] = _int_value(value, config[key])
-            elif key in {"weak_text_min_words", "weak_text_min_chars"}:
+            elif key in {
+                "weak_text_min_words",
+                "weak_text_min_chars",
+                "pdf_ocr_max_workers",
+                "pdf_ocr_parallel_min_pages",
+            }:
                 config[key] = _int_value(value, config[key], minimum=0)
             elif key in {
                 "image_contrast",
@@ -1263,7 +1272,13 @@ def load_ocr_runtime_config(db: Any | None = None) -> dict[str, Any]:
                 ):
                     config[key] = _int_value(row.value_text, config[key])
                 elif (
-                    key in {"weak_text_min_words", "weak_text_min_chars"}
+                    key
+                    in {
+                        "weak_text_min_words",
+                        "weak_text_min_chars",
+                        "pdf_ocr_max_workers",
+                        "pdf_ocr_parallel_min_pages",
+                    }
                     and row.value_text is not None
                 ):
                     config[key] = _int_value(row.value_text, config[key], minimum=0)
@@ -2563,5 +2578,10 @@ def load_snapshot_learning_config(db: Any | None = None) -> dict[str, int]:
     return _cache_set("snapshot_learning", config)  # type: ignore[return-value]
 
 
+def prime_ocr_runtime_config(config: dict[str, Any]) -> None:
+    """Seed the OCR config cache, e.g. inside an OCR pool worker process."""
+    _cache_set("ocr_config", dict(config))
+
+
 def invalidate_runtime_config_cache() -> None:
     _cache.clear()
@@ -59,37 +59,21 @@ _MIN_CONFIDENCE_DELTA_FOR_TYPE_CHANGE = 0.20
 # ── Carga de imagen desde caché OCR ───────────────────────────────────────────
 
 
-def _load_vision_image_from_cache(hash_sha256: str | None) -> bytes | None:
+def _load_vision_image_from_cache(hash_sha256: str | None, tenant_id: Any = None) -> bytes | None:
     """Devuelve los bytes JPEG del caché OCR sin reejecutar Tesseract.
 
-    El caché OCR guarda 'vision_image_b64' junto al texto extraído.
-    Lo recuperamos directamente usando el hash SHA-256 del fichero
-    (almacenado en ImpDocumento.hash_sha256) sin necesitar el fichero original.
+    El caché OCR guarda la imagen de visión como blob junto al texto extraído.
+    La recuperamos con el hash SHA-256 del fichero (ImpDocumento.hash_sha256)
+    y el tenant, sin necesitar el fichero original.
 
     Devuelve None si el caché no existe, expiró o no tiene imagen.
     """
     if not hash_sha256:
         return None
-    import base64
-    import json
+    from app.modules.importador.ocr_service import load_cached_vision_image
 
-    from app.config.settings import settings
-    from app.modules.importador.ocr_service import OCR_EXTRACTION_CACHE_VERSION
-
-    cache_path = settings.uploads_path / "_importador_ocr_cache" / f"{hash_sha256}.json"
-    if not cache_path.exists():
-        return None
     try:
-        payload = json.loads(cache_path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-    if payload.get("version") != OCR_EXTRACTION_CACHE_VERSION:
-        return None  # caché obsoleto — se regenerará en la próxima importación
-    b64 = payload.get("vision_image_b64")
-    if not b64:
-        return None
-    try:
-        return base64.b64decode(b64.encode("ascii"))
+        return load_cached_vision_image(hash_sha256, str(tenant_id) if tenant_id else None)
     except Exception:
         return None
 
@@ -303,7 +287,9 @@ async def analyze_document_with_ai(
 
     # Intentar cargar imagen del caché OCR para enviar al LLM en modo visión.
     # Reutiliza lo que Tesseract ya procesó — no vuelve a ejecutar OCR.
-    vision_image_bytes = _load_vision_image_from_cache(getattr(doc, "hash_sha256", None))
+    vision_image_bytes = _load_vision_image_from_cache(
+        getattr(doc, "hash_sha256", None), getattr(doc, "tenant_id", None)
+    )
     _image_source = "ocr_cache" if vision_image_bytes else "none"
     logger.debug(
         "ai_agent doc_id=%s vision_image=%s hash=%s",
@@ -0,0 +1,413 @@
+"""Cache de extracciones OCR del importador, direccionado por contenido.
+
+Cada entrada tiene dos partes:
+
+- metadatos (texto, páginas, datos estructurados…) en JSON, opcionalmente
+  comprimido con zlib, bajo la clave ``sha256(tenant:sha256(fichero))``;
+- blobs binarios (p. ej. la imagen JPEG para visión) guardados aparte bajo su
+  propio ``sha256``, sin base64 y compartidos entre entradas idénticas.
+
+Backends:
+
+- ``fs``: directorio (local o compartido por NFS/volumen entre workers). LRU
+  por ``mtime`` (se actualiza en cada acierto), tope de tamaño total y TTL.
+- ``redis``: claves con TTL deslizante; el tope global lo aplica Redis con su
+  ``maxmemory-policy`` (``allkeys-lru``) y aquí se limita el tamaño por entrada.
+- ``none``: desactivado.
+
+Configuración por entorno: ``IMPORTADOR_OCR_CACHE_BACKEND`` (fs|redis|none),
+``IMPORTADOR_OCR_CACHE_REDIS_URL`` (por defecto ``REDIS_URL``),
+``IMPORTADOR_OCR_CACHE_MAX_MB``, ``IMPORTADOR_OCR_CACHE_TTL_DAYS`` e
+``IMPORTADOR_OCR_CACHE_COMPRESS``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+logger = logging.getLogger("importador.ocr_cache")
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRY_BYTES = 32 * 1024 * 1024
+# Re-scan the directory for eviction after this fraction of max_bytes was written.
+_EVICTION_SCAN_FRACTION = 0.05
+
+_lock = Lock()
+_caches: dict[tuple[str, str], ExtractionCache] = {}
+_prometheus: dict[str, Any] | None = None
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def blob_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _metrics() -> dict[str, Any]:
+    global _prometheus
+    if _prometheus is not None:
+        return _prometheus
+    try:
+        import prometheus_client as pc
+
+        _prometheus = {
+            "events": pc.Counter(
+                "importador_ocr_cache_events_total",
+                "OCR extraction cache events",
+                ["backend", "event"],
+            ),
+            "bytes": pc.Counter(
+                "importador_ocr_cache_bytes_total",
+                "OCR extraction cache bytes read/written",
+                ["backend", "direction"],
+            ),
+        }
+    except Exception:
+        _prometheus = {}
+    return _prometheus
+
+
+class ExtractionCache:
+    """Base: codificación, métricas y API ``get``/``put``/``get_blob``."""
+
+    backend = "none"
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        compress: bool = True,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.compress = compress
+        self.max_entry_bytes = max_entry_bytes
+        self._stats_lock = Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+        }
+
+    # ── Métricas ──────────────────────────────────────────────────────────
+
+    def _count(self, event: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[event] = self._stats.get(event, 0) + amount
+        metrics = _metrics()
+        if not metrics:
+            return
+        if event.startswith("bytes_"):
+            metrics["bytes"].labels(self.backend, event[len("bytes_") :]).inc(amount)
+        else:
+            metrics["events"].labels(self.backend, event).inc(amount)
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            data: dict[str, Any] = dict(self._stats)
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else 0.0
+        data["backend"] = self.backend
+        return data
+
+    # ── Codificación ──────────────────────────────────────────────────────
+
+    def _encode_meta(self, meta: dict[str, Any]) -> bytes:
+        raw = json.dumps(meta, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(raw, 6) if self.compress else raw
+
+    @staticmethod
+    def _decode_meta(data: bytes) -> dict[str, Any]:
+        # JSON plano (entradas antiguas o compress=False) empieza por "{".
+        if data[:1] != b"{":
+            data = zlib.decompress(data)
+        return json.loads(data.decode("utf-8"))
+
+    # ── API pública ───────────────────────────────────────────────────────
+
+    def get(self, key: str) -> tuple[dict[str, Any], dict[str, bytes]] | None:
+        """Devuelve ``(metadatos, blobs)`` o ``None`` si no hay entrada válida."""
+        try:
+            raw = self._read_meta(key)
+            if raw is None:
+                self._count("misses")
+                return None
+            meta = self._decode_meta(raw)
+            stored_at = float(meta.get("stored_at") or 0)
+            if stored_at and time.time() - stored_at > self.ttl_seconds:
+                self._delete_meta(key)
+                self._count("misses")
+                return None
+            blobs: dict[str, bytes] = {}
+            read_bytes = len(raw)
+            for name, digest in (meta.get("blobs") or {}).items():
+                blob = self._read_blob(str(digest))
+                if blob is None:
+                    # Blob desalojado: la entrada ya no está completa.
+                    self._count("misses")
+                    return None
+                blobs[name] = blob
+                read_bytes += len(blob)
+            self._touch(key, meta)
+        except Exception:
+            logger.warning("No se pudo leer cache OCR %s", key, exc_info=True)
+            self._count("errors")
+            self._count("misses")
+            return None
+        self._count("hits")
+        self._count("bytes_read", read_bytes)
+        return meta, blobs
+
+    def put(self, key: str, meta: dict[str, Any], blobs: dict[str, bytes] | None = None) -> bool:
+        blobs = blobs or {}
+        refs = {name: blob_digest(data) for name, data in blobs.items()}
+        payload = self._encode_meta({**meta, "blobs": refs, "stored_at": time.time()})
+        total = len(payload) + sum(len(data) for data in blobs.values())
+        if total > self.max_entry_bytes:
+            logger.info("Entrada OCR %s demasiado grande para cache (%s bytes)", key, total)
+            return False
+        try:
+            for name, data in blobs.items():
+                self._write_blob(refs[name], data)
+            self._write_meta(key, payload)
+        except Exception:
+            logger.warning("No se pudo guardar cache OCR %s", key, exc_info=True)
+            self._count("errors")
+            return False
+        self._count("stores")
+        self._count("bytes_written", total)
+        self._after_put(total)
+        return True
+
+    def get_blob(self, digest: str) -> bytes | None:
+        try:
+            return self._read_blob(digest)
+        except Exception:
+            logger.warning("No se pudo leer blob OCR %s", digest, exc_info=True)
+            self._count("errors")
+            return None
+
+    # ── Backend ───────────────────────────────────────────────────────────
+
+    def _read_meta(self, key: str) -> bytes | None:
+        return None
+
+    def _write_meta(self, key: str, payload: bytes) -> None:
+        return None
+
+    def _delete_meta(self, key: str) -> None:
+        return None
+
+    def _read_blob(self, digest: str) -> bytes | None:
+        return None
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        return None
+
+    def _touch(self, key: str, meta: dict[str, Any]) -> None:
+        return None
+
+    def _after_put(self, written: int) -> None:
+        return None
+
+
+class FilesystemExtractionCache(ExtractionCache):
+    """``<root>/<key>.json`` + ``<root>/blobs/<aa>/<digest>.bin``."""
+
+    backend = "fs"
+
+    def __init__(self, root: Path, *, max_bytes: int = DEFAULT_MAX_BYTES, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._written_since_scan = max_bytes  # first put triggers a scan
+        self._evict_lock = Lock()
+
+    def meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.bin"
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _read_meta(self, key: str) -> bytes | None:
+        path = self.meta_path(key)
+        return path.read_bytes() if path.exists() else None
+
+    def _write_meta(self, key: str, payload: bytes) -> None:
+        self._atomic_write(self.meta_path(key), payload)
+
+    def _delete_meta(self, key: str) -> None:
+        self.meta_path(key).unlink(missing_ok=True)
+
+    def _read_blob(self, digest: str) -> bytes | None:
+        path = self.blob_path(digest)
+        return path.read_bytes() if path.exists() else None
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        path = self.blob_path(digest)
+        if path.exists():
+            os.utime(path)
+            return
+        self._atomic_write(path, data)
+
+    def _touch(self, key: str, meta: dict[str, Any]) -> None:
+        try:
+            os.utime(self.meta_path(key))
+            for digest in (meta.get("blobs") or {}).values():
+                os.utime(self.blob_path(str(digest)))
+        except OSError:
+            pass
+
+    def _after_put(self, written: int) -> None:
+        self._written_since_scan += written
+        if self._written_since_scan >= self.max_bytes * _EVICTION_SCAN_FRACTION:
+            self.evict()
+
+    def evict(self) -> int:
+        """Borra lo caducado y, si se supera ``max_bytes``, lo menos usado."""
+        if not self._evict_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._written_since_scan = 0
+            files: list[tuple[float, int, Path]] = []
+            for path in self.root.rglob("*"):
+                if path.suffix not in (".json", ".bin") or not path.is_file():
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            files.sort()
+            total = sum(size for _mtime, size, _path in files)
+            cutoff = time.time() - self.ttl_seconds
+            removed = 0
+            for mtime, size, path in files:
+                if mtime >= cutoff and total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            if removed:
+                self._count("evictions", removed)
+                logger.info("Cache OCR: %s ficheros desalojados, %s bytes", removed, total)
+            return removed
+        finally:
+            self._evict_lock.release()
+
+
+class RedisExtractionCache(ExtractionCache):
+    backend = "redis"
+    prefix = "importador:ocr"
+
+    def __init__(self, client: Any, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.client = client
+
+    def _meta_key(self, key: str) -> str:
+        return f"{self.prefix}:meta:{key}"
+
+    def _blob_key(self, digest: str) -> str:
+        return f"{self.prefix}:blob:{digest}"
+
+    def _read_meta(self, key: str) -> bytes | None:
+        return self.client.get(self._meta_key(key))
+
+    def _write_meta(self, key: str, payload: bytes) -> None:
+        self.client.set(self._meta_key(key), payload, ex=int(self.ttl_seconds))
+
+    def _delete_meta(self, key: str) -> None:
+        self.client.delete(self._meta_key(key))
+
+    def _read_blob(self, digest: str) -> bytes | None:
+        return self.client.get(self._blob_key(digest))
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        # Blobs outlive the metadata pointing at them, never the other way round.
+        self.client.set(self._blob_key(digest), data, ex=int(self.ttl_seconds) + 3600)
+
+    def _touch(self, key: str, meta: dict[str, Any]) -> None:
+        ttl = int(self.ttl_seconds)
+        pipe = self.client.pipeline()
+        pipe.expire(self._meta_key(key), ttl)
+        for digest in (meta.get("blobs") or {}).values():
+            pipe.expire(self._blob_key(str(digest)), ttl + 3600)
+        pipe.execute()
+
+
+def _build_cache(backend: str, fs_root: Path) -> ExtractionCache:
+    common = {
+        "ttl_seconds": float(os.getenv("IMPORTADOR_OCR_CACHE_TTL_DAYS", "30")) * 24 * 3600,
+        "compress": _env_bool("IMPORTADOR_OCR_CACHE_COMPRESS", True),
+    }
+    if backend == "none":
+        return ExtractionCache(**common)
+    if backend == "redis":
+        redis_url = os.getenv("IMPORTADOR_OCR_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+
+                client = redis.from_url(redis_url, socket_timeout=2, socket_connect_timeout=2)
+                client.ping()
+                return RedisExtractionCache(client, **common)
+            except Exception:
+                logger.warning(
+                    "Redis no disponible para cache OCR; usando sistema de ficheros",
+                    exc_info=True,
+                )
+        else:
+            logger.warning("IMPORTADOR_OCR_CACHE_BACKEND=redis sin REDIS_URL; usando ficheros")
+    max_mb = float(os.getenv("IMPORTADOR_OCR_CACHE_MAX_MB", str(DEFAULT_MAX_BYTES // 2**20)))
+    return FilesystemExtractionCache(fs_root, max_bytes=int(max_mb * 2**20), **common)
+
+
+def get_extraction_cache(fs_root: Path) -> ExtractionCache:
+    """Cache configurado por entorno; ``fs_root`` es el directorio del backend ``fs``."""
+    backend = (os.getenv("IMPORTADOR_OCR_CACHE_BACKEND") or "fs").strip().lower()
+    cache_key = (backend, str(fs_root))
+    with _lock:
+        cache = _caches.get(cache_key)
+        if cache is None:
+            cache = _caches[cache_key] = _build_cache(backend, Path(fs_root))
+        return cache
+
+
+def extraction_cache_stats() -> list[dict[str, Any]]:
+    with _lock:
+        return [cache.stats() for cache in _caches.values()]
+
+
+def invalidate_extraction_caches() -> None:
+    """Olvida las instancias configuradas (tests / cambio de configuración)."""
+    with _lock:
+        _caches.clear()
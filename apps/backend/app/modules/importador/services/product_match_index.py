@@ -0,0 +1,326 @@
+"""Índice por tenant para el matching de líneas importadas contra el catálogo.
+
+``_score_product_candidate`` es caro (varios ``SequenceMatcher`` por producto y
+alias), así que en vez de puntuar todo el catálogo para cada línea se generan
+candidatos con:
+
+- mapas exactos: supplier refs, nombres/alias normalizados y "core" sin
+  tokens de empaque;
+- un índice invertido de trigramas de caracteres sobre nombre, core y alias.
+
+Solo los ``limit`` mejores candidatos por solapamiento de trigramas (más los
+aciertos exactos) pasan por el scoring real, que no cambia. Se pierden a
+propósito los "fuzzy" sin ningún trigrama en común (ruido de caracteres sueltos
+que ``SequenceMatcher`` puntúa ~0.4 y nunca se autoseleccionan).
+
+El índice se guarda en memoria por tenant. Se refresca de forma incremental con
+los productos tocados en este proceso (eventos ORM) y con los que tengan
+``updated_at`` posterior al índice; si el conteo no cuadra o vence el TTL se
+reconstruye completo.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.core.products import Product
+
+from .product_matching import (
+    _iter_product_supplier_refs,
+    _norm_import_text,
+    _normalize_supplier_ref,
+    _strip_pack_tokens,
+)
+
+logger = logging.getLogger("importador.product_match_index")
+
+_CACHE_TTL = 300.0
+_MAX_CACHED_TENANTS = 64
+DEFAULT_CANDIDATE_LIMIT = 60
+
+_lock = Lock()
+_indexes: dict[str, ProductMatchIndex] = {}
+_dirty_products: dict[str, set[str]] = {}
+
+
+@dataclass(slots=True)
+class IndexedProduct:
+    """Snapshot desacoplado de la sesión con los campos que usa el scoring."""
+
+    id: UUID
+    name: str
+    sku: str | None
+    unit: str | None
+    stock: float
+    product_metadata: dict | None
+    import_aliases: list | None
+    updated_at: datetime | None
+
+
+_PRODUCT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.sku,
+    Product.unit,
+    Product.stock,
+    Product.product_metadata,
+    Product.import_aliases,
+    Product.updated_at,
+)
+
+
+def _trigrams(text: str) -> frozenset[str]:
+    if not text:
+        return frozenset()
+    padded = f" {text} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _match_keys(product: IndexedProduct) -> set[str]:
+    keys = {_norm_import_text(product.name or ""), _strip_pack_tokens(product.name or "")}
+    aliases = product.import_aliases if isinstance(product.import_aliases, list) else []
+    for alias in aliases:
+        if isinstance(alias, dict):
+            keys.add(_norm_import_text(str(alias.get("name") or "")))
+    keys.discard("")
+    return keys
+
+
+class ProductMatchIndex:
+    def __init__(self, tenant_id: str) -> None:
+        self.tenant_id = tenant_id
+        self.built_at = time.monotonic()
+        self.lock = Lock()
+        self.max_updated_at: datetime | None = None
+        self._products: dict[str, IndexedProduct] = {}
+        self._refs: dict[str, set[str]] = {}
+        self._exact: dict[str, set[str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._key_meta: dict[int, tuple[str, frozenset[str]]] = {}
+        self._keys_by_product: dict[str, list[tuple[str, str, int]]] = {}
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def add(self, product: IndexedProduct) -> None:
+        pid = str(product.id)
+        self.remove(pid)
+        self._products[pid] = product
+        entries: list[tuple[str, str, int]] = []
+        for ref in _iter_product_supplier_refs(product):
+            norm = _norm_import_text(ref)
+            self._refs.setdefault(norm, set()).add(pid)
+            entries.append(("ref", norm, -1))
+        for key in _match_keys(product):
+            self._exact.setdefault(key, set()).add(pid)
+            grams = _trigrams(key)
+            key_id = self._next_key
+            self._next_key += 1
+            self._key_meta[key_id] = (pid, grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key_id)
+            entries.append(("key", key, key_id))
+        self._keys_by_product[pid] = entries
+        updated_at = product.updated_at
+        if updated_at is not None and (
+            self.max_updated_at is None or updated_at > self.max_updated_at
+        ):
+            self.max_updated_at = updated_at
+
+    def remove(self, product_id: str) -> None:
+        if self._products.pop(product_id, None) is None:
+            return
+        for kind, value, key_id in self._keys_by_product.pop(product_id, []):
+            bucket = self._refs if kind == "ref" else self._exact
+            ids = bucket.get(value)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    bucket.pop(value, None)
+            if key_id < 0:
+                continue
+            _pid, grams = self._key_meta.pop(key_id)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(key_id)
+                    if not postings:
+                        self._postings.pop(gram, None)
+
+    def get(self, product_id: UUID | str) -> IndexedProduct | None:
+        return self._products.get(str(product_id))
+
+    def candidates(
+        self,
+        description: str,
+        supplier_ref: str | None = None,
+        *,
+        limit: int = DEFAULT_CANDIDATE_LIMIT,
+    ) -> list[IndexedProduct]:
+        """Productos que merece la pena puntuar para ``description``."""
+        with self.lock:
+            return self._candidates(description, supplier_ref, limit=limit)
+
+    def _candidates(
+        self,
+        description: str,
+        supplier_ref: str | None,
+        *,
+        limit: int,
+    ) -> list[IndexedProduct]:
+        desc_norm = _norm_import_text(description)
+        desc_core = _strip_pack_tokens(description)
+        selected: dict[str, IndexedProduct] = {}
+
+        normalized_ref = _normalize_supplier_ref(supplier_ref)
+        if normalized_ref:
+            for pid in self._refs.get(_norm_import_text(normalized_ref), ()):
+                selected[pid] = self._products[pid]
+        if not desc_norm:
+            return list(selected.values())
+        for key in {desc_norm, desc_core}:
+            for pid in self._exact.get(key, ()):
+                selected[pid] = self._products[pid]
+
+        query_grams = _trigrams(desc_norm) | _trigrams(desc_core)
+        if not query_grams:
+            return list(selected.values())
+        shared: Counter[int] = Counter()
+        for gram in query_grams:
+            postings = self._postings.get(gram)
+            if postings:
+                shared.update(postings)
+
+        query_size = len(query_grams)
+        best_by_product: dict[str, float] = {}
+        for key_id, hits in shared.items():
+            pid, grams = self._key_meta[key_id]
+            key_size = len(grams)
+            # Overlap coefficient favours containment (alias/name inside the line),
+            # Dice keeps long unrelated keys from tying with real matches.
+            similarity = hits / min(key_size, query_size) + 2.0 * hits / (key_size + query_size)
+            if similarity > best_by_product.get(pid, 0.0):
+                best_by_product[pid] = similarity
+
+        for pid, _similarity in heapq.nlargest(
+            max(1, limit), best_by_product.items(), key=lambda item: item[1]
+        ):
+            selected.setdefault(pid, self._products[pid])
+        return list(selected.values())
+
+
+def _snapshot(row: Any) -> IndexedProduct:
+    return IndexedProduct(
+        id=row.id,
+        name=row.name or "",
+        sku=row.sku,
+        unit=row.unit,
+        stock=float(row.stock or 0),
+        product_metadata=row.product_metadata,
+        import_aliases=row.import_aliases,
+        updated_at=row.updated_at,
+    )
+
+
+def _build_index(db: Session, tenant_key: str) -> ProductMatchIndex:
+    started_at = time.perf_counter()
+    index = ProductMatchIndex(tenant_key)
+    rows = (
+        db.query(*_PRODUCT_COLUMNS)
+        .filter(Product.tenant_id == tenant_key, Product.active == True)  # noqa: E712
+        .all()
+    )
+    for row in rows:
+        index.add(_snapshot(row))
+    logger.info(
+        "Product match index built tenant=%s products=%s ms=%s",
+        tenant_key,
+        len(index),
+        int((time.perf_counter() - started_at) * 1000),
+    )
+    return index
+
+
+def _refresh_index(db: Session, index: ProductMatchIndex, dirty: set[str]) -> None:
+    conditions = []
+    if dirty:
+        conditions.append(Product.id.in_([UUID(pid) for pid in dirty]))
+    if index.max_updated_at is not None:
+        conditions.append(Product.updated_at >= index.max_updated_at)
+    if not conditions:
+        return
+    rows = (
+        db.query(*_PRODUCT_COLUMNS, Product.active)
+        .filter(Product.tenant_id == index.tenant_id, or_(*conditions))
+        .all()
+    )
+    for row in rows:
+        if row.active:
+            index.add(_snapshot(row))
+        else:
+            index.remove(str(row.id))
+    found = {str(row.id) for row in rows}
+    for pid in dirty - found:
+        index.remove(pid)
+
+
+def get_product_match_index(db: Session, tenant_id: UUID | str) -> ProductMatchIndex:
+    """Devuelve el índice del tenant, construyéndolo o refrescándolo si hace falta."""
+    tenant_key = str(tenant_id)
+    active_count = (
+        db.query(func.count(Product.id))
+        .filter(Product.tenant_id == tenant_key, Product.active == True)  # noqa: E712
+        .scalar()
+    )
+    with _lock:
+        index = _indexes.get(tenant_key)
+        dirty = _dirty_products.pop(tenant_key, set())
+    if index is not None and (time.monotonic() - index.built_at) > _CACHE_TTL:
+        index = None
+    if index is not None:
+        with index.lock:
+            _refresh_index(db, index, dirty)
+        if len(index) != int(active_count or 0):
+            index = None
+    if index is None:
+        index = _build_index(db, tenant_key)
+        with _lock:
+            _indexes.pop(tenant_key, None)
+            while len(_indexes) >= _MAX_CACHED_TENANTS:
+                _indexes.pop(next(iter(_indexes)))
+            _indexes[tenant_key] = index
+    return index
+
+
+def invalidate_product_match_index(tenant_id: UUID | str | None = None) -> None:
+    with _lock:
+        if tenant_id is None:
+            _indexes.clear()
+            _dirty_products.clear()
+            return
+        _indexes.pop(str(tenant_id), None)
+        _dirty_products.pop(str(tenant_id), None)
+
+
+def _mark_product_dirty(_mapper: Any, _connection: Any, target: Product) -> None:
+    tenant_key = str(getattr(target, "tenant_id", "") or "")
+    if not tenant_key or target.id is None or tenant_key not in _indexes:
+        return
+    with _lock:
+        _dirty_products.setdefault(tenant_key, set()).add(str(target.id))
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Product, _event_name, _mark_product_dirty)
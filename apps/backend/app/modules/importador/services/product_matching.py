@@ -428,6 +428,26 @@ def _score_product_candidate(
     return best_score, best_reason, best_factor
 
 
+def _rank_product_candidates(
+    index,
+    description: str,
+    supplier_ref: str | None = None,
+) -> list[tuple[float, str, float, object]]:
+    """Score only the indexed candidates for a line, best first."""
+    ranked: list[tuple[float, str, float, object]] = []
+    for product in index.candidates(description, supplier_ref):
+        score, reason, factor = _score_product_candidate(
+            description,
+            product,
+            supplier_ref=supplier_ref,
+        )
+        if score <= 0:
+            continue
+        ranked.append((score, reason or "candidate", factor, product))
+    ranked.sort(key=lambda row: (-row[0], getattr(row[3], "name", "")))
+    return ranked
+
+
 def _build_document_line_matches(
     db: Session,
     tenant_id: UUID,
@@ -439,6 +459,7 @@ def _build_document_line_matches(
     from app.models.core.products import Product
 
     from ..schemas import DocumentLineMatchOut, ProductMatchCandidateOut
+    from .product_match_index import get_product_match_index
 
     data = doc.datos_confirmados or doc.datos_extraidos or {}
     if not isinstance(data, dict):
@@ -453,31 +474,35 @@ def _build_document_line_matches(
         for match in (line_matches or [])
         if getattr(match, "line_index", None) is not None
     }
-    products = (
-        db.query(Product)
-        .filter(Product.tenant_id == str(tenant_id), Product.active == True)  # noqa: E712
-        .all()
-    )
+    match_index = get_product_match_index(db, tenant_id)
 
-    output: list[DocumentLineMatchOut] = []
+    matched_lines: list[tuple[int, str, float, float, list]] = []
     for index, item in enumerate(line_items):
         description, qty, unit_price = _get_line_values(item)
         supplier_ref = _extract_line_supplier_ref(item)
         if not description or qty <= 0:
             continue
+        ranked = _rank_product_candidates(match_index, description, supplier_ref)
+        matched_lines.append((index, description, qty, unit_price, ranked))
+
+    # The index holds catalog snapshots; stock moves too often to trust them.
+    candidate_ids = {
+        product.id
+        for *_line, ranked in matched_lines
+        for _score, _reason, _factor, product in ranked[:limit_per_line]
+    }
+    fresh_stock = (
+        dict(
+            db.query(Product.id, Product.stock)
+            .filter(Product.tenant_id == str(tenant_id), Product.id.in_(candidate_ids))
+            .all()
+        )
+        if candidate_ids
+        else {}
+    )
 
-        ranked: list[tuple[float, str, float, object]] = []
-        for product in products:
-            score, reason, factor = _score_product_candidate(
-                description,
-                product,
-                supplier_ref=supplier_ref,
-            )
-            if score <= 0:
-                continue
-            ranked.append((score, reason or "candidate", factor, product))
-        ranked.sort(key=lambda row: (-row[0], getattr(row[3], "name", "")))
-
+    output: list[DocumentLineMatchOut] = []
+    for index, description, qty, unit_price, ranked in matched_lines:
         selected_match = selected_by_index.get(index)
         selected_product = (
             _find_product_by_id(db, tenant_id, selected_match.product_id)
@@ -504,7 +529,7 @@ def _build_document_line_matches(
                 name=product.name,
                 sku=product.sku,
                 unit=product.unit or "unit",
-                stock=float(product.stock or 0),
+                stock=float(fresh_stock.get(product.id, product.stock) or 0),
                 score=round(score, 4),
                 reason=reason,
                 inferred_factor=float(factor or 1),
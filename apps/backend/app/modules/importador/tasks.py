@@ -14,6 +14,8 @@ import asyncio
 import json
 import logging
 import os
+import shutil
+import threading
 import time
 from pathlib import Path
 from uuid import UUID
@@ -23,6 +25,11 @@ from .utils import json_safe as _json_safe
 
 logger = logging.getLogger("importador.tasks")
 
+# Secuencia de eventos de progreso por lote (en proceso si no hay Redis)
+_BATCH_SEQ_TTL_SECONDS = 7 * 24 * 3600
+_batch_seq_lock = threading.Lock()
+_local_batch_seq: dict[str, int] = {}
+
 # Formatos visuales: pre-OCR sabemos que necesitan deep lane.
 _INITIAL_VISUAL_FORMATS: frozenset[str] = frozenset(
     {
@@ -102,14 +109,6 @@ def _payload_path(doc_id: str | UUID) -> Path:
     return _payload_dir() / f"{doc_id}.bin"
 
 
-def _get_redis():
-    """Return a sync Redis client used for batch update pub/sub."""
-    import redis  # type: ignore
-
-    url = os.getenv("REDIS_URL") or os.getenv("DEV_REDIS_URL") or "redis://localhost:6379/0"
-    return redis.from_url(url, decode_responses=False)
-
-
 def store_payload(doc_id: str | UUID, file_bytes: bytes) -> None:
     """Store file bytes on local disk to avoid filling Redis memory."""
     payload_path = _payload_path(doc_id)
@@ -118,6 +117,19 @@ def store_payload(doc_id: str | UUID, file_bytes: bytes) -> None:
     tmp_path.replace(payload_path)
 
 
+def store_payload_file(doc_id: str | UUID, source_path: Path) -> None:
+    """Move an already-written file (chunked upload) into the payload slot without reading it."""
+    payload_path = _payload_path(doc_id)
+    try:
+        os.replace(source_path, payload_path)
+    except OSError:
+        # Otro sistema de ficheros: copia por bloques
+        tmp_path = payload_path.with_suffix(".tmp")
+        shutil.copyfile(source_path, tmp_path)
+        tmp_path.replace(payload_path)
+        Path(source_path).unlink(missing_ok=True)
+
+
 def _should_run_inline_ai(
     *,
     tipo_archivo: str,
@@ -162,20 +174,101 @@ def delete_payload(doc_id: str) -> None:
         logger.warning("No se pudo eliminar payload local de %s", doc_id, exc_info=True)
 
 
-def publish_batch_update(db, batch_id: UUID) -> None:
+def batch_channel(batch_id: UUID | str) -> str:
+    return f"imp:batch:{batch_id}"
+
+
+def _batch_seq_key(batch_id: UUID | str) -> str:
+    return f"imp:batch:{batch_id}:seq"
+
+
+def next_batch_seq(batch_id: UUID | str) -> int:
+    """Siguiente número de secuencia de los eventos de progreso del lote."""
+    from app.core.cache import get_sync_redis_client
+
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(_batch_seq_key(batch_id))
+            pipe.expire(_batch_seq_key(batch_id), _BATCH_SEQ_TTL_SECONDS)
+            return int(pipe.execute()[0])
+        except Exception as exc:
+            logger.warning("Secuencia Redis del batch %s no disponible: %s", batch_id, exc)
+    with _batch_seq_lock:
+        seq = _local_batch_seq.get(str(batch_id), 0) + 1
+        _local_batch_seq[str(batch_id)] = seq
+        return seq
+
+
+def current_batch_seq(batch_id: UUID | str) -> int:
+    from app.core.cache import get_sync_redis_client
+
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            return int(client.get(_batch_seq_key(batch_id)) or 0)
+        except Exception as exc:
+            logger.debug("Secuencia Redis del batch %s no disponible: %s", batch_id, exc)
+    with _batch_seq_lock:
+        return _local_batch_seq.get(str(batch_id), 0)
+
+
+def batch_snapshot(db, batch) -> dict:
+    """Estado completo del lote para el arranque (o resincronización) de un stream.
+
+    La secuencia se lee antes que el lote y los deltas se publican después del
+    commit. Un delta con ``seq`` <= la del snapshot ya está reflejado en él; uno
+    posterior trae el estado completo de sus ítems, así que aplicarlo encima de
+    un snapshot que ya lo incluía no cambia nada.
+    """
     from app.modules.importador import crud
 
-    batch = crud.get_batch_any_tenant(db, batch_id)
-    if batch is None:
-        return
+    seq = current_batch_seq(batch.id)
+    return {"type": "snapshot", "seq": seq, **crud.serialize_batch_detail(db, batch)}
+
+
+def publish_batch_update(db, batch_id: UUID, documento_id: UUID | None = None) -> None:
+    """Publica el progreso del lote como delta: resumen + ítems del documento.
+
+    Antes se serializaba el lote completo (todos los ítems) en cada cambio de
+    estado. Los streams mandan el snapshot al conectar o al detectar un hueco
+    de secuencia. Sin ``documento_id`` se publica el lote completo.
 
-    payload = crud.serialize_batch_detail(db, batch)
+    Llamar después del commit: el delta se lee de la BD y un stream que arranque
+    entre medias no debe recibir un estado que su snapshot todavía no ve.
+    """
+    from app.core.pubsub_hub import publish
+    from app.models.importador import ImpBatchImport
+    from app.modules.importador import crud
+
+    if documento_id is None:
+        batch = crud.get_batch_any_tenant(db, batch_id)
+        if batch is None:
+            return
+        payload = {**crud.serialize_batch_detail(db, batch), "type": "snapshot"}
+    else:
+        batch = db.get(ImpBatchImport, batch_id)
+        if batch is None:
+            return
+        payload = {
+            "type": "delta",
+            **crud.summarize_batch(db, batch),
+            "items": crud.serialize_batch_items_for_document(db, batch_id, documento_id),
+        }
     try:
-        _get_redis().publish(f"imp:batch:{batch_id}", json.dumps(_json_safe(payload)))
+        payload["seq"] = next_batch_seq(batch_id)
+        publish(batch_channel(batch_id), json.dumps(_json_safe(payload)))
     except Exception as exc:
         logger.warning("No se pudo publicar batch %s: %s", batch_id, exc)
 
 
+def publish_batch_updates(db, batch_ids, documento_id: UUID | None = None) -> None:
+    """`publish_batch_update` para cada lote tocado (tras el commit)."""
+    for batch_id in batch_ids:
+        publish_batch_update(db, batch_id, documento_id)
+
+
 async def _run_processing(
     doc_id: UUID,
     tenant_id: UUID,
@@ -223,10 +316,11 @@ async def _run_processing(
             return {"status": "skipped", "doc_id": doc_id, "reason": "already_processed"}
 
         crud.update_documento(db, doc, {"estado": "PROCESSING"})
-        for batch_id in crud.touch_batch_items_for_document(db, doc.id, estado="PROCESSING"):
+        batch_ids = crud.touch_batch_items_for_document(db, doc.id, estado="PROCESSING")
+        for batch_id in batch_ids:
             crud.refresh_batch_status(db, batch_id)
-            publish_batch_update(db, batch_id)
         db.commit()
+        publish_batch_updates(db, batch_ids, doc.id)
         db.refresh(doc)
 
         task_started_at = time.perf_counter()
@@ -254,10 +348,11 @@ async def _run_processing(
                 0, int(round((time.perf_counter() - task_started_at) * 1000))
             )
             commit_started_at = time.perf_counter()
-            for batch_id in crud.touch_batch_items_for_document(db, doc.id, estado="REVIEW"):
+            batch_ids = crud.touch_batch_items_for_document(db, doc.id, estado="REVIEW")
+            for batch_id in batch_ids:
                 crud.refresh_batch_status(db, batch_id)
-                publish_batch_update(db, batch_id)
             db.commit()
+            publish_batch_updates(db, batch_ids, doc.id)
             db.refresh(doc)
             commit_elapsed_ms = max(0, int(round((time.perf_counter() - commit_started_at) * 1000)))
             total_elapsed_ms = max(0, int(round((time.perf_counter() - task_started_at) * 1000)))
@@ -345,15 +440,16 @@ async def _run_processing(
                         db, fresh_doc, {"estado": "FAILED", "error_detalle": str(exc)}
                     )
                     crud.add_log(db, fresh_doc.id, "EXTRACT", user_id, {"error": str(exc)})
-                    for batch_id in crud.touch_batch_items_for_document(
+                    batch_ids = crud.touch_batch_items_for_document(
                         db,
                         fresh_doc.id,
                         estado="FAILED",
                         error_detalle=str(exc),
-                    ):
+                    )
+                    for batch_id in batch_ids:
                         crud.refresh_batch_status(db, batch_id)
-                        publish_batch_update(db, batch_id)
                     db.commit()
+                    publish_batch_updates(db, batch_ids, fresh_doc.id)
             except Exception as inner:
                 logger.error("No se pudo marcar FAILED doc %s: %s", doc_id, inner, exc_info=True)
 
@@ -448,15 +544,16 @@ def _make_task():
                             batch_estado = "FAILED"
 
                         crud.update_documento(db, doc, doc_update)
-                        for batch_id in crud.touch_batch_items_for_document(
+                        batch_ids = crud.touch_batch_items_for_document(
                             db,
                             doc.id,
                             estado=batch_estado,
                             error_detalle=user_msg if not tiene_datos else None,
-                        ):
+                        )
+                        for batch_id in batch_ids:
                             crud.refresh_batch_status(db, batch_id)
-                            publish_batch_update(db, batch_id)
                         db.commit()
+                        publish_batch_updates(db, batch_ids, doc.id)
             except Exception as exc:
                 logger.error("No se pudo actualizar estado doc %s: %s", doc_id, exc)
             return {"ok": False, "error": user_msg}
@@ -0,0 +1,253 @@
+"""Subidas reanudables por trozos para el importador.
+
+``run-async`` recibe los ficheros como multipart y los lee enteros en memoria
+(más el hash, la expansión de ZIPs y la copia al directorio de payloads). Para
+lotes grandes el cliente usa en su lugar:
+
+1. ``POST /importador/uploads`` (init): nombre, tamaño y SHA-256 opcional.
+2. ``PUT /importador/uploads/chunk/{id}?offset=N`` con el trozo en el cuerpo y
+   su ``X-Chunk-SHA256``. Se escribe directo a disco mientras llega; un trozo
+   con checksum erróneo se descarta. Para reanudar, ``GET /uploads/{id}``
+   devuelve ``received_bytes`` y se sigue desde ahí.
+3. ``POST /importador/uploads/complete`` con los ids: el lote se encola como en
+   ``run-async`` pero desde disco (``batch_service.enqueue_async_batch``).
+
+Los datos viven en ``<payload_dir>/_uploads/<id>/`` (mismo sistema de ficheros
+que los payloads, así el fichero final se mueve sin copiarlo). Las subidas
+abandonadas se purgan pasado ``IMPORTS_UPLOAD_TTL_HOURS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# SHA-256 acumulado por subida en este proceso: (bytes_hasheados, hasher).
+# Si otro proceso recibió parte de los trozos, se recalcula desde disco.
+_running_hashes: dict[str, tuple[int, Any]] = {}
+_running_hashes_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    try:
+        return int(raw) if raw else default
+    except ValueError:
+        return default
+
+
+def max_chunk_bytes() -> int:
+    return max(1, _env_int("IMPORTS_UPLOAD_CHUNK_MB", 8)) * 1024 * 1024
+
+
+def uploads_root() -> Path:
+    from .tasks import _payload_dir
+
+    root = _payload_dir() / "_uploads"
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+@dataclass(frozen=True)
+class UploadSession:
+    upload_id: str
+    tenant_id: str
+    user_id: str
+    filename: str
+    size: int
+    sha256: str | None
+    created_at: str
+
+    @property
+    def dir(self) -> Path:
+        return uploads_root() / self.upload_id
+
+    @property
+    def data_path(self) -> Path:
+        return self.dir / "data.part"
+
+    @property
+    def received_bytes(self) -> int:
+        try:
+            return self.data_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def status(self) -> dict[str, Any]:
+        received = self.received_bytes
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.size,
+            "received_bytes": received,
+            "chunk_size": max_chunk_bytes(),
+            "complete": received == self.size,
+        }
+
+
+def create_upload(
+    *, tenant_id: UUID, user_id: str, filename: str, size: int, sha256: str | None = None
+) -> UploadSession:
+    purge_stale_uploads()
+    session = UploadSession(
+        upload_id=str(uuid4()),
+        tenant_id=str(tenant_id),
+        user_id=str(user_id or ""),
+        filename=filename,
+        size=int(size),
+        sha256=(sha256 or "").strip().lower() or None,
+        created_at=datetime.datetime.now(datetime.UTC).isoformat(),
+    )
+    session.dir.mkdir(parents=True)
+    session.data_path.touch()
+    (session.dir / "meta.json").write_text(json.dumps(asdict(session)))
+    return session
+
+
+def get_upload(upload_id: str, tenant_id: UUID, user_id: str) -> UploadSession:
+    """Subida del usuario (404 si no existe, expiró o es de otro tenant/usuario)."""
+    try:
+        upload_id = str(UUID(str(upload_id)))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="upload_not_found")
+    try:
+        meta = json.loads((uploads_root() / upload_id / "meta.json").read_text())
+        session = UploadSession(**meta)
+    except (OSError, ValueError, TypeError):
+        raise HTTPException(status_code=404, detail="upload_not_found")
+    if session.tenant_id != str(tenant_id) or session.user_id != str(user_id or ""):
+        raise HTTPException(status_code=404, detail="upload_not_found")
+    return session
+
+
+async def append_chunk(
+    session: UploadSession,
+    *,
+    offset: int,
+    chunk_sha256: str,
+    body: AsyncIterator[bytes],
+) -> dict[str, Any]:
+    """Escribe un trozo en ``offset`` a medida que llega y verifica su checksum.
+
+    ``offset`` puede repetir el último trozo (reintento tras perder la
+    respuesta) pero no dejar huecos. Si el trozo no es válido el fichero vuelve
+    a ``offset`` y el cliente lo reenvía.
+    """
+    received = session.received_bytes
+    if offset > received or offset >= session.size:
+        raise HTTPException(status_code=409, detail="upload_offset_mismatch")
+
+    limit = min(max_chunk_bytes(), session.size - offset)
+    with _running_hashes_lock:
+        hashed, running = _running_hashes.get(session.upload_id, (0, None))
+    if offset == 0:
+        running = hashlib.sha256()
+    elif hashed != offset or running is None:
+        running = None
+    else:
+        running = running.copy()
+
+    chunk_digest = hashlib.sha256()
+    written = 0
+    error: HTTPException | None = None
+    fh = await asyncio.to_thread(session.data_path.open, "r+b")
+    try:
+        fh.seek(offset)
+        async for piece in body:
+            if not piece:
+                continue
+            written += len(piece)
+            if written > limit:
+                error = HTTPException(status_code=413, detail="chunk_too_large")
+                break
+            chunk_digest.update(piece)
+            if running is not None:
+                running.update(piece)
+            await asyncio.to_thread(fh.write, piece)
+        if error is None and written == 0:
+            error = HTTPException(status_code=400, detail="empty_chunk")
+        if error is None and chunk_digest.hexdigest() != (chunk_sha256 or "").strip().lower():
+            error = HTTPException(status_code=422, detail="chunk_checksum_mismatch")
+        # Reintento de un trozo ya recibido: se reescribe, no se acumula
+        await asyncio.to_thread(fh.truncate, offset if error else offset + written)
+    except BaseException:
+        # Conexión cortada a mitad de trozo: nada sin verificar queda en disco
+        await asyncio.to_thread(fh.truncate, offset)
+        with _running_hashes_lock:
+            _running_hashes.pop(session.upload_id, None)
+        raise
+    finally:
+        await asyncio.to_thread(fh.close)
+
+    with _running_hashes_lock:
+        if error is not None or running is None:
+            _running_hashes.pop(session.upload_id, None)
+        else:
+            _running_hashes[session.upload_id] = (offset + written, running)
+    if error is not None:
+        raise error
+    return session.status()
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while block := fh.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def finalize_upload(session: UploadSession) -> str:
+    """Comprueba que la subida está completa y devuelve su SHA-256."""
+    if session.received_bytes != session.size:
+        raise HTTPException(status_code=409, detail="upload_incomplete")
+    with _running_hashes_lock:
+        hashed, running = _running_hashes.get(session.upload_id, (0, None))
+    if running is not None and hashed == session.size:
+        file_hash = running.hexdigest()
+    else:
+        file_hash = await asyncio.to_thread(_hash_file, session.data_path)
+    if session.sha256 and session.sha256 != file_hash:
+        raise HTTPException(status_code=422, detail="upload_checksum_mismatch")
+    return file_hash
+
+
+def discard_upload(session: UploadSession) -> None:
+    with _running_hashes_lock:
+        _running_hashes.pop(session.upload_id, None)
+    shutil.rmtree(session.dir, ignore_errors=True)
+
+
+def purge_stale_uploads() -> int:
+    """Borra subidas sin actividad desde hace más de ``IMPORTS_UPLOAD_TTL_HOURS``."""
+    cutoff = time.time() - max(1, _env_int("IMPORTS_UPLOAD_TTL_HOURS", 24)) * 3600
+    removed = 0
+    for upload_dir in uploads_root().iterdir():
+        try:
+            last_activity = max(p.stat().st_mtime for p in (upload_dir, *upload_dir.iterdir()))
+        except (OSError, ValueError):
+            continue
+        if last_activity < cutoff:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info("importador: %s subidas por trozos caducadas eliminadas", removed)
+    return removed
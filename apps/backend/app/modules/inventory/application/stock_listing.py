@@ -0,0 +1,149 @@
+"""
+Listado de stock por proyección y paginación keyset.
+
+El listado selecciona solo las columnas que se serializan (sin cargar entidades
+``Product``/``Warehouse`` completas) y toma la presentación de compra de
+``product_pack_info`` en vez de agregar ``recipe_ingredients`` en cada llamada.
+La paginación es keyset sobre (nombre|código, almacén, id): el coste de una
+página no depende de su posición y las páginas son estables mientras el
+catálogo no cambie, lo que permite a los POS revalidarlas con ETag.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from typing import Any, Literal
+
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.core.products import Product
+from app.models.inventory.stock import StockItem
+from app.models.inventory.warehouse import Warehouse
+from app.models.recipes import ProductPackInfo
+
+StockOrder = Literal["name", "code"]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginación corrupto o de otro orden."""
+
+
+def _sort_keys(order: StockOrder) -> tuple[Any, Any, Any]:
+    product_key = Product.name if order == "name" else func.coalesce(Product.sku, "")
+    return product_key, func.coalesce(Warehouse.code, ""), StockItem.id
+
+
+def stock_projection_query(
+    tenant_id: str,
+    *,
+    warehouse_id: str | None = None,
+    product_id: str | None = None,
+    category_id: str | None = None,
+    exclude_raw_material: bool = False,
+    low_stock: bool = False,
+    search: str | None = None,
+) -> Select:
+    """SELECT de stock con las columnas que consume ``StockItemOut``."""
+    q = (
+        select(
+            StockItem.id,
+            StockItem.warehouse_id,
+            StockItem.product_id,
+            StockItem.qty,
+            StockItem.location,
+            StockItem.lot,
+            StockItem.expires_at,
+            Product.sku.label("p_sku"),
+            Product.name.label("p_name"),
+            Product.price.label("p_price"),
+            Product.unit.label("p_unit"),
+            Product.is_raw_material.label("p_is_raw_material"),
+            Product.product_metadata.label("p_meta"),
+            Warehouse.code.label("w_code"),
+            Warehouse.name.label("w_name"),
+            ProductPackInfo.pack_size,
+            ProductPackInfo.pack_label,
+            ProductPackInfo.pack_unit,
+        )
+        .join(Product, (Product.id == StockItem.product_id) & (Product.tenant_id == tenant_id))
+        .join(
+            Warehouse,
+            (Warehouse.id == StockItem.warehouse_id) & (Warehouse.tenant_id == tenant_id),
+        )
+        .outerjoin(ProductPackInfo, ProductPackInfo.product_id == StockItem.product_id)
+        .where(StockItem.tenant_id == tenant_id)
+    )
+    if warehouse_id is not None:
+        q = q.where(StockItem.warehouse_id == warehouse_id)
+    if product_id is not None:
+        q = q.where(StockItem.product_id == product_id)
+    if category_id is not None:
+        q = q.where(Product.category_id == category_id)
+    if exclude_raw_material:
+        q = q.where(Product.is_raw_material.is_(False))
+    if low_stock:
+        stock_min = Product.product_metadata["stock_minimo"].as_float()
+        q = q.where(and_(stock_min.is_not(None), StockItem.qty <= stock_min))
+    if search:
+        pattern = f"%{search.strip()}%"
+        q = q.where(or_(Product.name.ilike(pattern), Product.sku.ilike(pattern)))
+    return q
+
+
+def encode_cursor(order: StockOrder, row: Any) -> str:
+    key = row.p_name if order == "name" else (row.p_sku or "")
+    raw = json.dumps([order, key, row.w_code or "", str(row.id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: StockOrder) -> tuple[str, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order, key, code, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("invalid_cursor") from exc
+    if cursor_order != order:
+        raise InvalidCursorError("cursor_order_mismatch")
+    return str(key), str(code), str(item_id)
+
+
+def fetch_stock_page(
+    db: Session,
+    query: Select,
+    *,
+    order: StockOrder = "name",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> tuple[list[Any], str | None]:
+    """
+    Devuelve ``(filas, next_cursor)`` de la página que sigue a ``cursor``.
+
+    Se pide una fila de más para saber si hay página siguiente sin un COUNT.
+    """
+    keys = _sort_keys(order)
+    if cursor:
+        query = query.where(tuple_(*keys) > decode_cursor(cursor, order))
+    rows = db.execute(query.order_by(*keys).limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(order, rows[-1])
+
+
+def page_etag(payload: bytes) -> str:
+    """ETag débil del cuerpo serializado de una página."""
+    return f'W/"{hashlib.sha1(payload, usedforsecurity=False).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {c.strip() for c in if_none_match.split(",")}
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or etag in candidates or bare in candidates
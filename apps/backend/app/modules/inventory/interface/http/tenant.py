@@ -4,7 +4,7 @@ import asyncio
 from datetime import UTC, date, datetime, timedelta
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
@@ -16,7 +16,16 @@ from app.core.authz import require_permission, require_scope
 from app.models.core.products import Product
 from app.models.inventory.stock import StockItem, StockMove
 from app.models.inventory.warehouse import Warehouse
-from app.models.recipes import RecipeIngredient
+from app.modules.inventory.application.stock_listing import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    StockOrder,
+    etag_matches,
+    fetch_stock_page,
+    page_etag,
+    stock_projection_query,
+)
 from app.modules.settings.infrastructure.repositories import SettingsRepo
 from app.services.inventory_costing import InventoryCostingService
 from app.shared.utils import normalize_lot as _normalize_lot
@@ -361,6 +370,21 @@ class StockItemOut(BaseModel):
     warehouse: dict | None = None
 
 
+def _product_payload(product_id, sku, name, price, is_raw_material, meta: dict | None) -> dict:
+    meta = meta if isinstance(meta, dict) else {}
+    return {
+        "id": str(product_id),
+        "codigo": sku,
+        "nombre": name,
+        "precio": float(price or 0),
+        "is_raw_material": bool(is_raw_material),
+        "product_metadata": meta,
+        "metadata": meta,
+        "stock_minimo": meta.get("stock_minimo"),
+        "reorder_point": meta.get("reorder_point"),
+    }
+
+
 def _serialize_stock_item(
     row: StockItem,
     *,
@@ -370,20 +394,16 @@ def _serialize_stock_item(
     pack_label: str | None = None,
     pack_unit: str | None = None,
 ) -> StockItemOut:
-    meta = getattr(product, "product_metadata", None) or {}
     product_payload = None
     if product is not None:
-        product_payload = {
-            "id": str(product.id),
-            "codigo": product.sku,
-            "nombre": product.name,
-            "precio": float(product.price or 0),
-            "is_raw_material": bool(getattr(product, "is_raw_material", False)),
-            "product_metadata": meta,
-            "metadata": meta,
-            "stock_minimo": meta.get("stock_minimo"),
-            "reorder_point": meta.get("reorder_point"),
-        }
+        product_payload = _product_payload(
+            product.id,
+            product.sku,
+            product.name,
+            product.price,
+            getattr(product, "is_raw_material", False),
+            getattr(product, "product_metadata", None),
+        )
     warehouse_payload = None
     if warehouse is not None:
         warehouse_payload = {
@@ -409,6 +429,27 @@ def _serialize_stock_item(
     )
 
 
+def _stock_row_out(row) -> StockItemOut:
+    """Serializa una fila de ``stock_projection_query``."""
+    return StockItemOut(
+        id=str(row.id),
+        product_id=str(row.product_id),
+        warehouse_id=str(row.warehouse_id),
+        qty=float(row.qty or 0),
+        unit=row.p_unit or "unit",
+        pack_size=float(row.pack_size) if row.pack_size is not None else None,
+        pack_label=row.pack_label or None,
+        pack_unit=row.pack_unit or None,
+        ubicacion=row.location,
+        lote=row.lot,
+        expires_at=_iso_date(row.expires_at),
+        product=_product_payload(
+            row.product_id, row.p_sku, row.p_name, row.p_price, row.p_is_raw_material, row.p_meta
+        ),
+        warehouse={"id": str(row.warehouse_id), "code": row.w_code, "name": row.w_name},
+    )
+
+
 @router.get("/stock", response_model=list[StockItemOut])
 def get_stock(
     request: Request,
@@ -419,66 +460,64 @@ def get_stock(
         default=False, description="exclude raw materials from stock list"
     ),
 ):
-    from sqlalchemy import func as _func
-
     tid = _require_tenant_id(request)
+    # VERIFICADO: get_stock filtra warehouses y products por tenant_id
+    q = stock_projection_query(
+        tid,
+        warehouse_id=warehouse_id,
+        product_id=product_id,
+        exclude_raw_material=exclude_raw_material,
+    )
+    q = q.order_by(Product.name.asc(), Warehouse.code.asc())
+    return [_stock_row_out(r) for r in db.execute(q).all()]
 
-    # Subquery: pick one pack_info per product from recipe_ingredients
-    # (uses MAX to aggregate — most products appear in ≤1 recipe)
-    pack_subq = (
-        select(
-            RecipeIngredient.product_id.label("ri_product_id"),
-            _func.max(RecipeIngredient.qty_per_package).label("pack_size"),
-            _func.max(RecipeIngredient.purchase_packaging).label("pack_label"),
-            _func.max(RecipeIngredient.package_unit).label("pack_unit"),
-        )
-        .where(RecipeIngredient.qty_per_package > 0)
-        .group_by(RecipeIngredient.product_id)
-        .subquery("pack_info")
+
+class StockPageOut(BaseModel):
+    items: list[StockItemOut]
+    next_cursor: str | None = None
+    limit: int
+
+
+@router.get("/stock/page", response_model=StockPageOut)
+def get_stock_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    order: StockOrder = Query(default="name", description="name | code (SKU)"),
+    q: str | None = Query(default=None, description="búsqueda por nombre o SKU"),
+    warehouse_id: str | None = Query(default=None),
+    category_id: str | None = Query(default=None),
+    low_stock: bool = Query(default=False, description="solo qty <= stock_minimo"),
+    exclude_raw_material: bool = Query(default=False),
+):
+    """
+    Stock paginado por keyset (nombre o código). Responde 304 si la página no
+    cambió respecto al ETag enviado en ``If-None-Match``.
+    """
+    tid = _require_tenant_id(request)
+    query = stock_projection_query(
+        tid,
+        warehouse_id=warehouse_id,
+        category_id=category_id,
+        exclude_raw_material=exclude_raw_material,
+        low_stock=low_stock,
+        search=q,
     )
+    try:
+        rows, next_cursor = fetch_stock_page(db, query, order=order, limit=limit, cursor=cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    q = (
-        select(
-            StockItem,
-            Product,
-            Warehouse,
-            Product.sku.label("p_sku"),
-            Product.name.label("p_name"),
-            Product.price.label("p_price"),
-            Product.product_metadata.label("p_meta"),
-            Product.unit.label("p_unit"),
-            pack_subq.c.pack_size,
-            pack_subq.c.pack_label,
-            pack_subq.c.pack_unit,
-        )
-        # VERIFICADO: get_stock filtra warehouses y products por tenant_id
-        .join(Product, (Product.id == StockItem.product_id) & (Product.tenant_id == tid))
-        .join(Warehouse, (Warehouse.id == StockItem.warehouse_id) & (Warehouse.tenant_id == tid))
-        .outerjoin(pack_subq, pack_subq.c.ri_product_id == StockItem.product_id)
+    page = StockPageOut(
+        items=[_stock_row_out(r) for r in rows], next_cursor=next_cursor, limit=limit
     )
-    if tid is not None:
-        q = q.where(StockItem.tenant_id == tid)
-    if warehouse_id is not None:
-        q = q.where(StockItem.warehouse_id == warehouse_id)
-    if product_id is not None:
-        q = q.where(StockItem.product_id == product_id)
-    if exclude_raw_material:
-        q = q.where(Product.is_raw_material.is_(False))
-    q = q.order_by(Product.name.asc(), Warehouse.code.asc())
-    rows = db.execute(q).all()
-    out: list[StockItemOut] = []
-    for r in rows:
-        out.append(
-            _serialize_stock_item(
-                r[0],
-                product=r[1],
-                warehouse=r[2],
-                pack_size=float(r[8]) if r[8] is not None else None,
-                pack_label=r[9] or None,
-                pack_unit=r[10] or None,
-            )
-        )
-    return out
+    body = page.model_dump_json().encode()
+    etag = page_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post(
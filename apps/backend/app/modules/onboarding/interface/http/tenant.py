@@ -66,7 +66,7 @@ class OnboardingInitRequest(BaseModel):
 
 
 @router.post("/init")
-async def onboarding_init(
+def onboarding_init(
     payload: OnboardingInitRequest,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user_context),
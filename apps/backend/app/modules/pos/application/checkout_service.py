@@ -7,8 +7,11 @@ Responsabilidades:
 3. Calcular totales con IVA
 4. Resolver almacén
 5. Descontar stock por línea (FIFO/LIFO/AVG) con soporte de lotes
-6. Actualizar estado del recibo a 'paid'
-7. Crear documentos complementarios (factura, venta) — best-effort
+6. Actualizar estado del recibo a 'paid' (y el rollup de KPIs del día)
+7. Crear documentos complementarios (factura, venta) — best-effort. Por
+   defecto los crea el outbox (``receipt_documents``) tras ``pos.receipt.completed``;
+   en modo ``sync`` (``pos.documents.mode``) se crean antes de responder y el
+   evento solo se publica si fallan.
 """
 
 from __future__ import annotations
@@ -19,10 +22,25 @@ from datetime import UTC, datetime
 from decimal import Decimal
 from uuid import UUID, uuid4
 
+from fastapi import HTTPException
 from sqlalchemy import bindparam, text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Session
 
+from app.modules.analytics.application.kpi_rollups import record_receipt_paid
+from app.modules.pos.application.receipt_documents import (
+    DOCUMENTS_DONE,
+    DOCUMENTS_FAILED,
+    DOCUMENTS_PENDING,
+    create_receipt_documents,
+    publish_documents_created,
+    set_documents_status,
+)
+from app.modules.settings.application.tenant_settings import (
+    DOCUMENTS_MODE_SYNC,
+    TenantSettingsContext,
+    load_tenant_settings,
+)
 from app.services.event_service import EventService
 from app.services.inventory_costing import InventoryCostingService
 
@@ -61,17 +79,39 @@ class CheckoutResult:
     paid: Decimal
     change: Decimal
     documents_created: dict = field(default_factory=dict)
+    documents_status: str = DOCUMENTS_PENDING
+
+
+@dataclass
+class _LinePlan:
+    line_id: UUID
+    product_id: UUID
+    qty_sold: float
+    unit_price: float
+    discount_pct: float
+    allocations: list[tuple] = field(default_factory=list)  # (stock_row, qty, lot, expires_at)
+    current_qty: float = 0.0
+    move_slice: tuple[int, int] = (0, 0)
+
+
+def _as_uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
 
 
 class CheckoutService:
     """
     Encapsula toda la lógica de negocio del checkout POS.
     El HTTP handler solo valida entrada, llama a execute() y formatea la respuesta.
+
+    La configuración del tenant (impuestos, costeo) sale de un único
+    ``TenantSettingsContext``: el del request si el router lo pasa, si no se
+    carga una vez en la primera consulta.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, tenant_settings: TenantSettingsContext | None = None):
         self.db = db
         self._costing = InventoryCostingService(db)
+        self._tenant_settings = tenant_settings
 
     # ------------------------------------------------------------------ #
     # Public API                                                           #
@@ -85,12 +125,13 @@ class CheckoutService:
         3. Calcula totales + IVA
         4. Resuelve almacén
         5. Descuenta stock por línea
-        6. Marca recibo como 'paid'
-        7. Crea documentos complementarios (best-effort)
+        6. Marca recibo como 'paid' (documentos en 'pending')
+        7. Crea documentos complementarios solo en modo ``sync``; si no, los
+           crea el outbox y el POS consulta ``documents_status``
         """
         self._validate_receipt(req.receipt_id, req.tenant_id)
         self._insert_payments(req.receipt_id, req.payments)
-        subtotal, tax = self._calculate_totals(req.receipt_id)
+        subtotal, tax = self._calculate_totals(req.receipt_id, req.tenant_id)
         paid = sum(p.amount for p in req.payments)
         total = subtotal + tax
 
@@ -103,28 +144,32 @@ class CheckoutService:
         self._process_stock_lines(req.receipt_id, req.tenant_id, warehouse_id, req.stock_selections)
         self._mark_paid(req.receipt_id, req.tenant_id, subtotal, tax, warehouse_id)
 
-        # Publish event atomically within the same transaction so the receipt
-        # and its outbox entry are always consistent (no lost-event window).
-        EventService.publish(
-            self.db,
-            tenant_id=req.tenant_id,
-            event_type="pos.receipt.completed",
-            aggregate_type="pos_receipt",
-            aggregate_id=req.receipt_id,
-            payload={
-                "receipt_id": str(req.receipt_id),
-                "tenant_id": str(req.tenant_id),
-                "warehouse_id": str(warehouse_id),
-                "subtotal": str(subtotal),
-                "tax": str(tax),
-                "total": str(subtotal + tax),
-                "paid": str(sum(p.amount for p in req.payments)),
-            },
-        )
+        completed = {
+            "receipt_id": str(req.receipt_id),
+            "tenant_id": str(req.tenant_id),
+            "warehouse_id": str(warehouse_id),
+            "subtotal": str(subtotal),
+            "tax": str(tax),
+            "total": str(subtotal + tax),
+            "paid": str(sum(p.amount for p in req.payments)),
+            "invoice_series": req.invoice_series,
+        }
+        # En modo sync el evento solo se publica si los documentos fallan: así
+        # la lane del outbox no los crea a la vez que el checkout.
+        sync_documents = self._settings(req.tenant_id).documents_mode == DOCUMENTS_MODE_SYNC
+        if not sync_documents:
+            # Publish event atomically within the same transaction so the receipt
+            # and its outbox entry are always consistent (no lost-event window).
+            self._publish_completed(req.tenant_id, req.receipt_id, completed)
 
         self.db.commit()  # receipt + payments + stock_moves + outbox in one transaction
 
-        documents = self._create_documents(req.receipt_id, req.tenant_id, req.invoice_series)
+        documents: dict = {}
+        documents_status = DOCUMENTS_PENDING
+        if sync_documents:
+            documents, documents_status = self._create_documents(
+                req.receipt_id, req.tenant_id, req.invoice_series, completed
+            )
 
         return CheckoutResult(
             receipt_id=req.receipt_id,
@@ -134,6 +179,7 @@ class CheckoutService:
             paid=paid,
             change=paid - total,
             documents_created=documents,
+            documents_status=documents_status,
         )
 
     # ------------------------------------------------------------------ #
@@ -177,7 +223,13 @@ class CheckoutService:
                 },
             )
 
-    def _calculate_totals(self, receipt_id: UUID) -> tuple[Decimal, Decimal]:
+    def _settings(self, tenant_id: UUID) -> TenantSettingsContext:
+        snapshot = self._tenant_settings
+        if snapshot is None or snapshot.tenant_id != str(tenant_id):
+            snapshot = self._tenant_settings = load_tenant_settings(self.db, tenant_id)
+        return snapshot
+
+    def _calculate_totals(self, receipt_id: UUID, tenant_id: UUID) -> tuple[Decimal, Decimal]:
         row = self.db.execute(
             text(
                 "SELECT "
@@ -192,23 +244,13 @@ class CheckoutService:
         tax = Decimal(str(row[1] or 0))
 
         # Respect tenant tax config
-        tax_enabled = self._is_tax_enabled()
-        default_tax = self._resolve_default_tax_rate()
-        if not tax_enabled or (default_tax is not None and default_tax <= 0):
+        settings = self._settings(tenant_id)
+        default_tax = settings.default_tax_rate
+        if not settings.tax_enabled or (default_tax is not None and default_tax <= 0):
             tax = Decimal("0")
 
         return subtotal, tax
 
-    def _is_tax_enabled(self) -> bool:
-        from app.modules.pos.interface.http._deps import is_tax_enabled
-
-        return is_tax_enabled(self.db)
-
-    def _resolve_default_tax_rate(self) -> float | None:
-        from app.modules.pos.interface.http._deps import resolve_default_tax_rate
-
-        return resolve_default_tax_rate(self.db)
-
     def _resolve_warehouse(self, tenant_id: UUID, warehouse_id: UUID | None) -> UUID:
         if warehouse_id:
             row = self.db.execute(
@@ -244,17 +286,17 @@ class CheckoutService:
         warehouse_id: UUID,
         stock_selections: list[StockAllocationIn],
     ) -> None:
-        from app.modules.pos.interface.http._deps import (
-            ensure_generic_stock_row,
-            load_locked_stock_rows,
-            normalize_lot,
-            require_tenant_product,
-            resolve_inventory_costing_method,
-            resolve_outbound_stock_fifo,
-            resolve_selected_stock_row,
-            sum_stock_rows_qty,
-            to_decimal_q,
-        )
+        """
+        Descuenta stock y calcula COGS de todas las líneas del recibo.
+
+        1. Por línea: asigna lotes (FOR UPDATE sobre stock_items), valida y
+           descuenta. Las líneas repetidas de un producto ven el stock ya
+           descontado por las anteriores.
+        2. Costeo de todas las salidas en un único ``apply_moves``.
+        3. Escritura en bloque de pos_receipt_lines y stock_moves.
+        """
+        from app.modules.pos.interface.http._deps import to_decimal_q
+        from app.services.inventory_costing import CostMove
 
         lines = self.db.execute(
             text(
@@ -263,65 +305,176 @@ class CheckoutService:
             ).bindparams(bindparam("rid", type_=PGUUID(as_uuid=True))),
             {"rid": receipt_id},
         ).fetchall()
+        if not lines:
+            return
 
         selection_map = {str(sel.line_id): sel for sel in stock_selections}
-        costing_method = resolve_inventory_costing_method(self.db)
+        costing_method = self._settings(tenant_id).costing_method
+        # Una consulta valida que todos los productos son del tenant y trae su coste
+        cost_prices = self._load_cost_prices(tenant_id, {line[1] for line in lines})
 
+        plans: list[_LinePlan] = []
         for line in lines:
-            line_id, product_id, qty_sold, unit_price, discount_pct = (
-                line[0],
-                line[1],
-                float(line[2]),
-                float(line[3]),
-                float(line[4] or 0),
+            plan = _LinePlan(
+                line_id=line[0],
+                product_id=line[1],
+                qty_sold=float(line[2]),
+                unit_price=float(line[3]),
+                discount_pct=float(line[4] or 0),
             )
-            require_tenant_product(self.db, tenant_id, product_id)
-            self._process_line(
-                line_id=line_id,
-                product_id=product_id,
-                qty_sold=qty_sold,
-                unit_price=unit_price,
-                discount_pct=discount_pct,
+            self._allocate_line(
+                plan,
                 tenant_id=tenant_id,
                 warehouse_id=warehouse_id,
-                receipt_id=receipt_id,
-                costing_method=costing_method,
-                line_selection=selection_map.get(str(line_id)),
-                helpers={
-                    "load_locked_stock_rows": load_locked_stock_rows,
-                    "ensure_generic_stock_row": ensure_generic_stock_row,
-                    "resolve_selected_stock_row": resolve_selected_stock_row,
-                    "resolve_outbound_stock_fifo": resolve_outbound_stock_fifo,
-                    "sum_stock_rows_qty": sum_stock_rows_qty,
-                    "normalize_lot": normalize_lot,
-                    "to_decimal_q": to_decimal_q,
-                },
+                line_selection=selection_map.get(str(plan.line_id)),
+            )
+            plans.append(plan)
+
+        # Costing: FIFO / LIFO por asignación de lote, AVG por línea
+        moves: list[CostMove] = []
+        for plan in plans:
+            qty_dec = to_decimal_q(plan.qty_sold, "0.000001")
+            if costing_method in ("fifo", "lifo"):
+                plan.move_slice = (len(moves), len(moves) + len(plan.allocations))
+                for _si, alloc_qty, lot, exp in plan.allocations:
+                    moves.append(
+                        CostMove(
+                            str(warehouse_id),
+                            str(plan.product_id),
+                            to_decimal_q(alloc_qty, "0.000001"),
+                            "out",
+                            lot=lot,
+                            expires_at=exp,
+                        )
+                    )
+            else:
+                plan.move_slice = (len(moves), len(moves) + 1)
+                moves.append(
+                    CostMove(
+                        str(warehouse_id),
+                        str(plan.product_id),
+                        qty_dec,
+                        "out",
+                        initial_qty=to_decimal_q(plan.current_qty, "0.000001"),
+                        initial_avg_cost=to_decimal_q(
+                            float(cost_prices.get(str(plan.product_id)) or 0), "0.000001"
+                        ),
+                    )
+                )
+        results = self._costing.apply_moves(str(tenant_id), moves, costing_method=costing_method)
+
+        line_updates: list[dict] = []
+        move_rows: list[dict] = []
+        occurred_at = datetime.now(UTC)
+        for plan in plans:
+            first, last = plan.move_slice
+            cogs_total = sum(
+                (result.cogs for result in results[first:last]), to_decimal_q(0, "0.000001")
+            )
+            qty_dec = to_decimal_q(plan.qty_sold, "0.000001")
+            cogs_unit = (
+                to_decimal_q(cogs_total / qty_dec, "0.000001")
+                if qty_dec > 0
+                else to_decimal_q(0, "0.000001")
+            )
+            net_total = qty_dec * to_decimal_q(plan.unit_price, "0.0001")
+            net_total = net_total * (Decimal("1") - (to_decimal_q(plan.discount_pct, "0.01") / 100))
+            net_total = to_decimal_q(net_total, "0.01")
+            cogs_money = to_decimal_q(cogs_total, "0.01")
+            gross_profit = to_decimal_q(net_total - cogs_money, "0.01")
+            gross_margin = (
+                to_decimal_q(gross_profit / net_total, "0.0001")
+                if net_total > 0
+                else to_decimal_q(0, "0.0001")
             )
+            line_updates.append(
+                {
+                    "id": plan.line_id,
+                    "net": float(net_total),
+                    "cu": float(cogs_unit),
+                    "ct": float(cogs_money),
+                    "gp": float(gross_profit),
+                    "gmp": float(gross_margin),
+                }
+            )
+            for _si, alloc_qty, lot, exp in plan.allocations:
+                alloc_dec = to_decimal_q(alloc_qty, "0.000001")
+                alloc_ratio = alloc_dec / qty_dec if qty_dec > 0 else to_decimal_q(0, "0.000001")
+                move_rows.append(
+                    {
+                        "tid": tenant_id,
+                        "pid": plan.product_id,
+                        "wid": warehouse_id,
+                        "q": alloc_qty,
+                        "rid": receipt_id,
+                        "lot": lot,
+                        "exp": exp,
+                        "uc": float(cogs_unit),
+                        "tc": float(to_decimal_q(cogs_money * alloc_ratio, "0.01")),
+                        "occurred_at": occurred_at,
+                    }
+                )
 
-    def _process_line(
+        self.db.execute(
+            text(
+                "UPDATE pos_receipt_lines "
+                "SET net_total = :net, cogs_unit = :cu, cogs_total = :ct, "
+                "gross_profit = :gp, gross_margin_pct = :gmp WHERE id = :id"
+            ).bindparams(bindparam("id", type_=PGUUID(as_uuid=True))),
+            line_updates,
+        )
+        if move_rows:
+            self.db.execute(
+                text(
+                    "INSERT INTO stock_moves("
+                    "tenant_id, product_id, warehouse_id, qty, kind, ref_type, ref_id, "
+                    "tentative, posted, lot, expires_at, unit_cost, total_cost, occurred_at"
+                    ") VALUES ("
+                    ":tid, :pid, :wid, :q, 'sale', 'pos_receipt', :rid, "
+                    "FALSE, TRUE, :lot, :exp, :uc, :tc, :occurred_at"
+                    ")"
+                ).bindparams(
+                    bindparam("tid", type_=PGUUID(as_uuid=True)),
+                    bindparam("pid", type_=PGUUID(as_uuid=True)),
+                    bindparam("wid", type_=PGUUID(as_uuid=True)),
+                    bindparam("rid", type_=PGUUID(as_uuid=True)),
+                ),
+                move_rows,
+            )
+
+    def _load_cost_prices(self, tenant_id: UUID, product_ids: set) -> dict[str, object]:
+        rows = self.db.execute(
+            text(
+                "SELECT id, cost_price FROM products WHERE tenant_id = :tid AND id IN :pids"
+            ).bindparams(
+                bindparam("tid", type_=PGUUID(as_uuid=True)),
+                bindparam("pids", type_=PGUUID(as_uuid=True), expanding=True),
+            ),
+            {"tid": tenant_id, "pids": [_as_uuid(pid) for pid in product_ids]},
+        ).fetchall()
+        if len(rows) < len(product_ids):
+            raise HTTPException(status_code=404, detail="product_not_found")
+        return {str(row[0]): row[1] for row in rows}
+
+    def _allocate_line(
         self,
+        plan: _LinePlan,
         *,
-        line_id,
-        product_id,
-        qty_sold: float,
-        unit_price: float,
-        discount_pct: float,
         tenant_id: UUID,
         warehouse_id: UUID,
-        receipt_id: UUID,
-        costing_method: str,
         line_selection,
-        helpers: dict,
     ) -> None:
-        load_locked = helpers["load_locked_stock_rows"]
-        ensure_generic = helpers["ensure_generic_stock_row"]
-        resolve_selected = helpers["resolve_selected_stock_row"]
-        resolve_fifo = helpers["resolve_outbound_stock_fifo"]
-        sum_qty = helpers["sum_stock_rows_qty"]
-        normalize_lot = helpers["normalize_lot"]
-        to_dec = helpers["to_decimal_q"]
-
-        stock_rows = load_locked(self.db, tenant_id, warehouse_id, product_id)
+        from app.modules.pos.interface.http._deps import (
+            ensure_generic_stock_row,
+            load_locked_stock_rows,
+            normalize_lot,
+            resolve_outbound_stock_fifo,
+            resolve_selected_stock_row,
+            sum_stock_rows_qty,
+        )
+
+        qty_sold = plan.qty_sold
+        stock_rows = load_locked_stock_rows(self.db, tenant_id, warehouse_id, plan.product_id)
         allocations: list[tuple] = []
 
         if line_selection is not None:
@@ -330,7 +483,7 @@ class CheckoutService:
                 alloc_qty = float(alloc.get("qty") or 0)
                 if alloc_qty <= 0:
                     continue
-                stock_item = resolve_selected(
+                stock_item = resolve_selected_stock_row(
                     stock_rows,
                     lot=alloc.get("lot"),
                     expires_at=alloc.get("expires_at"),
@@ -349,13 +502,13 @@ class CheckoutService:
             if abs(selected_total - qty_sold) > 0.000001:
                 raise ValueError("invalid_lot_allocation_total")
         else:
-            fifo_allocs, remaining = resolve_fifo(stock_rows, qty_sold)
+            fifo_allocs, remaining = resolve_outbound_stock_fifo(stock_rows, qty_sold)
             if remaining > 0.000001 or not fifo_allocs:
-                stock_item = ensure_generic(
+                stock_item = ensure_generic_stock_row(
                     self.db,
                     tenant_id=tenant_id,
                     warehouse_id=warehouse_id,
-                    product_id=product_id,
+                    product_id=plan.product_id,
                 )
                 stock_rows = [stock_item]
                 allocations.append((stock_item, qty_sold, None, None))
@@ -363,137 +516,31 @@ class CheckoutService:
                 for si, aq, lot, exp in fifo_allocs:
                     allocations.append((si, aq, lot, exp))
 
-        current_qty = sum_qty(stock_rows)
-        cost_price = self.db.execute(
-            text("SELECT cost_price FROM products WHERE id = :pid AND tenant_id = :tid").bindparams(
-                bindparam("pid", type_=PGUUID(as_uuid=True)),
-                bindparam("tid", type_=PGUUID(as_uuid=True)),
-            ),
-            {"pid": product_id, "tid": tenant_id},
-        ).scalar()
-        fallback_cost = to_dec(float(cost_price or 0), "0.000001")
-        qty_dec = to_dec(qty_sold, "0.000001")
-
-        # Costing: FIFO / LIFO / AVG
-        if costing_method == "fifo":
-            cogs_total = to_dec(0, "0.000001")
-            for si, alloc_qty, lot, exp in allocations:
-                _, alloc_cogs = self._costing.apply_outbound_fifo(
-                    str(tenant_id),
-                    str(warehouse_id),
-                    str(product_id),
-                    qty=to_dec(alloc_qty, "0.000001"),
-                    allow_negative=False,
-                    lot=lot,
-                    expires_at=exp,
-                )
-                cogs_total += alloc_cogs
-        elif costing_method == "lifo":
-            cogs_total = to_dec(0, "0.000001")
-            for si, alloc_qty, lot, exp in allocations:
-                _, alloc_cogs = self._costing.apply_outbound_lifo(
-                    str(tenant_id),
-                    str(warehouse_id),
-                    str(product_id),
-                    qty=to_dec(alloc_qty, "0.000001"),
-                    allow_negative=False,
-                    lot=lot,
-                    expires_at=exp,
-                )
-                cogs_total += alloc_cogs
-        else:  # avg
-            _state = self._costing.apply_outbound(
-                str(tenant_id),
-                str(warehouse_id),
-                str(product_id),
-                qty=qty_dec,
-                allow_negative=False,
-                initial_qty=to_dec(current_qty, "0.000001"),
-                initial_avg_cost=fallback_cost,
-            )
-            cogs_total = qty_dec * _state.avg_cost
-
-        cogs_unit = (
-            to_dec(cogs_total / qty_dec, "0.000001") if qty_dec > 0 else to_dec(0, "0.000001")
-        )
-
-        net_total = to_dec(qty_sold, "0.000001") * to_dec(unit_price, "0.0001")
-        net_total = net_total * (Decimal("1") - (to_dec(discount_pct, "0.01") / 100))
-        net_total = to_dec(net_total, "0.01")
-        cogs_money = to_dec(cogs_total, "0.01")
-        gross_profit = to_dec(net_total - cogs_money, "0.01")
-        gross_margin = (
-            to_dec(gross_profit / net_total, "0.0001") if net_total > 0 else to_dec(0, "0.0001")
-        )
-
-        self.db.execute(
-            text(
-                "UPDATE pos_receipt_lines "
-                "SET net_total = :net, cogs_unit = :cu, cogs_total = :ct, "
-                "gross_profit = :gp, gross_margin_pct = :gmp WHERE id = :id"
-            ).bindparams(bindparam("id", type_=PGUUID(as_uuid=True))),
-            {
-                "id": line_id,
-                "net": float(net_total),
-                "cu": float(cogs_unit),
-                "ct": float(cogs_money),
-                "gp": float(gross_profit),
-                "gmp": float(gross_margin),
-            },
-        )
-
+        current_qty = sum_stock_rows_qty(stock_rows)
         if current_qty - qty_sold < 0:
             raise ValueError("insufficient_stock")
 
-        # Apply stock deductions
+        # Apply stock deductions now so later lines of the same product see them
+        deductions: list[dict] = []
         running_total = 0.0
-        for si, alloc_qty, lot, exp in allocations:
+        for si, alloc_qty, _lot, _exp in allocations:
             new_qty = float(si[1] or 0) - alloc_qty
             if new_qty < 0:
                 raise ValueError("selected_lot_insufficient")
             running_total += alloc_qty
-            alloc_dec = to_dec(alloc_qty, "0.000001")
-            alloc_ratio = alloc_dec / qty_dec if qty_dec > 0 else to_dec(0, "0.000001")
-            alloc_cost = to_dec(cogs_money * alloc_ratio, "0.01")
-
-            self.db.execute(
-                text(
-                    "INSERT INTO stock_moves("
-                    "tenant_id, product_id, warehouse_id, qty, kind, ref_type, ref_id, "
-                    "tentative, posted, lot, expires_at, unit_cost, total_cost, occurred_at"
-                    ") VALUES ("
-                    ":tid, :pid, :wid, :q, 'sale', 'pos_receipt', :rid, "
-                    "FALSE, TRUE, :lot, :exp, :uc, :tc, :occurred_at"
-                    ")"
-                ).bindparams(
-                    bindparam("tid", type_=PGUUID(as_uuid=True)),
-                    bindparam("pid", type_=PGUUID(as_uuid=True)),
-                    bindparam("wid", type_=PGUUID(as_uuid=True)),
-                    bindparam("rid", type_=PGUUID(as_uuid=True)),
-                ),
-                {
-                    "tid": tenant_id,
-                    "pid": product_id,
-                    "wid": warehouse_id,
-                    "q": alloc_qty,
-                    "rid": receipt_id,
-                    "lot": lot,
-                    "exp": exp,
-                    "uc": float(cogs_unit),
-                    "tc": float(alloc_cost),
-                    "occurred_at": datetime.now(UTC),
-                },
-            )
-            self.db.execute(
-                text("UPDATE stock_items SET qty = :q WHERE id = :id").bindparams(
-                    bindparam("id", type_=PGUUID(as_uuid=True))
-                ),
-                {"q": new_qty, "id": si[0]},
-            )
-
+            deductions.append({"q": new_qty, "id": si[0]})
         if abs(running_total - qty_sold) > 0.000001:
             raise ValueError("invalid_lot_allocation_total")
 
+        self.db.execute(
+            text("UPDATE stock_items SET qty = :q WHERE id = :id").bindparams(
+                bindparam("id", type_=PGUUID(as_uuid=True))
+            ),
+            deductions,
+        )
+        plan.allocations = allocations
+        plan.current_qty = current_qty
+
     def _mark_paid(
         self,
         receipt_id: UUID,
@@ -503,12 +550,14 @@ class CheckoutService:
         warehouse_id: UUID,
     ) -> None:
         total = subtotal + tax
-        self.db.execute(
+        created_at = self.db.execute(
             text(
                 "UPDATE pos_receipts "
                 "SET status = 'paid', gross_total = :gt, tax_total = :tt, "
-                "warehouse_id = :wid, paid_at = NOW() "
-                "WHERE id = :id AND tenant_id = :tid"
+                "warehouse_id = :wid, paid_at = NOW(), "
+                "documents_status = :ds, documents_error = NULL "
+                "WHERE id = :id AND tenant_id = :tid "
+                "RETURNING created_at"
             ).bindparams(
                 bindparam("id", type_=PGUUID(as_uuid=True)),
                 bindparam("tid", type_=PGUUID(as_uuid=True)),
@@ -520,48 +569,57 @@ class CheckoutService:
                 "gt": float(total),
                 "tt": float(tax),
                 "wid": warehouse_id,
+                "ds": DOCUMENTS_PENDING,
             },
+        ).scalar()
+        # Rollup de KPIs del dashboard en la misma transacción que el cobro
+        record_receipt_paid(self.db, tenant_id, created_at, total)
+
+    def _publish_completed(self, tenant_id: UUID, receipt_id: UUID, payload: dict) -> None:
+        EventService.publish(
+            self.db,
+            tenant_id=tenant_id,
+            event_type="pos.receipt.completed",
+            aggregate_type="pos_receipt",
+            aggregate_id=receipt_id,
+            payload=payload,
         )
 
-    def _create_documents(self, receipt_id: UUID, tenant_id: UUID, invoice_series: str) -> dict:
-        """Crea documentos complementarios (factura, venta). Best-effort — no aborta el pago."""
+    def _create_documents(
+        self, receipt_id: UUID, tenant_id: UUID, invoice_series: str, completed: dict
+    ) -> tuple[dict, str]:
+        """Modo ``sync``: factura y venta antes de responder. Best-effort — no aborta el pago.
+
+        Si terminan, se publica ``pos.receipt.documents_created``. Si fallan o
+        no se puede confirmar el resultado, se publica ``pos.receipt.completed``
+        y los reintenta la etapa del outbox.
+        """
+        from app.modules.pos.application.invoice_integration import POSInvoicingService
+
         documents: dict = {}
+        error: str | None = None
         try:
-            from app.modules.pos.application.invoice_integration import POSInvoicingService
-
             service = POSInvoicingService(self.db, tenant_id)
-
-            try:
-                inv = service.create_invoice_from_receipt(
-                    receipt_id, customer_id=None, invoice_series=invoice_series
-                )
-                if inv:
-                    documents["invoice"] = inv
-                    self.db.commit()
-                else:
-                    self.db.rollback()
-            except Exception as e:
-                logger.warning("Error creating invoice from receipt: %s", e)
-                try:
-                    self.db.rollback()
-                except Exception:
-                    pass
-
-            try:
-                sale = service.create_sale_from_receipt(receipt_id)
-                if sale:
-                    documents["sale"] = sale
-                    self.db.commit()
-                else:
-                    self.db.rollback()
-            except Exception as e:
-                logger.warning("Error creating sale from receipt: %s", e)
-                try:
-                    self.db.rollback()
-                except Exception:
-                    pass
-
+            documents, error = create_receipt_documents(service, receipt_id, invoice_series)
         except Exception as e:
             logger.warning("Error creating complementary documents: %s", e)
-
-        return documents
+            error = str(e)
+        status = DOCUMENTS_FAILED if error else DOCUMENTS_DONE
+        try:
+            set_documents_status(self.db, tenant_id, receipt_id, status, error)
+            if error:
+                self._publish_completed(tenant_id, receipt_id, completed)
+            else:
+                publish_documents_created(self.db, tenant_id, receipt_id, documents)
+            self.db.commit()
+        except Exception as e:
+            logger.warning("Error saving documents status for receipt %s: %s", receipt_id, e)
+            self.db.rollback()
+            documents, status = {}, DOCUMENTS_PENDING
+            try:
+                self._publish_completed(tenant_id, receipt_id, completed)
+                self.db.commit()
+            except Exception as e:
+                logger.error("Receipt %s left without documents event: %s", receipt_id, e)
+                self.db.rollback()
+        return documents, status
@@ -63,6 +63,12 @@ class POSInvoicingService:
         self.db = db
         self.tenant_id = tenant_id
         self._enabled_slugs: set[str] | None = None
+        # Datos del tenant reutilizados entre recibos (lotes del outbox)
+        self._default_customer_id: UUID | None = None
+        self._invoice_sector: str | None = None
+        self._tenant_currency: str | None = None
+        # Último error capturado por create_*_from_receipt (devuelven None)
+        self.last_error: str | None = None
 
     def _rollback_savepoint(self, savepoint) -> None:
         try:
@@ -122,6 +128,8 @@ class POSInvoicingService:
         If receipt has no customer, attempts to resolve one heuristically ("Final Consumer").
         If not found, creates one (best-effort) to enable retail invoicing.
         """
+        if self._default_customer_id is not None:
+            return self._default_customer_id
         try:
             row = self.db.execute(
                 text(
@@ -139,7 +147,10 @@ class POSInvoicingService:
                 {"tid": self.tenant_id},
             ).first()
             if row and row[0]:
-                return UUID(str(row[0]))
+                # Solo se memoiza un cliente existente: uno recién creado puede
+                # desaparecer si se revierte el savepoint de la factura
+                self._default_customer_id = UUID(str(row[0]))
+                return self._default_customer_id
         except Exception:
             return None
 
@@ -173,6 +184,32 @@ class POSInvoicingService:
             return None
         return None
 
+    def _resolve_invoice_sector(self) -> str:
+        """Sector de las líneas de factura (company_settings, plantilla del tenant o 'pos')."""
+        if self._invoice_sector is not None:
+            return self._invoice_sector
+        # Resolve sector from company_settings (fallback to tenant template or 'pos')
+        sector = self.db.execute(
+            text(
+                "SELECT COALESCE(settings->>'sector', NULL) "
+                "FROM company_settings WHERE tenant_id = :tid"
+            ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
+            {"tid": self.tenant_id},
+        ).scalar()
+        if not sector:
+            sector = self.db.execute(
+                text("SELECT sector_template_name FROM tenants WHERE id = :tid").bindparams(
+                    bindparam("tid", type_=PGUUID(as_uuid=True))
+                ),
+                {"tid": self.tenant_id},
+            ).scalar()
+        # Map sector to supported polymorphic identities (invoice_lines.polymorphic_on)
+        sector = sector or "pos"
+        if sector not in {"pos", "bakery", "workshop"}:
+            sector = "pos"
+        self._invoice_sector = sector
+        return sector
+
     def create_invoice_from_receipt(
         self,
         receipt_id: UUID,
@@ -242,25 +279,7 @@ class POSInvoicingService:
                 self._rollback_savepoint(savepoint)
                 return None
 
-            # Resolve sector from company_settings (fallback to tenant template or 'pos')
-            sector = self.db.execute(
-                text(
-                    "SELECT COALESCE(settings->>'sector', NULL) "
-                    "FROM company_settings WHERE tenant_id = :tid"
-                ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-                {"tid": self.tenant_id},
-            ).scalar()
-            if not sector:
-                sector = self.db.execute(
-                    text("SELECT sector_template_name FROM tenants WHERE id = :tid").bindparams(
-                        bindparam("tid", type_=PGUUID(as_uuid=True))
-                    ),
-                    {"tid": self.tenant_id},
-                ).scalar()
-            # Map sector to supported polymorphic identities (invoice_lines.polymorphic_on)
-            sector = sector or "pos"
-            if sector not in {"pos", "bakery", "workshop"}:
-                sector = "pos"
+            sector = self._resolve_invoice_sector()
 
             # Generate canonical invoice number (uses DB sequence; fallback in dev)
             from app.modules.shared.services.numbering import generar_numero_documento
@@ -448,9 +467,33 @@ class POSInvoicingService:
                     self.db.rollback()
                 except Exception as rollback_error:
                     logger.error("Failed to rollback transaction: %s", rollback_error)
+            self.last_error = str(e)
             logger.exception("Error creating invoice from receipt: %s", e)
             return None
 
+    def _resolve_tenant_currency(self) -> str | None:
+        """Moneda operativa del tenant (company_settings / currencies)."""
+        if self._tenant_currency is not None:
+            return self._tenant_currency
+        # Fetch tenant currency from operational settings (company_settings / currencies)
+        currency = self.db.execute(
+            text(
+                """
+                SELECT COALESCE(
+                    NULLIF(UPPER(TRIM(cs.currency)), ''),
+                    NULLIF(UPPER(TRIM(cur.code)), '')
+                ) AS currency
+                FROM tenants t
+                LEFT JOIN company_settings cs ON cs.tenant_id = t.id
+                LEFT JOIN currencies cur ON cur.id = cs.currency_id
+                WHERE t.id = :tid
+                """
+            ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
+            {"tid": self.tenant_id},
+        ).scalar()
+        self._tenant_currency = currency
+        return currency
+
     def create_sale_from_receipt(self, receipt_id: UUID) -> dict | None:
         """
         Create a Sales Order from a paid POS receipt.
@@ -529,6 +572,8 @@ class POSInvoicingService:
                 {"tid": self.tenant_id, "rid": receipt_uuid},
             ).first()
             if existing:
+                # Idempotente: la venta ya existe (reintento del outbox o backfill)
+                self._rollback_savepoint(savepoint)
                 so_id, so_number, so_total, so_status = existing
                 return {
                     "sale_id": str(so_id),
@@ -537,22 +582,7 @@ class POSInvoicingService:
                     "total": float(so_total or 0),
                 }
 
-            # Fetch tenant currency from operational settings (company_settings / currencies)
-            tenant_currency = self.db.execute(
-                text(
-                    """
-                    SELECT COALESCE(
-                        NULLIF(UPPER(TRIM(cs.currency)), ''),
-                        NULLIF(UPPER(TRIM(cur.code)), '')
-                    ) AS currency
-                    FROM tenants t
-                    LEFT JOIN company_settings cs ON cs.tenant_id = t.id
-                    LEFT JOIN currencies cur ON cur.id = cs.currency_id
-                    WHERE t.id = :tid
-                    """
-                ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-                {"tid": self.tenant_id},
-            ).scalar()
+            tenant_currency = self._resolve_tenant_currency()
 
             if not tenant_currency:
                 logger.warning("Tenant %s has no configured currency", self.tenant_id)
@@ -674,6 +704,7 @@ class POSInvoicingService:
                     self.db.rollback()
                 except Exception as rollback_error:
                     logger.error("Failed to rollback transaction: %s", rollback_error)
+            self.last_error = str(e)
             logger.exception("Error creating sale from receipt: %s", e)
             return None
 
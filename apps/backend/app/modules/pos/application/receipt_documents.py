@@ -0,0 +1,203 @@
+"""
+Documentos complementarios de recibos POS (factura y venta) fuera del checkout.
+
+El checkout confirma el cobro y publica ``pos.receipt.completed``; por defecto
+la factura y la venta se crean después, en la lane ``pos_documents`` del
+outbox (``process_receipt_documents``), que agrupa los recibos del lote por
+tenant y reutiliza un ``POSInvoicingService`` por tenant. Los tenants que
+imprimen el número de factura en el ticket activan
+``pos.documents.mode = "sync"`` y el checkout las crea antes de responder.
+
+El estado queda en ``pos_receipts.documents_status`` (pending → done | failed)
+para que el POS lo consulte. La etapa es idempotente por recibo: salta los
+recibos en ``done``, la factura no se repite si el recibo ya tiene
+``invoice_id`` y la venta tampoco si ya hay un pedido para el recibo. Al
+terminar se publica ``pos.receipt.documents_created``, que dispara el
+recálculo de rentabilidad (necesita el pedido de venta).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.core.event_outbox import EventOutbox
+from app.models.core.facturacion import Invoice
+from app.models.pos.receipt import POSReceipt
+from app.models.sales.order import SalesOrder
+from app.modules.pos.application.invoice_integration import POSInvoicingService
+from app.services.event_service import EventService
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_PENDING = "pending"
+DOCUMENTS_DONE = "done"
+DOCUMENTS_FAILED = "failed"
+
+RECEIPT_DOCUMENTS_EVENT = "pos.receipt.documents_created"
+
+
+def create_receipt_documents(
+    service: POSInvoicingService, receipt_id: UUID, invoice_series: str = "A"
+) -> tuple[dict, str | None]:
+    """Factura y venta de un recibo pagado. Devuelve ``(documentos, error)``.
+
+    Cada documento va en su propio savepoint (``POSInvoicingService``): un
+    fallo de la factura no impide la venta y no confirma ni revierte la
+    transacción del llamador.
+    """
+    documents: dict = {}
+    errors: list[str] = []
+
+    service.last_error = None
+    invoice = service.create_invoice_from_receipt(
+        receipt_id, customer_id=None, invoice_series=invoice_series
+    )
+    if invoice:
+        documents["invoice"] = invoice
+    elif service.last_error:
+        errors.append(f"invoice: {service.last_error}")
+
+    service.last_error = None
+    sale = service.create_sale_from_receipt(receipt_id)
+    if sale:
+        documents["sale"] = sale
+    elif service.last_error:
+        errors.append(f"sale: {service.last_error}")
+
+    return documents, "; ".join(errors) or None
+
+
+def set_documents_status(
+    db: Session, tenant_id: UUID, receipt_id: UUID, status: str, error: str | None = None
+) -> None:
+    db.execute(
+        update(POSReceipt)
+        .where(POSReceipt.id == receipt_id, POSReceipt.tenant_id == tenant_id)
+        .values(documents_status=status, documents_error=error)
+    )
+
+
+def finish_receipt_documents(
+    db: Session, tenant_id: UUID, receipt_id: UUID, documents: dict, error: str | None
+) -> None:
+    """Guarda el resultado y, si terminó bien, publica ``pos.receipt.documents_created``."""
+    if error:
+        set_documents_status(db, tenant_id, receipt_id, DOCUMENTS_FAILED, error)
+        return
+    set_documents_status(db, tenant_id, receipt_id, DOCUMENTS_DONE)
+    publish_documents_created(db, tenant_id, receipt_id, documents)
+
+
+def publish_documents_created(
+    db: Session, tenant_id: UUID, receipt_id: UUID, documents: dict
+) -> None:
+    EventService.publish(
+        db,
+        tenant_id=tenant_id,
+        event_type=RECEIPT_DOCUMENTS_EVENT,
+        aggregate_type="pos_receipt",
+        aggregate_id=receipt_id,
+        payload={"receipt_id": str(receipt_id), "documents": sorted(documents)},
+    )
+
+
+def get_receipt_documents(db: Session, tenant_id: UUID, receipt_id: UUID) -> dict | None:
+    """Estado de los documentos de un recibo para el POS (``None`` si no existe)."""
+    row = db.execute(
+        select(
+            POSReceipt.documents_status,
+            POSReceipt.documents_error,
+            Invoice.id,
+            Invoice.number,
+            Invoice.status,
+            Invoice.total,
+        )
+        .outerjoin(Invoice, Invoice.id == POSReceipt.invoice_id)
+        .where(POSReceipt.id == receipt_id, POSReceipt.tenant_id == tenant_id)
+    ).first()
+    if row is None:
+        return None
+    status, error, invoice_id, invoice_number, invoice_status, invoice_total = row
+
+    documents: dict = {}
+    if invoice_id is not None:
+        documents["invoice"] = {
+            "invoice_id": str(invoice_id),
+            "invoice_number": invoice_number,
+            "status": invoice_status,
+            "total": float(invoice_total or 0),
+        }
+    sale = db.execute(
+        select(SalesOrder.id, SalesOrder.number, SalesOrder.status, SalesOrder.total)
+        .where(SalesOrder.tenant_id == tenant_id, SalesOrder.pos_receipt_id == receipt_id)
+        .limit(1)
+    ).first()
+    if sale is not None:
+        documents["sale"] = {
+            "sale_id": str(sale[0]),
+            "number": sale[1],
+            "sale_type": "sales_order",
+            "status": sale[2],
+            "total": float(sale[3] or 0),
+        }
+    return {
+        "receipt_id": str(receipt_id),
+        "documents_status": status,
+        "documents_error": error,
+        "documents": documents,
+    }
+
+
+def _as_uuid(value) -> UUID | None:
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def process_receipt_documents(db: Session, events: list[EventOutbox]) -> dict[UUID, str]:
+    """Batch handler de ``pos.receipt.completed`` (lane ``pos_documents``).
+
+    Devuelve ``{event_id: error}`` de los recibos cuyos documentos fallaron;
+    el outbox los reintenta con backoff.
+    """
+    by_tenant: dict[UUID, list[tuple[EventOutbox, UUID]]] = defaultdict(list)
+    failures: dict[UUID, str] = {}
+    for event in events:
+        receipt_id = _as_uuid((event.payload or {}).get("receipt_id"))
+        if receipt_id is None:
+            failures[event.id] = "invalid receipt_id"
+            continue
+        by_tenant[_as_uuid(event.tenant_id)].append((event, receipt_id))
+
+    for tenant_id, items in by_tenant.items():
+        # Estado actual de todos los recibos del tenant en una consulta
+        rows = db.execute(
+            select(POSReceipt.id, POSReceipt.documents_status).where(
+                POSReceipt.tenant_id == tenant_id,
+                POSReceipt.id.in_([receipt_id for _, receipt_id in items]),
+            )
+        )
+        statuses = {str(rid): status for rid, status in rows}
+        service = POSInvoicingService(db, tenant_id)
+        for event, receipt_id in items:
+            if str(receipt_id) not in statuses:
+                # Recibo borrado o de otro tenant: nada que generar
+                continue
+            if statuses[str(receipt_id)] == DOCUMENTS_DONE:
+                # Modo síncrono: el checkout ya los creó
+                publish_documents_created(db, tenant_id, receipt_id, {})
+                continue
+            invoice_series = (event.payload or {}).get("invoice_series") or "A"
+            documents, error = create_receipt_documents(service, receipt_id, invoice_series)
+            finish_receipt_documents(db, tenant_id, receipt_id, documents, error)
+            if error:
+                failures[event.id] = error
+
+    logger.info("POS documents: %d receipts processed, %d failed", len(events), len(failures))
+    return failures
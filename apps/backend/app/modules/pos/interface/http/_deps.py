@@ -6,7 +6,7 @@ Contiene:
 - Validación de UUIDs
 - Helpers de Decimal
 - Helpers de stock
-- Helpers de settings/config
+- Helpers de settings/config (snapshot por request: ``get_tenant_settings``)
 - Todos los modelos Pydantic de request/response del módulo POS
 """
 
@@ -26,6 +26,14 @@ from sqlalchemy.orm import Session
 from starlette.requests import Request
 
 from app.models.accounting.pos_settings import TenantAccountingSettings
+from app.modules.settings.application.tenant_settings import (
+    TenantSettingsContext,
+    get_request_tenant_settings,
+    load_tenant_settings,
+    parse_costing_method,
+    parse_default_tax_rate,
+    parse_tax_enabled,
+)
 from app.modules.settings.infrastructure.repositories import SettingsRepo
 
 logger = logging.getLogger(__name__)
@@ -135,6 +143,29 @@ def require_tenant_product(
     return product_id
 
 
+def require_tenant_products(
+    db: Session,
+    tenant_id: UUID,
+    product_ids,
+    *,
+    detail: str = "product_not_found",
+) -> set[UUID]:
+    """Variante de ``require_tenant_product`` para todas las líneas en una consulta."""
+    wanted = {pid if isinstance(pid, UUID) else UUID(str(pid)) for pid in product_ids}
+    if not wanted:
+        return wanted
+    rows = db.execute(
+        text("SELECT id FROM products WHERE tenant_id = :tid AND id IN :pids").bindparams(
+            bindparam("tid", type_=PGUUID(as_uuid=True)),
+            bindparam("pids", type_=PGUUID(as_uuid=True), expanding=True),
+        ),
+        {"tid": tenant_id, "pids": list(wanted)},
+    ).fetchall()
+    if len({row[0] for row in rows}) < len(wanted):
+        raise HTTPException(status_code=404, detail=detail)
+    return wanted
+
+
 # ============================================================================
 # DECIMAL
 # ============================================================================
@@ -173,51 +204,14 @@ def ensure_pos_accounting_settings(settings: TenantAccountingSettings) -> None:
 
 def resolve_tenant_currency(db: Session, tenant_id: UUID) -> str:
     """Resuelve la moneda base del tenant para POS."""
-    row = db.execute(
-        text(
-            """
-            SELECT COALESCE(
-                NULLIF(UPPER(TRIM(cs.currency)), ''),
-                NULLIF(UPPER(TRIM(cur.code)), '')
-            )
-            FROM company_settings cs
-            LEFT JOIN currencies cur ON cur.id = cs.currency_id
-            WHERE cs.tenant_id = :tid
-            LIMIT 1
-            """
-        ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-        {"tid": tenant_id},
-    ).first()
-    if row and row[0]:
-        cur = str(row[0]).strip().upper()
-        if cur:
-            return cur
-
-    base = db.execute(
-        text(
-            "SELECT NULLIF(UPPER(TRIM(base_currency)), '') FROM tenants WHERE id = :tid LIMIT 1"
-        ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
-        {"tid": tenant_id},
-    ).first()
-    if base and base[0]:
-        return str(base[0]).strip().upper()
-
-    return "USD"
+    return load_tenant_settings(db, tenant_id).currency
 
 
 def resolve_inventory_costing_method(db: Session) -> str:
     """Obtiene el método de costeo configurado para inventario/POS."""
     try:
         repo = SettingsRepo(db)
-        inventory_cfg = repo.get("inventory") or {}
-        pos_cfg = repo.get("pos") or {}
-        candidate = None
-        if isinstance(inventory_cfg, dict):
-            candidate = inventory_cfg.get("costing_method")
-        if candidate is None and isinstance(pos_cfg, dict):
-            candidate = (pos_cfg.get("inventory") or {}).get("costing_method")
-        method = str(candidate or "avg").strip().lower()
-        return method if method in {"avg", "fifo", "lifo"} else "avg"
+        return parse_costing_method(repo.get("inventory"), repo.get("pos"))
     except Exception:
         return "avg"
 
@@ -226,23 +220,7 @@ def resolve_default_tax_rate(db: Session) -> float | None:
     """Obtiene la tasa de IVA por defecto desde settings."""
     try:
         repo = SettingsRepo(db)
-        pos_cfg = repo.get("pos") or {}
-        fiscal_cfg = repo.get("fiscal") or {}
-        dr = ((pos_cfg.get("tax") or {}).get("default_rate")) if isinstance(pos_cfg, dict) else None
-        if dr is None:
-            dr = (
-                ((fiscal_cfg.get("tax") or {}).get("default_rate"))
-                if isinstance(fiscal_cfg, dict)
-                else None
-            )
-        if dr is None:
-            return None
-        drf = float(dr)
-        if drf < 0:
-            drf = 0.0
-        if drf > 1:
-            drf = drf / 100.0
-        return drf
+        return parse_default_tax_rate(repo.get("pos"), repo.get("fiscal"))
     except Exception:
         return None
 
@@ -251,41 +229,21 @@ def is_tax_enabled(db: Session) -> bool:
     """Lee si los impuestos están habilitados desde settings."""
     try:
         repo = SettingsRepo(db)
-        pos_cfg = repo.get("pos") or {}
-        fiscal_cfg = repo.get("fiscal") or {}
-
-        def to_bool(val) -> bool | None:
-            try:
-                if isinstance(val, bool):
-                    return val
-                if isinstance(val, int | float):
-                    return bool(int(val))
-                if isinstance(val, str):
-                    v = val.strip().lower()
-                    if v in ("true", "1", "yes", "on"):
-                        return True
-                    if v in ("false", "0", "no", "off"):
-                        return False
-                return None
-            except Exception:
-                return None
-
-        v = (
-            to_bool((pos_cfg.get("tax") or {}).get("enabled"))
-            if isinstance(pos_cfg, dict)
-            else None
-        )
-        if v is None:
-            v = (
-                to_bool((fiscal_cfg.get("tax") or {}).get("enabled"))
-                if isinstance(fiscal_cfg, dict)
-                else None
-            )
-        return True if v is None else bool(v)
+        return parse_tax_enabled(repo.get("pos"), repo.get("fiscal"))
     except Exception:
         return True
 
 
+def get_tenant_settings(request: Request, db: Session) -> TenantSettingsContext:
+    """Snapshot de configuración del tenant, cargado una vez por request.
+
+    Preferir sus propiedades (``currency``, ``costing_method``,
+    ``default_tax_rate``, ``tax_enabled``) a los helpers ``resolve_*`` de
+    arriba, que releen ``company_settings`` en cada llamada.
+    """
+    return get_request_tenant_settings(request, db, get_tenant_id(request))
+
+
 # ============================================================================
 # STOCK HELPERS
 # ============================================================================
@@ -509,6 +467,8 @@ class ReceiptCreateIn(BaseModel):
     cashier_id: str | None = None
     customer_id: str | None = None
     client_request_id: str | None = Field(default=None, min_length=1, max_length=120)
+    # Número de un bloque pre-asignado (cajas offline); None = asignar ahora
+    number: str | None = Field(default=None, min_length=3, max_length=30)
     lines: list[ReceiptLineIn] = Field(default_factory=list)
     payments: list[PaymentIn] = Field(default_factory=list)
     notes: str | None = Field(default=None, max_length=500)
@@ -605,6 +565,25 @@ class NumberingCounterUpdateIn(BaseModel):
         return (v or "").strip() or "A"
 
 
+class NumberBlockReserveIn(BaseModel):
+    register_id: str
+    size: int = Field(ge=1, le=1000)
+
+    @field_validator("register_id")
+    @classmethod
+    def validate_register_id(cls, v):
+        validate_uuid(v, "Register ID")
+        return v
+
+
+class NumberBlockOut(BaseModel):
+    register_id: str
+    first: int
+    last: int
+    first_number: str
+    last_number: str
+
+
 class DocSeriesOut(BaseModel):
     id: str
     register_id: str | None
@@ -16,11 +16,15 @@ from app.db.rls import ensure_rls
 from ._deps import (
     DocSeriesOut,
     DocSeriesUpsertIn,
+    NumberBlockOut,
+    NumberBlockReserveIn,
     NumberingCounterOut,
     NumberingCounterUpdateIn,
     get_tenant_id,
+    get_user_id,
     validate_uuid,
 )
+from .receipts import format_receipt_number, reserve_offline_receipt_block
 
 logger = logging.getLogger(__name__)
 
@@ -316,3 +320,36 @@ def reset_yearly_series(
     )
     db.commit()
     return {"updated": result.rowcount}
+
+
+@router.post(
+    "/numbering/blocks",
+    response_model=NumberBlockOut,
+    dependencies=[Depends(require_permission("pos.receipt.create"))],
+)
+def reserve_receipt_number_block(
+    payload: NumberBlockReserveIn,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Reserva un bloque de números de ticket para una caja que operará offline."""
+    tenant_id = get_tenant_id(request)
+    register_uuid = validate_uuid(payload.register_id, "Register ID")
+    exists = db.execute(
+        text("SELECT 1 FROM pos_registers WHERE id = :rid AND tenant_id = :tid"),
+        {"rid": str(register_uuid), "tid": str(tenant_id)},
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Registro no encontrado")
+
+    block = reserve_offline_receipt_block(
+        db, tenant_id, register_uuid, payload.size, reserved_by=get_user_id(request)
+    )
+    db.commit()
+    return NumberBlockOut(
+        register_id=str(register_uuid),
+        first=block.first,
+        last=block.last,
+        first_number=format_receipt_number(block.first),
+        last_number=format_receipt_number(block.last),
+    )
@@ -18,7 +18,9 @@ from app.core.access_guard import with_access_claims
 from app.core.audit_events import audit_event
 from app.core.authz import require_permission, require_scope
 from app.db.rls import ensure_guc_from_request, ensure_rls
+from app.modules.analytics.application.kpi_rollups import record_receipt_paid
 from app.services.inventory_costing import InventoryCostingService
+from app.services.sequences import SequenceBlock, reserve_sequence_block
 
 from ._deps import (
     CalculateTotalsIn,
@@ -29,14 +31,12 @@ from ._deps import (
     ensure_generic_stock_row,
     get_claims,
     get_tenant_id,
+    get_tenant_settings,
     get_user_id,
     is_company_admin,
-    is_tax_enabled,
     load_locked_stock_rows,
-    require_tenant_product,
+    require_tenant_products,
     require_tenant_warehouse,
-    resolve_default_tax_rate,
-    resolve_inventory_costing_method,
     sum_stock_rows_qty,
     to_decimal_q,
     validate_uuid,
@@ -56,6 +56,108 @@ def _get_receipt_by_client_request_id(db: Session, tenant_id, client_request_id:
     ).first()
 
 
+RECEIPT_SEQUENCE = "POS_R"
+
+
+def format_receipt_number(n: int) -> str:
+    return f"R-{n:04d}"
+
+
+def _legacy_last_receipt_number(db: Session, tenant_id, register_id) -> int:
+    """MAX sobre el histórico de la caja: semilla del contador, solo la primera vez."""
+    return db.execute(
+        text(
+            "SELECT COALESCE(MAX("
+            "CASE WHEN SPLIT_PART(number, '-', 2) ~ '^[0-9]+$' "
+            "THEN (SPLIT_PART(number, '-', 2))::int ELSE 0 END"
+            "), 0) "
+            "FROM pos_receipts WHERE tenant_id = :tid AND register_id = :rid"
+        ).bindparams(
+            bindparam("tid", type_=PGUUID(as_uuid=True)),
+            bindparam("rid", type_=PGUUID(as_uuid=True)),
+        ),
+        {"tid": tenant_id, "rid": register_id},
+    ).scalar()
+
+
+def reserve_receipt_numbers(db: Session, tenant_id, register_id, size: int = 1) -> SequenceBlock:
+    """Asigna ``size`` números de ticket de la caja (contador por tenant/caja)."""
+    return reserve_sequence_block(
+        db,
+        tenant_id,
+        RECEIPT_SEQUENCE,
+        size,
+        scope=str(register_id),
+        seed=lambda: _legacy_last_receipt_number(db, tenant_id, register_id),
+    )
+
+
+def reserve_offline_receipt_block(
+    db: Session, tenant_id, register_id, size: int, reserved_by=None
+) -> SequenceBlock:
+    """Reserva un bloque para una caja offline y lo registra en ``pos_receipt_number_blocks``."""
+    block = reserve_receipt_numbers(db, tenant_id, register_id, size)
+    db.execute(
+        text(
+            "INSERT INTO pos_receipt_number_blocks("
+            "tenant_id, register_id, first_no, last_no, reserved_by"
+            ") VALUES (:tid, :rid, :first_no, :last_no, :reserved_by)"
+        ).bindparams(
+            bindparam("tid", type_=PGUUID(as_uuid=True)),
+            bindparam("rid", type_=PGUUID(as_uuid=True)),
+            bindparam("reserved_by", type_=PGUUID(as_uuid=True)),
+        ),
+        {
+            "tid": tenant_id,
+            "rid": register_id,
+            "first_no": block.first,
+            "last_no": block.last,
+            "reserved_by": reserved_by,
+        },
+    )
+    return block
+
+
+def _validate_reserved_number(db: Session, tenant_id, register_id, number: str) -> str:
+    """Acepta un número de un bloque reservado para la caja (tickets offline).
+
+    Los números asignados online también salen del contador, así que no basta
+    con ``<= last_number``: el número tiene que estar dentro de un bloque
+    registrado. El índice único (tenant, caja, número) cubre la carrera entre
+    dos envíos del mismo número.
+    """
+    prefix, _, digits = number.strip().partition("-")
+    if prefix != "R" or not digits.isdigit():
+        raise HTTPException(status_code=400, detail="invalid_receipt_number")
+    reserved = db.execute(
+        text(
+            "SELECT 1 FROM pos_receipt_number_blocks "
+            "WHERE tenant_id = :tid AND register_id = :rid "
+            "AND :n BETWEEN first_no AND last_no LIMIT 1"
+        ).bindparams(
+            bindparam("tid", type_=PGUUID(as_uuid=True)),
+            bindparam("rid", type_=PGUUID(as_uuid=True)),
+        ),
+        {"tid": tenant_id, "rid": register_id, "n": int(digits)},
+    ).first()
+    if not reserved:
+        raise HTTPException(status_code=400, detail="receipt_number_not_reserved")
+    number = format_receipt_number(int(digits))
+    used = db.execute(
+        text(
+            "SELECT 1 FROM pos_receipts "
+            "WHERE tenant_id = :tid AND register_id = :rid AND number = :number"
+        ).bindparams(
+            bindparam("tid", type_=PGUUID(as_uuid=True)),
+            bindparam("rid", type_=PGUUID(as_uuid=True)),
+        ),
+        {"tid": tenant_id, "rid": register_id, "number": number},
+    ).first()
+    if used:
+        raise HTTPException(status_code=409, detail="receipt_number_in_use")
+    return number
+
+
 router = APIRouter(
     prefix="/pos",
     tags=["POS — Receipts"],
@@ -214,30 +316,15 @@ def create_receipt(payload: ReceiptCreateIn, request: Request, db: Session = Dep
         if shift[0] != "open":
             raise HTTPException(status_code=400, detail="El turno no está abierto")
 
-        # Numeración atómica con advisory lock
-        db.execute(
-            text("SELECT pg_advisory_xact_lock(hashtext(:k))"),
-            {"k": f"{tenant_id}-{register_uuid}-POS_R"},
-        )
-
-        ticket_number = db.execute(
-            text(
-                "SELECT COALESCE(MAX("
-                "CASE WHEN SPLIT_PART(number, '-', 2) ~ '^[0-9]+$' "
-                "THEN (SPLIT_PART(number, '-', 2))::int ELSE 0 END"
-                "), 0) + 1 "
-                "FROM pos_receipts WHERE tenant_id = :tid AND register_id = :rid"
-            ).bindparams(
-                bindparam("tid", type_=PGUUID(as_uuid=True)),
-                bindparam("rid", type_=PGUUID(as_uuid=True)),
-            ),
-            {"tid": tenant_id, "rid": register_uuid},
-        ).scalar()
-        ticket_number = f"R-{ticket_number:04d}"
-
-        from ._deps import resolve_tenant_currency
+        if payload.number:
+            ticket_number = _validate_reserved_number(db, tenant_id, register_uuid, payload.number)
+        else:
+            ticket_number = format_receipt_number(
+                reserve_receipt_numbers(db, tenant_id, register_uuid).first
+            )
 
-        currency = resolve_tenant_currency(db, tenant_id)
+        tenant_settings = get_tenant_settings(request, db)
+        currency = tenant_settings.currency
 
         row = db.execute(
             text(
@@ -269,12 +356,13 @@ def create_receipt(payload: ReceiptCreateIn, request: Request, db: Session = Dep
 
         receipt_id = row[0]
 
-        tax_enabled = is_tax_enabled(db)
-        default_tax = resolve_default_tax_rate(db)
+        tax_enabled = tenant_settings.tax_enabled
+        default_tax = tenant_settings.default_tax_rate
+
+        product_uuids = [validate_uuid(line.product_id, "Product ID") for line in payload.lines]
+        require_tenant_products(db, tenant_id, product_uuids)
 
-        for line in payload.lines:
-            product_uuid = validate_uuid(line.product_id, "Product ID")
-            require_tenant_product(db, tenant_id, product_uuid)
+        for line, product_uuid in zip(payload.lines, product_uuids, strict=True):
 
             tax_rate = line.tax_rate
             if not tax_enabled:
@@ -335,7 +423,7 @@ def create_receipt(payload: ReceiptCreateIn, request: Request, db: Session = Dep
     except HTTPException:
         db.rollback()
         raise
-    except IntegrityError:
+    except IntegrityError as exc:
         db.rollback()
         if client_request_id:
             existing = _get_receipt_by_client_request_id(db, tenant_id, client_request_id)
@@ -346,6 +434,8 @@ def create_receipt(payload: ReceiptCreateIn, request: Request, db: Session = Dep
                     "status": existing[2],
                     "idempotent_replay": True,
                 }
+        if "uq_pos_receipts_tenant_register_number" in str(exc.orig):
+            raise HTTPException(status_code=409, detail="receipt_number_in_use")
         raise
     except Exception as e:
         db.rollback()
@@ -658,7 +748,7 @@ def checkout(
     )
 
     try:
-        result = CheckoutService(db).execute(checkout_req)
+        result = CheckoutService(db, get_tenant_settings(request, db)).execute(checkout_req)
     except ValueError as e:
         db.rollback()
         detail = str(e)
@@ -710,6 +800,7 @@ def checkout(
                     "change": float(result.change),
                 },
                 "documents_created": list(result.documents_created.keys()),
+                "documents_status": result.documents_status,
             },
             req=request,
         )
@@ -728,9 +819,30 @@ def checkout(
             "change": float(result.change),
         },
         "documents_created": result.documents_created,
+        # pending: la factura/venta las crea el outbox; consultar /documents
+        "documents_status": result.documents_status,
     }
 
 
+@router.get(
+    "/receipts/{receipt_id}/documents",
+    response_model=dict,
+    dependencies=[Depends(require_permission("pos.receipt.read"))],
+)
+def get_receipt_documents_status(receipt_id: str, request: Request, db: Session = Depends(get_db)):
+    """Estado de la factura/venta del recibo (pending | done | failed) para el POS."""
+    from app.modules.pos.application.receipt_documents import get_receipt_documents
+
+    ensure_guc_from_request(request, db, persist=True)
+    receipt_uuid = validate_uuid(receipt_id, "Receipt ID")
+    tenant_id = get_tenant_id(request)
+
+    result = get_receipt_documents(db, tenant_id, receipt_uuid)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Recibo no encontrado")
+    return result
+
+
 # ============================================================================
 # REFUND
 # ============================================================================
@@ -796,7 +908,8 @@ def refund_receipt(
             raise HTTPException(status_code=400, detail="Recibo sin líneas")
 
         costing = InventoryCostingService(db)
-        costing_method = resolve_inventory_costing_method(db)
+        costing_method = get_tenant_settings(request, db).costing_method
+        require_tenant_products(db, tenant_id, {line[0] for line in lines})
 
         for line in lines:
             product_id = line[0]
@@ -814,7 +927,6 @@ def refund_receipt(
             qty_dec = to_decimal_q(qty_return, "0.000001")
             cogs_unit_dec = to_decimal_q(cogs_unit, "0.000001")
 
-            require_tenant_product(db, tenant_id, product_id)
             stock_rows = load_locked_stock_rows(db, tenant_id, warehouse_uuid, product_id)
             current_qty = sum_stock_rows_qty(stock_rows)
             stock_item = ensure_generic_stock_row(
@@ -927,16 +1039,19 @@ def refund_receipt(
         db.commit()
 
         try:
-            db.execute(
+            refunded = db.execute(
                 text(
                     "UPDATE pos_receipts SET status = 'refunded' "
-                    "WHERE id = :id AND tenant_id = :tid"
+                    "WHERE id = :id AND tenant_id = :tid AND status = 'paid' "
+                    "RETURNING created_at, gross_total"
                 ).bindparams(
                     bindparam("id", type_=PGUUID(as_uuid=True)),
                     bindparam("tid", type_=PGUUID(as_uuid=True)),
                 ),
                 {"id": receipt_uuid, "tid": tenant_id},
-            )
+            ).first()
+            if refunded is not None:
+                record_receipt_paid(db, tenant_id, refunded[0], refunded[1] or 0, sign=-1)
             db.commit()
         except Exception:
             db.rollback()
@@ -1027,29 +1142,20 @@ def backfill_receipt_documents(
     documents_created: dict = {}
     try:
         from app.modules.pos.application.invoice_integration import POSInvoicingService
+        from app.modules.pos.application.receipt_documents import (
+            create_receipt_documents,
+            finish_receipt_documents,
+        )
 
         service = POSInvoicingService(db, tenant_id)
-        try:
-            invoice_result = service.create_invoice_from_receipt(receipt_uuid, customer_id=None)
-            if invoice_result:
-                documents_created["invoice"] = invoice_result
-            else:
-                db.rollback()
-        except Exception as e:
-            logger.warning("Error backfilling invoice for receipt %s: %s", receipt_uuid, e)
-            db.rollback()
-
-        try:
-            sale_result = service.create_sale_from_receipt(receipt_uuid)
-            if sale_result:
-                documents_created["sale"] = sale_result
-            else:
-                db.rollback()
-        except Exception as e:
-            logger.warning("Error backfilling sale for receipt %s: %s", receipt_uuid, e)
-            db.rollback()
+        documents_created, error = create_receipt_documents(service, receipt_uuid)
+        if error:
+            logger.warning("Error backfilling documents for receipt %s: %s", receipt_uuid, error)
+        finish_receipt_documents(db, tenant_id, receipt_uuid, documents_created, error)
+        db.commit()
     except Exception as e:
         logger.warning("Error backfilling documents: %s", e)
+        db.rollback()
 
     return {"ok": True, "receipt_id": str(receipt_uuid), "documents_created": documents_created}
 
@@ -18,6 +18,7 @@ from app.db.rls import ensure_guc_from_request, ensure_rls
 from app.models.accounting.chart_of_accounts import JournalEntry as AsientoContable
 from app.models.accounting.chart_of_accounts import JournalEntryLine as AsientoLinea
 from app.models.accounting.pos_settings import PaymentMethod, TenantAccountingSettings
+from app.modules.accounting.application.balances import apply_entry_to_balances
 from app.modules.accounting.interface.http.tenant import _generate_numero_asiento
 
 from ._deps import (
@@ -720,6 +721,7 @@ def close_shift(
                             line.entry_id = entry.id
                             line.line_number = idx + 1
                             db.add(line)
+                        apply_entry_to_balances(db, acc_lines)
                         db.commit()
                         accounting_result = {"entry_id": str(entry.id), "status": "posted"}
         except Exception as e:
@@ -1071,6 +1073,7 @@ def generate_accounting_for_closed_shift(
             line.entry_id = entry.id
             line.line_number = idx + 1
             db.add(line)
+        apply_entry_to_balances(db, lines)
         db.commit()
 
         return {
@@ -331,7 +331,7 @@ def create_printer_label_configuration(
 
 
 @router.post("/printing/labels", summary="Send TSPL label to attached printer")
-async def print_label(
+def print_label(
     payload: PrintLabelRequest,
     tenant_id: str = Depends(ensure_tenant),
     db: Session = Depends(get_db),
@@ -493,7 +493,7 @@ def get_receipt_preview(
 
 
 @router.post("/printing/labels/batch", summary="Send TSPL labels batch to attached printer")
-async def print_labels_batch(
+def print_labels_batch(
     payload: PrintLabelsRequest,
     tenant_id: str = Depends(ensure_tenant),
     db: Session = Depends(get_db),
@@ -47,6 +47,7 @@ from app.models.production._cost_periods import CostPeriod
 from app.models.production._recipe_steps import RecipeStep
 from app.models.production.production_order import ProductionOrder, ProductionOrderLine
 from app.models.recipes import Recipe, RecipeIngredient
+from app.modules.analytics.application.kpi_rollups import record_production_completed
 from app.modules.feature_flags.dependencies import require_flag
 from app.schemas.cost_periods import (
     CostPeriodCreate,
@@ -102,6 +103,7 @@ from app.schemas.recipes import (
     RecipeUpdate,
 )
 from app.services.cost_periods_service import CostPeriodsService
+from app.services.inventory_costing import CostMove, InventoryCostingService
 from app.services.product_raw_materials import sync_product_as_raw_material_from_recipe_line
 from app.services.recipe_calculator import (
     _build_tenant_ingredient_unit_cost_map,
@@ -115,6 +117,7 @@ from app.services.recipe_calculator import (
     get_recipe_profitability,
 )
 from app.services.recipe_optimizer import optimize_recipe_with_ai
+from app.services.sequences import next_sequence_number
 
 router = APIRouter(
     prefix="/production",
@@ -486,62 +489,58 @@ def _seed_default_order_costs(db: Session, order: ProductionOrder) -> None:
         )
 
 
-def _generate_next_numero(db: Session, tenant_id: UUID) -> str:
-    year = datetime.now(UTC).year
-    prefix = f"OP-{year}-"
+def _last_number_with_prefix(db: Session, tenant_id: UUID, column: str, prefix: str) -> int:
+    """Último número emitido con ``prefix`` (semilla del contador, solo primera vez)."""
     table_name = ProductionOrder.__table__.fullname
     stmt = text(
         f"""
-        SELECT order_number
+        SELECT {column}
         FROM {table_name}
         WHERE tenant_id = :tenant_id
-          AND order_number LIKE :prefix
-        ORDER BY order_number DESC
+          AND {column} LIKE :prefix
+        ORDER BY {column} DESC
         LIMIT 1
         """
     )
-    last_numero = db.execute(stmt, {"tenant_id": str(tenant_id), "prefix": f"{prefix}%"}).scalar()
-    if last_numero:
-        try:
-            last_num = int(str(last_numero).split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
+    last = db.execute(stmt, {"tenant_id": str(tenant_id), "prefix": f"{prefix}%"}).scalar()
+    try:
+        return int(str(last).split("-")[-1]) if last else 0
+    except (ValueError, IndexError):
+        return 0
+
+
+def _generate_next_numero(db: Session, tenant_id: UUID) -> str:
+    year = datetime.now(UTC).year
+    prefix = f"OP-{year}-"
+    next_num = next_sequence_number(
+        db,
+        tenant_id,
+        "production_order",
+        period=str(year),
+        seed=lambda: _last_number_with_prefix(db, tenant_id, "order_number", prefix),
+    )
     return f"{prefix}{next_num:04d}"
 
 
 def _generate_batch_number(db: Session, tenant_id: UUID) -> str:
-    year = datetime.now(UTC).year
-    month = datetime.now(UTC).month
-    prefix = f"LOT-{year}{month:02d}-"
-    table_name = ProductionOrder.__table__.fullname
-    stmt = text(
-        f"""
-        SELECT batch_number
-        FROM {table_name}
-        WHERE tenant_id = :tenant_id
-          AND batch_number IS NOT NULL
-          AND batch_number LIKE :prefix
-        ORDER BY batch_number DESC
-        LIMIT 1
-        """
+    now = datetime.now(UTC)
+    period = f"{now.year}{now.month:02d}"
+    prefix = f"LOT-{period}-"
+    next_num = next_sequence_number(
+        db,
+        tenant_id,
+        "production_batch",
+        period=period,
+        seed=lambda: _last_number_with_prefix(db, tenant_id, "batch_number", prefix),
     )
-    last_batch = db.execute(stmt, {"tenant_id": str(tenant_id), "prefix": f"{prefix}%"}).scalar()
-    if last_batch:
-        try:
-            last_num = int(str(last_batch).split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
     return f"{prefix}{next_num:04d}"
 
 
-async def _create_stock_moves_for_ingredients(
-    db: Session, order: ProductionOrder, warehouse_id: UUID | None = None
+def _create_stock_moves_for_ingredients(
+    db: Session,
+    order: ProductionOrder,
+    warehouse_id: UUID | None = None,
+    cost_moves: list[tuple[StockMove, CostMove]] | None = None,
 ) -> list[UUID]:
     if not warehouse_id:
         raise ValueError("Warehouse is required to consume ingredients")
@@ -624,6 +623,21 @@ async def _create_stock_moves_for_ingredients(
             stmt = stmt.where(StockItem.warehouse_id == warehouse_id)
         result = db.execute(stmt)
         stock_item = result.scalar_one_or_none()
+        if cost_moves is not None and prod is not None:
+            cost_moves.append(
+                (
+                    stock_move,
+                    CostMove(
+                        str(warehouse_id),
+                        str(line.ingredient_product_id),
+                        _dec_q(stock_qty),
+                        "out",
+                        allow_negative=True,
+                        initial_qty=_dec_q(stock_item.qty if stock_item else 0),
+                        initial_avg_cost=_dec_q(prod.cost_price),
+                    ),
+                )
+            )
         if stock_item:
             stock_item.qty = float(stock_item.qty or 0) - stock_qty
         else:
@@ -655,8 +669,11 @@ async def _create_stock_moves_for_ingredients(
     return stock_move_ids
 
 
-async def _create_stock_move_for_output(
-    db: Session, order: ProductionOrder, warehouse_id: UUID | None = None
+def _create_stock_move_for_output(
+    db: Session,
+    order: ProductionOrder,
+    warehouse_id: UUID | None = None,
+    cost_moves: list[tuple[StockMove, CostMove]] | None = None,
 ) -> UUID:
     if not warehouse_id:
         raise ValueError("Warehouse is required to receive produced stock")
@@ -696,6 +713,21 @@ async def _create_stock_move_for_output(
         stock_item = db.execute(reusable_stmt).scalar_one_or_none()
         if stock_item:
             stock_item.lot = order.batch_number
+    if cost_moves is not None:
+        # unit_cost is filled in by _apply_production_costing from the ingredients' COGS.
+        cost_moves.append(
+            (
+                stock_move,
+                CostMove(
+                    str(warehouse_id),
+                    str(order.product_id),
+                    _dec_q(abs(float(order.qty_produced))),
+                    "in",
+                    lot=order.batch_number,
+                    initial_qty=_dec_q(stock_item.qty if stock_item else 0),
+                ),
+            )
+        )
     if stock_item:
         stock_item.qty = float(stock_item.qty or 0) + abs(float(order.qty_produced))
     else:
@@ -736,6 +768,51 @@ async def _create_stock_move_for_output(
     return stock_move.id
 
 
+def _dec_q(value: object) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.000001"))
+
+
+def _apply_production_costing(
+    db: Session, order: ProductionOrder, cost_moves: list[tuple[StockMove, CostMove]]
+) -> None:
+    """Costea consumos y salida de la orden en bloque.
+
+    Los consumos van en un único ``apply_moves``; la entrada del producto
+    terminado se valora al COGS total de los ingredientes / cantidad producida
+    y se aplica en un segundo lote.
+    """
+    from app.modules.pos.interface.http._deps import resolve_inventory_costing_method
+
+    if not cost_moves:
+        return
+    costing = InventoryCostingService(db)
+    costing_method = resolve_inventory_costing_method(db)
+    tenant_key = str(order.tenant_id)
+
+    consumed = [(sm, move) for sm, move in cost_moves if move.direction == "out"]
+    produced = [(sm, move) for sm, move in cost_moves if move.direction == "in"]
+
+    results = costing.apply_moves(
+        tenant_key, [move for _, move in consumed], costing_method=costing_method
+    )
+    total_cogs = Decimal("0")
+    for (stock_move, move), result in zip(consumed, results, strict=True):
+        total_cogs += result.cogs
+        stock_move.total_cost = float(result.cogs)
+        stock_move.unit_cost = float(_dec_q(result.cogs / move.qty)) if move.qty > 0 else 0.0
+
+    output_qty = sum((move.qty for _, move in produced), Decimal("0"))
+    unit_cost = _dec_q(total_cogs / output_qty) if output_qty > 0 else Decimal("0")
+    costing.apply_moves(
+        tenant_key,
+        [move._replace(unit_cost=unit_cost, initial_avg_cost=unit_cost) for _, move in produced],
+        costing_method=costing_method,
+    )
+    for stock_move, move in produced:
+        stock_move.unit_cost = float(unit_cost)
+        stock_move.total_cost = float(_dec_q(unit_cost * move.qty))
+
+
 def _resolve_warehouse_id(db: Session, tenant_id: UUID, preferred: UUID | None = None) -> UUID:
     if preferred:
         return UUID(str(_require_warehouse_for_tenant(db, tenant_id, preferred).id))
@@ -878,7 +955,7 @@ def _create_expense_for_completed_production(
 
 # ÓRDENES DE PRODUCCIÓN
 @router.get("/orders", response_model=ProductionOrderList)
-async def list_production_orders(
+def list_production_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     status: str | None = Query(None),
@@ -933,7 +1010,7 @@ async def list_production_orders(
 
 
 @router.get("/planning/suggestions", response_model=list[ProductionPlanningSuggestion])
-async def list_production_planning_suggestions(
+def list_production_planning_suggestions(
     target_date: date | None = Query(None),
     history_days: int = Query(14, ge=1, le=90),
     limit: int = Query(12, ge=1, le=100),
@@ -1030,7 +1107,7 @@ async def list_production_planning_suggestions(
 
 
 @router.post("/orders", response_model=ProductionOrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_production_order(
+def create_production_order(
     order_in: ProductionOrderCreate,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1248,7 +1325,7 @@ def replace_order_costs(
 
 
 @router.get("/orders/{order_id}", response_model=ProductionOrderResponse)
-async def get_production_order(
+def get_production_order(
     order_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1268,7 +1345,7 @@ async def get_production_order(
 
 
 @router.put("/orders/{order_id}", response_model=ProductionOrderResponse)
-async def update_production_order(
+def update_production_order(
     order_id: UUID,
     order_in: ProductionOrderUpdate,
     db: Session = Depends(get_db),
@@ -1299,7 +1376,7 @@ async def update_production_order(
 
 
 @router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_production_order(
+def delete_production_order(
     order_id: UUID,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1325,7 +1402,7 @@ async def delete_production_order(
 
 
 @router.post("/orders/{order_id}/start", response_model=ProductionOrderResponse)
-async def start_production(
+def start_production(
     order_id: UUID,
     request: ProductionOrderStartRequest,
     db: Session = Depends(get_db),
@@ -1357,7 +1434,7 @@ async def start_production(
 
 
 @router.post("/orders/{order_id}/complete", response_model=ProductionOrderResponse)
-async def complete_production(
+def complete_production(
     order_id: UUID,
     request: ProductionOrderCompleteRequest,
     db: Session = Depends(get_db),
@@ -1407,8 +1484,11 @@ async def complete_production(
         if not line.qty_consumed or line.qty_consumed == 0:
             line.qty_consumed = line.qty_required
     try:
-        await _create_stock_moves_for_ingredients(db, order, warehouse_id)
-        await _create_stock_move_for_output(db, order, warehouse_id)
+        cost_moves: list[tuple[StockMove, CostMove]] = []
+        _create_stock_moves_for_ingredients(db, order, warehouse_id, cost_moves)
+        _create_stock_move_for_output(db, order, warehouse_id, cost_moves)
+        _apply_production_costing(db, order, cost_moves)
+        record_production_completed(db, order)
         try:
             _seed_default_order_costs(db, order)
             _create_expense_for_completed_production(db, order, tenant_id, user_id)
@@ -1431,7 +1511,7 @@ async def complete_production(
 
 
 @router.post("/orders/{order_id}/cancel", response_model=ProductionOrderResponse)
-async def cancel_production(
+def cancel_production(
     order_id: UUID,
     reason: str | None = Query(None),
     db: Session = Depends(get_db),
@@ -1462,7 +1542,7 @@ async def cancel_production(
 
 
 @router.post("/calculator", response_model=ProductionCalculatorResponse)
-async def calculate_production(
+def calculate_production(
     request: ProductionCalculatorRequest,
     db: Session = Depends(get_db),
     claims: dict = Depends(with_access_claims),
@@ -1534,7 +1614,7 @@ async def calculate_production(
 
 
 @router.get("/stats", response_model=ProductionOrderStats)
-async def get_production_stats(
+def get_production_stats(
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
     db: Session = Depends(get_db),
@@ -1770,11 +1850,10 @@ def update_recipe(
             ingredient_product_ids,
             exclude_recipe_id=recipe_id,
         )
-        (
-            db.query(RecipeIngredient)
-            .filter(RecipeIngredient.recipe_id == recipe_id)
-            .delete(synchronize_session=False)
-        )
+        # Borrado por el ORM (delete-orphan), no con Query.delete(): el hook de
+        # after_delete marca los productos para refrescar product_pack_info.
+        recipe.ingredients.clear()
+        db.flush()
         for idx, ing_data in enumerate(ingredients_payload):
             resolved_package_cost = _resolve_recipe_line_package_cost(
                 db,
@@ -322,7 +322,10 @@ def upsert_recipe_from_import(
         recipe.yield_qty = yield_qty
         recipe.waste_pct = waste_pct
 
-    db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id == recipe.id).delete()
+    # Borrado por el ORM (delete-orphan), no con Query.delete(): el hook de
+    # after_delete marca los productos para refrescar product_pack_info.
+    recipe.ingredients.clear()
+    db.flush()
 
     total_cost = Decimal("0")
     line_order = 0
@@ -1,26 +1,35 @@
 from __future__ import annotations
 
-import re
-import unicodedata
-from difflib import SequenceMatcher
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field, field_validator
-from sqlalchemy import func, inspect, select, text
-from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
 from app.core.access_guard import with_access_claims
 from app.core.authz import require_permission, require_scope
+from app.core.cache import (
+    CacheTTL,
+    cache_get_or_load_sync,
+    invalidate_on_commit,
+    invalidate_tenant_domain_sync,
+)
 from app.core.dependencies import get_current_tenant_id
 from app.middleware.tenant import ensure_tenant
 from app.models.core.product_category import ProductCategory
 from app.models.core.products import Product
 from app.models.inventory.stock import StockItem
 from app.models.inventory.warehouse import Warehouse
+from app.modules.products.application.duplicates import (
+    DUPLICATES_CACHE_DOMAIN,
+    find_product_fk_tables,
+    load_duplicate_groups,
+    qualified_table_name,
+    refresh_duplicate_groups,
+)
 from app.services.product_raw_materials import validate_raw_material_unit
 from app.shared.jsonb_schemas import ProductMetadataJSON
 
@@ -211,64 +220,6 @@ class ProductOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
-def _normalize_product_name(value: str | None) -> str:
-    if not value:
-        return ""
-    txt = unicodedata.normalize("NFKD", str(value))
-    txt = "".join(ch for ch in txt if not unicodedata.combining(ch))
-    txt = txt.lower().strip()
-    txt = re.sub(r"[^a-z0-9\s]+", " ", txt)
-    txt = re.sub(r"\s+", " ", txt).strip()
-    return txt
-
-
-def _normalize_product_tokens(value: str | None) -> list[str]:
-    base = _normalize_product_name(value)
-    if not base:
-        return []
-    out: list[str] = []
-    for tok in base.split(" "):
-        if len(tok) > 3 and tok.endswith("s"):
-            out.append(tok[:-1])
-        else:
-            out.append(tok)
-    return out
-
-
-def _is_similar_product_name(left: str | None, right: str | None, threshold: float = 0.88) -> bool:
-    a_tokens = _normalize_product_tokens(left)
-    b_tokens = _normalize_product_tokens(right)
-    if not a_tokens or not b_tokens:
-        return False
-
-    a_num = {t for t in a_tokens if any(ch.isdigit() for ch in t)}
-    b_num = {t for t in b_tokens if any(ch.isdigit() for ch in t)}
-    if a_num and b_num and a_num != b_num:
-        return False
-
-    a = " ".join(a_tokens)
-    b = " ".join(b_tokens)
-    if a == b:
-        return True
-    if a in b or b in a:
-        min_len = min(len(a), len(b))
-        max_len = max(len(a), len(b))
-        if min_len >= 4 and (min_len / max_len) >= 0.6:
-            return True
-    if SequenceMatcher(None, a, b).ratio() >= threshold:
-        return True
-    a_set = set(a_tokens)
-    b_set = set(b_tokens)
-    if len(a_set) == 1 or len(b_set) == 1:
-        return False
-    overlap = len(a_set.intersection(b_set))
-    if overlap == 0:
-        return False
-    min_side = overlap / max(min(len(a_set), len(b_set)), 1)
-    jaccard = overlap / max(len(a_set.union(b_set)), 1)
-    return min_side >= 0.8 and jaccard >= 0.55
-
-
 def _to_product_out_row_optimized(row: Product, real_stock: float | None = None) -> ProductOut:
     """Optimized conversion with minimal operations."""
     return ProductOut(
@@ -363,27 +314,36 @@ def _resolve_category_id(db: Session, tenant_id: str, category_name: str | None)
     return category.id
 
 
+_CATEGORIES_CACHE_DOMAIN = "product_categories"
+invalidate_on_commit(ProductCategory, _CATEGORIES_CACHE_DOMAIN)
+
+
 @router.get("/product-categories", response_model=list[CategoryOut], dependencies=protected)
 def list_categories(
     request: Request,
     db: Session = Depends(get_db),
     tenant_id: UUID = Depends(get_current_tenant_id),
 ):
-    categories = (
-        db.query(ProductCategory)
-        .filter(ProductCategory.tenant_id == tenant_id)
-        .order_by(ProductCategory.name.asc())
-        .all()
-    )
-    return [
-        CategoryOut(
-            id=str(c.id),
-            name=c.name,
-            description=c.description,
-            parent_id=str(c.parent_id) if c.parent_id else None,
+    def _load() -> list[dict[str, Any]]:
+        categories = (
+            db.query(ProductCategory)
+            .filter(ProductCategory.tenant_id == tenant_id)
+            .order_by(ProductCategory.name.asc())
+            .all()
         )
-        for c in categories
-    ]
+        return [
+            CategoryOut(
+                id=str(c.id),
+                name=c.name,
+                description=c.description,
+                parent_id=str(c.parent_id) if c.parent_id else None,
+            ).model_dump()
+            for c in categories
+        ]
+
+    return cache_get_or_load_sync(
+        tenant_id, _CATEGORIES_CACHE_DOMAIN, ["list"], _load, CacheTTL.CATALOGOS
+    )
 
 
 @router.post(
@@ -598,6 +558,7 @@ class SimilarProductGroupOut(BaseModel):
 class SimilarProductsResponse(BaseModel):
     groups: list[SimilarProductGroupOut]
     total_groups: int
+    scanned: int = 0
 
 
 class MergeSimilarProductsIn(BaseModel):
@@ -612,93 +573,7 @@ class MergeSimilarProductsOut(BaseModel):
     deleted_ids: list[UUID]
 
 
-def _quote_ident(name: str) -> str:
-    return '"' + name.replace('"', '""') + '"'
-
-
-def _qualified_table_name(db: Session, table: str) -> str:
-    quoted = _quote_ident(table)
-    if db.get_bind().dialect.name == "sqlite":
-        return quoted
-    return f"public.{quoted}"
-
-
-def _find_product_fk_tables(db: Session) -> list[tuple[str, bool]]:
-    if db.get_bind().dialect.name == "sqlite":
-        inspector = inspect(db.get_bind())
-        out: list[tuple[str, bool]] = []
-        for table in inspector.get_table_names():
-            if table == "products":
-                continue
-            try:
-                columns = {column["name"] for column in inspector.get_columns(table)}
-            except NoSuchTableError:
-                continue
-            if "product_id" in columns:
-                out.append((table, "tenant_id" in columns))
-        return sorted(out)
-
-    rows = db.execute(
-        text(
-            """
-            SELECT c.table_name
-            FROM information_schema.columns c
-            WHERE c.table_schema='public'
-              AND c.column_name='product_id'
-              AND c.table_name <> 'products'
-            ORDER BY c.table_name
-            """
-        )
-    ).fetchall()
-    tables = [str(r[0]) for r in rows]
-    out: list[tuple[str, bool]] = []
-    for table in tables:
-        has_tenant = (
-            db.execute(
-                text(
-                    """
-                    SELECT 1
-                    FROM information_schema.columns
-                    WHERE table_schema='public'
-                      AND table_name=:tbl
-                      AND column_name='tenant_id'
-                    LIMIT 1
-                    """
-                ),
-                {"tbl": table},
-            ).first()
-            is not None
-        )
-        out.append((table, has_tenant))
-    return out
-
-
-def _count_product_refs(
-    db: Session, tenant_id: str, product_id: UUID, tables: list[tuple[str, bool]]
-) -> int:
-    total = 0
-    for table, has_tenant in tables:
-        qtable = _qualified_table_name(db, table)
-        if has_tenant:
-            count = (
-                db.execute(
-                    text(
-                        f"SELECT COUNT(*) FROM {qtable} " "WHERE tenant_id=:tid AND product_id=:pid"
-                    ),
-                    {"tid": tenant_id, "pid": str(product_id)},
-                ).scalar()
-                or 0
-            )
-        else:
-            count = (
-                db.execute(
-                    text(f"SELECT COUNT(*) FROM {qtable} WHERE product_id=:pid"),
-                    {"pid": str(product_id)},
-                ).scalar()
-                or 0
-            )
-        total += int(count)
-    return total
+invalidate_on_commit(Product, DUPLICATES_CACHE_DOMAIN)
 
 
 @router.get("/duplicates/similar", response_model=SimilarProductsResponse, dependencies=protected)
@@ -707,81 +582,30 @@ def list_similar_products(
     db: Session = Depends(get_db),
     threshold: float = Query(default=0.9, ge=0.7, le=1.0),
     limit: int = Query(default=12, ge=1, le=100),
-    scan_limit: int = Query(default=1000, ge=10, le=5000),
 ):
+    """Grupos de casi duplicados sobre el catálogo completo (cacheado por umbral)."""
     tenant_id = str(get_current_tenant_id(request))
-
-    products = (
-        db.query(Product)
-        .filter(Product.tenant_id == tenant_id)
-        .order_by(Product.name.asc())
-        .limit(scan_limit)
-        .all()
+    result = load_duplicate_groups(db, tenant_id, threshold)
+    groups = result["groups"][:limit]
+    return SimilarProductsResponse(
+        groups=groups, total_groups=len(groups), scanned=result["scanned"]
     )
-    if not products:
-        return SimilarProductsResponse(groups=[], total_groups=0)
-
-    tables = _find_product_fk_tables(db)
-    refs_by_id: dict[UUID, int] = {}
-    for p in products:
-        refs_by_id[p.id] = _count_product_refs(db, tenant_id, p.id, tables)
-
-    groups: list[SimilarProductGroupOut] = []
-    used: set[UUID] = set()
-    n = len(products)
-    for i in range(n):
-        base = products[i]
-        if base.id in used:
-            continue
-        similar: list[Product] = []
-        for j in range(i + 1, n):
-            other = products[j]
-            if other.id in used:
-                continue
-            if _is_similar_product_name(base.name, other.name, threshold):
-                similar.append(other)
-        if not similar:
-            continue
-        cluster = [base, *similar]
-        winner = sorted(
-            cluster,
-            key=lambda p: (
-                0 if (p.sku and p.sku.strip()) else 1,
-                -(refs_by_id.get(p.id, 0)),
-                p.created_at or p.updated_at,
-                str(p.id),
-            ),
-        )[0]
-        candidates = [p for p in cluster if p.id != winner.id]
-        for c in cluster:
-            used.add(c.id)
-
-        groups.append(
-            SimilarProductGroupOut(
-                winner=SimilarProductCandidateOut(
-                    id=winner.id,
-                    name=winner.name or "",
-                    sku=winner.sku,
-                    price=float(winner.price or 0),
-                    stock=float(winner.stock or 0),
-                    refs=refs_by_id.get(winner.id, 0),
-                ),
-                candidates=[
-                    SimilarProductCandidateOut(
-                        id=c.id,
-                        name=c.name or "",
-                        sku=c.sku,
-                        price=float(c.price or 0),
-                        stock=float(c.stock or 0),
-                        refs=refs_by_id.get(c.id, 0),
-                    )
-                    for c in candidates
-                ],
-            )
-        )
 
-    groups = groups[:limit]
-    return SimilarProductsResponse(groups=groups, total_groups=len(groups))
+
+@router.post(
+    "/duplicates/similar/refresh",
+    status_code=202,
+    dependencies=protected,
+)
+def refresh_similar_products(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    threshold: float = Query(default=0.9, ge=0.7, le=1.0),
+):
+    """Recalcula los grupos en segundo plano (p.ej. tras una importación masiva)."""
+    tenant_id = str(get_current_tenant_id(request))
+    background_tasks.add_task(refresh_duplicate_groups, tenant_id, threshold)
+    return {"status": "queued", "threshold": threshold}
 
 
 @router.post(
@@ -813,7 +637,7 @@ def merge_similar_products(
     if not losers:
         raise HTTPException(status_code=404, detail="losers_not_found")
 
-    tables = _find_product_fk_tables(db)
+    tables = find_product_fk_tables(db)
     moved_refs: dict[str, int] = {}
     deleted_ids: list[UUID] = []
 
@@ -821,7 +645,7 @@ def merge_similar_products(
         for table, has_tenant in tables:
             if not has_tenant:
                 continue
-            qtable = _qualified_table_name(db, table)
+            qtable = qualified_table_name(db, table)
             res = db.execute(
                 text(
                     f"UPDATE {qtable} "
@@ -1211,6 +1035,9 @@ def purge_products_pro(request: Request, payload: PurgeRequest, db: Session = De
             "product_categories", "DELETE FROM product_categories WHERE tenant_id = :tid"
         )
     db.commit()
+    # DELETE en SQL plano: no pasa por los eventos ORM de invalidate_on_commit
+    invalidate_tenant_domain_sync(tenant_id, _CATEGORIES_CACHE_DOMAIN)
+    invalidate_tenant_domain_sync(tenant_id, DUPLICATES_CACHE_DOMAIN)
 
     # Best-effort audit log
     try:
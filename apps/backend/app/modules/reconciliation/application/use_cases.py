@@ -1,10 +1,11 @@
 """Business logic / use cases for reconciliation module."""
 
 import logging
+from datetime import date, datetime
 from decimal import Decimal
 from uuid import UUID
 
-from sqlalchemy import text
+from sqlalchemy import bindparam, text, update
 from sqlalchemy.orm import Session
 
 from app.modules.reconciliation.domain.exceptions import (
@@ -12,12 +13,33 @@ from app.modules.reconciliation.domain.exceptions import (
     LineNotFound,
     StatementNotFound,
 )
+from app.modules.reconciliation.domain.matching import (
+    MatchInvoice,
+    MatchLine,
+    MatchResult,
+    match_lines,
+)
 from app.modules.reconciliation.domain.models import ReconciliationBankStatement as BankStatement
 from app.modules.reconciliation.domain.models import ReconciliationStatementLine as StatementLine
 from app.modules.reconciliation.infrastructure.reconciliation_service import ReconciliationService
 
 logger = logging.getLogger(__name__)
 
+_CLOSED_INVOICE_STATUSES = frozenset({"cancelled", "draft", "paid"})
+
+
+def _as_date(value) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
 
 class ImportStatementUseCase:
     """Import a bank statement with its transaction lines."""
@@ -135,63 +157,50 @@ class AutoMatchUseCase:
         if not statement:
             raise StatementNotFound(f"Statement {statement_id} not found")
 
-        unmatched_lines = (
-            db_session.query(StatementLine)
-            .filter(
+        lines = [
+            MatchLine(
+                id=row.id,
+                reference=row.reference,
+                amount=Decimal(str(row.amount)),
+                transaction_date=row.transaction_date,
+            )
+            for row in db_session.query(
+                StatementLine.id,
+                StatementLine.reference,
+                StatementLine.amount,
+                StatementLine.transaction_date,
+            ).filter(
                 StatementLine.statement_id == statement_id,
                 StatementLine.match_status == "unmatched",
             )
-            .all()
-        )
-
-        matched = 0
-
-        for line in unmatched_lines:
-            # Try match by reference first
-            if line.reference:
-                invoice = db_session.execute(
-                    text(
-                        """
-                        SELECT id, total FROM invoices
-                        WHERE tenant_id = :tenant_id
-                        AND number = :reference
-                        LIMIT 1
-                        """
-                    ),
-                    {"tenant_id": str(tenant_id), "reference": line.reference},
-                ).first()
-
-                if invoice:
-                    line.matched_invoice_id = invoice[0]
-                    line.match_status = "auto_matched"
-                    line.match_confidence = Decimal("95.00")
-                    matched += 1
-                    continue
-
-            # Try match by amount + date proximity (±3 days)
-            invoice = db_session.execute(
-                text(
-                    """
-                    SELECT id, total FROM invoices
-                    WHERE tenant_id = :tenant_id
-                    AND ABS(total - :amount) < 0.01
-                    AND status NOT IN ('cancelled', 'draft', 'paid')
-                    AND ABS(issue_date::date - :txn_date) <= 3
-                    LIMIT 1
-                    """
-                ),
-                {
-                    "tenant_id": str(tenant_id),
-                    "amount": float(line.amount),
-                    "txn_date": line.transaction_date,
-                },
-            ).first()
-
-            if invoice:
-                line.matched_invoice_id = invoice[0]
-                line.match_status = "auto_matched"
-                line.match_confidence = Decimal("75.00")
-                matched += 1
+        ]
+
+        results: list[MatchResult] = []
+        if lines:
+            invoices = self._load_candidate_invoices(tenant_id, lines, db_session)
+            already_matched = {
+                row[0]
+                for row in db_session.query(StatementLine.matched_invoice_id).filter(
+                    StatementLine.tenant_id == tenant_id,
+                    StatementLine.matched_invoice_id.isnot(None),
+                )
+            }
+            results = match_lines(lines, invoices, excluded_invoice_ids=already_matched)
+
+        if results:
+            db_session.execute(
+                update(StatementLine),
+                [
+                    {
+                        "id": result.line_id,
+                        "matched_invoice_id": result.invoice_id,
+                        "match_status": "auto_matched",
+                        "match_confidence": result.confidence,
+                    }
+                    for result in results
+                ],
+            )
+        matched = len(results)
 
         statement.matched_count = (
             db_session.query(StatementLine)
@@ -216,6 +225,38 @@ class AutoMatchUseCase:
         logger.info(f"Auto-match on statement {statement_id}: {matched} new matches")
         return statement
 
+    @staticmethod
+    def _load_candidate_invoices(
+        tenant_id: UUID, lines: list[MatchLine], db_session: Session
+    ) -> list[MatchInvoice]:
+        """Invoices referenced by the lines plus every open invoice, in one query."""
+        references = sorted({line.reference.strip() for line in lines if line.reference})
+        reference_filter = "OR number IN :references" if references else ""
+        stmt = text(
+            f"""
+            SELECT id, number, total, issue_date, status FROM invoices
+            WHERE tenant_id = :tenant_id
+            AND (status NOT IN ('cancelled', 'draft', 'paid') {reference_filter})
+            """
+        )
+        params: dict = {"tenant_id": str(tenant_id)}
+        if references:
+            stmt = stmt.bindparams(bindparam("references", expanding=True))
+            params["references"] = references
+
+        invoices = []
+        for row in db_session.execute(stmt, params):
+            invoices.append(
+                MatchInvoice(
+                    id=row.id if isinstance(row.id, UUID) else UUID(str(row.id)),
+                    number=row.number,
+                    total=Decimal(str(row.total or 0)),
+                    issue_date=_as_date(row.issue_date),
+                    open=row.status not in _CLOSED_INVOICE_STATUSES,
+                )
+            )
+        return invoices
+
 
 class ManualMatchUseCase:
     """Manually link a statement line to an invoice."""
@@ -0,0 +1,138 @@
+"""Set-based auto-matching of statement lines against invoices.
+
+Pure domain logic: the caller loads candidate invoices once and persists the
+returned assignments. Candidates are looked up through in-memory indexes by
+reference (invoice number) and by amount in cents, scored, and then assigned
+globally best-first so no invoice is matched to two lines and ties resolve
+deterministically instead of by whatever ``LIMIT 1`` returned.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from uuid import UUID
+
+REFERENCE_CONFIDENCE = Decimal("95.00")
+AMOUNT_CONFIDENCE = Decimal("75.00")
+DEFAULT_DATE_WINDOW_DAYS = 3
+_AMOUNT_TOLERANCE = Decimal("0.01")
+_CENT = Decimal("0.01")
+
+# Lower tier wins; within a tier smaller date gap, then smaller amount gap.
+_TIER_REFERENCE = 0
+_TIER_AMOUNT = 1
+
+
+@dataclass(frozen=True, slots=True)
+class MatchLine:
+    id: UUID
+    reference: str | None
+    amount: Decimal
+    transaction_date: date
+
+
+@dataclass(frozen=True, slots=True)
+class MatchInvoice:
+    id: UUID
+    number: str | None
+    total: Decimal
+    issue_date: date | None
+    # Only open invoices are eligible for amount matching.
+    open: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class MatchResult:
+    line_id: UUID
+    invoice_id: UUID
+    confidence: Decimal
+
+
+def _norm_reference(value: str | None) -> str:
+    return (value or "").strip().upper()
+
+
+def _cents(amount: Decimal) -> int:
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+class InvoiceIndex:
+    """Candidate invoices indexed by normalized number and by amount in cents."""
+
+    def __init__(self, invoices: list[MatchInvoice]):
+        self.by_reference: dict[str, list[MatchInvoice]] = defaultdict(list)
+        self.by_cents: dict[int, list[MatchInvoice]] = defaultdict(list)
+        for invoice in invoices:
+            reference = _norm_reference(invoice.number)
+            if reference:
+                self.by_reference[reference].append(invoice)
+            if invoice.open and invoice.issue_date is not None:
+                self.by_cents[_cents(invoice.total)].append(invoice)
+
+    def amount_candidates(self, amount: Decimal) -> list[MatchInvoice]:
+        cents = _cents(amount)
+        return [
+            invoice
+            for key in (cents - 1, cents, cents + 1)
+            for invoice in self.by_cents.get(key, ())
+            if abs(invoice.total - amount) < _AMOUNT_TOLERANCE
+        ]
+
+
+def match_lines(
+    lines: list[MatchLine],
+    invoices: list[MatchInvoice],
+    *,
+    date_window_days: int = DEFAULT_DATE_WINDOW_DAYS,
+    excluded_invoice_ids: set[UUID] | None = None,
+) -> list[MatchResult]:
+    """One-to-one assignment of ``lines`` to ``invoices``.
+
+    Reference matches beat amount + date matches; inside each tier the pair
+    with the closest date and amount is assigned first. Invoices in
+    ``excluded_invoice_ids`` (already matched elsewhere) are never used.
+    """
+    excluded = excluded_invoice_ids or set()
+    index = InvoiceIndex([inv for inv in invoices if inv.id not in excluded])
+
+    edges: list[tuple[int, int, Decimal, int, str, MatchLine, MatchInvoice]] = []
+    for position, line in enumerate(lines):
+        reference = _norm_reference(line.reference)
+        reference_hits = index.by_reference.get(reference, ()) if reference else ()
+        for invoice in reference_hits:
+            edges.append(_edge(_TIER_REFERENCE, position, line, invoice))
+        seen = {invoice.id for invoice in reference_hits}
+        for invoice in index.amount_candidates(line.amount):
+            if invoice.id in seen:
+                continue
+            gap = abs((invoice.issue_date - line.transaction_date).days)
+            if gap <= date_window_days:
+                edges.append(_edge(_TIER_AMOUNT, position, line, invoice))
+
+    edges.sort(key=lambda edge: edge[:5])
+    used_lines: set[UUID] = set()
+    used_invoices: set[UUID] = set()
+    results: list[MatchResult] = []
+    for tier, _gap, _diff, _position, _invoice_key, line, invoice in edges:
+        if line.id in used_lines or invoice.id in used_invoices:
+            continue
+        used_lines.add(line.id)
+        used_invoices.add(invoice.id)
+        confidence = REFERENCE_CONFIDENCE if tier == _TIER_REFERENCE else AMOUNT_CONFIDENCE
+        results.append(MatchResult(line.id, invoice.id, confidence))
+    return results
+
+
+def _edge(
+    tier: int, position: int, line: MatchLine, invoice: MatchInvoice
+) -> tuple[int, int, Decimal, int, str, MatchLine, MatchInvoice]:
+    gap = (
+        abs((invoice.issue_date - line.transaction_date).days)
+        if invoice.issue_date is not None
+        else 10**6
+    )
+    diff = abs(invoice.total - line.amount)
+    return (tier, gap, diff, position, str(invoice.id), line, invoice)
@@ -1,11 +1,17 @@
-"""Recalculation Engine — Profit snapshots"""
+"""Recalculation Engine — Profit snapshots
+
+``recalculate_daily`` re-aggregates the whole day. ``apply_orders_delta`` and
+``refresh_expenses`` are the incremental paths used by the outbox poller: sales
+orders already folded into the snapshots carry ``profit_snapshot_at``, so a
+delta only adds the lines of orders that are still pending.
+"""
 
 import logging
-from datetime import date
+from datetime import UTC, date, datetime
 from decimal import Decimal
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 
 from app.models.core.products import Product
@@ -15,6 +21,12 @@ from app.models.sales.order import SalesOrder, SalesOrderItem
 
 logger = logging.getLogger(__name__)
 
+_ZERO = Decimal("0")
+
+
+def _dec(value) -> Decimal:
+    return Decimal(str(value or 0))
+
 
 class RecalculationService:
     """Recalculates profit snapshots from domain data."""
@@ -28,105 +40,32 @@ class RecalculationService:
         target_date: date,
         location_id: UUID | None = None,
     ) -> ProfitSnapshotDaily:
-        """Recalculate profit snapshot for a given day."""
-        # 1. Calculate total sales for the day
-        sales_query = self.db.query(
-            func.count(SalesOrder.id).label("order_count"),
-            func.coalesce(func.sum(SalesOrder.total), 0).label("total_sales"),
-        ).filter(
+        """Recalculate profit snapshot for a given day.
+
+        The snapshot row and then the day's orders are locked (same order as
+        ``apply_orders_delta``); only the locked orders are aggregated and
+        stamped, so an order committed meanwhile stays pending for the next
+        delta instead of being marked applied without being counted.
+        """
+        snapshot = self._get_daily_snapshot(tenant_id, target_date, for_update=True)
+        order_ids = self._lock_orders(
             SalesOrder.tenant_id == tenant_id,
             SalesOrder.order_date == target_date,
         )
-        sales_result = sales_query.first()
-        order_count = sales_result[0] or 0
-        total_sales = Decimal(str(sales_result[1] or 0))
-
-        # 2. Calculate COGS from order items
-        items_query = (
-            self.db.query(
-                func.count(SalesOrderItem.id).label("item_count"),
-                func.coalesce(func.sum(SalesOrderItem.qty), 0).label("total_qty"),
-            )
-            .join(SalesOrder, SalesOrder.id == SalesOrderItem.order_id)
-            .filter(
-                SalesOrder.tenant_id == tenant_id,
-                SalesOrder.order_date == target_date,
-            )
+        if snapshot is None:
+            # A concurrent recalculation may have created it while we waited
+            snapshot = self._get_daily_snapshot(tenant_id, target_date, for_update=True)
+        order_filter = (SalesOrder.id.in_(order_ids),)
+        order_count, total_sales, item_count, product_lines = self._aggregate_orders(
+            tenant_id, order_filter
         )
-        items_result = items_query.first()
-        item_count = items_result[0] or 0
-
-        # Calculate COGS per product
-        total_cogs = Decimal("0")
-        product_snapshots = []
-
-        # Get all order items for the day with product info
-        detail_query = (
-            self.db.query(
-                SalesOrderItem.product_id,
-                func.sum(SalesOrderItem.qty).label("sold_qty"),
-                func.sum(SalesOrderItem.line_total).label("revenue"),
-            )
-            .join(SalesOrder, SalesOrder.id == SalesOrderItem.order_id)
-            .filter(
-                SalesOrder.tenant_id == tenant_id,
-                SalesOrder.order_date == target_date,
-            )
-            .group_by(SalesOrderItem.product_id)
-        )
-
-        for row in detail_query.all():
-            product_id = row[0]
-            sold_qty = Decimal(str(row[1] or 0))
-            revenue = Decimal(str(row[2] or 0))
-
-            # Get unit cost from recipe or product.cost_price
-            unit_cost = self._get_unit_cost(tenant_id, product_id, target_date)
-            cogs = sold_qty * unit_cost
-            total_cogs += cogs
-            gross = revenue - cogs
-            margin = (gross / revenue * 100) if revenue > 0 else Decimal("0")
-
-            product_snapshots.append(
-                {
-                    "product_id": product_id,
-                    "revenue": revenue,
-                    "cogs": cogs,
-                    "gross_profit": gross,
-                    "margin_pct": margin,
-                    "sold_qty": sold_qty,
-                }
-            )
-
-        # 3. Calculate expenses for the day
-        total_expenses = Decimal("0")
-        try:
-            from app.models.expenses.expense import Expense
-
-            exp_result = (
-                self.db.query(func.coalesce(func.sum(Expense.amount), 0))
-                .filter(
-                    Expense.tenant_id == tenant_id,
-                    Expense.date == target_date,
-                )
-                .scalar()
-            )
-            total_expenses = Decimal(str(exp_result or 0))
-        except Exception:
-            logger.debug("Expenses table not available or query failed")
+        total_expenses = self._get_total_expenses(tenant_id, target_date)
+        total_cogs = sum((line["cogs"] for line in product_lines), _ZERO)
 
         gross_profit = total_sales - total_cogs
         net_profit = gross_profit - total_expenses
 
-        # 4. Upsert daily snapshot
-        snapshot = (
-            self.db.query(ProfitSnapshotDaily)
-            .filter(
-                ProfitSnapshotDaily.tenant_id == tenant_id,
-                ProfitSnapshotDaily.date == target_date,
-            )
-            .first()
-        )
+        # Upsert daily snapshot
         if snapshot:
             snapshot.total_sales = total_sales
             snapshot.total_cogs = total_cogs
@@ -150,38 +89,71 @@ class RecalculationService:
             )
             self.db.add(snapshot)
 
-        # 5. Upsert product snapshots
-        for ps_data in product_snapshots:
-            ps = (
-                self.db.query(ProductProfitSnapshot)
-                .filter(
-                    ProductProfitSnapshot.tenant_id == tenant_id,
-                    ProductProfitSnapshot.date == target_date,
-                    ProductProfitSnapshot.product_id == ps_data["product_id"],
-                )
-                .first()
-            )
-            if ps:
-                ps.revenue = ps_data["revenue"]
-                ps.cogs = ps_data["cogs"]
-                ps.gross_profit = ps_data["gross_profit"]
-                ps.margin_pct = ps_data["margin_pct"]
-                ps.sold_qty = ps_data["sold_qty"]
-            else:
-                ps = ProductProfitSnapshot(
-                    tenant_id=tenant_id,
-                    date=target_date,
-                    product_id=ps_data["product_id"],
-                    location_id=location_id,
-                    revenue=ps_data["revenue"],
-                    cogs=ps_data["cogs"],
-                    gross_profit=ps_data["gross_profit"],
-                    margin_pct=ps_data["margin_pct"],
-                    sold_qty=ps_data["sold_qty"],
-                )
-                self.db.add(ps)
-                self.db.flush()
+        self._upsert_product_snapshots(
+            tenant_id, target_date, location_id, product_lines, additive=False
+        )
+        self._mark_orders_applied(*order_filter, SalesOrder.profit_snapshot_at.is_(None))
+        self.db.flush()
+        return snapshot
+
+    def apply_orders_delta(
+        self,
+        tenant_id: UUID,
+        target_date: date,
+        location_id: UUID | None = None,
+    ) -> ProfitSnapshotDaily:
+        """Fold the day's pending sales orders into the existing snapshots.
+
+        Only orders without ``profit_snapshot_at`` are aggregated, so repeated
+        calls are idempotent. The snapshot row is locked before reading the
+        running totals, so concurrent deltas add up instead of overwriting
+        each other. Falls back to ``recalculate_daily`` when the day has no
+        snapshot yet.
+        """
+        snapshot = self._get_daily_snapshot(tenant_id, target_date, for_update=True)
+        if snapshot is None:
+            return self.recalculate_daily(tenant_id, target_date, location_id)
+
+        order_ids = self._lock_orders(
+            SalesOrder.tenant_id == tenant_id,
+            SalesOrder.order_date == target_date,
+            SalesOrder.profit_snapshot_at.is_(None),
+        )
+        if not order_ids:
+            return snapshot
+
+        order_filter = (SalesOrder.id.in_(order_ids),)
+        order_count, sales, item_count, product_lines = self._aggregate_orders(
+            tenant_id, order_filter
+        )
+        cogs = sum((line["cogs"] for line in product_lines), _ZERO)
+
+        snapshot.total_sales = _dec(snapshot.total_sales) + sales
+        snapshot.total_cogs = _dec(snapshot.total_cogs) + cogs
+        snapshot.gross_profit = snapshot.total_sales - snapshot.total_cogs
+        snapshot.net_profit = snapshot.gross_profit - _dec(snapshot.total_expenses)
+        snapshot.order_count = (snapshot.order_count or 0) + order_count
+        snapshot.item_count = (snapshot.item_count or 0) + item_count
 
+        self._upsert_product_snapshots(
+            tenant_id, target_date, location_id, product_lines, additive=True
+        )
+        self._mark_orders_applied(*order_filter)
+        self.db.flush()
+        return snapshot
+
+    def refresh_expenses(
+        self,
+        tenant_id: UUID,
+        target_date: date,
+        location_id: UUID | None = None,
+    ) -> ProfitSnapshotDaily:
+        """Re-read the day's expenses without touching the sales aggregates."""
+        snapshot = self._get_daily_snapshot(tenant_id, target_date, for_update=True)
+        if snapshot is None:
+            return self.recalculate_daily(tenant_id, target_date, location_id)
+        snapshot.total_expenses = self._get_total_expenses(tenant_id, target_date)
+        snapshot.net_profit = _dec(snapshot.gross_profit) - snapshot.total_expenses
         self.db.flush()
         return snapshot
 
@@ -204,31 +176,202 @@ class RecalculationService:
         self.db.flush()
         return results
 
-    def _get_unit_cost(self, tenant_id: UUID, product_id: UUID, target_date: date) -> Decimal:
-        """Get unit cost from recipe (active, versioned) or product.cost_price."""
-        # Try recipe first
+    def _get_daily_snapshot(
+        self, tenant_id: UUID, target_date: date, *, for_update: bool = False
+    ) -> ProfitSnapshotDaily | None:
+        query = self.db.query(ProfitSnapshotDaily).filter(
+            ProfitSnapshotDaily.tenant_id == tenant_id,
+            ProfitSnapshotDaily.date == target_date,
+        )
+        if for_update:
+            # populate_existing: re-read the totals even if the row is cached
+            query = query.with_for_update().populate_existing()
+        return query.first()
+
+    def _lock_orders(self, *criteria) -> list[UUID]:
+        """IDs of the matching sales orders, locked until the transaction ends."""
+        return [
+            row[0]
+            for row in self.db.query(SalesOrder.id)
+            .filter(*criteria)
+            .order_by(SalesOrder.id)
+            .with_for_update()
+            .all()
+        ]
+
+    def _aggregate_orders(
+        self, tenant_id: UUID, order_filter: tuple
+    ) -> tuple[int, Decimal, int, list[dict]]:
+        """Order count, sales total, item count and per-product lines for the filter."""
+        sales_result = (
+            self.db.query(
+                func.count(SalesOrder.id).label("order_count"),
+                func.coalesce(func.sum(SalesOrder.total), 0).label("total_sales"),
+            )
+            .filter(*order_filter)
+            .first()
+        )
+        order_count = sales_result[0] or 0
+        total_sales = _dec(sales_result[1])
+
+        detail_rows = (
+            self.db.query(
+                SalesOrderItem.product_id,
+                func.count(SalesOrderItem.id).label("item_count"),
+                func.sum(SalesOrderItem.qty).label("sold_qty"),
+                func.sum(SalesOrderItem.line_total).label("revenue"),
+            )
+            .join(SalesOrder, SalesOrder.id == SalesOrderItem.order_id)
+            .filter(*order_filter)
+            .group_by(SalesOrderItem.product_id)
+            .all()
+        )
+        item_count = sum(int(row[1] or 0) for row in detail_rows)
+
+        unit_costs = self._get_unit_costs(
+            tenant_id, [row[0] for row in detail_rows if row[0] is not None]
+        )
+        product_lines = []
+        for row in detail_rows:
+            product_id = row[0]
+            sold_qty = _dec(row[2])
+            revenue = _dec(row[3])
+            cogs = sold_qty * unit_costs.get(product_id, _ZERO)
+            product_lines.append(
+                {
+                    "product_id": product_id,
+                    "revenue": revenue,
+                    "cogs": cogs,
+                    "sold_qty": sold_qty,
+                }
+            )
+        return order_count, total_sales, item_count, product_lines
+
+    def _upsert_product_snapshots(
+        self,
+        tenant_id: UUID,
+        target_date: date,
+        location_id: UUID | None,
+        product_lines: list[dict],
+        *,
+        additive: bool,
+    ) -> None:
+        """Write product snapshots with one SELECT and one flush for the whole day.
+
+        ``location_id`` is nullable and part of the unique key, so Postgres'
+        ``ON CONFLICT`` would never match the NULL rows; existing snapshots are
+        loaded in bulk and updated in place instead.
+        """
+        lines = [line for line in product_lines if line["product_id"] is not None]
+        if not lines:
+            return
+        existing = {
+            ps.product_id: ps
+            for ps in self.db.query(ProductProfitSnapshot)
+            .filter(
+                ProductProfitSnapshot.tenant_id == tenant_id,
+                ProductProfitSnapshot.date == target_date,
+                ProductProfitSnapshot.product_id.in_([line["product_id"] for line in lines]),
+            )
+            .all()
+        }
+        new_rows = []
+        for line in lines:
+            revenue, cogs, sold_qty = line["revenue"], line["cogs"], line["sold_qty"]
+            ps = existing.get(line["product_id"])
+            if ps is not None and additive:
+                revenue += _dec(ps.revenue)
+                cogs += _dec(ps.cogs)
+                sold_qty += _dec(ps.sold_qty)
+            gross = revenue - cogs
+            margin = (gross / revenue * 100) if revenue > 0 else _ZERO
+            if ps is None:
+                new_rows.append(
+                    ProductProfitSnapshot(
+                        tenant_id=tenant_id,
+                        date=target_date,
+                        product_id=line["product_id"],
+                        location_id=location_id,
+                        revenue=revenue,
+                        cogs=cogs,
+                        gross_profit=gross,
+                        margin_pct=margin,
+                        sold_qty=sold_qty,
+                    )
+                )
+                continue
+            ps.revenue = revenue
+            ps.cogs = cogs
+            ps.gross_profit = gross
+            ps.margin_pct = margin
+            ps.sold_qty = sold_qty
+        if new_rows:
+            self.db.add_all(new_rows)
+        self.db.flush()
+
+    def _mark_orders_applied(self, *criteria) -> None:
+        """Stamp ``profit_snapshot_at`` without bumping ``updated_at``."""
+        self.db.execute(
+            update(SalesOrder)
+            .where(*criteria)
+            .values(profit_snapshot_at=datetime.now(UTC), updated_at=SalesOrder.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _get_total_expenses(self, tenant_id: UUID, target_date: date) -> Decimal:
         try:
-            recipe = (
-                self.db.query(Recipe)
+            from app.models.expenses.expense import Expense
+
+            exp_result = (
+                self.db.query(func.coalesce(func.sum(Expense.amount), 0))
+                .filter(
+                    Expense.tenant_id == tenant_id,
+                    Expense.date == target_date,
+                )
+                .scalar()
+            )
+            return _dec(exp_result)
+        except Exception:
+            logger.debug("Expenses table not available or query failed")
+            return _ZERO
+
+    def _get_unit_costs(self, tenant_id: UUID, product_ids: list[UUID]) -> dict[UUID, Decimal]:
+        """Unit cost per product: active recipe cost, else ``product.cost_price``.
+
+        One query per source regardless of how many products were sold.
+        """
+        if not product_ids:
+            return {}
+        product_ids = list(dict.fromkeys(product_ids))
+        costs: dict[UUID, Decimal] = {}
+        try:
+            recipe_rows = (
+                self.db.query(Recipe.product_id, Recipe.unit_cost)
                 .filter(
                     Recipe.tenant_id == tenant_id,
-                    Recipe.product_id == product_id,
+                    Recipe.product_id.in_(product_ids),
                     Recipe.is_active.is_(True),
                 )
-                .first()
+                .all()
             )
-            if recipe and recipe.unit_cost:
-                return Decimal(str(recipe.unit_cost))
+            for product_id, unit_cost in recipe_rows:
+                if unit_cost and product_id not in costs:
+                    costs[product_id] = _dec(unit_cost)
         except Exception:
             logger.debug("Recipe query failed (e.g. UUID type mismatch on SQLite)")
 
-        # Fallback to product.cost_price
-        product = (
-            self.db.query(Product)
-            .filter(Product.id == product_id, Product.tenant_id == tenant_id)
-            .first()
-        )
-        if product and product.cost_price:
-            return Decimal(str(product.cost_price))
+        missing = [pid for pid in product_ids if pid not in costs]
+        if missing:
+            product_rows = (
+                self.db.query(Product.id, Product.cost_price)
+                .filter(Product.id.in_(missing), Product.tenant_id == tenant_id)
+                .all()
+            )
+            for product_id, cost_price in product_rows:
+                if cost_price:
+                    costs[product_id] = _dec(cost_price)
+        return costs
 
-        return Decimal("0")
+    def _get_unit_cost(self, tenant_id: UUID, product_id: UUID, target_date: date) -> Decimal:
+        """Get unit cost from recipe (active, versioned) or product.cost_price."""
+        return self._get_unit_costs(tenant_id, [product_id]).get(product_id, _ZERO)
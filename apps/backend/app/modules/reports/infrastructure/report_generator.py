@@ -250,51 +250,30 @@ class ReportExporter:
 
     @staticmethod
     def to_excel(data: ReportData) -> bytes:
-        """Export to Excel"""
+        """Export to Excel (openpyxl write-only, volcado a fichero temporal)"""
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font
+            from app.modules.export.application.streaming import write_xlsx
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Report"
+            # Anchos calculados en una pasada: el modo write-only no permite
+            # releer las celdas después de escribirlas.
+            widths = [len(str(header)) for header in data.columns]
+            for row in data.rows:
+                for idx, value in enumerate(row[: len(widths)]):
+                    widths[idx] = max(widths[idx], len(str(value)))
 
-            # Write header
-            for col_idx, header in enumerate(data.columns, start=1):
-                cell = ws.cell(row=1, column=col_idx, value=header)
-                cell.font = Font(bold=True)
-
-            # Write data
-            for row_idx, row in enumerate(data.rows, start=2):
-                for col_idx, value in enumerate(row, start=1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
-
-            # Write summary
+            footer = []
             if data.summary:
-                summary_row = len(data.rows) + 3
-                ws.cell(row=summary_row, column=1, value="RESUMEN")
-                for idx, (key, value) in enumerate(data.summary.items()):
-                    ws.cell(row=summary_row + idx + 1, column=1, value=key)
-                    ws.cell(row=summary_row + idx + 1, column=2, value=value)
-
-            # Auto-adjust columns
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except Exception:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Save to bytes
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            return output.getvalue()
+                footer.append(["RESUMEN"])
+                footer.extend([key, value] for key, value in data.summary.items())
+
+            fh, _ = write_xlsx(
+                data.rows,
+                data.columns,
+                widths=[min(w + 2, 50) for w in widths],
+                footer=footer,
+            )
+            with fh:
+                return fh.read()
 
         except ImportError:
             logger.error("openpyxl not installed. Install with: pip install openpyxl")
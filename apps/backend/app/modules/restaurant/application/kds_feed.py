@@ -0,0 +1,316 @@
+"""
+Feed push del KDS (pantallas de cocina): tablero inicial + deltas por ítem.
+
+Cada pantalla sondeaba ``GET /restaurant/kds/orders`` cada pocos segundos y
+cada sondeo repetía el join comandas × mesas × ítems. Ahora abren
+``GET /restaurant/kds/stream`` (SSE): reciben el tablero una vez
+(``event: snapshot``) y después los cambios (``event: delta``) que publican
+los endpoints de comandas y del KDS tras confirmar la transacción.
+
+- Cada cambio lleva un ``seq`` por tenant, que es el ``id:`` del evento SSE.
+  Al reconectar, ``Last-Event-ID`` (o ``?since=``) reenvía solo lo perdido
+  desde un log acotado; si el hueco ya no está en el log, nuevo snapshot.
+- La entrega va por ``app.core.pubsub_hub`` (una conexión pub/sub por proceso).
+- Sin Redis (dev, tests) la secuencia y el log viven en el propio proceso.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Session
+
+from app.core.pubsub_hub import MessagesLost, hub
+
+logger = logging.getLogger(__name__)
+
+KDS_STATUSES = ("pending", "preparing", "ready")
+KDS_LOG_SIZE = 500
+KDS_LOG_TTL_SECONDS = 6 * 3600
+KEEPALIVE_SECONDS = 15.0
+
+_local_lock = threading.Lock()
+_local_seq: dict[str, int] = {}
+_local_log: dict[str, deque[tuple[int, str]]] = {}
+
+
+def kds_channel(tenant_id: UUID | str) -> str:
+    return f"kds:{tenant_id}"
+
+
+def _seq_key(tenant_id: str) -> str:
+    return f"kds:{tenant_id}:seq"
+
+
+def _log_key(tenant_id: str) -> str:
+    return f"kds:{tenant_id}:log"
+
+
+# ---------------------------------------------------------------------------
+# Tablero
+# ---------------------------------------------------------------------------
+
+
+def _iso(value) -> str | None:
+    return value.isoformat() if value else None
+
+
+def serialize_order_header(row) -> dict[str, Any]:
+    """Cabecera de comanda: ``(id, order_number, table_id, table_number, table_name, opened_at, created_at)``."""
+    return {
+        "order_id": str(row[0]),
+        "order_number": row[1],
+        "table_id": str(row[2]) if row[2] is not None else None,
+        "table_number": row[3],
+        "table_name": row[4],
+        "opened_at": _iso(row[5]),
+        "created_at": _iso(row[6]),
+    }
+
+
+def serialize_item(item_id, product_name, qty, notes, status, created_at) -> dict[str, Any]:
+    return {
+        "id": str(item_id),
+        "product_name": product_name,
+        "qty": float(qty) if qty is not None else 0,
+        "notes": notes,
+        "status": status,
+        "created_at": _iso(created_at),
+    }
+
+
+def load_kds_board(db: Session, tenant_id: UUID | str) -> list[dict[str, Any]]:
+    """Comandas abiertas con ítems pending/preparing/ready, agrupadas por comanda."""
+    rows = db.execute(
+        text(
+            "SELECT o.id, o.order_number, o.table_id, t.number, t.name, "
+            "o.opened_at, o.created_at, "
+            "i.id, i.product_name, i.qty, i.notes, i.status, i.created_at "
+            "FROM restaurant_orders o "
+            "JOIN restaurant_tables t ON t.id = o.table_id "
+            "JOIN restaurant_order_items i ON i.order_id = o.id "
+            "WHERE o.tenant_id = :tid "
+            "AND i.status IN ('pending','preparing','ready') "
+            "AND o.status NOT IN ('paid','canceled') "
+            "ORDER BY o.created_at ASC, i.created_at ASC"
+        ).bindparams(bindparam("tid", type_=PGUUID(as_uuid=True))),
+        {"tid": str(tenant_id)},
+    ).fetchall()
+
+    grouped: dict[str, dict[str, Any]] = {}
+    for r in rows:
+        oid = str(r[0])
+        if oid not in grouped:
+            grouped[oid] = {**serialize_order_header(r[:7]), "items": []}
+        grouped[oid]["items"].append(serialize_item(*r[7:13]))
+    return list(grouped.values())
+
+
+def _load_board_snapshot(tenant_id: str) -> list[dict[str, Any]]:
+    """Tablero con sesión propia (el stream no retiene una conexión de la request)."""
+    from app.config.database import SessionLocal
+    from app.db.rls import set_tenant_guc
+
+    with SessionLocal() as db:
+        set_tenant_guc(db, tenant_id)
+        return load_kds_board(db, tenant_id)
+
+
+# ---------------------------------------------------------------------------
+# Deltas
+# ---------------------------------------------------------------------------
+
+
+def item_added_delta(order: dict[str, Any], item: dict[str, Any]) -> dict[str, Any]:
+    return {"op": "item_added", "order": order, "item": item}
+
+
+def item_updated_delta(order_id, item_id, changes: dict[str, Any]) -> dict[str, Any]:
+    return {"op": "item_updated", "order_id": str(order_id), "item_id": str(item_id), **changes}
+
+
+def item_removed_delta(order_id, item_id) -> dict[str, Any]:
+    return {"op": "item_removed", "order_id": str(order_id), "item_id": str(item_id)}
+
+
+def items_status_delta(order_id, item_ids, status: str) -> dict[str, Any]:
+    return {
+        "op": "items_status",
+        "order_id": str(order_id),
+        "item_ids": [str(i) for i in item_ids],
+        "status": status,
+    }
+
+
+def publish_kds_changes(tenant_id: UUID | str, deltas: list[dict[str, Any]]) -> None:
+    """Numera, guarda en el log y publica los deltas de un tenant.
+
+    Llamar después del ``commit``. Best-effort: un fallo solo se registra (las
+    pantallas se resincronizan al detectar el hueco de secuencia).
+    """
+    if not deltas:
+        return
+    from app.core.cache import get_sync_redis_client
+
+    tid = str(tenant_id)
+    channel = kds_channel(tid)
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            last = client.incrby(_seq_key(tid), len(deltas))
+            messages = _number(deltas, last - len(deltas) + 1)
+            pipe = client.pipeline(transaction=False)
+            pipe.zadd(_log_key(tid), {data: seq for seq, data in messages})
+            pipe.zremrangebyrank(_log_key(tid), 0, -KDS_LOG_SIZE - 1)
+            pipe.expire(_log_key(tid), KDS_LOG_TTL_SECONDS)
+            for _, data in messages:
+                pipe.publish(channel, data)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"KDS publish tenant={tid} vía Redis falló: {e}; entrega local")
+
+    with _local_lock:
+        first = _local_seq.get(tid, 0) + 1
+        messages = _number(deltas, first)
+        _local_seq[tid] = first + len(deltas) - 1
+        _local_log.setdefault(tid, deque(maxlen=KDS_LOG_SIZE)).extend(messages)
+    for _, data in messages:
+        hub.dispatch_threadsafe(channel, data)
+
+
+def _number(deltas: list[dict[str, Any]], first: int) -> list[tuple[int, str]]:
+    return [
+        (first + n, json.dumps({**delta, "seq": first + n}, default=str))
+        for n, delta in enumerate(deltas)
+    ]
+
+
+def current_seq(tenant_id: UUID | str) -> int:
+    """Último ``seq`` publicado para el tenant (0 si no hubo cambios)."""
+    from app.core.cache import get_sync_redis_client
+
+    tid = str(tenant_id)
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            return int(client.get(_seq_key(tid)) or 0)
+        except Exception as e:
+            logger.debug(f"KDS seq tenant={tid} no disponible: {e}")
+    with _local_lock:
+        return _local_seq.get(tid, 0)
+
+
+def changes_since(tenant_id: UUID | str, seq: int) -> list[str] | None:
+    """Deltas publicados después de ``seq`` o ``None`` si ya no se pueden reenviar.
+
+    ``None`` (hueco fuera del log, secuencia reiniciada o Redis caído) obliga a
+    mandar un snapshot completo.
+    """
+    from app.core.cache import get_sync_redis_client
+
+    tid = str(tenant_id)
+    client = get_sync_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.get(_seq_key(tid))
+            pipe.zrangebyscore(_log_key(tid), f"({seq}", "+inf", withscores=True)
+            current, rows = pipe.execute()
+        except Exception as e:
+            logger.debug(f"KDS log tenant={tid} no disponible: {e}")
+            return None
+        current = int(current or 0)
+        entries = [(int(score), data) for data, score in rows]
+    else:
+        with _local_lock:
+            current = _local_seq.get(tid, 0)
+            entries = [(s, data) for s, data in _local_log.get(tid, ()) if s > seq]
+
+    if seq > current:
+        return None
+    if seq == current:
+        return []
+    if not entries or entries[0][0] != seq + 1:
+        return None
+    return [data for _, data in entries]
+
+
+# ---------------------------------------------------------------------------
+# Stream SSE
+# ---------------------------------------------------------------------------
+
+
+def _sse(event: str, data: str, seq: int) -> str:
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+
+
+def _seq_of(data: str) -> int | None:
+    try:
+        return int(json.loads(data)["seq"])
+    except Exception:
+        return None
+
+
+async def _resync(tenant_id: str, last_seq: int | None) -> tuple[list[str], int]:
+    """Eventos para ponerse al día desde ``last_seq``: reenvío del log o snapshot."""
+    if last_seq is not None:
+        missed = await asyncio.to_thread(changes_since, tenant_id, last_seq)
+        if missed is not None:
+            events = [_sse("delta", data, _seq_of(data) or last_seq) for data in missed]
+            if missed:
+                last_seq = _seq_of(missed[-1]) or last_seq
+            return events, last_seq
+    seq = await asyncio.to_thread(current_seq, tenant_id)
+    board = await asyncio.to_thread(_load_board_snapshot, tenant_id)
+    data = json.dumps({"seq": seq, "orders": board}, default=str)
+    return [_sse("snapshot", data, seq)], seq
+
+
+async def kds_event_stream(
+    tenant_id: UUID | str,
+    last_seq: int | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncIterator[str]:
+    """Eventos SSE del KDS de un tenant: snapshot (o reenvío) y después deltas."""
+    tid = str(tenant_id)
+    async with hub.subscription(kds_channel(tid)) as sub:
+        # Suscrito antes de leer el tablero: lo publicado entre medias llega
+        # por la cola y se descarta por seq si el snapshot ya lo incluía.
+        events, last_seq = await _resync(tid, last_seq)
+        for event in events:
+            yield event
+
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                return
+            try:
+                data = await sub.get(timeout=KEEPALIVE_SECONDS)
+            except MessagesLost:
+                events, last_seq = await _resync(tid, last_seq)
+                for event in events:
+                    yield event
+                continue
+            if data is None:
+                yield ": keep-alive\n\n"
+                continue
+            seq = _seq_of(data)
+            if seq is None or seq <= last_seq:
+                continue
+            if seq > last_seq + 1:
+                # Publicaciones concurrentes llegadas fuera de orden: rellenar desde el log
+                events, last_seq = await _resync(tid, last_seq)
+                for event in events:
+                    yield event
+                continue
+            last_seq = seq
+            yield _sse("delta", data, seq)
@@ -8,6 +8,7 @@ from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import bindparam, text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
@@ -18,6 +19,17 @@ from app.core.access_guard import with_access_claims
 from app.core.authz import require_permission, require_scope
 from app.core.permissions import PERM_RESTAURANT_KDS_MANAGE, PERM_RESTAURANT_KDS_VIEW
 from app.db.rls import ensure_guc_from_request, ensure_rls
+from app.modules.restaurant.application.kds_feed import (
+    item_added_delta,
+    item_removed_delta,
+    item_updated_delta,
+    items_status_delta,
+    kds_event_stream,
+    load_kds_board,
+    publish_kds_changes,
+    serialize_item,
+    serialize_order_header,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +43,17 @@ router = APIRouter(
     ],
 )
 
+# Streams SSE: sin ``ensure_rls`` para no retener una sesión de BD mientras la
+# conexión sigue abierta (el snapshot abre la suya).
+stream_router = APIRouter(
+    prefix="/restaurant",
+    tags=["Restaurant"],
+    dependencies=[
+        Depends(with_access_claims),
+        Depends(require_scope("tenant")),
+    ],
+)
+
 
 def _get_tenant_id(request: Request) -> UUID:
     claims = getattr(request.state, "access_claims", {}) or {}
@@ -457,10 +480,15 @@ def add_order_item(
     ensure_guc_from_request(request, db, persist=True)
     tenant_id = _get_tenant_id(request)
 
+    # Cabecera de mesa incluida para el delta del KDS
     order = db.execute(
-        text("SELECT id, status FROM restaurant_orders WHERE id = :oid").bindparams(
-            bindparam("oid", type_=PGUUID(as_uuid=True))
-        ),
+        text(
+            "SELECT o.id, o.status, o.order_number, o.table_id, t.number, t.name, "
+            "o.opened_at, o.created_at "
+            "FROM restaurant_orders o "
+            "LEFT JOIN restaurant_tables t ON t.id = o.table_id "
+            "WHERE o.id = :oid"
+        ).bindparams(bindparam("oid", type_=PGUUID(as_uuid=True))),
         {"oid": order_id},
     ).first()
     if not order:
@@ -510,6 +538,18 @@ def add_order_item(
     _recalculate_order_totals(db, order_id)
     db.commit()
 
+    publish_kds_changes(
+        tenant_id,
+        [
+            item_added_delta(
+                serialize_order_header((order[0], *order[2:8])),
+                serialize_item(
+                    row[0], payload.product_name, payload.qty, payload.notes, "pending", row[1]
+                ),
+            )
+        ],
+    )
+
     return {
         "id": str(row[0]),
         "order_id": order_id,
@@ -530,6 +570,7 @@ def update_order_item(
 ):
     """Actualiza un ítem de la comanda (qty, notes, status)."""
     ensure_guc_from_request(request, db, persist=True)
+    tenant_id = _get_tenant_id(request)
 
     item = db.execute(
         text(
@@ -572,6 +613,9 @@ def update_order_item(
     _recalculate_order_totals(db, order_id)
     db.commit()
 
+    changes = {k: params[k] for k in ("qty", "notes", "status") if k in params}
+    publish_kds_changes(tenant_id, [item_updated_delta(order_id, item_id, changes)])
+
     return {"id": item_id, "order_id": order_id, "status": "updated"}
 
 
@@ -579,6 +623,7 @@ def update_order_item(
 def remove_order_item(order_id: str, item_id: str, request: Request, db: Session = Depends(get_db)):
     """Elimina un ítem de la comanda."""
     ensure_guc_from_request(request, db, persist=True)
+    tenant_id = _get_tenant_id(request)
 
     item = db.execute(
         text(
@@ -602,6 +647,8 @@ def remove_order_item(order_id: str, item_id: str, request: Request, db: Session
     _recalculate_order_totals(db, order_id)
     db.commit()
 
+    publish_kds_changes(tenant_id, [item_removed_delta(order_id, item_id)])
+
     return {"id": item_id, "order_id": order_id, "status": "removed"}
 
 
@@ -609,6 +656,7 @@ def remove_order_item(order_id: str, item_id: str, request: Request, db: Session
 def send_to_kitchen(order_id: str, request: Request, db: Session = Depends(get_db)):
     """Envía los ítems pendientes a cocina (status → 'preparing')."""
     ensure_guc_from_request(request, db, persist=True)
+    tenant_id = _get_tenant_id(request)
 
     order = db.execute(
         text("SELECT id, status FROM restaurant_orders WHERE id = :oid").bindparams(
@@ -623,14 +671,15 @@ def send_to_kitchen(order_id: str, request: Request, db: Session = Depends(get_d
 
     now = datetime.now(UTC)
 
-    result = db.execute(
+    sent = db.execute(
         text(
             "UPDATE restaurant_order_items "
             "SET status = 'preparing', sent_to_kitchen_at = :now "
-            "WHERE order_id = :oid AND status = 'pending'"
+            "WHERE order_id = :oid AND status = 'pending' "
+            "RETURNING id"
         ).bindparams(bindparam("oid", type_=PGUUID(as_uuid=True))),
         {"oid": order_id, "now": now},
-    )
+    ).fetchall()
 
     # Update order status to preparing
     db.execute(
@@ -642,7 +691,11 @@ def send_to_kitchen(order_id: str, request: Request, db: Session = Depends(get_d
 
     db.commit()
 
-    return {"order_id": order_id, "items_sent": result.rowcount}
+    item_ids = [r[0] for r in sent]
+    if item_ids:
+        publish_kds_changes(tenant_id, [items_status_delta(order_id, item_ids, "preparing")])
+
+    return {"order_id": order_id, "items_sent": len(item_ids)}
 
 
 @router.post("/orders/{order_id}/close", response_model=dict[str, Any])
@@ -734,51 +787,11 @@ def kds_list_orders(request: Request, db: Session = Depends(get_db)):
     Permiso: restaurant.kds.view
     """
     ensure_guc_from_request(request, db, persist=True)
-
-    rows = db.execute(
-        text(
-            "SELECT o.id, o.order_number, o.table_id, t.number, t.name, "
-            "o.opened_at, o.created_at, "
-            "i.id, i.product_name, i.qty, i.notes, i.status, i.created_at "
-            "FROM restaurant_orders o "
-            "JOIN restaurant_tables t ON t.id = o.table_id "
-            "JOIN restaurant_order_items i ON i.order_id = o.id "
-            "WHERE i.status IN ('pending','preparing','ready') "
-            "AND o.status NOT IN ('paid','canceled') "
-            "ORDER BY o.created_at ASC, i.created_at ASC"
-        ),
-    ).fetchall()
-
-    grouped: dict[str, dict[str, Any]] = {}
-    for r in rows:
-        oid = str(r[0])
-        if oid not in grouped:
-            grouped[oid] = {
-                "order_id": oid,
-                "order_number": r[1],
-                "table_id": str(r[2]),
-                "table_number": r[3],
-                "table_name": r[4],
-                "opened_at": r[5].isoformat() if r[5] else None,
-                "created_at": r[6].isoformat() if r[6] else None,
-                "items": [],
-            }
-        grouped[oid]["items"].append(
-            {
-                "id": str(r[7]),
-                "product_name": r[8],
-                "qty": float(r[9]) if r[9] is not None else 0,
-                "notes": r[10],
-                "status": r[11],
-                "created_at": r[12].isoformat() if r[12] else None,
-            }
-        )
-
-    return list(grouped.values())
+    return load_kds_board(db, _get_tenant_id(request))
 
 
 def _kds_set_item_status(
-    db: Session, item_id: str, *, new_status: str, ready: bool = False
+    db: Session, tenant_id: UUID, item_id: str, *, new_status: str, ready: bool = False
 ) -> dict[str, Any]:
     item = db.execute(
         text("SELECT id, order_id, status FROM restaurant_order_items WHERE id = :iid").bindparams(
@@ -805,6 +818,7 @@ def _kds_set_item_status(
             {"iid": item_id, "st": new_status},
         )
     db.commit()
+    publish_kds_changes(tenant_id, [items_status_delta(item[1], [item_id], new_status)])
     return {"id": item_id, "order_id": str(item[1]), "status": new_status}
 
 
@@ -816,7 +830,9 @@ def _kds_set_item_status(
 def kds_mark_ready(item_id: str, request: Request, db: Session = Depends(get_db)):
     """Marca un ítem como listo (ready). Permiso: restaurant.kds.manage"""
     ensure_guc_from_request(request, db, persist=True)
-    return _kds_set_item_status(db, item_id, new_status="ready", ready=True)
+    return _kds_set_item_status(
+        db, _get_tenant_id(request), item_id, new_status="ready", ready=True
+    )
 
 
 @router.post(
@@ -827,7 +843,34 @@ def kds_mark_ready(item_id: str, request: Request, db: Session = Depends(get_db)
 def kds_mark_served(item_id: str, request: Request, db: Session = Depends(get_db)):
     """Marca un ítem como servido. Permiso: restaurant.kds.manage"""
     ensure_guc_from_request(request, db, persist=True)
-    return _kds_set_item_status(db, item_id, new_status="served")
+    return _kds_set_item_status(db, _get_tenant_id(request), item_id, new_status="served")
+
+
+@stream_router.get(
+    "/kds/stream",
+    dependencies=[Depends(require_permission(PERM_RESTAURANT_KDS_VIEW))],
+)
+async def kds_stream(request: Request, since: int | None = Query(default=None, ge=0)):
+    """Feed SSE del KDS: ``snapshot`` del tablero y después ``delta`` por ítem.
+
+    Cada evento lleva ``id: <seq>``; al reconectar, ``Last-Event-ID`` (o
+    ``?since=``) reenvía solo los cambios perdidos. Permiso: restaurant.kds.view
+    """
+    tenant_id = _get_tenant_id(request)
+    last_seq = since
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.strip().isdigit():
+        last_seq = int(last_event_id)
+
+    return StreamingResponse(
+        kds_event_stream(tenant_id, last_seq, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
 
 
 # ===========================================================================
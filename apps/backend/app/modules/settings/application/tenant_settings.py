@@ -0,0 +1,283 @@
+"""
+Snapshot de configuración del tenant por request.
+
+Un checkout POS consultaba la configuración muchas veces: moneda, método de
+costeo, IVA por defecto e impuestos activos (un ``SettingsRepo`` por helper)
+y los feature flags (``tenants.config_json``) en cada ``require_flag``.
+``TenantSettingsContext`` reúne en una sola consulta la fila del tenant,
+``company_settings`` y ``tenant_accounting_settings``; se memoiza en
+``request.state`` y se cachea por proceso (L1, TTL corto) con la generación del
+dominio ``tenant_settings``, que se incrementa al confirmar escrituras en esas
+tablas.
+
+No confundir con ``app.core.tenant_context.TenantContext`` (identidad de la
+request: tenant, usuario y scope).
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.core.cache import CacheTTL, cache_get_or_load_sync, invalidate_on_commit
+from app.models.accounting.pos_settings import TenantAccountingSettings
+from app.models.company.company import Currency
+from app.models.company.company_settings import CompanySettings
+from app.models.tenant import Tenant
+
+if TYPE_CHECKING:
+    from app.modules.feature_flags.service import ResolvedFlags
+
+TENANT_SETTINGS_CACHE_DOMAIN = "tenant_settings"
+COSTING_METHODS = frozenset({"avg", "fifo", "lifo"})
+DOCUMENTS_MODE_ASYNC = "async"
+DOCUMENTS_MODE_SYNC = "sync"
+
+_REQUEST_STATE_ATTR = "tenant_settings"
+_ACCOUNT_COLUMNS = tuple(
+    column
+    for column in TenantAccountingSettings.__table__.columns
+    if column.name.endswith("_account_id")
+)
+
+invalidate_on_commit(CompanySettings, TENANT_SETTINGS_CACHE_DOMAIN)
+invalidate_on_commit(TenantAccountingSettings, TENANT_SETTINGS_CACHE_DOMAIN)
+invalidate_on_commit(Tenant, TENANT_SETTINGS_CACHE_DOMAIN, tenant_attr="id")
+
+
+# ---------------------------------------------------------------------------
+# Lectura de la configuración (compartida con los helpers de POS)
+# ---------------------------------------------------------------------------
+
+
+def _to_bool(val) -> bool | None:
+    if isinstance(val, bool):
+        return val
+    if isinstance(val, int | float):
+        return bool(int(val))
+    if isinstance(val, str):
+        v = val.strip().lower()
+        if v in ("true", "1", "yes", "on"):
+            return True
+        if v in ("false", "0", "no", "off"):
+            return False
+    return None
+
+
+def _tax_section(cfg) -> dict:
+    if not isinstance(cfg, dict):
+        return {}
+    tax = cfg.get("tax")
+    return tax if isinstance(tax, dict) else {}
+
+
+def parse_costing_method(inventory_cfg, pos_cfg) -> str:
+    """Método de costeo de inventario/POS (``avg`` si falta o no es válido)."""
+    candidate = None
+    if isinstance(inventory_cfg, dict):
+        candidate = inventory_cfg.get("costing_method")
+    if candidate is None and isinstance(pos_cfg, dict):
+        candidate = (pos_cfg.get("inventory") or {}).get("costing_method")
+    method = str(candidate or "avg").strip().lower()
+    return method if method in COSTING_METHODS else "avg"
+
+
+def parse_default_tax_rate(pos_cfg, fiscal_cfg) -> float | None:
+    """Tasa de IVA por defecto como fracción (``12`` → ``0.12``)."""
+    dr = _tax_section(pos_cfg).get("default_rate")
+    if dr is None:
+        dr = _tax_section(fiscal_cfg).get("default_rate")
+    if dr is None:
+        return None
+    try:
+        drf = float(dr)
+    except (TypeError, ValueError):
+        return None
+    if drf < 0:
+        drf = 0.0
+    if drf > 1:
+        drf = drf / 100.0
+    return drf
+
+
+def parse_tax_enabled(pos_cfg, fiscal_cfg) -> bool:
+    """Impuestos activos; ``pos.tax.enabled`` manda sobre ``fiscal.tax.enabled``."""
+    v = _to_bool(_tax_section(pos_cfg).get("enabled"))
+    if v is None:
+        v = _to_bool(_tax_section(fiscal_cfg).get("enabled"))
+    return True if v is None else bool(v)
+
+
+def parse_documents_mode(pos_cfg) -> str:
+    """Creación de factura/venta del checkout: ``async`` (outbox) o ``sync`` (en la respuesta)."""
+    documents = pos_cfg.get("documents") if isinstance(pos_cfg, dict) else None
+    mode = documents.get("mode") if isinstance(documents, dict) else None
+    mode = str(mode or DOCUMENTS_MODE_ASYNC).strip().lower()
+    return DOCUMENTS_MODE_SYNC if mode == DOCUMENTS_MODE_SYNC else DOCUMENTS_MODE_ASYNC
+
+
+def normalize_currency(value) -> str | None:
+    cur = str(value or "").strip().upper()
+    return cur or None
+
+
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class TenantSettingsContext:
+    """Configuración del tenant vigente para la request (solo lectura)."""
+
+    tenant_id: str
+    base_currency: str | None = None
+    company_currency: str | None = None
+    country_code: str | None = None
+    config: dict[str, Any] = field(default_factory=dict)
+    settings: dict[str, Any] = field(default_factory=dict)
+    pos_config: dict[str, Any] = field(default_factory=dict)
+    invoice_config: dict[str, Any] = field(default_factory=dict)
+    accounting: dict[str, str | None] | None = None
+
+    def get(self, key: str) -> dict:
+        """Misma resolución por clave que ``SettingsRepo.get``."""
+        if key == "pos":
+            return self.pos_config
+        if key == "invoice":
+            return self.invoice_config
+        value = self.settings.get(key)
+        return value if isinstance(value, dict) else {}
+
+    @property
+    def currency(self) -> str:
+        return self.company_currency or self.base_currency or "USD"
+
+    @property
+    def costing_method(self) -> str:
+        return parse_costing_method(self.get("inventory"), self.pos_config)
+
+    @property
+    def default_tax_rate(self) -> float | None:
+        return parse_default_tax_rate(self.pos_config, self.get("fiscal"))
+
+    @property
+    def tax_enabled(self) -> bool:
+        return parse_tax_enabled(self.pos_config, self.get("fiscal"))
+
+    @property
+    def documents_mode(self) -> str:
+        return parse_documents_mode(self.pos_config)
+
+    @property
+    def feature_overrides(self) -> dict[str, Any] | None:
+        features = self.config.get("features")
+        return features if isinstance(features, dict) else None
+
+    def flags(self) -> ResolvedFlags:
+        from app.modules.feature_flags.service import resolve_flags
+
+        return resolve_flags(
+            tenant_id=self.tenant_id,
+            country_code=self.country_code,
+            tenant_features=self.feature_overrides,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TenantSettingsContext:
+        return cls(**data)
+
+
+def _as_dict(value) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def _tenant_key(tenant_id: UUID | str) -> UUID | str:
+    try:
+        return UUID(str(tenant_id))
+    except (TypeError, ValueError):
+        return tenant_id
+
+
+def _load_snapshot(db: Session, tenant_id: UUID | str) -> dict[str, Any] | None:
+    """Una consulta: tenant + company_settings (+ moneda) + cuentas contables POS."""
+    tenant_key = _tenant_key(tenant_id)
+    row = db.execute(
+        select(
+            Tenant.base_currency,
+            Tenant.country_code,
+            Tenant.config_json,
+            CompanySettings.id.label("cs_id"),
+            CompanySettings.currency.label("cs_currency"),
+            Currency.code.label("cs_currency_code"),
+            CompanySettings.settings,
+            CompanySettings.pos_config,
+            CompanySettings.invoice_config,
+            TenantAccountingSettings.id.label("tas_id"),
+            *_ACCOUNT_COLUMNS,
+        )
+        .select_from(Tenant)
+        .outerjoin(CompanySettings, CompanySettings.tenant_id == tenant_key)
+        .outerjoin(Currency, Currency.id == CompanySettings.currency_id)
+        .outerjoin(TenantAccountingSettings, TenantAccountingSettings.tenant_id == tenant_key)
+        .where(Tenant.id == tenant_key)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    accounting = None
+    if row.tas_id is not None:
+        accounting = {
+            column.name: (str(row._mapping[column]) if row._mapping[column] else None)
+            for column in _ACCOUNT_COLUMNS
+        }
+    snapshot = TenantSettingsContext(
+        tenant_id=str(tenant_id),
+        base_currency=normalize_currency(row.base_currency),
+        company_currency=normalize_currency(row.cs_currency)
+        or normalize_currency(row.cs_currency_code),
+        country_code=row.country_code,
+        config=_as_dict(row.config_json),
+        settings=_as_dict(row.settings),
+        pos_config=_as_dict(row.pos_config),
+        invoice_config=_as_dict(row.invoice_config),
+        accounting=accounting,
+    )
+    return snapshot.to_dict()
+
+
+def load_tenant_settings(db: Session, tenant_id: UUID | str) -> TenantSettingsContext:
+    """Snapshot del tenant desde la cache de proceso o, si falta, de la BD."""
+    data = cache_get_or_load_sync(
+        tenant_id,
+        TENANT_SETTINGS_CACHE_DOMAIN,
+        ["snapshot"],
+        lambda: _load_snapshot(db, tenant_id),
+        CacheTTL.SHORT,
+    )
+    if data is None:
+        # Tenant inexistente: valores por defecto (no se cachea)
+        return TenantSettingsContext(tenant_id=str(tenant_id))
+    return TenantSettingsContext.from_dict(data)
+
+
+def get_request_tenant_settings(
+    request: Request | None, db: Session, tenant_id: UUID | str
+) -> TenantSettingsContext:
+    """``load_tenant_settings`` memoizado en ``request.state`` (una carga por request)."""
+    state = getattr(request, "state", None)
+    cached = getattr(state, _REQUEST_STATE_ATTR, None) if state is not None else None
+    if isinstance(cached, TenantSettingsContext) and cached.tenant_id == str(tenant_id):
+        return cached
+    snapshot = load_tenant_settings(db, tenant_id)
+    if state is not None:
+        setattr(state, _REQUEST_STATE_ATTR, snapshot)
+    return snapshot
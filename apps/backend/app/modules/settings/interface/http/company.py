@@ -18,6 +18,7 @@ from app.config.settings import settings
 from app.core.access_guard import with_access_claims
 from app.core.audit_events import audit_event
 from app.core.authz import require_scope
+from app.core.cache import CacheTTL, cache_get_or_load_sync, invalidate_on_commit
 from app.db.rls import set_tenant_guc
 from app.middleware.tenant import ensure_tenant
 from app.models.company.company import SectorTemplate
@@ -80,17 +81,36 @@ class CompanySettingsResponse(BaseModel):
     settings: dict
 
 
+_SETTINGS_CACHE_DOMAIN = "empresa"
+invalidate_on_commit(CompanySettings, _SETTINGS_CACHE_DOMAIN)
+invalidate_on_commit(Tenant, _SETTINGS_CACHE_DOMAIN, tenant_attr="id")
+
+
 @router.get("/settings", summary="Get company settings")
 def get_company_settings(tenant_id: str = Depends(ensure_tenant), db: Session = Depends(get_db)):
     """
     Gets the tenant configuration (language, timezone, currency, etc.)
 
+    Served from the two-tier cache; invalidated when CompanySettings or the
+    Tenant row of this tenant is committed.
+
     Args:
         tenant_id: UUID of the tenant
 
     Returns:
         Complete tenant configuration
     """
+    cached = cache_get_or_load_sync(
+        tenant_id,
+        _SETTINGS_CACHE_DOMAIN,
+        ["settings"],
+        lambda: _load_company_settings(tenant_id, db).model_dump(),
+        CacheTTL.EMPRESA_CONFIG,
+    )
+    return CompanySettingsResponse.model_validate(cached)
+
+
+def _load_company_settings(tenant_id: str, db: Session) -> CompanySettingsResponse:
     # Validate that the tenant exists
     try:
         tenant_key = UUID(str(tenant_id))
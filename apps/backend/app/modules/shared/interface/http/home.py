@@ -15,7 +15,7 @@ templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/")
-async def home(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
+def home(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
     is_company_user = False
     company = None
     company_name = None
@@ -120,7 +120,7 @@ def _get_incident_for_request(
 
 
 @router.get("/", response_model=list[IncidentResponse])
-async def list_incidents(
+def list_incidents(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     type_: str | None = None,
@@ -153,7 +153,7 @@ async def list_incidents(
 
 
 @router.post("/", response_model=IncidentResponse, status_code=status.HTTP_201_CREATED)
-async def create_incident(
+def create_incident(
     incident_data: IncidentCreate,
     request: Request,
     tenant_id: str | None = None,
@@ -181,7 +181,7 @@ async def create_incident(
 
 
 @router.get("/{incident_id}", response_model=IncidentResponse)
-async def get_incident(
+def get_incident(
     incident_id: UUID,
     request: Request,
     db: Session = Depends(get_db),
@@ -191,7 +191,7 @@ async def get_incident(
 
 
 @router.put("/{incident_id}", response_model=IncidentResponse)
-async def update_incident(
+def update_incident(
     incident_id: UUID,
     incident_update: IncidentUpdate,
     request: Request,
@@ -214,7 +214,7 @@ async def update_incident(
 
 
 @router.delete("/{incident_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_incident(
+def delete_incident(
     incident_id: UUID,
     request: Request,
     db: Session = Depends(get_db),
@@ -294,7 +294,7 @@ async def resolve_incident(
 
 
 @router.get("/stock-alerts/", response_model=list[StockAlertResponse])
-async def list_stock_alerts(
+def list_stock_alerts(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     alert_type: str | None = None,
@@ -327,7 +327,7 @@ async def list_stock_alerts(
     response_model=StockAlertResponse,
     status_code=status.HTTP_201_CREATED,
 )
-async def create_stock_alert(
+def create_stock_alert(
     alert_data: StockAlertCreate,
     request: Request,
     tenant_id: str | None = None,
@@ -398,7 +398,7 @@ async def notify_stock_alert(
 
 
 @router.post("/stock-alerts/{alert_id}/resolve")
-async def resolve_stock_alert(
+def resolve_stock_alert(
     alert_id: UUID,
     request: Request,
     db: Session = Depends(get_db),
@@ -426,7 +426,7 @@ async def resolve_stock_alert(
 
 
 @router.get("/notifications/channels", response_model=list[NotificationChannelResponse])
-async def list_notification_channels(
+def list_notification_channels(
     request: Request,
     tenant_id: str | None = None,
     db: Session = Depends(get_db),
@@ -449,7 +449,7 @@ async def list_notification_channels(
     response_model=NotificationChannelResponse,
     status_code=status.HTTP_201_CREATED,
 )
-async def create_notification_channel(
+def create_notification_channel(
     channel_data: NotificationChannelCreate,
     request: Request,
     tenant_id: str | None = None,
@@ -479,7 +479,7 @@ async def create_notification_channel(
 
 
 @router.put("/notifications/channels/{channel_id}", response_model=NotificationChannelResponse)
-async def update_notification_channel(
+def update_notification_channel(
     channel_id: UUID,
     channel_update: NotificationChannelUpdate,
     request: Request,
@@ -508,7 +508,7 @@ async def update_notification_channel(
 
 
 @router.get("/notifications/log", response_model=list[NotificationLogResponse])
-async def get_notification_log(
+def get_notification_log(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     request: Request = None,
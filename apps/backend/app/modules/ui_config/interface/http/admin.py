@@ -34,7 +34,7 @@ router = APIRouter(prefix="/ui-config", tags=["ui-config"])
 
 
 @router.get("/sections", response_model=list[UiSectionResponse])
-async def list_sections(
+def list_sections(
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
     active_only: bool = Query(True),
@@ -60,7 +60,7 @@ async def list_sections(
 
 
 @router.post("/sections", response_model=UiSectionResponse, status_code=201)
-async def create_section(
+def create_section(
     data: UiSectionCreate,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -91,7 +91,7 @@ async def create_section(
 
 
 @router.put("/sections/{section_id}", response_model=UiSectionResponse)
-async def update_section(
+def update_section(
     section_id: UUID,
     data: UiSectionUpdate,
     db: Session = Depends(get_db),
@@ -120,7 +120,7 @@ async def update_section(
 
 
 @router.delete("/sections/{section_id}", status_code=204)
-async def delete_section(
+def delete_section(
     section_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -138,7 +138,7 @@ async def delete_section(
 
 
 @router.get("/sections/{section_id}/widgets", response_model=list[UiWidgetResponse])
-async def list_widgets_by_section(
+def list_widgets_by_section(
     section_id: UUID,
     db: Session = Depends(get_db),
     active_only: bool = Query(True),
@@ -166,7 +166,7 @@ async def list_widgets_by_section(
 
 
 @router.post("/widgets", response_model=UiWidgetResponse, status_code=201)
-async def create_widget(
+def create_widget(
     data: UiWidgetCreate,
     db: Session = Depends(get_db),
 ):
@@ -194,7 +194,7 @@ async def create_widget(
 
 
 @router.get("/tables", response_model=list[UiTableResponse])
-async def list_tables(
+def list_tables(
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
 ):
@@ -224,7 +224,7 @@ async def list_tables(
 
 
 @router.get("/tables/{table_slug}", response_model=UiTableResponse)
-async def get_table_config(
+def get_table_config(
     table_slug: str,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -255,7 +255,7 @@ async def get_table_config(
 
 
 @router.post("/tables", response_model=UiTableResponse, status_code=201)
-async def create_table(
+def create_table(
     data: UiTableCreate,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -293,7 +293,7 @@ async def create_table(
 
 
 @router.get("/forms", response_model=list[UiFormResponse])
-async def list_forms(
+def list_forms(
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
 ):
@@ -320,7 +320,7 @@ async def list_forms(
 
 
 @router.get("/forms/{form_slug}", response_model=UiFormResponse)
-async def get_form_config(
+def get_form_config(
     form_slug: str,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -348,7 +348,7 @@ async def get_form_config(
 
 
 @router.post("/forms", response_model=UiFormResponse, status_code=201)
-async def create_form(
+def create_form(
     data: UiFormCreate,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -383,7 +383,7 @@ async def create_form(
 
 
 @router.get("/dashboards/default", response_model=UiDashboardResponse)
-async def get_default_dashboard(
+def get_default_dashboard(
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
 ):
@@ -406,7 +406,7 @@ async def get_default_dashboard(
 
 
 @router.get("/dashboards", response_model=list[UiDashboardResponse])
-async def list_dashboards(
+def list_dashboards(
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
 ):
@@ -429,7 +429,7 @@ async def list_dashboards(
 
 
 @router.post("/dashboards", response_model=UiDashboardResponse, status_code=201)
-async def create_dashboard(
+def create_dashboard(
     data: UiDashboardCreate,
     tenant_id: UUID = Depends(get_tenant_id_from_token),
     db: Session = Depends(get_db),
@@ -0,0 +1,82 @@
+"""Per-endpoint circuit breaker for webhook deliveries.
+
+After ``failure_threshold`` consecutive failures the circuit opens and
+deliveries to that endpoint are deferred (rescheduled through the queue)
+for ``reset_timeout`` seconds. Then a single probe is let through
+(half-open): success closes the circuit, failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from threading import Lock
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+
+
+class EndpointCircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = Lock()
+
+    def allow(self, key: str) -> bool:
+        """True if a delivery to ``key`` may be attempted now."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.opened_at is None:
+                return True
+            if self._clock() - circuit.opened_at < self.reset_timeout or circuit.probing:
+                return False
+            circuit.probing = True
+            return True
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until the circuit for ``key`` accepts a probe (0 if closed)."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - circuit.opened_at))
+
+    def is_open(self, key: str) -> bool:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit is not None and circuit.opened_at is not None
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures += 1
+            if circuit.probing or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = self._clock()
+                circuit.probing = False
+
+    def reset(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(key, None)
+
+
+# Process-wide breaker shared by all dispatchers
+endpoint_circuit_breaker = EndpointCircuitBreaker()
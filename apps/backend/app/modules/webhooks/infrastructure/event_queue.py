@@ -26,6 +26,8 @@ class WebhookEventQueue:
 
         self.queue_key = "webhooks:deliveries:pending"
         self.processing_key = "webhooks:deliveries:processing"
+        # Retries waiting for their backoff: ZSET scored by due epoch seconds
+        self.delayed_key = "webhooks:deliveries:delayed"
 
     def enqueue(
         self,
@@ -35,25 +37,39 @@ class WebhookEventQueue:
         secret: str,
         payload: dict[str, Any],
         attempt_number: int = 1,
+        *,
+        delay_seconds: float = 0,
+        extra: dict[str, Any] | None = None,
     ) -> bool:
-        """Enqueue a webhook delivery."""
+        """Enqueue a webhook delivery.
+
+        With ``delay_seconds`` the message is parked in the delayed set and only
+        becomes visible to ``dequeue`` after ``promote_due`` moves it.
+        """
         if not self.redis_client:
             logger.error("Redis client not available")
             return False
 
         try:
+            now = datetime.now(UTC)
             message = {
+                **(extra or {}),
                 "delivery_id": str(delivery_id),
                 "subscription_id": str(subscription_id),
                 "target_url": target_url,
                 "secret": secret,
                 "payload": payload,
                 "attempt_number": attempt_number,
-                "enqueued_at": datetime.now(UTC).isoformat(),
+                "enqueued_at": now.isoformat(),
             }
 
-            self.redis_client.rpush(self.queue_key, json.dumps(message))
-            logger.info(f"Enqueued webhook delivery: {delivery_id}")
+            if delay_seconds > 0:
+                due = now.timestamp() + delay_seconds
+                self.redis_client.zadd(self.delayed_key, {json.dumps(message): due})
+                logger.info(f"Scheduled webhook delivery {delivery_id} in {delay_seconds:.0f}s")
+            else:
+                self.redis_client.rpush(self.queue_key, json.dumps(message))
+                logger.info(f"Enqueued webhook delivery: {delivery_id}")
             return True
 
         except Exception as e:
@@ -75,6 +91,26 @@ class WebhookEventQueue:
             logger.exception(f"Failed to dequeue webhook: {e}")
             return None
 
+    def promote_due(self, limit: int = 500) -> int:
+        """Move delayed deliveries whose backoff expired to the pending list."""
+        if not self.redis_client:
+            return 0
+
+        try:
+            now = datetime.now(UTC).timestamp()
+            due = self.redis_client.zrangebyscore(self.delayed_key, "-inf", now, start=0, num=limit)
+            promoted = 0
+            for raw in due:
+                # ZREM wins for exactly one worker, so a retry is never promoted twice.
+                if self.redis_client.zrem(self.delayed_key, raw):
+                    self.redis_client.rpush(self.queue_key, raw)
+                    promoted += 1
+            return promoted
+
+        except Exception as e:
+            logger.exception(f"Failed to promote delayed webhooks: {e}")
+            return 0
+
     def move_to_processing(self, message: dict[str, Any]) -> None:
         """Move message to processing set."""
         if not self.redis_client:
@@ -107,6 +143,17 @@ class WebhookEventQueue:
             logger.exception(f"Failed to get queue size: {e}")
             return 0
 
+    def delayed_count(self) -> int:
+        """Get number of deliveries waiting for a retry backoff."""
+        if not self.redis_client:
+            return 0
+
+        try:
+            return self.redis_client.zcard(self.delayed_key)
+        except Exception as e:
+            logger.exception(f"Failed to get delayed count: {e}")
+            return 0
+
     def processing_count(self) -> int:
         """Get number of deliveries being processed."""
         if not self.redis_client:
@@ -124,7 +171,7 @@ class WebhookEventQueue:
             return
 
         try:
-            self.redis_client.delete(self.queue_key)
+            self.redis_client.delete(self.queue_key, self.delayed_key)
             logger.warning("Cleared webhook delivery queue")
         except Exception as e:
             logger.exception(f"Failed to clear queue: {e}")
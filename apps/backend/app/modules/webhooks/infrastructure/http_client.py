@@ -0,0 +1,69 @@
+"""Shared HTTP client for webhook deliveries.
+
+One pooled ``httpx.AsyncClient`` per event loop instead of a new client (and
+TCP/TLS handshake) per attempt. HTTP/2 is negotiated when the optional ``h2``
+package is installed; otherwise the pool speaks HTTP/1.1 keep-alive.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:  # pragma: no cover - depends on optional extra
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+WEBHOOK_POOL_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=50,
+    keepalive_expiry=30.0,
+)
+WEBHOOK_DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def get_webhook_http_client() -> httpx.AsyncClient:
+    """Return the pooled client bound to the running event loop."""
+    global _client, _client_loop
+    current_loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is current_loop and not _client.is_closed:
+        return _client
+
+    if _client is not None:
+        # El cliente anterior puede pertenecer a un loop ya cerrado (Celery/asyncio.run).
+        try:
+            await _client.aclose()
+        except Exception:
+            pass
+
+    _client = httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=WEBHOOK_POOL_LIMITS,
+        timeout=WEBHOOK_DEFAULT_TIMEOUT,
+        follow_redirects=False,
+    )
+    _client_loop = current_loop
+    logger.debug("Webhook HTTP client created (http2=%s)", HTTP2_AVAILABLE)
+    return _client
+
+
+async def close_webhook_http_client() -> None:
+    global _client, _client_loop
+    client = _client
+    _client = None
+    _client_loop = None
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
@@ -5,7 +5,10 @@ import hashlib
 import hmac
 import json
 import logging
-from datetime import datetime, timedelta
+import weakref
+from datetime import datetime
+from typing import Any
+from urllib.parse import urlsplit
 from uuid import UUID, uuid4
 
 import httpx
@@ -13,23 +16,82 @@ from sqlalchemy.orm import Session
 
 from app.modules.webhooks.domain.entities import (
     DeliveryStatus,
-    WebhookDeliveryAttempt,
     WebhookEndpoint,
     WebhookEvent,
     WebhookEventType,
     WebhookPayload,
 )
+from app.modules.webhooks.infrastructure.circuit_breaker import (
+    EndpointCircuitBreaker,
+    endpoint_circuit_breaker,
+)
+from app.modules.webhooks.infrastructure.http_client import get_webhook_http_client
 
 logger = logging.getLogger(__name__)
 
+# Concurrency caps shared by every dispatch running in the same event loop
+MAX_CONCURRENT_DELIVERIES_PER_TENANT = 32
+MAX_CONCURRENT_DELIVERIES_PER_HOST = 8
+
+
+class _DeliveryLimits:
+    """Per-tenant and per-host semaphores for one event loop."""
+
+    def __init__(self) -> None:
+        self.tenants: dict[str, asyncio.Semaphore] = {}
+        self.hosts: dict[str, asyncio.Semaphore] = {}
+
+    def tenant(self, tenant_id: str) -> asyncio.Semaphore:
+        sem = self.tenants.get(tenant_id)
+        if sem is None:
+            sem = self.tenants[tenant_id] = asyncio.Semaphore(MAX_CONCURRENT_DELIVERIES_PER_TENANT)
+        return sem
+
+    def host(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).netloc or url).lower()
+        sem = self.hosts.get(host)
+        if sem is None:
+            sem = self.hosts[host] = asyncio.Semaphore(MAX_CONCURRENT_DELIVERIES_PER_HOST)
+        return sem
+
+
+_limits_by_loop: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _DeliveryLimits] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _delivery_limits() -> _DeliveryLimits:
+    loop = asyncio.get_running_loop()
+    limits = _limits_by_loop.get(loop)
+    if limits is None:
+        limits = _limits_by_loop[loop] = _DeliveryLimits()
+    return limits
+
 
 class WebhookDispatcher:
-    """Main webhook dispatcher and delivery system"""
+    """Main webhook dispatcher and delivery system.
+
+    Deliveries to all endpoints run concurrently (bounded per tenant and per
+    host) over a shared pooled HTTP client. Each call makes a single attempt;
+    retries are rescheduled through ``WebhookEventQueue`` with exponential
+    backoff instead of sleeping in-process, and endpoints that keep failing
+    are short-circuited by a per-endpoint circuit breaker.
+    """
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        *,
+        client: httpx.AsyncClient | None = None,
+        queue: Any | None = None,
+        breaker: EndpointCircuitBreaker | None = None,
+    ):
         self.db = db
         self.max_retries = 5
         self.backoff_base = 2  # Exponential backoff: 2^attempt
+        self._client = client
+        self._queue = queue
+        self.breaker = breaker or endpoint_circuit_breaker
 
     def trigger(
         self,
@@ -88,10 +150,9 @@ class WebhookDispatcher:
             endpoints: List of webhook endpoints to dispatch to
 
         Returns:
-            Dictionary mapping endpoint_id to delivery_status
+            Dictionary mapping endpoint_id to delivery_status (RETRYING when a
+            retry was scheduled on the queue)
         """
-        results = {}
-
         # Create payload
         payload = WebhookPayload(
             id=str(event.id),
@@ -101,140 +162,219 @@ class WebhookDispatcher:
             tenant_id=event.tenant_id,
             resource_type=event.resource_type,
             resource_id=event.resource_id,
-        )
-
-        # Dispatch to each endpoint
-        tasks = []
-        for endpoint in endpoints:
-            if not endpoint.active or endpoint.status != "active":
-                continue
+        ).to_dict()
+
+        targets = [
+            endpoint
+            for endpoint in endpoints
+            if endpoint.active
+            and endpoint.status == "active"
+            and event.event_type in endpoint.events
+        ]
+        if not targets:
+            return {}
 
-            if event.event_type not in endpoint.events:
-                continue
+        # Execute all deliveries concurrently
+        statuses = await asyncio.gather(
+            *(self._deliver_bounded(endpoint, payload) for endpoint in targets),
+            return_exceptions=True,
+        )
 
-            task = self._deliver_to_endpoint(endpoint, payload)
-            tasks.append((endpoint.id, task))
+        results: dict[UUID, DeliveryStatus] = {}
+        for endpoint, status in zip(targets, statuses, strict=True):
+            if isinstance(status, BaseException):
+                logger.error(f"Dispatch failed for endpoint {endpoint.id}: {status}")
+                status = DeliveryStatus.FAILED
+            results[endpoint.id] = status
+        return results
 
-        # Execute all deliveries concurrently
-        if tasks:
-            for endpoint_id, task in tasks:
-                try:
-                    status = await task
-                    results[endpoint_id] = status
-                except Exception as e:
-                    logger.error(f"Dispatch failed for endpoint {endpoint_id}: {e}")
-                    results[endpoint_id] = DeliveryStatus.FAILED
+    async def redeliver(self, message: dict[str, Any]) -> DeliveryStatus:
+        """Run a retry previously scheduled on the queue by ``_schedule_retry``."""
+        endpoint = WebhookEndpoint(
+            id=UUID(str(message["subscription_id"])),
+            tenant_id=str(message.get("tenant_id") or ""),
+            url=message["target_url"],
+            events=[],
+            secret=message.get("secret") or "",
+            headers=message.get("headers"),
+            max_retries=int(message.get("max_retries") or self.max_retries),
+            timeout_seconds=int(message.get("timeout_seconds") or 30),
+        )
+        return await self._deliver_bounded(
+            endpoint, message["payload"], attempt=int(message.get("attempt_number") or 1)
+        )
 
+    async def process_retries(self, limit: int = 100) -> dict[str, DeliveryStatus]:
+        """Promote due retries and deliver up to ``limit`` of them concurrently."""
+        queue = self._get_queue()
+        if queue is None:
+            return {}
+        queue.promote_due()
+        messages = []
+        while len(messages) < limit:
+            message = queue.dequeue()
+            if message is None:
+                break
+            queue.move_to_processing(message)
+            messages.append(message)
+        if not messages:
+            return {}
+
+        statuses = await asyncio.gather(
+            *(self.redeliver(message) for message in messages), return_exceptions=True
+        )
+        results: dict[str, DeliveryStatus] = {}
+        for message, status in zip(messages, statuses, strict=True):
+            queue.mark_processed(message["delivery_id"])
+            if isinstance(status, BaseException):
+                logger.error(f"Webhook retry failed for {message['target_url']}: {status}")
+                status = DeliveryStatus.FAILED
+            results[f"{message['delivery_id']}:{message['subscription_id']}"] = status
         return results
 
+    async def _deliver_bounded(
+        self, endpoint: WebhookEndpoint, payload: dict[str, Any], attempt: int = 1
+    ) -> DeliveryStatus:
+        limits = _delivery_limits()
+        async with limits.tenant(str(endpoint.tenant_id)), limits.host(endpoint.url):
+            return await self._deliver_to_endpoint(endpoint, payload, attempt)
+
     async def _deliver_to_endpoint(
-        self, endpoint: WebhookEndpoint, payload: WebhookPayload
+        self, endpoint: WebhookEndpoint, payload: dict[str, Any], attempt: int = 1
     ) -> DeliveryStatus:
         """
-        Deliver webhook to a single endpoint
+        Make one delivery attempt to a single endpoint
 
         Args:
             endpoint: Webhook endpoint
-            payload: Payload to send
+            payload: Payload dictionary (``WebhookPayload.to_dict()``)
+            attempt: Attempt number (1-based)
 
         Returns:
             Delivery status
         """
-        payload_dict = payload.to_dict()
-        signature = self._generate_signature(endpoint.secret, payload_dict)
+        breaker_key = str(endpoint.id)
+        if not self.breaker.allow(breaker_key):
+            # Circuit open: defer without spending an attempt
+            return self._schedule_retry(
+                endpoint,
+                payload,
+                attempt,
+                delay_seconds=max(1.0, self.breaker.retry_after(breaker_key)),
+                reason="circuit_open",
+            )
 
+        signature = self._generate_signature(endpoint.secret, payload)
         headers = {
             "Content-Type": "application/json",
             "User-Agent": "GestiqCloud-Webhooks/1.0",
             "X-Webhook-Signature": signature,
-            "X-Webhook-ID": payload.id,
-            "X-Webhook-Timestamp": payload.timestamp.isoformat(),
+            "X-Webhook-ID": str(payload.get("id")),
+            "X-Webhook-Timestamp": str(payload.get("timestamp")),
         }
 
         # Add custom headers
         if endpoint.headers:
             headers.update(endpoint.headers)
 
-        attempt = 0
         last_error = None
+        try:
+            client = self._client or await get_webhook_http_client()
+            response = await client.post(
+                endpoint.url,
+                json=payload,
+                headers=headers,
+                timeout=endpoint.timeout_seconds,
+            )
+            logger.info(
+                f"Webhook delivery attempt {attempt} to {endpoint.url}: "
+                f"HTTP {response.status_code}"
+            )
+
+            # Success (2xx or 3xx)
+            if response.status_code < 400:
+                self.breaker.record_success(breaker_key)
+                return DeliveryStatus.DELIVERED
+
+            if response.status_code < 500:
+                # 4xx errors usually don't warrant retry; the endpoint itself is up
+                self.breaker.record_success(breaker_key)
+                return DeliveryStatus.FAILED
+
+            last_error = f"HTTP {response.status_code}"
 
-        while attempt < endpoint.max_retries:
-            attempt += 1
-
-            try:
-                async with httpx.AsyncClient(timeout=endpoint.timeout_seconds) as client:
-                    response = await client.post(
-                        endpoint.url,
-                        json=payload_dict,
-                        headers=headers,
-                    )
-
-                    # Log attempt
-                    attempt_record = WebhookDeliveryAttempt(
-                        id=uuid4(),
-                        webhook_id=endpoint.id,
-                        event_id=payload.id,
-                        attempt_number=attempt,
-                        status=(
-                            DeliveryStatus.DELIVERED
-                            if response.status_code < 400
-                            else DeliveryStatus.FAILED
-                        ),
-                        http_status_code=response.status_code,
-                        response_body=response.text[:1000],  # Store first 1000 chars
-                        request_timestamp=datetime.now(),
-                        response_timestamp=datetime.now(),
-                    )
-
-                    logger.info(
-                        f"Webhook delivery attempt {attempt} to {endpoint.url}: "
-                        f"HTTP {response.status_code}"
-                    )
-
-                    # Success (2xx or 3xx)
-                    if response.status_code < 400:
-                        return DeliveryStatus.DELIVERED
-
-                    # Failure - will retry
-                    if response.status_code < 500:
-                        # 4xx errors usually don't warrant retry
-                        return DeliveryStatus.FAILED
-
-                    last_error = f"HTTP {response.status_code}"
-
-            except httpx.TimeoutException:
-                last_error = "Request timeout"
-                logger.warning(f"Webhook delivery timeout to {endpoint.url} (attempt {attempt})")
-
-            except httpx.RequestError as e:
-                last_error = str(e)
-                logger.warning(
-                    f"Webhook delivery failed to {endpoint.url}: {e} (attempt {attempt})"
-                )
-
-            except Exception as e:
-                last_error = str(e)
-                logger.error(f"Unexpected error delivering webhook: {e}")
-
-            # Calculate next retry time (exponential backoff)
-            if attempt < endpoint.max_retries:
-                backoff_seconds = self.backoff_base**attempt
-                next_retry = datetime.now() + timedelta(seconds=backoff_seconds)
-
-                attempt_record.status = DeliveryStatus.RETRYING
-                attempt_record.next_retry_at = next_retry
-
-                logger.info(f"Scheduling retry for {endpoint.url} in {backoff_seconds}s")
-
-                # Wait before retrying
-                await asyncio.sleep(backoff_seconds)
-
-        # All retries exhausted
-        logger.error(
-            f"Webhook delivery failed after {endpoint.max_retries} attempts to {endpoint.url}. "
-            f"Last error: {last_error}"
+        except httpx.TimeoutException:
+            last_error = "Request timeout"
+            logger.warning(f"Webhook delivery timeout to {endpoint.url} (attempt {attempt})")
+
+        except httpx.RequestError as e:
+            last_error = str(e)
+            logger.warning(f"Webhook delivery failed to {endpoint.url}: {e} (attempt {attempt})")
+
+        except Exception as e:
+            last_error = str(e)
+            logger.error(f"Unexpected error delivering webhook: {e}")
+
+        self.breaker.record_failure(breaker_key)
+        if attempt >= endpoint.max_retries:
+            # All retries exhausted
+            logger.error(
+                f"Webhook delivery failed after {endpoint.max_retries} attempts to "
+                f"{endpoint.url}. Last error: {last_error}"
+            )
+            return DeliveryStatus.ABANDONED
+
+        return self._schedule_retry(
+            endpoint,
+            payload,
+            attempt + 1,
+            delay_seconds=self.backoff_base**attempt,
+            reason=last_error,
         )
-        return DeliveryStatus.ABANDONED
+
+    def _schedule_retry(
+        self,
+        endpoint: WebhookEndpoint,
+        payload: dict[str, Any],
+        attempt: int,
+        *,
+        delay_seconds: float,
+        reason: str | None,
+    ) -> DeliveryStatus:
+        queue = self._get_queue()
+        if queue is None or not queue.enqueue(
+            delivery_id=payload.get("id"),
+            subscription_id=endpoint.id,
+            target_url=endpoint.url,
+            secret=endpoint.secret,
+            payload=payload,
+            attempt_number=attempt,
+            delay_seconds=delay_seconds,
+            extra={
+                "tenant_id": str(endpoint.tenant_id),
+                "headers": endpoint.headers,
+                "max_retries": endpoint.max_retries,
+                "timeout_seconds": endpoint.timeout_seconds,
+                "last_error": reason,
+            },
+        ):
+            logger.error(f"Could not schedule webhook retry to {endpoint.url}: {reason}")
+            return DeliveryStatus.FAILED
+
+        logger.info(
+            f"Scheduling retry {attempt} for {endpoint.url} in {delay_seconds:.0f}s ({reason})"
+        )
+        return DeliveryStatus.RETRYING
+
+    def _get_queue(self):
+        if self._queue is None:
+            from app.config.settings import settings
+            from app.modules.webhooks.infrastructure.event_queue import WebhookEventQueue
+
+            self._queue = WebhookEventQueue(
+                getattr(settings, "REDIS_URL", None) or "redis://localhost:6379/0"
+            )
+        return self._queue
 
     def _generate_signature(self, secret: str, payload: dict) -> str:
         """
@@ -90,7 +90,7 @@ def _is_missing_webhooks_tables(exc: Exception) -> bool:
 
 
 @router.post("", response_model=WebhookResponse, status_code=201)
-async def create_webhook(
+def create_webhook(
     request: CreateWebhookRequest,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -114,7 +114,7 @@ async def create_webhook(
 
 
 @router.get("", response_model=WebhookListResponse)
-async def list_webhooks(
+def list_webhooks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     current_user: dict = Depends(get_current_user),
@@ -139,7 +139,7 @@ async def list_webhooks(
 
 
 @router.put("/{webhook_id}", response_model=WebhookResponse)
-async def update_webhook(
+def update_webhook(
     webhook_id: UUID,
     request: UpdateWebhookRequest,
     current_user: dict = Depends(get_current_user),
@@ -169,7 +169,7 @@ async def update_webhook(
 
 
 @router.delete("/{webhook_id}", status_code=204)
-async def delete_webhook(
+def delete_webhook(
     webhook_id: UUID,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -191,7 +191,7 @@ async def delete_webhook(
 
 
 @router.get("/{webhook_id}/history", response_model=DeliveryListResponse)
-async def get_webhook_history(
+def get_webhook_history(
     webhook_id: UUID,
     limit: int = Query(100, ge=1, le=1000),
     skip: int = Query(0, ge=0),
@@ -218,7 +218,7 @@ async def get_webhook_history(
 
 
 @router.post("/{webhook_id}/retry", response_model=DeliveryResponse)
-async def retry_delivery(
+def retry_delivery(
     webhook_id: UUID,
     delivery_id: UUID = Query(...),
     current_user: dict = Depends(get_current_user),
@@ -241,7 +241,7 @@ async def retry_delivery(
 
 
 @router.get("/{webhook_id}/secret", response_model=WebhookSecretResponse)
-async def get_webhook_secret(
+def get_webhook_secret(
     webhook_id: UUID,
     current_user: dict = Depends(get_current_user),
     _authz: dict = Depends(require_permission("webhooks.secret.view")),
@@ -267,7 +267,7 @@ async def get_webhook_secret(
 
 
 @router.post("/{webhook_id}/rotate-secret", response_model=WebhookSecretResponse)
-async def rotate_webhook_secret(
+def rotate_webhook_secret(
     webhook_id: UUID,
     current_user: dict = Depends(get_current_user),
     _authz: dict = Depends(require_permission("webhooks.secret.rotate")),
@@ -293,7 +293,7 @@ async def rotate_webhook_secret(
 
 
 @router.post("/{webhook_id}/test", response_model=WebhookTestResponse)
-async def test_webhook(
+def test_webhook(
     webhook_id: UUID,
     request: WebhookTestRequest | None = None,
     current_user: dict = Depends(get_current_user),
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
 import logging
 import time
+from collections import Counter
 from typing import Any
 
 import requests
@@ -26,6 +28,7 @@ logger = logging.getLogger(__name__)
 WEBHOOK_TIMEOUT_SECONDS = 10
 WEBHOOK_MAX_RETRIES = 3
 WEBHOOK_USER_AGENT = "GestiqCloud-Webhooks/1.0"
+WEBHOOK_RETRY_BATCH = 100
 
 
 def _sign(secret: str, payload: dict[str, Any]) -> str:
@@ -190,6 +193,37 @@ def deliver(self, delivery_id: str) -> dict:
     return {"ok": False, "error": "unknown_error"}
 
 
+@shared_task(name="apps.backend.app.modules.webhooks.tasks.process_retries")
+def process_retries(limit: int = WEBHOOK_RETRY_BATCH) -> dict:
+    """
+    Deliver webhook retries whose backoff has expired (Celery beat, every 30s).
+
+    WebhookDispatcher parks failed attempts in the queue's delayed set;
+    ``process_retries`` promotes the due ones and makes their next attempt.
+
+    Args:
+        limit: Maximum retries delivered per run
+
+    Returns:
+        Number of retries processed and a count per delivery status
+    """
+    from app.modules.webhooks.infrastructure.http_client import close_webhook_http_client
+    from app.modules.webhooks.infrastructure.webhook_dispatcher import WebhookDispatcher
+
+    async def _run():
+        try:
+            with SessionLocal() as db:
+                return await WebhookDispatcher(db).process_retries(limit)
+        finally:
+            # Each run gets a fresh event loop; don't leave its pool behind
+            await close_webhook_http_client()
+
+    results = asyncio.run(_run())
+    if results:
+        logger.info(f"Processed {len(results)} webhook retries")
+    return {"processed": len(results), **Counter(status.value for status in results.values())}
+
+
 def _update_delivery_status(
     db, delivery_id: str, status: str, error: str | None, attempts: int
 ) -> None:
@@ -453,6 +453,11 @@ def build_api_router() -> APIRouter:
         ("app.modules.restaurant.interface.http.tenant", "router"),
         prefix="/tenant",
     )
+    include_router_safe(
+        r,
+        ("app.modules.restaurant.interface.http.tenant", "stream_router"),
+        prefix="/tenant",
+    )
 
     # Reconciliation (Payments AR/AP)
     include_router_safe(
@@ -83,7 +83,7 @@ def _to_response(log: NotificationLog, channel_map: dict) -> LogEntryResponse:
 
 
 @router.get("/", response_model=list[LogEntryResponse])
-async def list_logs(
+def list_logs(
     tipo: str | None = None,
     estado: str | None = None,
     ref_type: str | None = None,
@@ -128,7 +128,7 @@ async def list_logs(
 
 
 @router.get("/stats", response_model=LogStatsResponse)
-async def get_log_stats(
+def get_log_stats(
     days: int = Query(30, ge=1, le=365),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -1,16 +1,33 @@
 """Event Outbox Service — Publish domain events with guaranteed delivery"""
 
 import logging
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from typing import Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import event as sa_event
+from sqlalchemy import or_, text
 from sqlalchemy.orm import Session
 
 from app.models.core.event_outbox import EventOutbox
 
 logger = logging.getLogger(__name__)
 
+# Canal LISTEN/NOTIFY que despierta a workers/outbox_dispatcher.py
+OUTBOX_CHANNEL = "event_outbox"
+
+# Reintentos: 5s, 10s, 20s... hasta 15 min entre intentos
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 15 * 60
+
+_PENDING_NOTIFY_KEY = "event_outbox_notify"
+
+
+def retry_delay(attempt: int) -> timedelta:
+    """Backoff exponencial del intento ``attempt`` (1 = primer fallo)."""
+    seconds = RETRY_BASE_SECONDS * 2 ** max(attempt - 1, 0)
+    return timedelta(seconds=min(seconds, RETRY_MAX_SECONDS))
+
 
 class EventService:
     """Service for publishing domain events to the outbox."""
@@ -24,7 +41,11 @@ class EventService:
         aggregate_type: str | None = None,
         aggregate_id: UUID | None = None,
     ) -> EventOutbox:
-        """Publish an event to the outbox (within current transaction)."""
+        """Publish an event to the outbox (within current transaction).
+
+        On PostgreSQL a ``NOTIFY event_outbox`` per event type is queued for the
+        commit, so listening dispatchers pick the event up without polling.
+        """
         event = EventOutbox(
             id=uuid4(),
             tenant_id=tenant_id,
@@ -34,6 +55,7 @@ class EventService:
             payload=payload,
         )
         db.add(event)
+        db.info.setdefault(_PENDING_NOTIFY_KEY, set()).add(event_type)
         # Don't commit — let caller's transaction include this
         return event
 
@@ -44,25 +66,86 @@ class EventService:
         if event:
             event.published_at = datetime.now(UTC)
             event.last_error = None
+            event.next_attempt_at = None
 
     @staticmethod
     def mark_failed(db: Session, event_id: UUID, error: str) -> None:
-        """Mark an event as failed with error."""
+        """Mark an event as failed with error and schedule the next attempt."""
         event = db.query(EventOutbox).filter(EventOutbox.id == event_id).first()
         if event:
             event.retry_count = (event.retry_count or 0) + 1
             event.last_error = error
+            event.next_attempt_at = datetime.now(UTC) + retry_delay(event.retry_count)
+
+    @staticmethod
+    def _pending_query(db: Session, max_retries: int):
+        return db.query(EventOutbox).filter(
+            EventOutbox.published_at.is_(None),
+            EventOutbox.retry_count < max_retries,
+            or_(
+                EventOutbox.next_attempt_at.is_(None),
+                EventOutbox.next_attempt_at <= datetime.now(UTC),
+            ),
+        )
 
     @staticmethod
     def get_unpublished(db: Session, limit: int = 50, max_retries: int = 5) -> list[EventOutbox]:
-        """Get unpublished events for processing."""
+        """Get unpublished events that are due for processing."""
         return (
-            db.query(EventOutbox)
-            .filter(
-                EventOutbox.published_at.is_(None),
-                EventOutbox.retry_count < max_retries,
-            )
+            EventService._pending_query(db, max_retries)
             .order_by(EventOutbox.created_at.asc())
             .limit(limit)
             .all()
         )
+
+    @staticmethod
+    def claim_batch(
+        db: Session,
+        limit: int = 50,
+        max_retries: int = 5,
+        *,
+        event_types: set[str] | frozenset[str] | None = None,
+        exclude_types: set[str] | frozenset[str] | None = None,
+    ) -> list[EventOutbox]:
+        """Claim due events with ``FOR UPDATE SKIP LOCKED``.
+
+        The rows stay locked until the caller's transaction ends, so concurrent
+        dispatchers get disjoint batches. ``event_types``/``exclude_types``
+        restrict the claim to one dispatcher lane.
+        """
+        query = EventService._pending_query(db, max_retries)
+        if event_types is not None:
+            query = query.filter(EventOutbox.event_type.in_(event_types))
+        if exclude_types:
+            query = query.filter(EventOutbox.event_type.not_in(exclude_types))
+        return (
+            query.order_by(EventOutbox.created_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+
+@sa_event.listens_for(Session, "before_commit")
+def _notify_outbox_listeners(session: Session) -> None:
+    """Queue one NOTIFY per published event type; Postgres delivers it on commit."""
+    if session.get_nested_transaction() is not None:
+        # Savepoint: se notifica al confirmar la transacción externa
+        return
+    event_types = session.info.pop(_PENDING_NOTIFY_KEY, None)
+    if not event_types:
+        return
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    for event_type in sorted(event_types):
+        session.execute(
+            text("SELECT pg_notify(:channel, :event_type)"),
+            {"channel": OUTBOX_CHANNEL, "event_type": event_type},
+        )
+
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _discard_outbox_notifications(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_NOTIFY_KEY, None)
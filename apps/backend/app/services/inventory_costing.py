@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from datetime import UTC, date, datetime
 from decimal import Decimal
-from typing import Literal, NamedTuple
+from typing import Any, Literal, NamedTuple
 from uuid import uuid4
 
 from fastapi import HTTPException
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
 
 from app.shared.utils import normalize_lot as _normalize_lot
@@ -18,10 +18,85 @@ class CostState(NamedTuple):
     avg_cost: Decimal
 
 
+def _as_date(value: Any) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class CostMove(NamedTuple):
+    """One inbound/outbound movement for ``InventoryCostingService.apply_moves``."""
+
+    warehouse_id: str
+    product_id: str
+    qty: Decimal
+    direction: Literal["in", "out"]
+    unit_cost: Decimal = Decimal("0")
+    lot: str | None = None
+    expires_at: date | None = None
+    allow_negative: bool = False
+    initial_qty: Decimal | None = None
+    initial_avg_cost: Decimal | None = None
+
+
+class CostMoveResult(NamedTuple):
+    state: CostState
+    # COGS of an outbound move (layers for FIFO/LIFO, qty * avg for WAC); 0 inbound.
+    cogs: Decimal
+
+
+class _Layer:
+    __slots__ = ("id", "lot", "expires_at", "remaining", "unit_cost", "seq", "dirty")
+
+    def __init__(self, layer_id, lot, expires_at, remaining, unit_cost, seq) -> None:
+        self.id = layer_id
+        self.lot = lot
+        self.expires_at = expires_at
+        self.remaining = remaining
+        self.unit_cost = unit_cost
+        self.seq = seq
+        self.dirty = False
+
+
 class InventoryCostingService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _is_sqlite(self) -> bool:
+        return getattr(self.db.get_bind().dialect, "name", "") == "sqlite"
+
+    def _bulk_update(
+        self,
+        table: str,
+        rows: list[dict[str, Any]],
+        columns: tuple[str, ...],
+        *,
+        touch_updated_at: bool = False,
+    ) -> None:
+        """Write ``columns`` for many rows (keyed by ``id``) in a single UPDATE."""
+        if not rows:
+            return
+        params: dict[str, Any] = {}
+        keys: list[str] = []
+        cases: dict[str, list[str]] = {column: [] for column in columns}
+        for i, row in enumerate(rows):
+            params[f"k{i}"] = row["id"]
+            keys.append(f":k{i}")
+            for column in columns:
+                params[f"{column}_{i}"] = row[column]
+                cases[column].append(f"WHEN :k{i} THEN :{column}_{i}")
+        assignments = [f"{column} = CASE id {' '.join(cases[column])} END" for column in columns]
+        if touch_updated_at:
+            assignments.append("updated_at = CURRENT_TIMESTAMP")
+        self.db.execute(
+            text(f"UPDATE {table} SET {', '.join(assignments)} WHERE id IN ({', '.join(keys)})"),
+            params,
+        )
+
     def _ensure_state_row(
         self,
         tenant_id: str,
@@ -39,7 +114,7 @@ class InventoryCostingService:
             "avg": float(initial_avg_cost or Decimal("0")),
         }
 
-        if getattr(self.db.get_bind().dialect, "name", "") == "sqlite":
+        if self._is_sqlite():
             existing = self.db.execute(
                 text(
                     "SELECT 1 FROM inventory_cost_state "
@@ -77,7 +152,7 @@ class InventoryCostingService:
             "FROM inventory_cost_state "
             "WHERE tenant_id = :tid AND warehouse_id = :wid AND product_id = :pid"
         )
-        if getattr(self.db.get_bind().dialect, "name", "") != "sqlite":
+        if not self._is_sqlite():
             select_sql += " FOR UPDATE"
 
         row = self.db.execute(
@@ -275,6 +350,7 @@ class InventoryCostingService:
             params,
         ).fetchall()
 
+        updates: list[dict[str, Any]] = []
         for layer_id, layer_qty, layer_cost in layers:
             if remaining <= 0:
                 break
@@ -282,10 +358,8 @@ class InventoryCostingService:
             total_cogs += consume * Decimal(str(layer_cost))
             remaining -= consume
             new_layer_qty = Decimal(str(layer_qty)) - consume
-            self.db.execute(
-                text("UPDATE inventory_cost_layers SET remaining_qty = :q WHERE id = :id"),
-                {"q": float(new_layer_qty), "id": layer_id},
-            )
+            updates.append({"id": layer_id, "remaining_qty": float(new_layer_qty)})
+        self._bulk_update("inventory_cost_layers", updates, ("remaining_qty",))
 
         if remaining > 0 and not allow_negative:
             raise HTTPException(
@@ -466,3 +540,285 @@ class InventoryCostingService:
         if method == "lifo":
             return self._layer_inventory_value(tenant_id, warehouse_id=warehouse_id, order="lifo")
         raise ValueError(f"Unsupported costing method: {costing_method}")
+
+    # ── Batch API ─────────────────────────────────────────────────────────
+    #
+    # ``apply_moves`` applies many inbound/outbound moves (several products,
+    # several lines of the same product) with a fixed number of round trips:
+    # one multi-row state insert, one ordered SELECT ... FOR UPDATE for the
+    # state rows, one for the cost layers, and one bulk write per table.
+    # Consumption is computed in memory in move order, so the results match
+    # calling the single-move methods one after another.
+
+    def apply_moves(
+        self,
+        tenant_id: str,
+        moves: list[CostMove],
+        *,
+        costing_method: Literal["avg", "fifo", "lifo"] = "avg",
+    ) -> list[CostMoveResult]:
+        if not moves:
+            return []
+        method = (costing_method or "avg").lower()
+        use_layers = method in ("fifo", "lifo")
+        q = "0.000001"
+
+        initials: dict[tuple[str, str], CostMove] = {}
+        for move in moves:
+            initials.setdefault((str(move.warehouse_id), str(move.product_id)), move)
+        keys = sorted(initials)
+        self._ensure_state_rows(tenant_id, initials)
+        states = self._lock_state_rows(tenant_id, keys)
+        layers = self._lock_layers(tenant_id, keys) if use_layers else {}
+
+        new_layers: list[tuple[tuple[str, str], _Layer]] = []
+        now = datetime.now(UTC)
+        results: list[CostMoveResult] = []
+        for move in moves:
+            key = (str(move.warehouse_id), str(move.product_id))
+            state = states.get(key)
+            if state is None:
+                # Should not happen due to insert above; keep safe defaults.
+                state = states[key] = {"id": None, "qty": _dec(0, q), "avg": _dec(0, q)}
+            qty = move.qty
+            if move.direction == "in":
+                if use_layers:
+                    layer = _Layer(
+                        None,
+                        _normalize_lot(move.lot),
+                        move.expires_at,
+                        qty,
+                        move.unit_cost,
+                        (now, len(new_layers)),
+                    )
+                    layers.setdefault(key, []).append(layer)
+                    new_layers.append((key, layer))
+                new_qty = state["qty"] + qty
+                if new_qty > 0:
+                    new_avg = (state["qty"] * state["avg"] + qty * move.unit_cost) / new_qty
+                else:
+                    new_avg = _dec(0, q)
+                state["qty"] = _dec(new_qty, q)
+                state["avg"] = _dec(new_avg, q)
+                cogs = _dec(0, q)
+            else:
+                # Same order as apply_outbound_fifo/lifo: layers first, then the state check.
+                if use_layers:
+                    cogs = self._consume_memory_layers(layers.get(key, []), move, method)
+                if not move.allow_negative and state["qty"] < qty:
+                    raise HTTPException(status_code=400, detail="insufficient_stock")
+                if not use_layers:
+                    cogs = _dec(qty * state["avg"], q)
+                state["qty"] = _dec(state["qty"] - qty, q)
+            state["dirty"] = True
+            results.append(CostMoveResult(CostState(state["qty"], state["avg"]), cogs))
+
+        self._bulk_update(
+            "inventory_cost_state",
+            [
+                {"id": st["id"], "on_hand_qty": float(st["qty"]), "avg_cost": float(st["avg"])}
+                for st in states.values()
+                if st.get("dirty") and st["id"] is not None
+            ],
+            ("on_hand_qty", "avg_cost"),
+            touch_updated_at=True,
+        )
+        if use_layers:
+            self._write_layers(tenant_id, layers, new_layers, now)
+        return results
+
+    def _ensure_state_rows(self, tenant_id: str, initials: dict[tuple[str, str], CostMove]) -> None:
+        rows = [
+            {
+                "tid": tenant_id,
+                "wid": wid,
+                "pid": pid,
+                "q": float(move.initial_qty or Decimal("0")),
+                "avg": float(move.initial_avg_cost or Decimal("0")),
+            }
+            for (wid, pid), move in initials.items()
+        ]
+        if self._is_sqlite():
+            existing = {
+                (str(r[0]), str(r[1]))
+                for r in self.db.execute(
+                    text(
+                        "SELECT warehouse_id, product_id FROM inventory_cost_state "
+                        "WHERE tenant_id = :tid AND product_id IN :pids"
+                    ).bindparams(bindparam("pids", expanding=True)),
+                    {"tid": tenant_id, "pids": sorted({row["pid"] for row in rows})},
+                )
+            }
+            missing = [
+                {**row, "id": str(uuid4()), "updated_at": datetime.now(UTC)}
+                for row in rows
+                if (row["wid"], row["pid"]) not in existing
+            ]
+            if missing:
+                self.db.execute(
+                    text(
+                        "INSERT INTO inventory_cost_state("
+                        "id, tenant_id, warehouse_id, product_id, on_hand_qty, avg_cost, updated_at"
+                        ") VALUES (:id, :tid, :wid, :pid, :q, :avg, :updated_at)"
+                    ),
+                    missing,
+                )
+            return
+        self.db.execute(
+            text(
+                "INSERT INTO inventory_cost_state("
+                "tenant_id, warehouse_id, product_id, on_hand_qty, avg_cost"
+                ") VALUES (:tid, :wid, :pid, :q, :avg) "
+                "ON CONFLICT (tenant_id, warehouse_id, product_id) DO NOTHING"
+            ),
+            rows,
+        )
+
+    def _lock_state_rows(
+        self, tenant_id: str, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, Any]]:
+        sql = (
+            "SELECT id, warehouse_id, product_id, on_hand_qty, avg_cost "
+            "FROM inventory_cost_state "
+            "WHERE tenant_id = :tid AND warehouse_id IN :wids AND product_id IN :pids "
+            "ORDER BY warehouse_id, product_id"
+        )
+        if not self._is_sqlite():
+            sql += " FOR UPDATE"
+        wanted = set(keys)
+        states: dict[tuple[str, str], dict[str, Any]] = {}
+        for row in self.db.execute(
+            text(sql).bindparams(
+                bindparam("wids", expanding=True), bindparam("pids", expanding=True)
+            ),
+            {
+                "tid": tenant_id,
+                "wids": sorted({wid for wid, _ in keys}),
+                "pids": sorted({pid for _, pid in keys}),
+            },
+        ):
+            key = (str(row[1]), str(row[2]))
+            if key in wanted:
+                states[key] = {
+                    "id": str(row[0]),
+                    "qty": _dec(row[3], "0.000001"),
+                    "avg": _dec(row[4], "0.000001"),
+                }
+        return states
+
+    def _lock_layers(
+        self, tenant_id: str, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[_Layer]]:
+        self._ensure_layers_table()
+        sql = (
+            "SELECT id, warehouse_id, product_id, lot, expires_at, remaining_qty, unit_cost, "
+            "created_at FROM inventory_cost_layers "
+            "WHERE tenant_id = :tid AND warehouse_id IN :wids AND product_id IN :pids "
+            "AND remaining_qty > 0 "
+            "ORDER BY warehouse_id, product_id, created_at, id"
+        )
+        if not self._is_sqlite():
+            sql += " FOR UPDATE"
+        wanted = set(keys)
+        layers: dict[tuple[str, str], list[_Layer]] = {}
+        for row in self.db.execute(
+            text(sql).bindparams(
+                bindparam("wids", expanding=True), bindparam("pids", expanding=True)
+            ),
+            {
+                "tid": tenant_id,
+                "wids": sorted({wid for wid, _ in keys}),
+                "pids": sorted({pid for _, pid in keys}),
+            },
+        ):
+            key = (str(row[1]), str(row[2]))
+            if key not in wanted:
+                continue
+            bucket = layers.setdefault(key, [])
+            # Existing layers sort before in-batch ones, in the order returned.
+            bucket.append(
+                _Layer(
+                    row[0],
+                    row[3],
+                    _as_date(row[4]),
+                    Decimal(str(row[5])),
+                    Decimal(str(row[6])),
+                    (None, len(bucket)),
+                )
+            )
+        return layers
+
+    @staticmethod
+    def _consume_memory_layers(
+        layers: list[_Layer], move: CostMove, order: Literal["fifo", "lifo"]
+    ) -> Decimal:
+        lot = _normalize_lot(move.lot) if move.lot is not None else None
+        candidates = [
+            layer
+            for layer in layers
+            if layer.remaining > 0
+            and (move.lot is None or layer.lot == lot)
+            and (move.expires_at is None or layer.expires_at == move.expires_at)
+        ]
+        # Existing layers (seq[0] is None) are older than the ones added in this batch.
+        candidates.sort(key=lambda layer: (layer.seq[0] is not None, layer.seq[1]))
+        if order == "lifo":
+            candidates.reverse()
+
+        remaining = move.qty
+        total_cogs = Decimal("0")
+        for layer in candidates:
+            if remaining <= 0:
+                break
+            consume = min(remaining, layer.remaining)
+            total_cogs += consume * layer.unit_cost
+            remaining -= consume
+            layer.remaining -= consume
+            layer.dirty = True
+
+        if remaining > 0 and not move.allow_negative:
+            raise HTTPException(
+                status_code=400,
+                detail="insufficient_stock_fifo" if order == "fifo" else "insufficient_stock_lifo",
+            )
+        return _dec(total_cogs, "0.000001")
+
+    def _write_layers(
+        self,
+        tenant_id: str,
+        layers: dict[tuple[str, str], list[_Layer]],
+        new_layers: list[tuple[tuple[str, str], _Layer]],
+        created_at: datetime,
+    ) -> None:
+        self._bulk_update(
+            "inventory_cost_layers",
+            [
+                {"id": layer.id, "remaining_qty": float(layer.remaining)}
+                for bucket in layers.values()
+                for layer in bucket
+                if layer.dirty and layer.id is not None
+            ],
+            ("remaining_qty",),
+        )
+        if new_layers:
+            self.db.execute(
+                text(
+                    "INSERT INTO inventory_cost_layers "
+                    "(tenant_id, warehouse_id, product_id, lot, expires_at, remaining_qty, "
+                    "unit_cost, created_at) "
+                    "VALUES (:tid, :wid, :pid, :lot, :exp, :qty, :cost, :created_at)"
+                ),
+                [
+                    {
+                        "tid": tenant_id,
+                        "wid": wid,
+                        "pid": pid,
+                        "lot": layer.lot,
+                        "exp": layer.expires_at,
+                        "qty": float(layer.remaining),
+                        "cost": float(layer.unit_cost),
+                        "created_at": created_at,
+                    }
+                    for (wid, pid), layer in new_layers
+                ],
+            )
@@ -8,6 +8,8 @@ from uuid import UUID
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.services.sequences import next_sequence_number
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,9 +42,8 @@ def assign_doc_number(
     if year is None:
         year = datetime.now().year
 
-    # Transacción anidada para locks
+    # Transacción anidada: si falla la asignación no se pierde la del caller
     with db.begin_nested():
-        # Buscar serie activa con lock FOR UPDATE
         query = text(
             """
             SELECT id, name, current_no, reset_policy
@@ -55,7 +56,6 @@ def assign_doc_number(
               CASE WHEN register_id = CAST(:register_id AS uuid) THEN 0 ELSE 1 END,
               created_at DESC
             LIMIT 1
-            FOR UPDATE
         """
         )
 
@@ -74,37 +74,48 @@ def assign_doc_number(
                 f"doc_type={doc_type}, register_id={register_id}"
             )
 
-        series_id, series_name, current_no, reset_policy = result
+        series_id, series_name, _current_no, reset_policy = result
 
-        # Verificar si reset anual
         if reset_policy == "yearly":
-            # Buscar último número del año
-            check_query = text(
-                """
-                SELECT MAX(CAST(SPLIT_PART(numero, '-', 2) AS INTEGER)) as last_no
-                FROM invoices
-                WHERE series = :series_id
-                  AND EXTRACT(YEAR FROM fecha) = :year
-            """
+            # Contador por (serie, año); el MAX sobre facturas solo siembra el primero
+            def _last_invoice_no() -> int | None:
+                return db.execute(
+                    text(
+                        """
+                        SELECT MAX(CAST(SPLIT_PART(numero, '-', 2) AS INTEGER)) as last_no
+                        FROM invoices
+                        WHERE series = :series_id
+                          AND EXTRACT(YEAR FROM fecha) = :year
+                    """
+                    ),
+                    {"series_id": series_id, "year": year},
+                ).scalar()
+
+            next_no = next_sequence_number(
+                db,
+                tenant_id,
+                f"series:{doc_type}",
+                scope=str(series_id),
+                period=str(year),
+                seed=_last_invoice_no,
+            )
+            db.execute(
+                text("UPDATE doc_series SET current_no = :next_no WHERE id = :series_id"),
+                {"next_no": next_no, "series_id": series_id},
             )
-            last_no_result = db.execute(check_query, {"series_id": series_id, "year": year}).first()
-
-            if last_no_result and last_no_result[0]:
-                next_no = last_no_result[0] + 1
-            else:
-                next_no = 1
         else:
-            next_no = current_no + 1
-
-        # Actualizar contador
-        update_query = text(
-            """
-            UPDATE doc_series
-            SET current_no = :next_no
-            WHERE id = :series_id
-        """
-        )
-        db.execute(update_query, {"next_no": next_no, "series_id": series_id})
+            # La propia fila de la serie es el contador (editable desde admin)
+            next_no = db.execute(
+                text(
+                    """
+                    UPDATE doc_series
+                    SET current_no = current_no + 1
+                    WHERE id = :series_id
+                    RETURNING current_no
+                """
+                ),
+                {"series_id": series_id},
+            ).scalar()
 
         # Formatear número: SERIE-NNNN
         formatted_number = f"{series_name}-{next_no:04d}"
@@ -0,0 +1,153 @@
+"""
+Sequence allocator - Contadores de numeración sin huecos.
+
+Un contador por (tenant, doc_type, scope, period) en la tabla
+``sequence_counters``. Cada asignación es un único ``UPDATE ... RETURNING``
+sobre esa fila: el lock de fila serializa solo a quien numera el mismo
+contador (p.ej. la misma caja) y se libera al COMMIT; si la transacción hace
+ROLLBACK el incremento se deshace, por lo que no quedan huecos.
+
+- ``scope``: sub-contador dentro del tenant (ID de caja/registro, serie...).
+  ``""`` = contador único del tenant.
+- ``period``: clave de reinicio (``"2026"``, ``"202610"``). ``""`` = nunca.
+- ``seed``: callable que devuelve el último número ya emitido antes de existir
+  el contador (numeración legacy). Solo se invoca al crear la fila, de modo
+  que el escaneo histórico ocurre una vez por contador y no en cada documento.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+MAX_BLOCK_SIZE = 1000
+
+_UPDATE_SQL = text(
+    """
+    UPDATE sequence_counters
+    SET last_number = last_number + :n,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE tenant_id = :tenant_id
+      AND doc_type = :doc_type
+      AND scope = :scope
+      AND period = :period
+    RETURNING last_number
+    """
+)
+
+_INSERT_SQL = text(
+    """
+    INSERT INTO sequence_counters (tenant_id, doc_type, scope, period, last_number, updated_at)
+    VALUES (:tenant_id, :doc_type, :scope, :period, :start + :n, CURRENT_TIMESTAMP)
+    ON CONFLICT (tenant_id, doc_type, scope, period)
+    DO UPDATE SET
+        last_number = sequence_counters.last_number + :n,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING last_number
+    """
+)
+
+
+class SequenceBlock(NamedTuple):
+    """Rango ``[first, last]`` reservado de un contador."""
+
+    first: int
+    last: int
+
+    def __len__(self) -> int:
+        return self.last - self.first + 1
+
+
+def _params(tenant_id: str | UUID, doc_type: str, scope: str, period: str, n: int) -> dict:
+    return {
+        "tenant_id": str(tenant_id),
+        "doc_type": doc_type,
+        "scope": scope or "",
+        "period": period or "",
+        "n": n,
+    }
+
+
+def reserve_sequence_block(
+    db: Session,
+    tenant_id: str | UUID,
+    doc_type: str,
+    size: int,
+    *,
+    scope: str = "",
+    period: str = "",
+    seed: Callable[[], int | None] | None = None,
+) -> SequenceBlock:
+    """
+    Reserva ``size`` números consecutivos (pre-asignación para cajas offline).
+
+    El bloque queda asignado al confirmar la transacción del caller.
+
+    Raises:
+        ValueError: Si ``size`` está fuera de ``1..MAX_BLOCK_SIZE``
+    """
+    if size < 1 or size > MAX_BLOCK_SIZE:
+        raise ValueError(f"size debe estar entre 1 y {MAX_BLOCK_SIZE}")
+
+    params = _params(tenant_id, doc_type, scope, period, size)
+    last = db.execute(_UPDATE_SQL, params).scalar()
+    if last is None:
+        start = int((seed() if seed is not None else None) or 0)
+        # ON CONFLICT cubre la carrera de dos primeras asignaciones simultáneas
+        last = db.execute(_INSERT_SQL, {**params, "start": start}).scalar()
+        logger.info(
+            "Contador creado: %s/%s/%s (tenant=%s, desde %s)",
+            doc_type,
+            scope or "-",
+            period or "-",
+            str(tenant_id)[:8],
+            start,
+        )
+    last = int(last)
+    return SequenceBlock(first=last - size + 1, last=last)
+
+
+def next_sequence_number(
+    db: Session,
+    tenant_id: str | UUID,
+    doc_type: str,
+    *,
+    scope: str = "",
+    period: str = "",
+    seed: Callable[[], int | None] | None = None,
+) -> int:
+    """Asigna el siguiente número del contador (ver `reserve_sequence_block`)."""
+    return reserve_sequence_block(
+        db, tenant_id, doc_type, 1, scope=scope, period=period, seed=seed
+    ).first
+
+
+def current_sequence_number(
+    db: Session,
+    tenant_id: str | UUID,
+    doc_type: str,
+    *,
+    scope: str = "",
+    period: str = "",
+) -> int:
+    """Último número asignado (0 si el contador aún no existe). No bloquea."""
+    value = db.execute(
+        text(
+            """
+            SELECT last_number FROM sequence_counters
+            WHERE tenant_id = :tenant_id
+              AND doc_type = :doc_type
+              AND scope = :scope
+              AND period = :period
+            """
+        ),
+        _params(tenant_id, doc_type, scope, period, 0),
+    ).scalar()
+    return int(value or 0)
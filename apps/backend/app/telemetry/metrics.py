@@ -9,12 +9,16 @@ _REQUEST_LATENCY = None
 _ACTIVE_REQUESTS = None
 _DB_QUERY_COUNT = None
 _DB_QUERY_LATENCY = None
+_OUTBOX_EVENTS = None
+_OUTBOX_LAG = None
+_OUTBOX_BATCH_LATENCY = None
 
 
 def _ensure_metrics():
     """Lazily initialize Prometheus metrics."""
     global _client, _REQUEST_COUNT, _REQUEST_LATENCY, _ACTIVE_REQUESTS
     global _DB_QUERY_COUNT, _DB_QUERY_LATENCY
+    global _OUTBOX_EVENTS, _OUTBOX_LAG, _OUTBOX_BATCH_LATENCY
 
     if _client is not None:
         return True
@@ -41,6 +45,21 @@ def _ensure_metrics():
             ["operation"],
             buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0],
         )
+        _OUTBOX_EVENTS = pc.Counter(
+            "outbox_events_total", "Outbox events dispatched", ["lane", "status"]
+        )
+        _OUTBOX_LAG = pc.Histogram(
+            "outbox_event_lag_seconds",
+            "Time from event creation to dispatch",
+            ["lane"],
+            buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0],
+        )
+        _OUTBOX_BATCH_LATENCY = pc.Histogram(
+            "outbox_batch_duration_seconds",
+            "Outbox batch processing time",
+            ["lane"],
+            buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+        )
         return True
     except ImportError:
         return False
@@ -62,6 +81,21 @@ def record_db_query(operation: str, duration: float) -> None:
     _DB_QUERY_LATENCY.labels(operation=operation).observe(duration)
 
 
+def record_outbox_batch(
+    lane: str, published: int, failed: int, lags: list[float], duration: float
+) -> None:
+    """Record one outbox dispatch batch (throughput, lag per event, batch time)."""
+    if not _ensure_metrics():
+        return
+    if published:
+        _OUTBOX_EVENTS.labels(lane=lane, status="published").inc(published)
+    if failed:
+        _OUTBOX_EVENTS.labels(lane=lane, status="failed").inc(failed)
+    for lag in lags:
+        _OUTBOX_LAG.labels(lane=lane).observe(lag)
+    _OUTBOX_BATCH_LATENCY.labels(lane=lane).observe(duration)
+
+
 def get_metrics() -> str:
     """Generate Prometheus metrics output."""
     if not _ensure_metrics():
@@ -134,6 +134,8 @@ def _load_all_models():
         "app.models.core.products",
         "app.models.inventory.warehouse",
         "app.models.accounting.chart_of_accounts",
+        "app.models.accounting.period",
+        "app.models.accounting.balance_snapshot",
         "app.models.einvoicing.country_settings",
         "app.models.einvoicing.einvoice",
         "app.models.finance.cash",
@@ -413,6 +415,16 @@ def db():
         # (e.g. `client`) may execute after other tests and still need tables.
 
 
+@pytest.fixture(autouse=True)
+def reset_local_cache():
+    """El L1 del cache vive en el proceso: no debe filtrar datos entre tests."""
+    from app.core.cache import invalidate_local_caches
+
+    invalidate_local_caches()
+    yield
+    invalidate_local_caches()
+
+
 @pytest.fixture(autouse=True)
 def clean_db_between_tests(db):
     engine = db.get_bind()
@@ -1097,6 +1109,75 @@ def _ensure_sqlite_stub_tables(engine):
                     """
                 )
             )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS sequence_counters (
+                        tenant_id TEXT NOT NULL,
+                        doc_type TEXT NOT NULL,
+                        scope TEXT NOT NULL DEFAULT '',
+                        period TEXT NOT NULL DEFAULT '',
+                        last_number INTEGER NOT NULL DEFAULT 0,
+                        updated_at TEXT,
+                        PRIMARY KEY (tenant_id, doc_type, scope, period)
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS pos_receipt_number_blocks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        tenant_id TEXT NOT NULL,
+                        register_id TEXT NOT NULL,
+                        first_no INTEGER NOT NULL,
+                        last_no INTEGER NOT NULL,
+                        reserved_by TEXT,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                    """
+                )
+            )
+            # Los contadores sobreviven al drop_all (no están en metadata)
+            conn.execute(text("DELETE FROM sequence_counters"))
+            conn.execute(text("DELETE FROM pos_receipt_number_blocks"))
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS kpi_hourly (
+                        tenant_id TEXT NOT NULL,
+                        day DATE NOT NULL,
+                        hour INTEGER NOT NULL,
+                        sales_total NUMERIC NOT NULL DEFAULT 0,
+                        receipts_count INTEGER NOT NULL DEFAULT 0,
+                        batches_completed INTEGER NOT NULL DEFAULT 0,
+                        produced_qty NUMERIC NOT NULL DEFAULT 0,
+                        waste_qty NUMERIC NOT NULL DEFAULT 0,
+                        waste_value NUMERIC NOT NULL DEFAULT 0,
+                        updated_at TEXT,
+                        PRIMARY KEY (tenant_id, day, hour)
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE TABLE IF NOT EXISTS kpi_daily (
+                        tenant_id TEXT NOT NULL,
+                        day DATE NOT NULL,
+                        critical_stock_items INTEGER NOT NULL DEFAULT 0,
+                        critical_sale_items INTEGER NOT NULL DEFAULT 0,
+                        critical_raw_items INTEGER NOT NULL DEFAULT 0,
+                        updated_at TEXT,
+                        PRIMARY KEY (tenant_id, day)
+                    )
+                    """
+                )
+            )
+            conn.execute(text("DELETE FROM kpi_hourly"))
+            conn.execute(text("DELETE FROM kpi_daily"))
             conn.execute(
                 text(
                     """
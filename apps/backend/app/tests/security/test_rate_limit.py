@@ -10,7 +10,7 @@ from app.middleware.endpoint_rate_limit import EndpointRateLimiter
 
 
 def _limiter():
-    # app=None: BaseHTTPMiddleware solo lo guarda; _check_memory no lo usa.
+    # app=None: el middleware ASGI solo lo guarda; _check_memory no lo usa.
     return EndpointRateLimiter(app=None, limits={"/x": (2, 60)}, redis_url=None)
 
 
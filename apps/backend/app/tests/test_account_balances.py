@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.models.accounting.chart_of_accounts import ChartOfAccounts, JournalEntryLine
+from app.models.accounting.period import AccountingPeriod
+from app.modules.accounting.application.balances import (
+    account_totals,
+    freeze_period,
+    rebuild_account_balances,
+)
+from app.modules.accounting.application.journal_service import JournalLineIn, create_posted_entry
+from app.modules.accounting.interface.http.tenant import (
+    PeriodActionPayload,
+    close_period,
+    get_balance_sheet,
+    get_profit_loss,
+    open_period,
+)
+
+
+def _account(db, tenant_id, code, name, type_):
+    acct = ChartOfAccounts(
+        tenant_id=tenant_id, code=code, name=name, type=type_, level=3, can_post=True, active=True
+    )
+    db.add(acct)
+    db.flush()
+    return acct
+
+
+def _sale(db, tenant_id, cash, revenue, day: date, amount: str):
+    return create_posted_entry(
+        db,
+        tenant_id=tenant_id,
+        entry_date=day,
+        description="Venta",
+        ref_doc_type="test",
+        ref_doc_id=tenant_id,
+        created_by=None,
+        lines=[
+            JournalLineIn(account_id=cash.id, debit=Decimal(amount), credit=Decimal("0")),
+            JournalLineIn(account_id=revenue.id, debit=Decimal("0"), credit=Decimal(amount)),
+        ],
+    )
+
+
+@pytest.fixture
+def ledger(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id"]
+    cash = _account(db, tenant_id, "570", "Caja", "ASSET")
+    equity = _account(db, tenant_id, "100", "Capital", "EQUITY")
+    revenue = _account(db, tenant_id, "700", "Ventas", "INCOME")
+    _sale(db, tenant_id, cash, revenue, date(2026, 1, 10), "100.00")
+    _sale(db, tenant_id, cash, revenue, date(2026, 1, 20), "50.00")
+    _sale(db, tenant_id, cash, revenue, date(2026, 2, 5), "25.00")
+    db.commit()
+    return tenant_id, cash, equity, revenue
+
+
+def test_posting_updates_balances_incrementally(db, ledger):
+    tenant_id, cash, _, revenue = ledger
+    db.refresh(cash)
+    db.refresh(revenue)
+
+    assert cash.debit_balance == Decimal("175.00") and cash.balance == Decimal("175.00")
+    assert revenue.credit_balance == Decimal("175.00") and revenue.balance == Decimal("-175.00")
+    assert rebuild_account_balances(db, tenant_id) == ([], 0)
+
+
+def test_reports_use_frozen_snapshot_for_closed_months(db, ledger):
+    tenant_id, cash, _, revenue = ledger
+    claims = {"tenant_id": str(tenant_id), "user_id": None}
+    close_period(PeriodActionPayload(year=2026, month=1), db, claims)
+
+    # Las líneas de enero ya no se releen: alterarlas no cambia los reportes
+    db.execute(
+        update(JournalEntryLine)
+        .where(JournalEntryLine.account_id == revenue.id)
+        .values(credit=Decimal("1.00"))
+    )
+    db.flush()
+
+    pl = get_profit_loss(
+        date_from=date(2026, 1, 1),
+        date_to=date(2026, 2, 28),
+        include_draft=False,
+        db=db,
+        claims=claims,
+    )
+    # enero (snapshot) 150 + febrero (línea alterada, período abierto) 1
+    assert pl.total_income == Decimal("151.00")
+
+    bs = get_balance_sheet(as_of_date=date(2026, 2, 28), db=db, claims=claims)
+    assert bs.total_assets == Decimal("175.00")
+
+    totals = account_totals(db, tenant_id, date_to=date(2026, 1, 31), account_ids=[cash.id])
+    assert totals[cash.id] == (Decimal("150.00"), Decimal("0"))
+
+    # El período cerrado rechaza nuevos asientos
+    with pytest.raises(HTTPException) as exc:
+        _sale(db, tenant_id, cash, revenue, date(2026, 1, 25), "10.00")
+    assert exc.value.status_code == 409
+
+    # Reabrir descarta el snapshot: vuelve a leer las líneas
+    open_period(PeriodActionPayload(year=2026, month=1), db, claims)
+    pl = get_profit_loss(
+        date_from=date(2026, 1, 1),
+        date_to=date(2026, 1, 31),
+        include_draft=False,
+        db=db,
+        claims=claims,
+    )
+    assert pl.total_income == Decimal("2.00")
+
+
+def test_rebuild_detects_and_fixes_drift(db, ledger):
+    tenant_id, cash, _, _ = ledger
+    db.add(AccountingPeriod(tenant_id=tenant_id, year=2026, month=1, status="CLOSED"))
+    db.execute(update(ChartOfAccounts).where(ChartOfAccounts.id == cash.id).values(debit_balance=0))
+    db.flush()
+
+    mismatches, _ = rebuild_account_balances(db, tenant_id)
+    assert [m.code for m in mismatches] == ["570"]
+
+    mismatches, regenerated = rebuild_account_balances(db, tenant_id, fix=True)
+    assert len(mismatches) == 1 and regenerated == 1
+    assert rebuild_account_balances(db, tenant_id) == ([], 0)
+    assert freeze_period(db, tenant_id, 2026, 1) == 2
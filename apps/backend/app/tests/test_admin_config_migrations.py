@@ -1,5 +1,3 @@
-import asyncio
-
 from fastapi import BackgroundTasks
 from sqlalchemy import text
 
@@ -32,9 +30,7 @@ def test_legacy_execute_delegates_to_admin_ops_runner(db, monkeypatch):
 
     monkeypatch.setattr(admin_ops, "trigger_migrations", fake_trigger_migrations)
 
-    response = asyncio.run(
-        legacy_migrations.execute_migrations(background_tasks=BackgroundTasks(), db=db)
-    )
+    response = legacy_migrations.execute_migrations(background_tasks=BackgroundTasks(), db=db)
 
     assert response.ok is True
     assert response.job_id == "run-123"
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import ast
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.config.database import make_async_db_url
+
+APP_DIR = Path(__file__).resolve().parents[1]
+_ROUTE_METHODS = {"get", "post", "put", "patch", "delete"}
+
+
+def test_make_async_db_url_swaps_driver_and_ssl():
+    assert (
+        make_async_db_url("postgresql+psycopg2://u:p@db:5432/gestiq?sslmode=require")
+        == "postgresql+asyncpg://u:p@db:5432/gestiq?ssl=require"
+    )
+    assert make_async_db_url("postgresql://u:p@db/gestiq") == "postgresql+asyncpg://u:p@db/gestiq"
+    assert make_async_db_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def _blocking_async_handlers() -> list[str]:
+    """Handlers ``async def`` con la Session síncrona que no esperan nada."""
+    offenders = []
+    for path in APP_DIR.rglob("*.py"):
+        if "tests" in path.parts:
+            continue
+        source = path.read_text(encoding="utf-8-sig")
+        if "async def" not in source or "get_db" not in source:
+            continue
+        for node in ast.walk(ast.parse(source)):
+            if not isinstance(node, ast.AsyncFunctionDef):
+                continue
+            is_route = any(
+                isinstance(d, ast.Call)
+                and isinstance(d.func, ast.Attribute)
+                and d.func.attr in _ROUTE_METHODS
+                for d in node.decorator_list
+            )
+            defaults = node.args.defaults + [d for d in node.args.kw_defaults if d]
+            uses_sync_db = any("Depends(get_db)" in ast.unparse(d) for d in defaults)
+            awaits = any(
+                isinstance(n, (ast.Await, ast.AsyncFor, ast.AsyncWith)) for n in ast.walk(node)
+            )
+            if is_route and uses_sync_db and not awaits:
+                offenders.append(f"{path.relative_to(APP_DIR)}:{node.lineno}:{node.name}")
+    return offenders
+
+
+def test_sync_session_handlers_run_in_threadpool():
+    # Un `async def` con Session síncrona bloquea el event loop en cada query:
+    # declararlo `def` (FastAPI lo ejecuta en el threadpool).
+    assert _blocking_async_handlers() == []
+
+
+def test_get_db_session_yields_working_async_session(db):
+    pytest.importorskip("aiosqlite")
+    from app.config import database
+
+    async def _run():
+        async with database.get_db_session("00000000-0000-0000-0000-000000000001") as session:
+            assert session.info["tenant_id"] == "00000000-0000-0000-0000-000000000001"
+            return (await session.execute(text("SELECT 41 + 1"))).scalar()
+
+    try:
+        assert asyncio.run(_run()) == 42
+    finally:
+        asyncio.run(database.get_async_engine().dispose())
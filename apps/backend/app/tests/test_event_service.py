@@ -109,3 +109,122 @@ class TestEventOutboxWorker:
         # Should not error on empty outbox
         count = poll_and_process(batch_size=10)
         assert count >= 0
+
+    def test_profit_events_coalesced_per_tenant_day(self, db, monkeypatch):
+        from app.modules.reports.application import recalculation_service
+        from app.services.event_service import EventService
+        from app.workers.event_outbox_worker import _handle_profit_events
+
+        calls = []
+        for name in ("recalculate_daily", "apply_orders_delta", "refresh_expenses"):
+            monkeypatch.setattr(
+                recalculation_service.RecalculationService,
+                name,
+                lambda self, tid, day, location_id=None, _name=name: calls.append(
+                    (_name, tid, day)
+                ),
+            )
+
+        tid = TestEventService()._make_tenant(db)
+        events = [
+            EventService.publish(
+                db, tid, "pos.receipt.documents_created", payload={"receipt_id": "x", "date": day}
+            )
+            for day in ("2026-06-01", "2026-06-01", "2026-06-01", "2026-06-02")
+        ]
+        events.append(EventService.publish(db, tid, "expense.posted", {"date": "2026-06-02"}))
+        events.append(EventService.publish(db, tid, "sale.updated", {"date": "2026-06-03"}))
+        events.append(EventService.publish(db, tid, "sale.posted", {"date": "2026-06-03"}))
+        db.flush()
+
+        failures = _handle_profit_events(db, events)
+
+        assert failures == {}
+        assert sorted((name, day.isoformat()) for name, _tid, day in calls) == [
+            ("apply_orders_delta", "2026-06-01"),
+            ("apply_orders_delta", "2026-06-02"),
+            ("recalculate_daily", "2026-06-03"),
+            ("refresh_expenses", "2026-06-02"),
+        ]
+
+
+class TestOutboxDispatch:
+    def _commit_events(self, db, event_type: str, count: int):
+        from app.services.event_service import EventService
+
+        tid = TestEventService()._make_tenant(db)
+        events = [EventService.publish(db, tid, event_type, {"n": n}) for n in range(count)]
+        db.commit()
+        return [e.id for e in events]
+
+    def test_mark_failed_schedules_backoff(self, db):
+        from datetime import UTC, datetime, timedelta
+
+        from app.services.event_service import EventService, retry_delay
+
+        assert [retry_delay(n).total_seconds() for n in (1, 2, 3)] == [5, 10, 20]
+        assert retry_delay(30) == timedelta(minutes=15)
+
+        tid = TestEventService()._make_tenant(db)
+        event = EventService.publish(db, tid, "backoff.event", payload={})
+        db.flush()
+        EventService.mark_failed(db, event.id, "boom")
+        db.flush()
+        db.refresh(event)
+        due = event.next_attempt_at.replace(tzinfo=event.next_attempt_at.tzinfo or UTC)
+        assert due > datetime.now(UTC)
+        assert event.id not in {e.id for e in EventService.get_unpublished(db, limit=1000)}
+
+        event.next_attempt_at = datetime.now(UTC) - timedelta(seconds=1)
+        db.flush()
+        claimed = EventService.claim_batch(db, limit=1000, event_types={"backoff.event"})
+        assert event.id in {e.id for e in claimed}
+
+    def test_dispatch_batch_claims_only_its_lane(self, db, monkeypatch):
+        import uuid
+
+        from app.models.core.event_outbox import EventOutbox
+        from app.workers import event_outbox_worker as worker
+
+        ok_type, bad_type = f"ok.{uuid.uuid4().hex}", f"bad.{uuid.uuid4().hex}"
+        seen = []
+
+        def _fail(event):
+            raise RuntimeError("handler down")
+
+        monkeypatch.setitem(worker.EVENT_HANDLERS, ok_type, [lambda e: seen.append(e.id)])
+        monkeypatch.setitem(worker.EVENT_HANDLERS, bad_type, [_fail])
+        ok_ids = self._commit_events(db, ok_type, 3)
+        bad_ids = self._commit_events(db, bad_type, 2)
+
+        result = worker.dispatch_batch(batch_size=2, event_types=frozenset({ok_type}))
+        assert result == worker.BatchResult(claimed=2, published=2, failed=0)
+        result = worker.dispatch_batch(batch_size=10, event_types=frozenset({ok_type, bad_type}))
+        assert result == worker.BatchResult(claimed=3, published=1, failed=2)
+        assert set(seen) == set(ok_ids)
+
+        db.expire_all()
+        failed = db.query(EventOutbox).filter(EventOutbox.id.in_(bad_ids)).all()
+        assert {(e.retry_count, e.published_at is None) for e in failed} == {(1, True)}
+        assert all(e.next_attempt_at is not None for e in failed)
+        # En backoff: el siguiente lote no los vuelve a reclamar
+        assert worker.dispatch_batch(event_types=frozenset({bad_type})).claimed == 0
+
+    def test_notifications_wake_only_the_matching_lane(self):
+        from app.workers.outbox_dispatcher import OutboxDispatcher
+
+        dispatcher = OutboxDispatcher(workers=3)
+        runners = {r.lane.name: r for r in dispatcher.runners}
+        assert runners["default"].lane.concurrency == 3
+        assert runners["profit"].lane.event_types >= {
+            "sale.posted",
+            "pos.receipt.documents_created",
+        }
+        assert runners["pos_documents"].lane.event_types == {"pos.receipt.completed"}
+
+        dispatcher.wake({"sale.posted"})
+        assert runners["profit"].wake.is_set()
+        assert not runners["default"].wake.is_set()
+
+        dispatcher.wake({"invoice.issued"})
+        assert runners["default"].wake.is_set()
@@ -0,0 +1,101 @@
+"""Tests for the historical bulk loader (vectorized prepare + chunked load)"""
+
+import json
+import uuid
+from datetime import date
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from app.modules.historical.application.bulk_loader import (
+    DAILY_SALES_SPEC,
+    SALES_SPEC,
+    HistBulkLoader,
+    iter_masters,
+    prepare_frame,
+)
+
+
+def _sales_df():
+    return pd.DataFrame(
+        {
+            "Fecha": ["2024-01-05", "not a date", "2024-02-10", None],
+            "Cliente": ["  Ana ", "Luis", "", "Ana"],
+            "Producto": ["Pan", "Pan", "Tarta", "Pan"],
+            "Cantidad": ["3", "x", 2, 1],
+            "Total": [4.5, 1.0, float("inf"), 2e13],
+        }
+    )
+
+
+class TestPrepareFrame:
+    def test_coerces_and_validates_columns(self):
+        prepared = prepare_frame(_sales_df(), SALES_SPEC)
+
+        assert prepared.errors == [
+            {"row": 2, "error": "missing_date"},
+            {"row": 4, "error": "missing_date"},
+        ]
+        valid = prepared.valid
+        assert list(valid["row"]) == [1, 3]
+        assert list(valid["date"]) == [date(2024, 1, 5), date(2024, 2, 10)]
+        assert list(valid["customer_name"]) == ["Ana", None]
+        assert list(valid["quantity"]) == [3.0, 2.0]
+        # Non-finite amounts fall back to 0 like the row-by-row path did
+        assert list(valid["total"]) == [4.5, 0.0]
+        assert list(valid["currency"]) == ["USD", "USD"]
+
+    def test_out_of_range_amount_is_reported(self):
+        df = _sales_df()
+        df.loc[3, "Fecha"] = "2024-03-01"
+        prepared = prepare_frame(df, SALES_SPEC)
+        assert {"row": 4, "error": "value_out_of_range:total"} in prepared.errors
+
+    def test_daily_sales_keep_last_row_per_date(self):
+        df = pd.DataFrame(
+            {
+                "fecha": ["2024-01-01", "2024-01-01", "2024-01-02"],
+                "total_ventas": [10, 20, 30],
+                "items": [1.9, 2.2, 3],
+            }
+        )
+        prepared = prepare_frame(df, DAILY_SALES_SPEC)
+        assert list(prepared.valid["sales_total"]) == [20.0, 30.0]
+        assert list(prepared.valid["total_items"]) == [2, 3]
+
+    def test_iter_masters_deduplicates_by_code_or_name(self):
+        prepared = prepare_frame(_sales_df(), SALES_SPEC)
+        masters = iter_masters(
+            prepared.frame,
+            [
+                ("product", "product_code", "product_name"),
+                ("client", "customer_code", "customer_name"),
+            ],
+        )
+        assert masters == [
+            {"et": "product", "c": "Pan", "n": "Pan"},
+            {"et": "product", "c": "Tarta", "n": "Tarta"},
+            {"et": "client", "c": "Ana", "n": "Ana"},
+            {"et": "client", "c": "Luis", "n": "Luis"},
+        ]
+
+
+class TestHistBulkLoader:
+    def test_load_streams_chunks_and_reports_progress(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = "sqlite"
+        df = pd.DataFrame({"fecha": ["2024-01-01"] * 11 + [None], "total": range(12)})
+        prepared = prepare_frame(df, SALES_SPEC)
+
+        imported, failed = HistBulkLoader(db, chunk_rows=5).load(
+            uuid.uuid4(), uuid.uuid4(), prepared, SALES_SPEC
+        )
+
+        assert (imported, failed) == (11, 1)
+        assert db.commit.call_count == 3
+        inserts = [c for c in db.execute.call_args_list if isinstance(c.args[1], list)]
+        assert [len(c.args[1]) for c in inserts] == [5, 5, 1]
+        progress = [c.args[1] for c in db.execute.call_args_list if "ir" in c.args[1]]
+        assert [(p["ir"], p["fr"]) for p in progress] == [(5, 1), (10, 1), (11, 1)]
+        report = json.loads(db.execute.call_args_list[-1].args[1]["err"])
+        assert report["errors"] == [{"row": 12, "error": "missing_date"}]
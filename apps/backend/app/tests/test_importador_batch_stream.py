@@ -0,0 +1,69 @@
+import json
+from uuid import uuid4
+
+from app.config.database import Base
+from app.core.pubsub_hub import hub
+from app.models.importador import ImpBatchImport, ImpBatchItem, ImpDocumento
+from app.modules.importador import crud
+from app.modules.importador.tasks import batch_channel, batch_snapshot, publish_batch_updates
+
+
+def _batch_with_documents(db, tenant_id, count: int):
+    Base.metadata.create_all(
+        bind=db.get_bind(),
+        tables=[ImpDocumento.__table__, ImpBatchImport.__table__, ImpBatchItem.__table__],
+    )
+    docs = [
+        ImpDocumento(
+            tenant_id=tenant_id,
+            nombre_archivo=f"factura-{n}.pdf",
+            tipo_archivo="PDF",
+            tamanio_bytes=1024,
+            estado="PROCESSING",
+        )
+        for n in range(count)
+    ]
+    batch = ImpBatchImport(tenant_id=tenant_id, estado="PROCESSING", total_items=count)
+    db.add_all([*docs, batch])
+    db.flush()
+    db.add_all(
+        ImpBatchItem(
+            id=uuid4(),
+            tenant_id=tenant_id,
+            batch_id=batch.id,
+            documento_id=doc.id,
+            nombre_archivo=doc.nombre_archivo,
+            tamanio_bytes=doc.tamanio_bytes,
+            orden=n,
+            estado="PROCESSING",
+        )
+        for n, doc in enumerate(docs)
+    )
+    db.commit()
+    return batch, docs
+
+
+async def test_batch_update_publishes_sequenced_item_deltas(db, tenant_minimal):
+    batch, docs = _batch_with_documents(db, tenant_minimal["tenant_id"], 3)
+
+    async with hub.subscription(batch_channel(batch.id)) as sub:
+        for doc, estado in ((docs[0], "REVIEW"), (docs[1], "FAILED")):
+            batch_ids = crud.touch_batch_items_for_document(db, doc.id, estado=estado)
+            for batch_id in batch_ids:
+                crud.refresh_batch_status(db, batch_id)
+            db.commit()
+            publish_batch_updates(db, batch_ids, doc.id)
+        first, second = [json.loads(await sub.get(timeout=1)) for _ in range(2)]
+
+    assert (first["type"], first["seq"], second["seq"]) == ("delta", 1, 2)
+    # Solo el ítem del documento que cambió, con el resumen del lote
+    assert [(i["documento_id"], i["estado"]) for i in first["items"]] == [
+        (str(docs[0].id), "REVIEW")
+    ]
+    assert (first["review_items"], first["processing_items"]) == (1, 2)
+    assert [i["estado"] for i in second["items"]] == ["FAILED"]
+    assert (second["failed_items"], second["estado"]) == (1, "PROCESSING")
+
+    snapshot = batch_snapshot(db, crud.get_batch_any_tenant(db, batch.id))
+    assert (snapshot["type"], snapshot["seq"]) == ("snapshot", 2)
+    assert [i["estado"] for i in snapshot["items"]] == ["REVIEW", "FAILED", "PROCESSING"]
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import zipfile
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException
+
+os.environ["DEBUG"] = "0"
+
+from app.models.importador import ImpDocumento
+from app.modules.importador import tasks, upload_service
+from app.modules.importador.batch_service import enqueue_async_batch
+
+
+@pytest.fixture
+def payload_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPORTADOR_PAYLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+async def _body(data: bytes, piece: int = 3):
+    for start in range(0, len(data), piece):
+        yield data[start : start + piece]
+
+
+def _append(session, offset: int, chunk: bytes, checksum: str | None = None):
+    return asyncio.run(
+        upload_service.append_chunk(
+            session,
+            offset=offset,
+            chunk_sha256=checksum or hashlib.sha256(chunk).hexdigest(),
+            body=_body(chunk),
+        )
+    )
+
+
+def _upload(tenant_id, filename: str, data: bytes, chunk_size: int):
+    session = upload_service.create_upload(
+        tenant_id=tenant_id,
+        user_id="test-user",
+        filename=filename,
+        size=len(data),
+        sha256=hashlib.sha256(data).hexdigest(),
+    )
+    for offset in range(0, len(data), chunk_size):
+        _append(session, offset, data[offset : offset + chunk_size])
+    return session
+
+
+def test_chunks_are_verified_and_upload_resumes_from_received_bytes(payload_dir, tenant_minimal):
+    data = b"%PDF-1.4\n" + bytes(range(256)) * 4
+    tenant_id = tenant_minimal["tenant_id"]
+    session = upload_service.create_upload(
+        tenant_id=tenant_id,
+        user_id="test-user",
+        filename="factura.pdf",
+        size=len(data),
+        sha256=hashlib.sha256(data).hexdigest(),
+    )
+    assert session.dir.parent == payload_dir / "_uploads"
+
+    assert _append(session, 0, data[:400])["received_bytes"] == 400
+    # Trozo corrupto: se descarta y el fichero vuelve al offset
+    with pytest.raises(HTTPException) as exc:
+        _append(session, 400, data[400:800], checksum="0" * 64)
+    assert exc.value.status_code == 422
+    # Sin huecos
+    with pytest.raises(HTTPException) as exc:
+        _append(session, 800, data[800:])
+    assert exc.value.status_code == 409
+
+    resumed = upload_service.get_upload(session.upload_id, tenant_id, "test-user")
+    assert resumed.received_bytes == 400
+    # Reintento del último trozo (respuesta perdida): idempotente
+    _append(resumed, 0, data[:400])
+    status = _append(resumed, 400, data[400:])
+    assert status["complete"] is True
+    assert resumed.data_path.read_bytes() == data
+    assert asyncio.run(upload_service.finalize_upload(resumed)) == hashlib.sha256(data).hexdigest()
+
+    with pytest.raises(HTTPException) as exc:
+        upload_service.get_upload(session.upload_id, tenant_id, "other-user")
+    assert exc.value.status_code == 404
+
+
+def test_completed_zip_upload_is_expanded_from_disk_and_moved_to_payloads(
+    db, tenant_minimal, payload_dir, monkeypatch
+):
+    queued: list[dict] = []
+
+    class FakeTask:
+        @staticmethod
+        def apply_async(*, kwargs, queue):
+            queued.append({"kwargs": kwargs, "queue": queue})
+
+    def fail_store_payload(doc_id, file_bytes):
+        raise AssertionError("chunked uploads must not be re-read into memory")
+
+    monkeypatch.setattr(tasks, "store_payload", fail_store_payload)
+    monkeypatch.setattr(tasks, "process_document_task", FakeTask())
+
+    csv_bytes = b"fecha,total\n2026-04-01,12.5\n"
+    pdf_bytes = b"%PDF-1.4\nfake\n"
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("ventas.csv", csv_bytes)
+        zf.writestr("ticket.pdf", pdf_bytes)
+    tenant_id = tenant_minimal["tenant_id"]
+    session = _upload(tenant_id, "lote.zip", zip_buffer.getvalue(), chunk_size=64)
+
+    result = asyncio.run(
+        enqueue_async_batch(
+            uploads=[session],
+            tenant_id=tenant_id,
+            user_id="test-user",
+            force=False,
+            recipe_snapshot_id=None,
+            db=db,
+        )
+    )
+
+    assert [item["nombre_archivo"] for item in result] == [
+        "lote.zip::ventas.csv",
+        "lote.zip::ticket.pdf",
+    ]
+    assert {item["kwargs"]["tipo_archivo"] for item in queued} == {"CSV", "PDF"}
+    docs = {
+        doc.nombre_archivo: doc
+        for doc in db.query(ImpDocumento).filter_by(tenant_id=tenant_id).all()
+    }
+    assert docs["lote.zip::ventas.csv"].hash_sha256 == hashlib.sha256(csv_bytes).hexdigest()
+    assert tasks.load_payload(str(docs["lote.zip::ventas.csv"].id)) == csv_bytes
+    assert tasks.load_payload(str(docs["lote.zip::ticket.pdf"].id)) == pdf_bytes
+
+    upload_service.discard_upload(session)
+    assert not session.dir.exists()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import time
+
+from app.modules.importador.services.extraction_cache import (
+    FilesystemExtractionCache,
+    RedisExtractionCache,
+    blob_digest,
+)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.ttl: dict[str, int] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttl[key] = ex
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        self.ttl[key] = ttl
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+
+def test_fs_cache_stores_blobs_as_raw_content_addressed_files(tmp_path):
+    cache = FilesystemExtractionCache(tmp_path)
+    image = b"\xff\xd8\xff-jpeg-bytes"
+
+    assert cache.put("k1", {"text": "hola"}, {"vision_image": image})
+    assert cache.put("k2", {"text": "otra"}, {"vision_image": image})
+
+    blob_path = cache.blob_path(blob_digest(image))
+    assert blob_path.read_bytes() == image
+    assert len(list((tmp_path / "blobs").rglob("*.bin"))) == 1
+    # Metadata is compressed and does not embed the image.
+    meta_raw = cache.meta_path("k1").read_bytes()
+    assert not meta_raw.startswith(b"{")
+    assert b"jpeg-bytes" not in meta_raw
+
+    meta, blobs = cache.get("k1")
+    assert meta["text"] == "hola"
+    assert blobs == {"vision_image": image}
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes_written"] > 0
+    assert stats["bytes_read"] >= len(image)
+
+
+def test_fs_cache_reads_plain_json_and_respects_ttl(tmp_path):
+    cache = FilesystemExtractionCache(tmp_path, compress=False, ttl_seconds=60)
+    cache.put("k", {"text": "plain"})
+    assert cache.meta_path("k").read_bytes().startswith(b"{")
+    assert cache.get("k")[0]["text"] == "plain"
+
+    cache.ttl_seconds = -1
+    assert cache.get("k") is None
+    assert not cache.meta_path("k").exists()
+
+
+def test_fs_cache_evicts_least_recently_used_over_size_cap(tmp_path):
+    cache = FilesystemExtractionCache(tmp_path, max_bytes=3200, compress=False)
+    for i in range(3):
+        cache.put(f"k{i}", {"text": "x" * 900})
+        past = time.time() - 100 + i
+        os.utime(cache.meta_path(f"k{i}"), (past, past))
+
+    cache.get("k0")  # refreshes k0, so k1 is now the oldest
+    cache.put("k3", {"text": "y" * 900})
+    cache.evict()
+
+    assert cache.get("k1") is None
+    assert cache.get("k0") is not None
+    assert cache.get("k3") is not None
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_fs_cache_entry_with_evicted_blob_is_a_miss(tmp_path):
+    cache = FilesystemExtractionCache(tmp_path)
+    cache.put("k", {"text": "t"}, {"vision_image": b"img"})
+    cache.blob_path(blob_digest(b"img")).unlink()
+
+    assert cache.get("k") is None
+
+
+def test_redis_cache_round_trip_with_sliding_ttl():
+    client = _FakeRedis()
+    cache = RedisExtractionCache(client, ttl_seconds=120)
+
+    cache.put("k", {"text": "redis"}, {"vision_image": b"img"})
+    assert client.data[f"importador:ocr:blob:{blob_digest(b'img')}"] == b"img"
+
+    client.ttl.clear()
+    meta, blobs = cache.get("k")
+    assert meta["text"] == "redis"
+    assert blobs["vision_image"] == b"img"
+    assert client.ttl["importador:ocr:meta:k"] == 120
@@ -571,6 +571,148 @@ def test_extract_pdf_uses_multiple_dpi_candidates_when_embedded_text_is_weak(mon
     assert "EXTRA" in result["text"]
 
 
+def _fake_multipage_fitz(page_texts: list[str], rendered: list[int]):
+    class FakePixmap:
+        def __init__(self, page_index: int):
+            self.width = page_index + 1
+            self.height = 2
+            self.samples = bytes([255, 255, 255] * self.width * self.height)
+
+    class FakePage:
+        def __init__(self, index: int):
+            self.index = index
+
+        def get_text(self, *args, **kwargs):
+            return page_texts[self.index]
+
+        def get_pixmap(self, dpi=300):
+            rendered.append(self.index)
+            return FakePixmap(self.index)
+
+    class FakeDoc:
+        def __init__(self):
+            self.pages = [FakePage(index) for index in range(len(page_texts))]
+
+        def __iter__(self):
+            return iter(self.pages)
+
+        def __getitem__(self, index):
+            return self.pages[index]
+
+        def __len__(self):
+            return len(self.pages)
+
+        def close(self):
+            return None
+
+    class FakeFitz:
+        @staticmethod
+        def open(stream=None, filetype=None):
+            del stream, filetype
+            return FakeDoc()
+
+    return FakeFitz()
+
+
+def _patch_multipage_ocr(monkeypatch, *, max_workers: int):
+    def fake_text_quality(text, ocr_runtime=None):
+        del ocr_runtime
+        if text.startswith("EMBEDDED"):
+            return {"score": 0.95, "words": 30.0, "chars": float(len(text))}
+        if text.startswith("OCR"):
+            return {"score": 0.9, "words": 8.0, "chars": float(len(text))}
+        return {"score": 0.05, "words": 1.0, "chars": float(len(text))}
+
+    monkeypatch.delenv("IMPORTADOR_OCR_PDF_WORKERS", raising=False)
+    monkeypatch.setattr(
+        ocr_service,
+        "_ocr_runtime_config",
+        lambda: {
+            "pdf_render_dpi": 240,
+            "weak_text_min_words": 2,
+            "weak_text_min_chars": 8,
+            "ocr_min_quality": 0.45,
+            "pdf_ocr_max_workers": max_workers,
+            "pdf_ocr_parallel_min_pages": 2,
+        },
+    )
+    monkeypatch.setattr(ocr_service, "_estimate_text_quality", fake_text_quality)
+    monkeypatch.setattr(
+        ocr_service,
+        "_ocr_image_candidates",
+        lambda img, allow_easyocr=True, allow_rescue_variants=True: (
+            f"OCR PAGE {img.width} TOTAL 5.30 CLIENTE"
+        ),
+    )
+
+
+def test_extract_pdf_ocrs_only_weak_pages_and_keeps_page_order(monkeypatch):
+    rendered: list[int] = []
+    fake_fitz = _fake_multipage_fitz(["borroso", "EMBEDDED factura total", "x"], rendered)
+    monkeypatch.setitem(__import__("sys").modules, "fitz", fake_fitz)
+    _patch_multipage_ocr(monkeypatch, max_workers=0)
+
+    result = asyncio.run(ocr_service._extract_pdf(b"%PDF-1.4 fake"))
+
+    assert result["format"] == "PDF_OCR"
+    assert result["page_texts"] == [
+        "OCR PAGE 1 TOTAL 5.30 CLIENTE",
+        "EMBEDDED factura total",
+        "OCR PAGE 3 TOTAL 5.30 CLIENTE",
+    ]
+    assert 1 not in rendered
+    assert set(result["page_timings_ms"]) == {"ocr_page_001", "ocr_page_003"}
+    assert result["vision_image_bytes"]
+
+
+def test_extract_pdf_fans_weak_pages_out_to_ocr_pool(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    rendered: list[int] = []
+    fake_fitz = _fake_multipage_fitz(["a", "b", "c", "EMBEDDED factura"], rendered)
+    monkeypatch.setitem(__import__("sys").modules, "fitz", fake_fitz)
+    _patch_multipage_ocr(monkeypatch, max_workers=3)
+    primed: list[dict] = []
+    monkeypatch.setattr(ocr_service, "prime_ocr_runtime_config", primed.append)
+    pool = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(ocr_service, "_get_pdf_ocr_pool", lambda max_workers: pool)
+
+    try:
+        result = asyncio.run(ocr_service._extract_pdf(b"%PDF-1.4 fake"))
+    finally:
+        pool.shutdown(wait=True)
+
+    assert len(primed) == 3
+    assert sorted(rendered) == [0, 1, 2]
+    assert result["page_texts"] == [
+        "OCR PAGE 1 TOTAL 5.30 CLIENTE",
+        "OCR PAGE 2 TOTAL 5.30 CLIENTE",
+        "OCR PAGE 3 TOTAL 5.30 CLIENTE",
+        "EMBEDDED factura",
+    ]
+    assert sorted(result["page_timings_ms"]) == ["ocr_page_001", "ocr_page_002", "ocr_page_003"]
+
+
+def test_extract_pdf_falls_back_to_serial_ocr_when_pool_fails(monkeypatch):
+    rendered: list[int] = []
+    fake_fitz = _fake_multipage_fitz(["a", "b"], rendered)
+    monkeypatch.setitem(__import__("sys").modules, "fitz", fake_fitz)
+    _patch_multipage_ocr(monkeypatch, max_workers=2)
+
+    def broken_pool(max_workers):
+        raise RuntimeError("no pool")
+
+    monkeypatch.setattr(ocr_service, "_get_pdf_ocr_pool", broken_pool)
+
+    result = asyncio.run(ocr_service._extract_pdf(b"%PDF-1.4 fake"))
+
+    assert result["page_texts"] == [
+        "OCR PAGE 1 TOTAL 5.30 CLIENTE",
+        "OCR PAGE 2 TOTAL 5.30 CLIENTE",
+    ]
+    assert rendered == [0, 1]
+
+
 def test_extract_excel_uses_runtime_limits(monkeypatch):
     monkeypatch.setattr(
         ocr_service,
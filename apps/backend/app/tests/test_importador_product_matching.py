@@ -204,3 +204,119 @@ class TestScoreProductCandidate:
         score, reason, _ = _score_product_candidate("Harina de Trigo", product)
         assert score == pytest.approx(0.99)
         assert reason == "alias_exact"
+
+
+# ── ProductMatchIndex ──────────────────────────────────────────────────────
+
+
+class TestProductMatchIndex:
+    """El índice solo recorta candidatos: el ranking debe coincidir con fuerza bruta."""
+
+    @staticmethod
+    def _product(name, *, aliases=None, metadata=None, sku=None):
+        from uuid import uuid4
+
+        from app.modules.importador.services.product_match_index import IndexedProduct
+
+        return IndexedProduct(
+            id=uuid4(),
+            name=name,
+            sku=sku,
+            unit="uds",
+            stock=0.0,
+            product_metadata=metadata or {},
+            import_aliases=aliases or [],
+            updated_at=None,
+        )
+
+    def _catalog(self):
+        names = [
+            "Harina de Trigo 50 kg",
+            "Harina Integral",
+            "Azucar Blanca 1kg",
+            "Azucar Morena",
+            "Aceite de Oliva Extra Virgen",
+            "Aceite Girasol 5 l",
+            "Levadura Fresca",
+            "Sal Fina",
+            "Mantequilla sin sal",
+            "Leche Entera 1 l",
+            "Huevos Docena",
+            "Chocolate Cobertura 70%",
+        ]
+        products = [self._product(name) for name in names]
+        products.append(
+            self._product(
+                "Queso",
+                aliases=[{"name": "QUESO FRESCO PASTEURIZADO", "factor": 2.0}],
+                metadata={"supplier_refs": ["REF-QF-9"]},
+            )
+        )
+        # Relleno para que el recorte de candidatos tenga efecto real.
+        products.extend(self._product(f"Articulo generico {i:04d}") for i in range(400))
+        return products
+
+    @staticmethod
+    def _brute_force(products, description, supplier_ref=None):
+        ranked = []
+        for product in products:
+            score, reason, factor = _score_product_candidate(
+                description, product, supplier_ref=supplier_ref
+            )
+            if score > 0:
+                ranked.append((score, reason or "candidate", factor, product))
+        ranked.sort(key=lambda row: (-row[0], getattr(row[3], "name", "")))
+        return ranked
+
+    def test_index_ranking_matches_brute_force(self):
+        from app.modules.importador.services.product_match_index import ProductMatchIndex
+        from app.modules.importador.services.product_matching import _rank_product_candidates
+
+        products = self._catalog()
+        index = ProductMatchIndex("tenant")
+        for product in products:
+            index.add(product)
+
+        cases = [
+            ("HARINA DE TRIGO 50KG", None),
+            ("harina integral molida", None),
+            ("Azucar blanca refinada 1 kg", None),
+            ("Aceite oliva virgen extra", None),
+            ("queso fresco pasteurizado", None),
+            ("producto sin descripcion clara", "REF-QF-9"),
+            ("Chocolate cobertura negro", None),
+        ]
+        for description, supplier_ref in cases:
+            # Fuzzy hits without a single shared trigram (~0.41, pure character
+            # noise) are pruned on purpose; everything above must be identical.
+            expected = [
+                row
+                for row in self._brute_force(products, description, supplier_ref)
+                if row[0] >= 0.45
+            ][:5]
+            actual = [
+                row
+                for row in _rank_product_candidates(index, description, supplier_ref)
+                if row[0] >= 0.45
+            ][:5]
+            assert [(row[0], row[1], row[3].id) for row in actual] == [
+                (row[0], row[1], row[3].id) for row in expected
+            ], description
+            assert len(index.candidates(description, supplier_ref)) < len(products)
+
+    def test_index_add_and_remove_keep_lookups_consistent(self):
+        from app.modules.importador.services.product_match_index import ProductMatchIndex
+
+        index = ProductMatchIndex("tenant")
+        product = self._product("Levadura Fresca", metadata={"supplier_ref": "LV-1"})
+        index.add(product)
+        assert [p.id for p in index.candidates("", "LV-1")] == [product.id]
+
+        product.import_aliases = [{"name": "levadura prensada", "factor": 1.0}]
+        index.add(product)
+        assert len(index) == 1
+        assert product.id in {p.id for p in index.candidates("Levadura prensada")}
+
+        index.remove(str(product.id))
+        assert len(index) == 0
+        assert index.candidates("Levadura prensada", "LV-1") == []
@@ -739,3 +739,45 @@ def test_save_document_to_expense_falls_back_to_detected_payment_method_from_doc
 
     assert expense is not None
     assert expense.payment_method == "Transferencia bancaria"
+
+
+def test_build_document_line_matches_sees_products_written_after_index_build(
+    db: Session, tenant_minimal
+):
+    tenant_id = tenant_minimal["tenant_id"]
+    document = ImpDocumento(
+        tenant_id=tenant_id,
+        nombre_archivo="factura-harina.pdf",
+        tipo_archivo="PDF",
+        tamanio_bytes=128,
+        estado="REVIEW",
+        datos_confirmados={
+            "line_items": [
+                {"description": "Harina de trigo 50 kg", "quantity": 2, "unit_price": 30.0}
+            ],
+        },
+    )
+    db.add(document)
+    db.flush()
+
+    assert _build_document_line_matches(db, tenant_id, document)[0].selected_product_id is None
+
+    product = Product(
+        tenant_id=tenant_id,
+        name="Harina de trigo",
+        active=True,
+        stock=7,
+        unit="kg",
+    )
+    db.add(product)
+    db.flush()
+
+    lines = _build_document_line_matches(db, tenant_id, document)
+    assert lines[0].selected_product_id == product.id
+    assert lines[0].candidates[0].stock == pytest.approx(7.0)
+
+    product.active = False
+    db.flush()
+
+    lines = _build_document_line_matches(db, tenant_id, document)
+    assert lines[0].selected_product_id is None
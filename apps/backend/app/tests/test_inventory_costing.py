@@ -4,6 +4,7 @@ from datetime import date
 from decimal import Decimal
 
 import pytest
+from fastapi import HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
@@ -383,3 +384,154 @@ def test_inventory_costing_fifo_consumes_only_selected_lot(db: Session, tenant_m
     assert layers[1][1] == date(2026, 4, 30)
     assert float(layers[1][2] or 0) == 1.0
     assert float(layers[1][3] or 0) == 3.0
+
+
+def _ensure_costing_tables(db: Session) -> None:
+    from app.models.inventory.stock import InventoryCostState
+
+    InventoryCostState.__table__.create(bind=db.get_bind(), checkfirst=True)
+    # SERIAL is not a rowid alias on SQLite; create the table the way the migration would.
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS inventory_cost_layers ("
+                "id INTEGER PRIMARY KEY, tenant_id TEXT NOT NULL, warehouse_id TEXT NOT NULL, "
+                "product_id TEXT NOT NULL, lot TEXT NULL, expires_at DATE NULL, "
+                "remaining_qty NUMERIC(14,6) NOT NULL, unit_cost NUMERIC(14,6) NOT NULL, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+
+
+def _batch_keys(tenant_minimal) -> tuple[str, str, str, str]:
+    import uuid
+
+    return (
+        tenant_minimal["tenant_id_str"],
+        str(uuid.uuid4()),
+        str(uuid.uuid4()),
+        str(uuid.uuid4()),
+    )
+
+
+def test_apply_moves_wac_matches_sequential(db: Session, tenant_minimal):
+    from app.services.inventory_costing import CostMove, InventoryCostingService
+
+    _ensure_costing_tables(db)
+    tid, wid, pid_a, pid_b = _batch_keys(tenant_minimal)
+    svc = InventoryCostingService(db)
+
+    results = svc.apply_moves(
+        tid,
+        [
+            CostMove(wid, pid_a, Decimal("10"), "in", unit_cost=Decimal("2.50")),
+            CostMove(
+                wid,
+                pid_b,
+                Decimal("4"),
+                "out",
+                initial_qty=Decimal("10"),
+                initial_avg_cost=Decimal("1.25"),
+            ),
+            CostMove(wid, pid_a, Decimal("10"), "in", unit_cost=Decimal("3.00")),
+            CostMove(wid, pid_a, Decimal("5"), "out"),
+        ],
+    )
+
+    assert [r.state.on_hand_qty for r in results] == [
+        Decimal("10"),
+        Decimal("6"),
+        Decimal("20"),
+        Decimal("15"),
+    ]
+    assert results[3].state.avg_cost == Decimal("2.75")
+    assert results[3].cogs == Decimal("13.75")
+    assert results[1].cogs == Decimal("5.00")
+
+    rows = {
+        str(r[0]): (Decimal(str(r[1])), Decimal(str(r[2])))
+        for r in db.execute(
+            text(
+                "SELECT product_id, on_hand_qty, avg_cost FROM inventory_cost_state "
+                "WHERE tenant_id = :tid AND warehouse_id = :wid"
+            ),
+            {"tid": tid, "wid": wid},
+        )
+    }
+    assert rows[pid_a] == (Decimal("15"), Decimal("2.75"))
+    assert rows[pid_b] == (Decimal("6"), Decimal("1.25"))
+
+    with pytest.raises(HTTPException) as exc:
+        svc.apply_moves(tid, [CostMove(wid, pid_b, Decimal("7"), "out")])
+    assert exc.value.detail == "insufficient_stock"
+
+
+def test_apply_moves_fifo_consumes_existing_then_batch_layers(db: Session, tenant_minimal):
+    from app.services.inventory_costing import CostMove, InventoryCostingService
+
+    _ensure_costing_tables(db)
+    tid, wid, pid, _ = _batch_keys(tenant_minimal)
+    svc = InventoryCostingService(db)
+    svc.apply_inbound_fifo(tid, wid, pid, qty=Decimal("3"), unit_cost=Decimal("1"))
+    svc.apply_inbound_fifo(tid, wid, pid, qty=Decimal("3"), unit_cost=Decimal("2"))
+
+    results = svc.apply_moves(
+        tid,
+        [
+            CostMove(wid, pid, Decimal("4"), "out"),
+            CostMove(wid, pid, Decimal("5"), "in", unit_cost=Decimal("4")),
+            CostMove(wid, pid, Decimal("3"), "out"),
+        ],
+        costing_method="fifo",
+    )
+
+    assert results[0].cogs == Decimal("5")  # 3 * 1 + 1 * 2
+    assert results[2].cogs == Decimal("8")  # 2 * 2 + 1 * 4
+    assert results[2].state.on_hand_qty == Decimal("4")
+    remaining = db.execute(
+        text(
+            "SELECT remaining_qty, unit_cost FROM inventory_cost_layers "
+            "WHERE tenant_id = :tid AND product_id = :pid AND remaining_qty > 0"
+        ),
+        {"tid": tid, "pid": pid},
+    ).fetchall()
+    assert [(Decimal(str(q)), Decimal(str(c))) for q, c in remaining] == [
+        (Decimal("4"), Decimal("4"))
+    ]
+
+
+def test_apply_moves_lifo_respects_lot_and_rejects_shortage(db: Session, tenant_minimal):
+    from app.services.inventory_costing import CostMove, InventoryCostingService
+
+    _ensure_costing_tables(db)
+    tid, wid, pid, _ = _batch_keys(tenant_minimal)
+    svc = InventoryCostingService(db)
+    svc.apply_moves(
+        tid,
+        [
+            CostMove(
+                wid,
+                pid,
+                Decimal("2"),
+                "in",
+                unit_cost=Decimal("1"),
+                lot="A",
+                expires_at=date(2030, 1, 1),
+            ),
+            CostMove(wid, pid, Decimal("2"), "in", unit_cost=Decimal("5"), lot="B"),
+        ],
+        costing_method="lifo",
+    )
+
+    (result,) = svc.apply_moves(
+        tid,
+        [CostMove(wid, pid, Decimal("1"), "out", lot="A", expires_at=date(2030, 1, 1))],
+        costing_method="lifo",
+    )
+    assert result.cogs == Decimal("1")
+
+    with pytest.raises(HTTPException) as exc:
+        svc.apply_moves(
+            tid, [CostMove(wid, pid, Decimal("2"), "out", lot="A")], costing_method="lifo"
+        )
+    assert exc.value.detail == "insufficient_stock_lifo"
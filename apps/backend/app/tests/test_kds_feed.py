@@ -0,0 +1,123 @@
+"""Tests: feed push del KDS — hub pub/sub, secuencia con reenvío y stream SSE."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core import pubsub_hub
+from app.core.pubsub_hub import MessagesLost, PubSubHub
+from app.modules.restaurant.application import kds_feed
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+
+class _ItemDb:
+    def __init__(self, row):
+        self._row = row
+
+    def execute(self, stmt, params=None):
+        return _FakeResult([self._row] if str(stmt).lstrip().startswith("SELECT") else [])
+
+    def commit(self):
+        pass
+
+
+def _parse(event: str) -> tuple[int, str, dict]:
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+async def test_hub_fans_out_and_flags_slow_consumers():
+    hub = PubSubHub(queue_size=2)
+    async with hub.subscription("kds:t1") as fast, hub.subscription("kds:t1") as slow:
+        assert hub.channels == {"kds:t1"}
+        hub.dispatch("kds:t1", "a")
+        assert await fast.get(timeout=0.1) == "a"
+        hub.dispatch("kds:t1", "b")
+        hub.dispatch("kds:t1", "c")
+        # slow no consumió: la tercera entrega desborda su cola
+        with pytest.raises(MessagesLost):
+            await slow.get(timeout=0.1)
+        assert await slow.get(timeout=0.01) is None
+        assert [await fast.get(timeout=0.1), await fast.get(timeout=0.1)] == ["b", "c"]
+    assert hub.channels == set()
+
+
+def test_local_only_publish_without_subscribers_warns(monkeypatch, caplog):
+    import app.core.cache as cache_module
+
+    monkeypatch.setattr(cache_module, "get_sync_redis_client", lambda: None)
+    monkeypatch.setattr(pubsub_hub, "_local_only_warned_at", float("-inf"))
+
+    with caplog.at_level("WARNING", logger=pubsub_hub.__name__):
+        pubsub_hub.publish("imp:batch:1", "a")
+        pubsub_hub.publish("imp:batch:1", "b")
+
+    # Un aviso por intervalo, no uno por mensaje
+    assert ["imp:batch:1" in r.getMessage() for r in caplog.records] == [True]
+
+
+def test_changes_since_replays_missed_deltas_or_requests_snapshot(monkeypatch):
+    tenant_id = uuid4()
+    order_id = uuid4()
+    monkeypatch.setattr(kds_feed, "KDS_LOG_SIZE", 3)
+    assert kds_feed.current_seq(tenant_id) == 0
+
+    for status in ("preparing", "ready", "served", "preparing"):
+        kds_feed.publish_kds_changes(
+            tenant_id, [kds_feed.items_status_delta(order_id, [uuid4()], status)]
+        )
+
+    assert kds_feed.current_seq(tenant_id) == 4
+    missed = kds_feed.changes_since(tenant_id, 2)
+    assert [json.loads(d)["seq"] for d in missed] == [3, 4]
+    assert json.loads(missed[0])["status"] == "served"
+    assert kds_feed.changes_since(tenant_id, 4) == []
+    # seq 1 ya salió del log; un token del futuro (secuencia reiniciada) tampoco sirve
+    assert kds_feed.changes_since(tenant_id, 0) is None
+    assert kds_feed.changes_since(tenant_id, 9) is None
+
+
+async def test_stream_sends_snapshot_then_deltas_and_resumes(monkeypatch):
+    from app.modules.restaurant.interface.http import tenant as mod
+
+    monkeypatch.setattr(mod, "ensure_guc_from_request", lambda *a, **kw: None)
+    tenant_id = uuid4()
+    order_id = uuid4()
+    board = [{"order_id": str(order_id), "items": []}]
+    monkeypatch.setattr(kds_feed, "_load_board_snapshot", lambda tid: board)
+
+    stream = kds_feed.kds_event_stream(tenant_id)
+    seq, event, data = _parse(await anext(stream))
+    assert (seq, event, data) == (0, "snapshot", {"seq": 0, "orders": board})
+
+    # Endpoint síncrono en el threadpool → entrega en el loop del stream
+    item_id = str(uuid4())
+    request = SimpleNamespace(state=SimpleNamespace(access_claims={"tenant_id": str(tenant_id)}))
+    db = _ItemDb((item_id, order_id, "preparing"))
+    await asyncio.to_thread(mod.kds_mark_ready, item_id, request=request, db=db)
+
+    seq, event, data = _parse(await asyncio.wait_for(anext(stream), 2))
+    assert (seq, event) == (1, "delta")
+    assert data["op"] == "items_status"
+    assert data["item_ids"] == [item_id]
+    assert data["status"] == "ready"
+    await stream.aclose()
+
+    # Pantalla reconectando con Last-Event-ID=1: solo lo perdido, sin snapshot
+    kds_feed.publish_kds_changes(tenant_id, [kds_feed.item_removed_delta(order_id, item_id)])
+    resumed = kds_feed.kds_event_stream(tenant_id, last_seq=1)
+    seq, event, data = _parse(await anext(resumed))
+    assert (seq, event, data["op"]) == (2, "delta", "item_removed")
+    await resumed.aclose()
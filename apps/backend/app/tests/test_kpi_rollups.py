@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from app.modules.analytics.application.kpi_rollups import (
+    live_today,
+    rebuild_day,
+    record_production_completed,
+    record_receipt_paid,
+    rollup_totals,
+)
+
+DAY = date(2026, 3, 10)
+
+
+def _receipt(db, tenant_id, created_at, total, status="paid"):
+    db.execute(
+        text(
+            "INSERT INTO pos_receipts (id, tenant_id, register_id, shift_id, number, status, "
+            "gross_total, tax_total, currency, created_at) "
+            "VALUES (:id, :tid, :reg, :shift, :num, :status, :total, 0, 'USD', :created_at)"
+        ),
+        {
+            "id": str(uuid.uuid4()),
+            "tid": tenant_id,
+            "reg": str(uuid.uuid4()),
+            "shift": str(uuid.uuid4()),
+            "num": uuid.uuid4().hex[:10],
+            "status": status,
+            "total": total,
+            "created_at": created_at,
+        },
+    )
+
+
+@pytest.fixture
+def tenant_id(tenant_minimal):
+    return tenant_minimal["tenant_id_str"]
+
+
+def test_checkout_and_refund_update_hourly_buckets(db, tenant_id):
+    record_receipt_paid(db, tenant_id, datetime(2026, 3, 10, 9, 15), 12.5)
+    record_receipt_paid(db, tenant_id, datetime(2026, 3, 10, 9, 40), 7.5)
+    record_receipt_paid(db, tenant_id, datetime(2026, 3, 10, 18, 5), 30)
+    record_receipt_paid(db, tenant_id, datetime(2026, 3, 10, 9, 40), 7.5, sign=-1)
+    db.commit()
+
+    totals = rollup_totals(db, tenant_id, DAY, DAY)
+    assert (totals.sales_total, totals.receipts_count) == (42.5, 2)
+    hours = db.execute(
+        text("SELECT hour, receipts_count FROM kpi_hourly WHERE tenant_id = :tid ORDER BY hour"),
+        {"tid": tenant_id},
+    ).fetchall()
+    assert [tuple(h) for h in hours] == [(9, 1), (18, 1)]
+    assert rollup_totals(db, tenant_id, DAY + timedelta(days=1), DAY + timedelta(days=7)) == (
+        rollup_totals(db, str(uuid.uuid4()), DAY, DAY)
+    )
+
+
+def test_production_completion_records_waste_value(db, tenant_id):
+    order = SimpleNamespace(
+        tenant_id=tenant_id,
+        completed_at=datetime(2026, 3, 10, 6, 0),
+        qty_produced=90,
+        waste_qty=10,
+        lines=[SimpleNamespace(cost_total=40), SimpleNamespace(cost_total=60)],
+    )
+    record_production_completed(db, order)
+    db.commit()
+
+    totals = rollup_totals(db, tenant_id, DAY, DAY)
+    assert totals.batches_completed == 1
+    assert (totals.produced_qty, totals.waste_qty) == (90, 10)
+    assert totals.waste_value == pytest.approx(10.0)
+
+
+def test_rebuild_and_live_today_match_incremental_rollup(db, tenant_id):
+    _receipt(db, tenant_id, datetime(2026, 3, 10, 8, 5), 10)
+    _receipt(db, tenant_id, datetime(2026, 3, 10, 8, 55), 15)
+    _receipt(db, tenant_id, datetime(2026, 3, 10, 20, 0), 5)
+    _receipt(db, tenant_id, datetime(2026, 3, 10, 21, 0), 99, status="refunded")
+    _receipt(db, tenant_id, datetime(2026, 3, 11, 0, 0), 50)
+    # Rollup desincronizado: la reconstrucción lo corrige
+    record_receipt_paid(db, tenant_id, datetime(2026, 3, 10, 8, 0), 1000)
+    db.commit()
+
+    assert rebuild_day(db, tenant_id, DAY) == 2
+    db.commit()
+
+    totals = rollup_totals(db, tenant_id, DAY, DAY)
+    assert (totals.sales_total, totals.receipts_count) == (30.0, 3)
+    live = live_today(db, tenant_id, DAY)
+    assert (live.sales_total, live.receipts_count) == (30.0, 3)
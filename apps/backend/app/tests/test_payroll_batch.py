@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, select
+
+from app.models.hr.attendance import TimeEntry
+from app.models.hr.employee import Employee, EmployeeSalary
+from app.models.hr.payroll import PayrollDetail, PayrollRun
+from app.models.hr.payslip import PaymentSlip
+from app.models.tenant import Tenant
+from app.modules.hr.application import payroll_batch, payroll_jobs
+from app.modules.hr.application.compensation import build_salary_notes
+from app.modules.hr.application.payroll_service import PayrollService
+
+
+def _add_employees(db, tenant_id, count: int, *, hourly_every: int = 3) -> None:
+    for i in range(count):
+        employee = Employee(
+            tenant_id=tenant_id,
+            first_name=f"Emp{i}",
+            last_name="Batch",
+            national_id=f"ID-{i:05d}",
+            contract_type="PERMANENT",
+            status="ACTIVE",
+            hire_date=date(2024, 1, 1),
+            country="ES",
+        )
+        db.add(employee)
+        db.flush()
+        hourly = i % hourly_every == 0
+        # Un salario antiguo y el vigente: debe ganar el más reciente
+        db.add(
+            EmployeeSalary(
+                employee_id=employee.id,
+                salary_amount=Decimal("1"),
+                currency="EUR",
+                effective_date=date(2025, 1, 1),
+            )
+        )
+        db.add(
+            EmployeeSalary(
+                employee_id=employee.id,
+                salary_amount=Decimal("10") if hourly else Decimal("2000"),
+                currency="EUR",
+                effective_date=date(2026, 1, 1),
+                notes=build_salary_notes("hourly") if hourly else None,
+            )
+        )
+        if hourly:
+            for day in (2, 3):
+                db.add(
+                    TimeEntry(
+                        tenant_id=tenant_id,
+                        employee_id=employee.id,
+                        entry_date=date(2026, 2, day),
+                        clock_in_time=time(9, 0),
+                        clock_out_time=time(13, 0),
+                        entry_type="trabajo",
+                    )
+                )
+    db.flush()
+
+
+def _count_statements(db, fn):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    return result, len(statements)
+
+
+def _tenant(db) -> uuid.UUID:
+    tid = uuid.uuid4()
+    db.add(Tenant(id=tid, name="Payroll Batch", slug=f"payroll-{tid.hex[:8]}"))
+    db.flush()
+    return tid
+
+
+def _generate(db, tenant_id):
+    return PayrollService.generate_payroll(db, tenant_id, "2026-02", date(2026, 2, 28))
+
+
+def test_generate_payroll_query_count_does_not_grow_with_employees(db):
+    small, large = _tenant(db), _tenant(db)
+    _add_employees(db, small, 3)
+    _add_employees(db, large, 12)
+
+    _, small_statements = _count_statements(db, lambda: _generate(db, small))
+    payroll, large_statements = _count_statements(db, lambda: _generate(db, large))
+
+    # Consultas agrupadas + INSERT multi-fila: nada por empleado
+    assert large_statements == small_statements
+    details = db.execute(select(PayrollDetail).where(PayrollDetail.payroll_id == payroll.id))
+    details = details.scalars().all()
+    assert len(details) == 12
+    # 4 por hora: 2 días x 4 h x 10; 8 mensuales con el salario vigente
+    assert (
+        sorted(d.gross_salary for d in details) == [Decimal("80.00")] * 4 + [Decimal("2000.00")] * 8
+    )
+    assert payroll.total_gross == Decimal("16320.00")
+    assert len(payroll.details) == 12
+    slips = db.execute(select(PaymentSlip).where(PaymentSlip.tenant_id == str(large)))
+    assert {s.payroll_detail_id for s in slips.scalars()} == {d.id for d in details}
+
+
+def test_generate_payroll_reports_progress_per_batch(db, tenant_minimal, monkeypatch):
+    tenant_id = tenant_minimal["tenant_id"]
+    _add_employees(db, tenant_id, 5)
+    monkeypatch.setattr(payroll_batch, "BATCH_SIZE", 2)
+    calls = []
+
+    PayrollService.generate_payroll(
+        db,
+        tenant_id,
+        "2026-02",
+        date(2026, 2, 28),
+        progress=lambda done, total: calls.append((done, total)),
+    )
+
+    assert calls == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_payroll_job_runs_in_background_session(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id"]
+    _add_employees(db, tenant_id, 3)
+    run = payroll_jobs.create_payroll_run(db, tenant_id, "2026-02", date(2026, 2, 28))
+    db.commit()
+
+    with pytest.raises(ValueError, match="already running"):
+        payroll_jobs.create_payroll_run(db, tenant_id, "2026-02", date(2026, 2, 28))
+
+    payroll_jobs.run_payroll_job(str(tenant_id), run.id)
+
+    db.expire_all()
+    run = db.get(PayrollRun, run.id)
+    assert (run.status, run.processed, run.total) == ("done", 3, 3)
+    assert run.payroll_id is not None
+    with pytest.raises(ValueError, match="already exists"):
+        payroll_jobs.create_payroll_run(db, tenant_id, "2026-02", date(2026, 2, 28))
+
+
+def test_stale_active_run_is_failed_and_concurrent_runs_collide(db, tenant_minimal, monkeypatch):
+    tenant_id = tenant_minimal["tenant_id"]
+    stale = payroll_jobs.create_payroll_run(db, tenant_id, "2026-03", date(2026, 3, 31))
+    stale.updated_at = datetime.now(UTC) - payroll_jobs.STALE_RUN_AFTER - timedelta(minutes=1)
+    db.commit()
+
+    # Proceso muerto a mitad: el mes no queda bloqueado
+    run = payroll_jobs.create_payroll_run(db, tenant_id, "2026-03", date(2026, 3, 31))
+    db.commit()
+    db.expire_all()
+    assert db.get(PayrollRun, stale.id).status == "failed"
+    assert db.get(PayrollRun, run.id).status == "pending"
+
+    # Carrera: ambas peticiones pasan la comprobación, el índice único decide
+    monkeypatch.setattr(payroll_jobs, "ACTIVE_STATUSES", ())
+    with pytest.raises(ValueError, match="already running"):
+        payroll_jobs.create_payroll_run(db, tenant_id, "2026-03", date(2026, 3, 31))
+    db.commit()
+    runs = db.scalars(
+        select(PayrollRun).where(
+            PayrollRun.tenant_id == run.tenant_id, PayrollRun.payroll_month == "2026-03"
+        )
+    ).all()
+    assert {(r.id, r.status) for r in runs} == {(stale.id, "failed"), (run.id, "pending")}
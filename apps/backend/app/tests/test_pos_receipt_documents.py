@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+from app.models.core.event_outbox import EventOutbox
+from app.models.pos.receipt import POSReceipt
+from app.models.pos.register import POSRegister, POSShift
+from app.models.tenant import Tenant
+from app.modules.pos.application import receipt_documents
+from app.modules.pos.application.checkout_service import CheckoutService
+from app.modules.pos.application.invoice_integration import POSInvoicingService
+from app.modules.settings.application.tenant_settings import parse_documents_mode
+from app.services.event_service import EventService
+
+
+def _tenant(db) -> uuid.UUID:
+    tid = uuid.uuid4()
+    db.add(Tenant(id=tid, name="POS Docs", slug=f"pos-docs-{tid.hex[:8]}", base_currency="USD"))
+    db.flush()
+    return tid
+
+
+def _paid_receipts(db, tenant_id, count: int, documents_status: str | None = "pending"):
+    register = POSRegister(id=uuid.uuid4(), tenant_id=tenant_id, name="Reg", active=True)
+    db.add(register)
+    db.flush()
+    shift = POSShift(
+        id=uuid.uuid4(),
+        register_id=register.id,
+        opened_by=uuid.uuid4(),
+        opened_at=datetime.now(UTC),
+        opening_float=0,
+        status="open",
+    )
+    db.add(shift)
+    db.flush()
+    ids = []
+    for n in range(count):
+        receipt = POSReceipt(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            register_id=register.id,
+            shift_id=shift.id,
+            number=f"R-{n:03d}",
+            status="paid",
+            gross_total=112,
+            tax_total=12,
+            currency="USD",
+            paid_at=datetime.now(UTC),
+            documents_status=documents_status,
+        )
+        db.add(receipt)
+        ids.append(receipt.id)
+    db.flush()
+    return ids
+
+
+def _completed(db, tenant_id, receipt_ids):
+    events = [
+        EventService.publish(
+            db,
+            tenant_id,
+            "pos.receipt.completed",
+            {"receipt_id": str(rid), "invoice_series": "B"},
+            aggregate_type="pos_receipt",
+            aggregate_id=rid,
+        )
+        for rid in receipt_ids
+    ]
+    db.flush()
+    return events
+
+
+def _fake_documents(monkeypatch, *, fail_invoice_for=()):
+    calls: list[tuple[str, uuid.UUID, int]] = []
+
+    def create_invoice(self, receipt_id, customer_id=None, invoice_series="A"):
+        calls.append(("invoice", receipt_id, id(self)))
+        if receipt_id in fail_invoice_for:
+            self.last_error = "numbering unavailable"
+            return None
+        return {"invoice_id": str(uuid.uuid4()), "invoice_number": f"{invoice_series}-1"}
+
+    def create_sale(self, receipt_id):
+        calls.append(("sale", receipt_id, id(self)))
+        return {"sale_id": str(uuid.uuid4()), "sale_type": "sales_order"}
+
+    monkeypatch.setattr(POSInvoicingService, "create_invoice_from_receipt", create_invoice)
+    monkeypatch.setattr(POSInvoicingService, "create_sale_from_receipt", create_sale)
+    return calls
+
+
+def _statuses(db, receipt_ids):
+    db.expire_all()
+    rows = db.query(POSReceipt.id, POSReceipt.documents_status).filter(
+        POSReceipt.id.in_(receipt_ids)
+    )
+    return dict(rows.all())
+
+
+def _documents_created(db, tenant_id):
+    db.flush()
+    rows = db.query(EventOutbox).filter(
+        EventOutbox.tenant_id == tenant_id,
+        EventOutbox.event_type == receipt_documents.RECEIPT_DOCUMENTS_EVENT,
+    )
+    return sorted(str(e.aggregate_id) for e in rows)
+
+
+def test_documents_stage_batches_per_tenant_and_skips_done_receipts(db, monkeypatch):
+    calls = _fake_documents(monkeypatch)
+    tenant_id = _tenant(db)
+    pending = _paid_receipts(db, tenant_id, 3)
+    synced = _paid_receipts(db, tenant_id, 1, documents_status="done")
+    events = _completed(db, tenant_id, pending + synced)
+
+    failures = receipt_documents.process_receipt_documents(db, events)
+
+    assert failures == {}
+    # Un servicio por tenant; nada para el recibo ya resuelto en modo sync
+    assert {(kind, rid) for kind, rid, _ in calls} == {
+        (kind, rid) for rid in pending for kind in ("invoice", "sale")
+    }
+    assert len({service for _, _, service in calls}) == 1
+    assert set(_statuses(db, pending + synced).values()) == {"done"}
+    assert _documents_created(db, tenant_id) == sorted(str(r) for r in pending + synced)
+
+    # Reentrega del mismo lote: idempotente
+    calls.clear()
+    assert receipt_documents.process_receipt_documents(db, events) == {}
+    assert calls == []
+
+
+def test_documents_stage_marks_failures_for_retry(db, monkeypatch):
+    tenant_id = _tenant(db)
+    ok, broken = _paid_receipts(db, tenant_id, 2)
+    calls = _fake_documents(monkeypatch, fail_invoice_for={broken})
+    events = _completed(db, tenant_id, [ok, broken])
+
+    failures = receipt_documents.process_receipt_documents(db, events)
+
+    assert failures == {events[1].id: "invoice: numbering unavailable"}
+    # La venta del recibo fallido se crea igualmente
+    assert ("sale", broken) in {(kind, rid) for kind, rid, _ in calls}
+    assert _statuses(db, [ok, broken]) == {ok: "done", broken: "failed"}
+    assert _documents_created(db, tenant_id) == [str(ok)]
+
+    result = receipt_documents.get_receipt_documents(db, tenant_id, broken)
+    assert result["documents_status"] == "failed"
+    assert result["documents_error"] == "invoice: numbering unavailable"
+    assert result["documents"] == {}
+    assert receipt_documents.get_receipt_documents(db, _tenant(db), broken) is None
+
+
+def test_sync_checkout_documents_only_fall_back_to_outbox_on_failure(db, monkeypatch):
+    tenant_id = _tenant(db)
+    ok, broken = _paid_receipts(db, tenant_id, 2)
+    _fake_documents(monkeypatch, fail_invoice_for={broken})
+    service = CheckoutService(db)
+
+    for rid in (ok, broken):
+        service._create_documents(rid, tenant_id, "B", {"receipt_id": str(rid)})
+
+    assert _statuses(db, [ok, broken]) == {ok: "done", broken: "failed"}
+    assert _documents_created(db, tenant_id) == [str(ok)]
+    # Solo el fallido llega a la lane del outbox para reintentarlo
+    completed = db.query(EventOutbox).filter(
+        EventOutbox.tenant_id == tenant_id, EventOutbox.event_type == "pos.receipt.completed"
+    )
+    assert [str(e.aggregate_id) for e in completed] == [str(broken)]
+
+
+def test_documents_mode_defaults_to_async():
+    assert parse_documents_mode(None) == "async"
+    assert parse_documents_mode({"documents": {"mode": "SYNC"}}) == "sync"
+    assert parse_documents_mode({"documents": {"mode": "later"}}) == "async"
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.pos.register import POSRegister, POSShift
+from app.modules.pos.interface.http._deps import ReceiptCreateIn, ReceiptLineIn
+from app.modules.pos.interface.http.receipts import (
+    create_receipt,
+    reserve_offline_receipt_block,
+)
+
+
+def _req(tenant_id: str, user_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        state=SimpleNamespace(access_claims={"tenant_id": tenant_id, "user_id": user_id})
+    )
+
+
+def test_offline_numbers_must_come_from_a_reserved_block(db: Session, tenant_minimal):
+    eng = db.get_bind()
+    if eng.dialect.name != "postgresql":
+        pytest.skip("Postgres-specific POS numbering test")
+
+    tenant_id = tenant_minimal["tenant_id"]
+    tenant_id_str = tenant_minimal["tenant_id_str"]
+    user_id = str(uuid.uuid4())
+
+    db.execute(text(f"SET app.tenant_id = '{tenant_id_str}'"))
+    db.execute(text("SET session_replication_role = REPLICA"))
+
+    product_id = uuid.uuid4()
+    db.execute(
+        text(
+            "INSERT INTO products (id, tenant_id, name, sku, active, stock, unit) "
+            "VALUES (:id, :tid, :name, :sku, TRUE, 0, 'unit')"
+        ),
+        {
+            "id": product_id,
+            "tid": tenant_id,
+            "name": "Offline POS Product",
+            "sku": f"POS-OFF-{product_id.hex[:8]}",
+        },
+    )
+    register = POSRegister(id=uuid.uuid4(), tenant_id=tenant_id, name="Caja Offline", active=True)
+    shift = POSShift(
+        id=uuid.uuid4(),
+        register_id=register.id,
+        opened_by=uuid.uuid4(),
+        opening_float=0,
+        status="open",
+    )
+    db.add_all([register, shift])
+    db.commit()
+    request = _req(tenant_id_str, user_id)
+
+    def payload(number: str | None = None) -> ReceiptCreateIn:
+        return ReceiptCreateIn(
+            shift_id=str(shift.id),
+            register_id=str(register.id),
+            number=number,
+            lines=[ReceiptLineIn(product_id=str(product_id), qty=1, unit_price=2.5)],
+        )
+
+    # R-0001 sale online; R-0002..R-0004 quedan reservados para la caja
+    assert create_receipt(payload(), request, db)["number"] == "R-0001"
+    block = reserve_offline_receipt_block(db, tenant_id, register.id, 3)
+    db.commit()
+    assert (block.first, block.last) == (2, 4)
+    assert create_receipt(payload(), request, db)["number"] == "R-0005"
+
+    assert create_receipt(payload("R-0003"), request, db)["number"] == "R-0003"
+    with pytest.raises(HTTPException) as exc:
+        create_receipt(payload("R-0003"), request, db)
+    assert exc.value.status_code == 409
+    # Ya asignado por el contador, pero fuera de cualquier bloque reservado
+    with pytest.raises(HTTPException) as exc:
+        create_receipt(payload("R-0005"), request, db)
+    assert (exc.value.status_code, exc.value.detail) == (400, "receipt_number_not_reserved")
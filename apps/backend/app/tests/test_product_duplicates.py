@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import random
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.modules.products.application.duplicates import (
+    build_duplicate_groups,
+    cluster_similar_names,
+    is_similar_product_name,
+)
+
+_BASES = [
+    "Leche Entera 1L",
+    "Pan Blanco Grande",
+    "Harina de Trigo 1kg",
+    "Queso Fresco Artesanal",
+    "Aceite de Oliva Virgen Extra 500ml",
+    "Galletas de Chocolate",
+    "Yogur Natural Azucarado",
+    "Mantequilla sin Sal 250g",
+    "Cafe Molido Tostado",
+    "Azucar Morena",
+]
+
+
+def _pairwise_clusters(names, threshold):
+    """Barrido O(n²) original, como referencia."""
+    clusters, used = [], set()
+    for i in range(len(names)):
+        if i in used:
+            continue
+        similar = [
+            j
+            for j in range(i + 1, len(names))
+            if j not in used and is_similar_product_name(names[i], names[j], threshold)
+        ]
+        if similar:
+            cluster = [i, *similar]
+            used.update(cluster)
+            clusters.append(cluster)
+    return clusters
+
+
+def _variants(rng: random.Random) -> list[str]:
+    names = []
+    for base in _BASES:
+        names.append(base)
+        names.append(base.upper())
+        names.append(base + "s")
+        names.append(base.replace("a", "á", 1))
+        chars = list(base)
+        chars[rng.randrange(len(chars))] = "x"
+        names.append("".join(chars))
+    names += [f"Producto Unico {i}" for i in range(40)]
+    return sorted(names)
+
+
+def test_lsh_clusters_match_pairwise_sweep():
+    names = _variants(random.Random(7))
+    for threshold in (0.8, 0.9):
+        assert cluster_similar_names(names, threshold) == _pairwise_clusters(names, threshold)
+
+
+def test_numbered_catalog_does_not_degenerate():
+    names = sorted(f"Producto {i}" for i in range(5000)) + ["Producto"]
+    started = time.perf_counter()
+    clusters = cluster_similar_names(names, 0.9)
+    assert time.perf_counter() - started < 10
+    # "Producto N" solo casa con el nombre sin número, nunca entre variantes
+    assert clusters == [[0, 5000]]
+
+
+def test_build_duplicate_groups_scans_whole_catalog(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id_str"]
+    for i, name in enumerate(["Leche Entera 1L", "leche entera 1l", "Pan Integral"]):
+        db.execute(
+            text(
+                "INSERT INTO products (id, tenant_id, name, sku, price, unit, active, is_active, "
+                "stock, use_suggested_price) "
+                "VALUES (:id, :tid, :name, :sku, 1, 'uds', 1, 1, 0, 0)"
+            ),
+            {
+                "id": str(uuid.uuid4()),
+                "tid": tenant_id,
+                "name": name,
+                "sku": "LEC-0001" if i == 1 else None,
+            },
+        )
+    db.commit()
+
+    result = build_duplicate_groups(db, tenant_id, 0.9)
+
+    assert result["scanned"] == 3
+    assert len(result["groups"]) == 1
+    group = result["groups"][0]
+    # El ganador es el que tiene SKU
+    assert group["winner"]["sku"] == "LEC-0001"
+    assert [c["name"] for c in group["candidates"]] == ["Leche Entera 1L"]
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime, timedelta
 from decimal import Decimal
 from types import SimpleNamespace
@@ -26,13 +25,11 @@ def test_complete_production_requires_authenticated_user(db, tenant_minimal):
     from app.schemas.production import ProductionOrderCompleteRequest
 
     with pytest.raises(HTTPException) as exc:
-        asyncio.run(
-            complete_production(
-                uuid4(),
-                ProductionOrderCompleteRequest(qty_produced=Decimal("1")),
-                db=db,
-                claims={"tenant_id": tenant_minimal["tenant_id_str"]},
-            )
+        complete_production(
+            uuid4(),
+            ProductionOrderCompleteRequest(qty_produced=Decimal("1")),
+            db=db,
+            claims={"tenant_id": tenant_minimal["tenant_id_str"]},
         )
 
     assert exc.value.status_code == 401
@@ -157,19 +154,17 @@ def test_complete_production_consumes_inputs_and_generates_output(
 
     claims = _claims(tenant_id_str, str(user.id))
 
-    created = asyncio.run(
-        create_production_order(
-            ProductionOrderCreate(
-                recipe_id=recipe.id,
-                product_id=bread.id,
-                warehouse_id=warehouse.id,
-                qty_planned=Decimal("20"),
-                scheduled_date=datetime.utcnow(),
-                notes="batch for morning shift",
-            ),
-            db=db,
-            claims=claims,
-        )
+    created = create_production_order(
+        ProductionOrderCreate(
+            recipe_id=recipe.id,
+            product_id=bread.id,
+            warehouse_id=warehouse.id,
+            qty_planned=Decimal("20"),
+            scheduled_date=datetime.utcnow(),
+            notes="batch for morning shift",
+        ),
+        db=db,
+        claims=claims,
     )
 
     assert created.status == "DRAFT"
@@ -179,19 +174,17 @@ def test_complete_production_consumes_inputs_and_generates_output(
         str(yeast.id),
     }
 
-    completed = asyncio.run(
-        complete_production(
-            created.id,
-            ProductionOrderCompleteRequest(
-                qty_produced=Decimal("18"),
-                waste_qty=Decimal("2"),
-                waste_reason="control sample",
-                batch_number="LOT-TEST-001",
-                notes="completed from automated test",
-            ),
-            db=db,
-            claims=claims,
-        )
+    completed = complete_production(
+        created.id,
+        ProductionOrderCompleteRequest(
+            qty_produced=Decimal("18"),
+            waste_qty=Decimal("2"),
+            waste_reason="control sample",
+            batch_number="LOT-TEST-001",
+            notes="completed from automated test",
+        ),
+        db=db,
+        claims=claims,
     )
 
     assert completed.status == "COMPLETED"
@@ -341,42 +334,36 @@ def test_list_production_orders_filters_by_scheduled_date(db, tenant_minimal, su
     claims = _claims(tenant_id_str, str(user.id))
     base_day = datetime(2026, 3, 12, 5, 0, 0)
 
-    asyncio.run(
-        create_production_order(
-            ProductionOrderCreate(
-                recipe_id=recipe.id,
-                product_id=finished.id,
-                warehouse_id=warehouse.id,
-                qty_planned=Decimal("20"),
-                scheduled_date=base_day,
-                notes="turno madrugada",
-            ),
-            db=db,
-            claims=claims,
-        )
-    )
-    asyncio.run(
-        create_production_order(
-            ProductionOrderCreate(
-                recipe_id=recipe.id,
-                product_id=finished.id,
-                warehouse_id=warehouse.id,
-                qty_planned=Decimal("15"),
-                scheduled_date=base_day + timedelta(days=1),
-                notes="turno manana",
-            ),
-            db=db,
-            claims=claims,
-        )
+    create_production_order(
+        ProductionOrderCreate(
+            recipe_id=recipe.id,
+            product_id=finished.id,
+            warehouse_id=warehouse.id,
+            qty_planned=Decimal("20"),
+            scheduled_date=base_day,
+            notes="turno madrugada",
+        ),
+        db=db,
+        claims=claims,
+    )
+    create_production_order(
+        ProductionOrderCreate(
+            recipe_id=recipe.id,
+            product_id=finished.id,
+            warehouse_id=warehouse.id,
+            qty_planned=Decimal("15"),
+            scheduled_date=base_day + timedelta(days=1),
+            notes="turno manana",
+        ),
+        db=db,
+        claims=claims,
     )
 
-    result = asyncio.run(
-        list_production_orders(
-            scheduled_from="2026-03-12T00:00:00",
-            scheduled_to="2026-03-12T23:59:59",
-            db=db,
-            claims=claims,
-        )
+    result = list_production_orders(
+        scheduled_from="2026-03-12T00:00:00",
+        scheduled_to="2026-03-12T23:59:59",
+        db=db,
+        claims=claims,
     )
 
     assert result.total == 1
@@ -531,29 +518,25 @@ def test_planning_suggestions_use_recent_sales_stock_and_existing_plan(
 
     claims = _claims(tenant_id_str, str(user.id))
     target_day = datetime(2026, 3, 12, 5, 0, 0)
-    asyncio.run(
-        create_production_order(
-            ProductionOrderCreate(
-                recipe_id=recipe.id,
-                product_id=bread.id,
-                warehouse_id=warehouse.id,
-                qty_planned=Decimal("1"),
-                scheduled_date=target_day,
-                notes="reposicion ya planificada",
-            ),
-            db=db,
-            claims=claims,
-        )
-    )
-
-    suggestions = asyncio.run(
-        list_production_planning_suggestions(
-            target_date=target_day.date(),
-            history_days=4,
-            limit=5,
-            db=db,
-            claims=claims,
-        )
+    create_production_order(
+        ProductionOrderCreate(
+            recipe_id=recipe.id,
+            product_id=bread.id,
+            warehouse_id=warehouse.id,
+            qty_planned=Decimal("1"),
+            scheduled_date=target_day,
+            notes="reposicion ya planificada",
+        ),
+        db=db,
+        claims=claims,
+    )
+
+    suggestions = list_production_planning_suggestions(
+        target_date=target_day.date(),
+        history_days=4,
+        limit=5,
+        db=db,
+        claims=claims,
     )
 
     assert len(suggestions) == 1
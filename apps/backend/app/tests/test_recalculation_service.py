@@ -160,3 +160,83 @@ class TestRecalculationService:
         svc = self._svc(db)
         cost = svc._get_unit_cost(tid, p.id, date(2026, 1, 1))
         assert cost == Decimal("0")
+
+    def test_apply_orders_delta_matches_full_recalculation(self, db):
+        from app.models.core.profit_snapshots import ProductProfitSnapshot
+
+        tid = self._make_tenant(db)
+        bread = self._make_product(db, tid, name="Bread", cost_price=2.0, price=5.0)
+        cake = self._make_product(db, tid, name="Cake", cost_price=10.0, price=25.0)
+        day = date(2026, 6, 1)
+        self._make_sale(db, tid, day, bread.id, qty=4, unit_price=5.0)
+        svc = self._svc(db)
+        svc.recalculate_daily(tid, day)
+
+        self._make_sale(db, tid, day, bread.id, qty=2, unit_price=5.0)
+        self._make_sale(db, tid, day, cake.id, qty=1, unit_price=25.0)
+        snap = svc.apply_orders_delta(tid, day)
+        # Already-applied orders are not counted twice
+        snap = svc.apply_orders_delta(tid, day)
+        db.flush()
+
+        assert float(snap.total_sales) == 55.0
+        assert float(snap.total_cogs) == 22.0
+        assert float(snap.gross_profit) == 33.0
+        assert snap.order_count == 3
+        assert snap.item_count == 3
+        product_snaps = {
+            ps.product_id: ps
+            for ps in db.query(ProductProfitSnapshot).filter(
+                ProductProfitSnapshot.tenant_id == tid, ProductProfitSnapshot.date == day
+            )
+        }
+        assert float(product_snaps[bread.id].sold_qty) == 6
+        assert float(product_snaps[bread.id].revenue) == 30.0
+        assert float(product_snaps[cake.id].cogs) == 10.0
+
+        full = svc.recalculate_daily(tid, day)
+        assert float(full.total_sales) == 55.0
+        assert float(full.total_cogs) == 22.0
+
+    def test_apply_orders_delta_without_snapshot_recalculates(self, db):
+        tid = self._make_tenant(db)
+        product = self._make_product(db, tid, cost_price=1.0)
+        self._make_sale(db, tid, date(2026, 6, 2), product.id, qty=3, unit_price=4.0)
+        snap = self._svc(db).apply_orders_delta(tid, date(2026, 6, 2))
+        db.flush()
+        assert float(snap.total_sales) == 12.0
+        assert float(snap.total_cogs) == 3.0
+
+    def test_recalculate_daily_only_stamps_aggregated_orders(self, db, monkeypatch):
+        tid = self._make_tenant(db)
+        product = self._make_product(db, tid, cost_price=1.0)
+        day = date(2026, 6, 3)
+        counted = self._make_sale(db, tid, day, product.id, qty=1, unit_price=10.0)
+        svc = self._svc(db)
+        lock_orders = svc._lock_orders
+
+        def lock_then_commit_another(*criteria):
+            locked = lock_orders(*criteria)
+            # Committed by another transaction after the lock was taken
+            self._make_sale(db, tid, day, product.id, qty=1, unit_price=7.0)
+            return locked
+
+        monkeypatch.setattr(svc, "_lock_orders", lock_then_commit_another)
+        snap = svc.recalculate_daily(tid, day)
+        db.flush()
+        assert float(snap.total_sales) == 10.0
+        db.refresh(counted)
+        assert counted.profit_snapshot_at is not None
+
+        monkeypatch.setattr(svc, "_lock_orders", lock_orders)
+        snap = svc.apply_orders_delta(tid, day)
+        db.flush()
+        assert float(snap.total_sales) == 17.0
+        assert snap.order_count == 2
+
+    def test_get_unit_costs_batches_products(self, db):
+        tid = self._make_tenant(db)
+        p1 = self._make_product(db, tid, cost_price=3.0)
+        p2 = self._make_product(db, tid, cost_price=4.5)
+        costs = self._svc(db)._get_unit_costs(tid, [p1.id, p2.id, uuid.uuid4()])
+        assert costs == {p1.id: Decimal("3"), p2.id: Decimal("4.5")}
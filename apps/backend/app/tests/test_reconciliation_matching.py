@@ -0,0 +1,138 @@
+"""Tests for the set-based reconciliation auto-matching engine"""
+
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.modules.reconciliation.domain.matching import (
+    AMOUNT_CONFIDENCE,
+    REFERENCE_CONFIDENCE,
+    MatchInvoice,
+    MatchLine,
+    match_lines,
+)
+
+D = date(2026, 3, 10)
+
+
+def _line(amount, reference=None, day=D):
+    return MatchLine(uuid.uuid4(), reference, Decimal(str(amount)), day)
+
+
+def _invoice(total, number=None, day=D, open=True):
+    return MatchInvoice(
+        uuid.uuid4(), number or f"F-{uuid.uuid4().hex[:6]}", Decimal(str(total)), day, open
+    )
+
+
+class TestMatchLines:
+    def test_reference_beats_amount_and_ignores_status(self):
+        paid = _invoice(50, number="F-001", open=False)
+        same_amount = _invoice(120)
+        line = _line(120, reference=" f-001 ")
+
+        [result] = match_lines([line], [paid, same_amount])
+
+        assert result.invoice_id == paid.id
+        assert result.confidence == REFERENCE_CONFIDENCE
+
+    def test_amount_match_prefers_closest_date_and_never_reuses_invoice(self):
+        near = _invoice(80, day=D)
+        far = _invoice(80, day=D + timedelta(days=3))
+        too_far = _invoice(80, day=D - timedelta(days=4))
+        exact_day = _line(80, day=D)
+        next_day = _line(80, day=D + timedelta(days=1))
+        third = _line(80, day=D)
+
+        results = {
+            r.line_id: r for r in match_lines([next_day, exact_day, third], [far, too_far, near])
+        }
+
+        assert results[exact_day.id].invoice_id == near.id
+        assert results[next_day.id].invoice_id == far.id
+        assert third.id not in results
+        assert {r.confidence for r in results.values()} == {AMOUNT_CONFIDENCE}
+
+    def test_closed_and_excluded_invoices_are_not_amount_candidates(self):
+        closed = _invoice(10, open=False)
+        taken = _invoice(10)
+        assert match_lines([_line(10)], [closed, taken], excluded_invoice_ids={taken.id}) == []
+
+    def test_synthetic_statement_is_one_to_one(self):
+        invoices = [_invoice(100 + i, day=D + timedelta(days=i % 20)) for i in range(2000)]
+        lines = [_line(100 + i, day=D + timedelta(days=i % 20)) for i in range(2000)]
+        lines += [_line(100 + i, day=D + timedelta(days=i % 20)) for i in range(200)]
+
+        results = match_lines(lines, invoices)
+
+        assert len(results) == 2000
+        assert len({r.invoice_id for r in results}) == 2000
+
+
+class TestAutoMatchUseCase:
+    def test_auto_match_bulk_updates_lines(self, db):
+        from sqlalchemy import text
+
+        from app.models.tenant import Tenant
+        from app.modules.reconciliation.application.schemas import TransactionItem
+        from app.modules.reconciliation.application.use_cases import (
+            AutoMatchUseCase,
+            ImportStatementUseCase,
+        )
+
+        tid = uuid.uuid4()
+        db.add(Tenant(id=tid, name="Recon Test", slug=f"recon-{tid.hex[:8]}"))
+        db.flush()
+        by_ref, by_amount = uuid.uuid4(), uuid.uuid4()
+        for inv_id, number, total in ((by_ref, "F-REF-1", 99), (by_amount, "F-2", 45.5)):
+            db.execute(
+                text(
+                    "INSERT INTO invoices (id, tenant_id, number, customer_id, issue_date, "
+                    "amount, subtotal, vat, total, status, created_at) "
+                    "VALUES (:id, :tid, :num, :cid, :day, :total, :total, 0, :total, 'issued', :day)"
+                ),
+                {
+                    "id": str(inv_id),
+                    "tid": str(tid),
+                    "num": number,
+                    "cid": str(uuid.uuid4()),
+                    "day": D.isoformat(),
+                    "total": total,
+                },
+            )
+
+        statement = ImportStatementUseCase().execute(
+            tenant_id=tid,
+            bank_name="Bank",
+            account_number="001",
+            statement_date=D,
+            transactions=[
+                TransactionItem(
+                    transaction_date=D,
+                    description="ref",
+                    reference="F-REF-1",
+                    amount=Decimal("1"),
+                    transaction_type="credit",
+                ),
+                TransactionItem(
+                    transaction_date=D + timedelta(days=2),
+                    description="amount",
+                    amount=Decimal("45.50"),
+                    transaction_type="credit",
+                ),
+                TransactionItem(
+                    transaction_date=D,
+                    description="nothing",
+                    amount=Decimal("7"),
+                    transaction_type="credit",
+                ),
+            ],
+            db_session=db,
+        )
+
+        result = AutoMatchUseCase().execute(statement_id=statement.id, tenant_id=tid, db_session=db)
+
+        assert result.matched_count == 2
+        assert result.status == "partial"
+        matched = {line.description: line.matched_invoice_id for line in result.lines}
+        assert matched == {"ref": by_ref, "amount": by_amount, "nothing": None}
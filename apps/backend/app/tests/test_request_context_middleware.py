@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.sessions import InMemorySessionStore, SessionMiddlewareServerSide
+from app.middleware.request_context import RequestContextMiddleware
+from app.middleware.request_log import RequestLogMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
+
+
+class _CountingTokenService:
+    def __init__(self):
+        self.calls = 0
+
+    def decode_and_validate(self, token: str, *, expected_type: str) -> dict:
+        self.calls += 1
+        return {"user_id": "u-1", "tenant_id": "t-1", "token": token}
+
+
+def test_access_token_is_decoded_once_per_request(monkeypatch):
+    service = _CountingTokenService()
+    monkeypatch.setattr("app.core.jwt_provider.get_token_service", lambda: service)
+
+    app = FastAPI()
+    app.add_middleware(RequestLogMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/me")
+    async def me(request: Request):
+        ctx = request.state.request_context
+        first = ctx.claims
+        second = ctx.decode_access(ctx.access_token)
+        return {"same": first is second, "user": first["user_id"], "rid": ctx.request_id}
+
+    response = TestClient(app).get(
+        "/me", headers={"Authorization": "Bearer abc", "X-Request-ID": "rid-1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"same": True, "user": "u-1", "rid": "rid-1"}
+    assert response.headers["X-Request-ID"] == "rid-1"
+    assert service.calls == 1
+
+
+def test_streaming_response_passes_through_stack_with_session_cookie():
+    app = FastAPI()
+    app.add_middleware(
+        SessionMiddlewareServerSide,
+        cookie_name="sess",
+        secret_key="secret",
+        https_only=False,
+        store=InMemorySessionStore(),
+    )
+    app.add_middleware(RequestLogMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
+
+    @app.get("/stream")
+    async def stream(request: Request):
+        request.state.session["seen"] = True
+        request.state.session_dirty = True
+
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    client = TestClient(app)
+    response = client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert "Content-Security-Policy" in response.headers
+    assert response.cookies.get("sess")
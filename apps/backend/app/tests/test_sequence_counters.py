@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import IS_SQLITE, SessionLocal
+from app.services.sequences import (
+    current_sequence_number,
+    next_sequence_number,
+    reserve_sequence_block,
+)
+
+_DDL = """
+CREATE TABLE sequence_counters (
+    tenant_id TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    scope TEXT NOT NULL DEFAULT '',
+    period TEXT NOT NULL DEFAULT '',
+    last_number INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (tenant_id, doc_type, scope, period)
+)
+"""
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seq.db'}", connect_args={"timeout": 30})
+    with engine.begin() as conn:
+        conn.execute(text(_DDL))
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_seed_runs_once_and_counters_are_isolated(session_factory):
+    tenant = uuid.uuid4()
+    seeds = []
+
+    def seed():
+        seeds.append(1)
+        return 41
+
+    with session_factory() as db:
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-1", seed=seed) == 42
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-1", seed=seed) == 43
+        # Otra caja y otro periodo tienen su propio contador
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-2") == 1
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-1", period="2027") == 1
+        db.commit()
+
+    assert len(seeds) == 1
+
+
+def test_rollback_leaves_no_gap(session_factory):
+    tenant = uuid.uuid4()
+    with session_factory() as db:
+        assert next_sequence_number(db, tenant, "production_order", period="2026") == 1
+        db.commit()
+        assert next_sequence_number(db, tenant, "production_order", period="2026") == 2
+        db.rollback()
+        assert next_sequence_number(db, tenant, "production_order", period="2026") == 2
+        db.commit()
+
+
+def test_block_reservation_for_offline_tills(session_factory):
+    tenant = uuid.uuid4()
+    with session_factory() as db:
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-1") == 1
+        block = reserve_sequence_block(db, tenant, "POS_R", 50, scope="reg-1")
+        assert (block.first, block.last, len(block)) == (2, 51, 50)
+        assert next_sequence_number(db, tenant, "POS_R", scope="reg-1") == 52
+        assert current_sequence_number(db, tenant, "POS_R", scope="reg-1") == 52
+        with pytest.raises(ValueError):
+            reserve_sequence_block(db, tenant, "POS_R", 0, scope="reg-1")
+        db.commit()
+
+
+@pytest.mark.skipif(
+    IS_SQLITE, reason="requiere PostgreSQL: SQLite serializa toda escritura con su lock de fichero"
+)
+def test_parallel_checkouts_never_get_duplicate_numbers(tenant_minimal):
+    # Con Postgres cada checkout es su propia conexión y solo el lock de fila
+    # del contador los serializa.
+    tenant = tenant_minimal["tenant_id"]
+    workers, per_worker = 8, 25
+
+    def session_factory():
+        db = SessionLocal()
+        db.info["tenant_id"] = str(tenant)
+        return db
+
+    numbers: list[int] = []
+    lock = threading.Lock()
+    errors: list[BaseException] = []
+
+    def checkout_loop():
+        try:
+            for _ in range(per_worker):
+                with session_factory() as db:
+                    n = next_sequence_number(db, tenant, "POS_R", scope="reg-1", seed=lambda: 0)
+                    db.commit()
+                with lock:
+                    numbers.append(n)
+        except BaseException as exc:  # pragma: no cover - reportado abajo
+            errors.append(exc)
+
+    threads = [threading.Thread(target=checkout_loop) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    total = workers * per_worker
+    assert sorted(numbers) == list(range(1, total + 1))
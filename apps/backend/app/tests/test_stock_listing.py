@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.core.products import Product
+from app.models.inventory.stock import StockItem
+from app.models.inventory.warehouse import Warehouse
+from app.models.recipes import ProductPackInfo, Recipe, RecipeIngredient
+from app.modules.inventory.interface.http.tenant import get_stock, get_stock_page
+
+
+def _request(tenant_id, if_none_match: str | None = None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return SimpleNamespace(
+        state=SimpleNamespace(access_claims={"tenant_id": str(tenant_id)}), headers=headers
+    )
+
+
+@pytest.fixture
+def catalog(db, tenant_minimal):
+    StockItem.__table__.create(bind=db.get_bind(), checkfirst=True)
+    tenant_id = tenant_minimal["tenant_id"]
+    main = Warehouse(id=uuid4(), tenant_id=tenant_id, code="MAIN", name="Main", is_active=True)
+    back = Warehouse(id=uuid4(), tenant_id=tenant_id, code="BACK", name="Back", is_active=True)
+    products = [
+        Product(
+            id=uuid4(),
+            tenant_id=tenant_id,
+            sku=f"SKU-{i:03d}",
+            name=f"Producto {i:02d}",
+            active=True,
+            stock=0,
+            unit="uds",
+            product_metadata={"stock_minimo": 5} if i % 4 == 0 else None,
+        )
+        for i in range(12)
+    ]
+    db.add_all([main, back, *products])
+    db.flush()
+    for i, product in enumerate(products):
+        for warehouse in (main, back):
+            db.add(
+                StockItem(
+                    id=str(uuid4()),
+                    tenant_id=str(tenant_id),
+                    warehouse_id=str(warehouse.id),
+                    product_id=str(product.id),
+                    qty=i,
+                )
+            )
+    db.commit()
+    return SimpleNamespace(tenant_id=tenant_id, products=products, main=main)
+
+
+def _stock(request, db, **filters):
+    params = {"warehouse_id": None, "product_id": None, "exclude_raw_material": False}
+    return get_stock(request, db, **{**params, **filters})
+
+
+def _page(request, db, **params):
+    defaults = {
+        "cursor": None,
+        "limit": 50,
+        "order": "name",
+        "q": None,
+        "warehouse_id": None,
+        "category_id": None,
+        "low_stock": False,
+        "exclude_raw_material": False,
+    }
+    return get_stock_page(request, db, **{**defaults, **params})
+
+
+def _page_items(response) -> dict:
+    return json.loads(response.body)
+
+
+def test_pack_info_follows_recipe_ingredient_changes(db, catalog):
+    tenant_id = catalog.tenant_id
+    eggs, finished = catalog.products[0], catalog.products[1]
+    recipe = Recipe(
+        id=uuid4(), tenant_id=tenant_id, product_id=finished.id, name="Tortilla", yield_qty=1
+    )
+    line = RecipeIngredient(
+        id=uuid4(),
+        recipe=recipe,
+        product_id=eggs.id,
+        qty=6,
+        unit="uds",
+        purchase_packaging="Cubeta",
+        qty_per_package=30,
+        package_unit="uds",
+        package_cost=4.5,
+    )
+    db.add_all([recipe, line])
+    db.commit()
+
+    info = db.get(ProductPackInfo, eggs.id)
+    assert (float(info.pack_size), info.pack_label, info.pack_unit) == (30.0, "Cubeta", "uds")
+    rows = _stock(_request(tenant_id), db, product_id=str(eggs.id))
+    assert {(r.pack_size, r.pack_label) for r in rows} == {(30.0, "Cubeta")}
+
+    line.qty_per_package = 12
+    db.commit()
+    db.expire_all()
+    assert float(db.get(ProductPackInfo, eggs.id).pack_size) == 12.0
+
+    db.delete(line)
+    db.commit()
+    db.expire_all()
+    assert db.get(ProductPackInfo, eggs.id) is None
+
+
+@pytest.mark.parametrize("order", ["name", "code"])
+def test_keyset_pages_cover_full_listing(db, catalog, order):
+    request = _request(catalog.tenant_id)
+    legacy = [(r.product_id, r.warehouse_id) for r in _stock(request, db)]
+    assert len(legacy) == 24
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        payload = _page_items(_page(request, db, cursor=cursor, limit=5, order=order))
+        seen += [(i["product_id"], i["warehouse_id"]) for i in payload["items"]]
+        pages += 1
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 5
+    assert seen == legacy
+
+
+def test_stock_page_filters_and_etag(db, catalog):
+    tenant_id = catalog.tenant_id
+
+    low = _page_items(
+        _page(_request(tenant_id), db, warehouse_id=str(catalog.main.id), low_stock=True)
+    )
+    # stock_minimo=5 en productos 0, 4 y 8; solo 0 y 4 están en o bajo el mínimo
+    assert [i["product"]["nombre"] for i in low["items"]] == ["Producto 00", "Producto 04"]
+
+    first = _page(_request(tenant_id), db, q="sku-01")
+    assert {i["product"]["codigo"] for i in _page_items(first)["items"]} == {"SKU-010", "SKU-011"}
+    etag = first.headers["etag"]
+
+    cached = _page(_request(tenant_id, if_none_match=etag), db, q="sku-01")
+    assert cached.status_code == 304
+
+    with pytest.raises(HTTPException) as exc:
+        _page(_request(tenant_id), db, cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_recipe_reimport_refreshes_pack_info_of_replaced_ingredients(db, catalog):
+    from types import SimpleNamespace
+
+    from app.modules.production.internal_api import upsert_recipe_from_import
+
+    tenant_id = catalog.tenant_id
+    eggs, finished = catalog.products[0], catalog.products[1]
+    recipe = Recipe(
+        id=uuid4(), tenant_id=tenant_id, product_id=finished.id, name="Tortilla", yield_qty=1
+    )
+    line = RecipeIngredient(
+        id=uuid4(),
+        recipe=recipe,
+        product_id=eggs.id,
+        qty=6,
+        unit="uds",
+        purchase_packaging="Cubeta",
+        qty_per_package=30,
+        package_unit="uds",
+        package_cost=4.5,
+    )
+    db.add_all([recipe, line])
+    db.commit()
+    assert db.get(ProductPackInfo, eggs.id) is not None
+
+    # La receta reimportada ya no usa huevos
+    doc = SimpleNamespace(
+        tenant_id=tenant_id,
+        nombre_archivo="tortilla.xlsx",
+        sheet_profiles_json=None,
+        datos_confirmados={
+            "nombre_receta": "Tortilla",
+            "filas": [{"ingredientes": "Patata", "cantidad": 500, "unidad": "gr"}],
+        },
+        datos_extraidos=None,
+    )
+    recipe_id, was_new = upsert_recipe_from_import(doc, db)
+    db.commit()
+    db.expire_all()
+
+    assert (recipe_id, was_new) == (recipe.id, False)
+    assert db.get(ProductPackInfo, eggs.id) is None
+
+
+def test_recipe_update_refreshes_pack_info_of_removed_ingredients(db, catalog):
+    from app.modules.production.interface.http.tenant import update_recipe
+    from app.schemas.recipes import RecipeIngredientCreate, RecipeUpdate
+
+    tenant_id = catalog.tenant_id
+    eggs, finished, flour = catalog.products[0], catalog.products[1], catalog.products[2]
+    recipe = Recipe(
+        id=uuid4(), tenant_id=tenant_id, product_id=finished.id, name="Bizcocho", yield_qty=1
+    )
+    db.add(recipe)
+    for product, packaging in ((eggs, "Cubeta"), (flour, "Saco")):
+        db.add(
+            RecipeIngredient(
+                id=uuid4(),
+                recipe=recipe,
+                product_id=product.id,
+                qty=1,
+                unit="uds",
+                purchase_packaging=packaging,
+                qty_per_package=30,
+                package_unit="uds",
+                package_cost=4.5,
+            )
+        )
+    db.commit()
+    assert db.get(ProductPackInfo, eggs.id) is not None
+
+    # El formulario envía la receta sin los huevos y con otro envase de harina
+    payload = RecipeUpdate(
+        ingredients=[
+            RecipeIngredientCreate(
+                product_id=flour.id,
+                qty=2,
+                unit="uds",
+                purchase_packaging="Saco grande",
+                qty_per_package=50,
+                package_unit="uds",
+                package_cost=20,
+            )
+        ]
+    )
+    update_recipe(recipe.id, payload, db, {"tenant_id": str(tenant_id)})
+    db.expire_all()
+
+    assert db.get(ProductPackInfo, eggs.id) is None
+    assert db.get(ProductPackInfo, flour.id).pack_label == "Saco grande"
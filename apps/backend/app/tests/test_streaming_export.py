@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.modules.export.application import jobs as export_jobs
+from app.modules.export.application.datasets import DATASETS, dataset_csv
+from app.modules.export.application.streaming import csv_chunks, iter_file, write_xlsx
+
+
+def _parse(data: bytes) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_csv_chunks_stream_in_blocks_and_gzip_roundtrip(monkeypatch):
+    from app.modules.export.application import streaming
+
+    monkeypatch.setattr(streaming, "CSV_CHUNK_BYTES", 256)
+    rows = [(i, f"item-{i}", "=HYPERLINK()" if i == 3 else "ok") for i in range(200)]
+
+    plain = list(csv_chunks(iter(rows), ("id", "name", "note")))
+    assert len(plain) > 5
+    parsed = _parse(b"".join(plain))
+    assert parsed[0] == ["id", "name", "note"]
+    assert len(parsed) == 201
+    assert parsed[4] == ["3", "item-3", "'=HYPERLINK()"]
+
+    compressed = b"".join(csv_chunks(iter(rows), ("id", "name", "note"), gzip=True))
+    assert gzip.decompress(compressed) == b"".join(plain)
+
+
+def test_write_xlsx_write_only_roundtrip():
+    openpyxl = pytest.importorskip("openpyxl")
+
+    fh, count = write_xlsx(
+        ((f"p{i}", i * 1.5) for i in range(1, 51)),
+        ("Producto", "Valor"),
+        sheet_title="Datos",
+        widths=(20, 12),
+        number_format="#,##0.00",
+        numeric_columns=(1,),
+        footer=[["RESUMEN"], ["total", 1912.5]],
+    )
+    assert count == 50
+    data = b"".join(iter_file(fh))
+    assert fh.closed
+
+    ws = openpyxl.load_workbook(io.BytesIO(data))["Datos"]
+    assert [c.value for c in ws[1]] == ["Producto", "Valor"]
+    assert ws["B51"].value == 75 and ws["B51"].number_format == "#,##0.00"
+    assert ws["A53"].value == "RESUMEN" and ws["B54"].value == 1912.5
+
+
+def test_report_exporter_excel_uses_write_only_engine():
+    openpyxl = pytest.importorskip("openpyxl")
+    from app.modules.reports.domain.entities import ReportData
+    from app.modules.reports.infrastructure.report_generator import ReportExporter
+
+    data = ReportData(
+        columns=["fecha", "total"], rows=[["2026-01-01", 10], ["2026-01-02", 5]], summary={"n": 2}
+    )
+    ws = openpyxl.load_workbook(io.BytesIO(ReportExporter.to_excel(data))).active
+    assert [c.value for c in ws[1]] == ["fecha", "total"]
+    assert ws["B3"].value == 5
+    assert (ws["A5"].value, ws["A6"].value, ws["B6"].value) == ("RESUMEN", "n", 2)
+
+
+@pytest.fixture
+def products(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id_str"]
+    for i in range(30):
+        db.execute(
+            text(
+                "INSERT INTO products (id, tenant_id, name, sku, price, unit, active, is_active, "
+                "stock, use_suggested_price) "
+                "VALUES (:id, :tid, :name, :sku, :price, 'uds', 1, 1, 0, 0)"
+            ),
+            {
+                "id": str(uuid.uuid4()),
+                "tid": tenant_id,
+                "name": f"Producto {i}",
+                "sku": f"SKU-{i:03d}",
+                "price": i,
+            },
+        )
+    db.commit()
+    return tenant_id
+
+
+def test_dataset_csv_has_no_row_cap(db, products):
+    parsed = _parse(b"".join(dataset_csv(db, DATASETS["products"], products)))
+    assert parsed[0] == ["id", "sku", "name", "price", "unit"]
+    assert len(parsed) == 31
+
+    limited = _parse(b"".join(dataset_csv(db, DATASETS["products"], products, limit=5)))
+    assert len(limited) == 6
+
+
+def test_background_export_job_produces_downloadable_file(db, products, tmp_path, monkeypatch):
+    from app.config.settings import settings
+
+    monkeypatch.setattr(settings, "UPLOADS_DIR", str(tmp_path))
+
+    job = export_jobs.create_export_job(products, "products", "csv", gzip=True)
+    assert job["status"] == "pending" and job["filename"] == "products.csv.gz"
+
+    export_jobs.run_export_job(products, job["id"])
+
+    done = export_jobs.get_export_job(products, job["id"])
+    assert done["status"] == "done" and done["rows"] == 30
+    path = export_jobs.export_job_file(products, done)
+    assert len(_parse(gzip.decompress(path.read_bytes()))) == 31
+
+    assert export_jobs.get_export_job(products, "../../etc/passwd") is None
+    assert export_jobs.purge_expired_jobs(products, now=done["finished_at"] + 10**6) == 1
+    assert not path.exists()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import uuid
 from datetime import date
 from decimal import Decimal
@@ -135,12 +134,10 @@ def test_production_create_order_rejects_foreign_warehouse(db: Session, tenant_m
     )
 
     with pytest.raises(HTTPException) as exc:
-        asyncio.run(
-            create_production_order(
-                payload,
-                db,
-                {"tenant_id": str(tenant_a), "user_id": str(uuid.uuid4())},
-            )
+        create_production_order(
+            payload,
+            db,
+            {"tenant_id": str(tenant_a), "user_id": str(uuid.uuid4())},
         )
 
     assert exc.value.status_code == 404
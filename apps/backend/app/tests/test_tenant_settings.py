@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from app.models.company.company_settings import CompanySettings
+from app.models.tenant import Tenant
+from app.modules.feature_flags.dependencies import get_feature_flags
+from app.modules.settings.application.tenant_settings import (
+    get_request_tenant_settings,
+    load_tenant_settings,
+    parse_default_tax_rate,
+)
+
+
+def _count_statements(db, fn):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    return result, len(statements)
+
+
+def _company_settings(db, tenant_id, **values) -> CompanySettings:
+    row = CompanySettings(
+        tenant_id=tenant_id,
+        default_language="es",
+        timezone="Europe/Madrid",
+        currency="eur",
+        primary_color="#000000",
+        secondary_color="#ffffff",
+        **values,
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+def _request(tenant_id):
+    return SimpleNamespace(state=SimpleNamespace(access_claims={"tenant_id": str(tenant_id)}))
+
+
+def test_snapshot_loads_in_one_query_and_follows_writes(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id"]
+    row = _company_settings(
+        db,
+        tenant_id,
+        pos_config={"tax": {"enabled": "yes", "default_rate": 12}},
+        settings={"inventory": {"costing_method": "FIFO"}},
+    )
+
+    snapshot, statements = _count_statements(db, lambda: load_tenant_settings(db, tenant_id))
+    assert statements == 1
+    assert snapshot.currency == "EUR"
+    assert snapshot.costing_method == "fifo"
+    assert snapshot.default_tax_rate == 0.12
+    assert snapshot.tax_enabled is True
+
+    _, statements = _count_statements(db, lambda: load_tenant_settings(db, tenant_id))
+    assert statements == 0
+
+    # El commit incrementa la generación del dominio: la siguiente lectura recarga
+    row.pos_config = {"tax": {"enabled": False}}
+    db.commit()
+    assert load_tenant_settings(db, tenant_id).tax_enabled is False
+
+
+def test_request_snapshot_is_memoized_and_feeds_feature_flags(db, tenant_minimal):
+    tenant_id = tenant_minimal["tenant_id"]
+    tenant = db.get(Tenant, tenant_id)
+    tenant.country_code = "EC"
+    tenant.config_json = {"features": {"crm_enabled": True}}
+    db.commit()
+    request = _request(tenant_id)
+
+    first = get_request_tenant_settings(request, db, tenant_id)
+    assert first.currency == "USD"  # sin company_settings: tenants.base_currency
+    flags, statements = _count_statements(db, lambda: get_feature_flags(request, db))
+    assert statements == 0
+    assert get_request_tenant_settings(request, db, tenant_id) is first
+    assert flags.is_enabled("crm_enabled")
+    assert flags.is_enabled("einvoicing_enabled")  # override de país EC
+
+
+def test_default_tax_rate_parsing():
+    assert parse_default_tax_rate({"tax": {"default_rate": "15"}}, None) == 0.15
+    assert parse_default_tax_rate({}, {"tax": {"default_rate": -1}}) == 0.0
+    assert parse_default_tax_rate({"tax": {"default_rate": "n/a"}}, None) is None
+    assert parse_default_tax_rate(None, None) is None
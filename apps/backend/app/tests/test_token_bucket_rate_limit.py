@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.token_bucket import (
+    LimitRule,
+    MemoryBucketBackend,
+    RedisBucketBackend,
+    TokenBucketLimiter,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_refills_continuously_without_boundary_bursts():
+    clock = _Clock()
+    backend = MemoryBucketBackend(clock=clock)
+    rule = LimitRule(10, 60)
+
+    async def drain() -> int:
+        return sum([(await backend.take("k", rule)).allowed for _ in range(15)])
+
+    assert asyncio.run(drain()) == 10
+    denied = asyncio.run(backend.take("k", rule))
+    assert not denied.allowed and denied.retry_after == 6
+
+    # A fixed window would hand out a full new quota here; the bucket only
+    # refills what elapsed (1 token every 6s).
+    clock.now += 12
+    assert asyncio.run(drain()) == 2
+
+
+def test_local_precheck_skips_backend_until_close_to_limit():
+    clock = _Clock()
+    backend = MemoryBucketBackend(clock=clock)
+    limiter = TokenBucketLimiter(backend, local_share=0.1, sync_threshold=0.5, clock=clock)
+    rule = LimitRule(100, 60)
+
+    async def run(n: int) -> list[bool]:
+        return [(await limiter.hit("user-1", rule)).allowed for _ in range(n)]
+
+    results = asyncio.run(run(120))
+
+    # Debt accumulated locally is charged on sync, so the cap still holds.
+    assert sum(results) == 100
+    assert results[-1] is False
+    assert limiter.local_hits > 0
+    assert backend.calls == 120 - limiter.local_hits
+
+
+def test_critical_limits_without_local_share_always_hit_backend():
+    backend = MemoryBucketBackend()
+    limiter = TokenBucketLimiter(backend, local_share=0)
+
+    async def run() -> None:
+        for _ in range(5):
+            await limiter.hit("ip", LimitRule(10, 60))
+
+    asyncio.run(run())
+    assert backend.calls == 5
+
+
+def test_redis_backend_runs_single_script_per_sync():
+    calls: list[tuple[list, list]] = []
+
+    class _FakeRedis:
+        def register_script(self, script):
+            assert "HMGET" in script and "PEXPIRE" in script
+
+            async def run(keys, args):
+                calls.append((keys, args))
+                return [1, "9.5", 0]
+
+            return run
+
+    backend = RedisBucketBackend(_FakeRedis(), prefix="rl:")
+    result = asyncio.run(backend.take("u", LimitRule(10, 60), debt=3))
+
+    assert result.allowed and result.remaining == 9
+    ((keys, args),) = calls
+    assert keys == ["rl:u"]
+    assert args[0] == 10 and args[2] == 3 and args[3] == 1
+
+
+def _app(**kwargs) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, **kwargs)
+
+    @app.get("/api/v1/tenant/items")
+    def items():
+        return {"ok": True}
+
+    @app.get("/api/v1/tenant/reports/heavy")
+    def heavy():
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_sets_headers_and_blocks_with_retry_after():
+    limiter = TokenBucketLimiter(MemoryBucketBackend(), local_share=0)
+    client = TestClient(_app(limit_per_minute=3, limiter=limiter, tenant_limits={}))
+
+    responses = [client.get("/api/v1/tenant/items") for _ in range(4)]
+
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "3"
+    assert responses[0].headers["X-RateLimit-Remaining"] == "2"
+    assert responses[3].headers["Retry-After"] == "20"
+
+
+def test_route_class_uses_its_own_bucket():
+    limiter = TokenBucketLimiter(MemoryBucketBackend(), local_share=0)
+    client = TestClient(
+        _app(
+            limit_per_minute=100,
+            route_limits={"/api/v1/tenant/reports": (1, 60)},
+            limiter=limiter,
+            tenant_limits={},
+        )
+    )
+
+    assert client.get("/api/v1/tenant/reports/heavy").status_code == 200
+    assert client.get("/api/v1/tenant/reports/heavy").status_code == 429
+    assert client.get("/api/v1/tenant/items").status_code == 200
+
+
+def test_limiter_errors_fail_open():
+    class _Broken:
+        async def take(self, key, rule, *, debt=0):
+            raise ConnectionError("redis down")
+
+    limiter = TokenBucketLimiter(_Broken(), local_share=0)
+    client = TestClient(_app(limit_per_minute=1, limiter=limiter, tenant_limits={}))
+
+    assert [client.get("/api/v1/tenant/items").status_code for _ in range(3)] == [200] * 3
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+
+import app.core.cache as cache_module
+from app.core.cache import (
+    cache_get_or_load,
+    cache_get_or_load_sync,
+    handle_invalidation_message,
+    invalidate_on_commit,
+    invalidate_tenant_all,
+    invalidate_tenant_domain,
+    invalidate_tenant_domain_sync,
+)
+
+
+def test_sync_loader_runs_once_for_concurrent_misses():
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return {"items": [1, 2]}
+
+    results = []
+
+    def worker():
+        results.append(cache_get_or_load_sync("t-1", "products", ["list"], loader, ttl=60))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"items": [1, 2]}] * 8
+    # Hit de L1: el loader no vuelve a ejecutarse
+    assert cache_get_or_load_sync("t-1", "products", ["list"], loader) == {"items": [1, 2]}
+    assert len(calls) == 1
+
+
+def test_async_single_flight_and_generation_invalidation():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": len(calls)}
+
+    async def run():
+        first = await asyncio.gather(
+            *(cache_get_or_load("t-1", "catalogos", ["a"], loader) for _ in range(10))
+        )
+        assert first == [{"n": 1}] * 10
+
+        generation = await invalidate_tenant_domain("t-1", "catalogos")
+        assert generation == 1
+        assert await cache_get_or_load("t-1", "catalogos", ["a"], loader) == {"n": 2}
+
+        # Otro dominio del mismo tenant no se ve afectado
+        await cache_get_or_load("t-1", "empresa", ["x"], loader)
+        await invalidate_tenant_domain("t-1", "catalogos")
+        assert await cache_get_or_load("t-1", "empresa", ["x"], loader) == {"n": 3}
+
+        # La generación a nivel tenant invalida todos los dominios
+        await invalidate_tenant_all("t-1")
+        assert await cache_get_or_load("t-1", "empresa", ["x"], loader) == {"n": 4}
+
+    asyncio.run(run())
+
+
+def test_tenant_ids_are_canonicalized():
+    tid = uuid.uuid4()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "v"
+
+    cache_get_or_load_sync(tid, "empresa", ["settings"], loader)
+    cache_get_or_load_sync(str(tid).upper(), "empresa", ["settings"], loader)
+    assert len(calls) == 1
+
+    invalidate_tenant_domain_sync(str(tid), "empresa")
+    cache_get_or_load_sync(tid, "empresa", ["settings"], loader)
+    assert len(calls) == 2
+
+
+def test_pubsub_message_drops_local_entries():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [len(calls)]
+
+    assert cache_get_or_load_sync("t-2", "catalogos", ["x"], loader) == [1]
+    assert cache_module.cache_stats()["l1_entries"] == 1
+
+    # Otro pod incrementó la generación a 7
+    handle_invalidation_message('{"t": "t-2", "d": "catalogos", "g": 7}')
+    assert cache_module.cache_stats()["l1_entries"] == 0
+    assert cache_get_or_load_sync("t-2", "catalogos", ["x"], loader) == [2]
+
+    handle_invalidation_message("not-json")  # ignorado sin error
+
+
+def test_invalidate_on_commit_bumps_generation_only_after_commit():
+    from sqlalchemy import Column, Integer, String, create_engine
+    from sqlalchemy.orm import Session, declarative_base
+
+    Base = declarative_base()
+
+    class Widget(Base):
+        __tablename__ = "widgets_cache_test"
+        id = Column(Integer, primary_key=True)
+        tenant_id = Column(String, nullable=False)
+
+    invalidate_on_commit(Widget, "widgets")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert cache_get_or_load_sync("t-3", "widgets", ["all"], loader) == 1
+
+    with Session(engine) as session:
+        session.add(Widget(id=1, tenant_id="t-3"))
+        session.flush()
+        session.rollback()
+    assert cache_get_or_load_sync("t-3", "widgets", ["all"], loader) == 1
+
+    with Session(engine) as session:
+        session.add(Widget(id=1, tenant_id="t-3"))
+        session.commit()
+    assert cache_get_or_load_sync("t-3", "widgets", ["all"], loader) == 2
+
+
+def test_sync_redis_client_retries_after_connection_failure(monkeypatch):
+    import redis
+
+    import app.config.settings as settings_module
+
+    attempts = []
+
+    class FakeRedis:
+        def ping(self):
+            if len(attempts) == 1:
+                raise ConnectionError("redis still starting")
+            return True
+
+    def from_url(url, **kwargs):
+        attempts.append(url)
+        return FakeRedis()
+
+    monkeypatch.delenv("DISABLE_REDIS", raising=False)
+    monkeypatch.setattr(
+        settings_module, "get_settings", lambda: type("S", (), {"REDIS_URL": "redis://r:6379/0"})
+    )
+    monkeypatch.setattr(redis.Redis, "from_url", staticmethod(from_url))
+    monkeypatch.setattr(cache_module, "_sync_redis_client", None)
+    monkeypatch.setattr(cache_module, "_sync_redis_available", None)
+    monkeypatch.setattr(cache_module, "_sync_redis_retry_at", 0.0)
+
+    assert cache_module.get_sync_redis_client() is None
+    # Dentro del cooldown no se vuelve a intentar
+    assert cache_module.get_sync_redis_client() is None
+    assert len(attempts) == 1
+
+    monkeypatch.setattr(cache_module, "_sync_redis_retry_at", 0.0)
+    client = cache_module.get_sync_redis_client()
+    assert isinstance(client, FakeRedis)
+    assert cache_module.get_sync_redis_client() is client
+    assert attempts == ["redis://r:6379/0"] * 2
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+
+from app.modules.webhooks.domain.entities import (
+    DeliveryStatus,
+    WebhookEndpoint,
+    WebhookEvent,
+    WebhookEventType,
+)
+from app.modules.webhooks.infrastructure.circuit_breaker import EndpointCircuitBreaker
+from app.modules.webhooks.infrastructure.webhook_dispatcher import WebhookDispatcher
+
+
+class _FakeQueue:
+    def __init__(self):
+        self.scheduled: list[dict] = []
+
+    def enqueue(self, **kwargs) -> bool:
+        self.scheduled.append(kwargs)
+        return True
+
+
+def _event() -> WebhookEvent:
+    return WebhookEvent(
+        id=uuid4(),
+        webhook_id=uuid4(),
+        tenant_id="tenant-1",
+        event_type=WebhookEventType.INVOICE_CREATED,
+        resource_type="invoice",
+        resource_id="inv-1",
+        payload={"total": "10.00"},
+        timestamp=datetime(2026, 1, 1, 12, 0, 0),
+    )
+
+
+def _endpoint(host: str) -> WebhookEndpoint:
+    return WebhookEndpoint(
+        id=uuid4(),
+        tenant_id="tenant-1",
+        url=f"http://{host}/hook",
+        events=[WebhookEventType.INVOICE_CREATED],
+        secret="s3cret",
+        max_retries=3,
+    )
+
+
+def _dispatcher(handler, **kwargs) -> tuple[WebhookDispatcher, _FakeQueue]:
+    queue = _FakeQueue()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return WebhookDispatcher(None, client=client, queue=queue, **kwargs), queue
+
+
+def test_dispatch_delivers_to_endpoints_concurrently():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.2)
+        return httpx.Response(200)
+
+    dispatcher, queue = _dispatcher(handler, breaker=EndpointCircuitBreaker())
+    endpoints = [_endpoint(f"sub{i}.example") for i in range(5)]
+
+    started = time.perf_counter()
+    results = asyncio.run(dispatcher.dispatch(_event(), endpoints))
+    elapsed = time.perf_counter() - started
+
+    assert set(results.values()) == {DeliveryStatus.DELIVERED}
+    assert len(results) == 5
+    # Sequential delivery would take ~1s.
+    assert elapsed < 0.7
+    assert queue.scheduled == []
+
+
+def test_server_error_schedules_retry_on_queue_without_sleeping():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    dispatcher, queue = _dispatcher(handler, breaker=EndpointCircuitBreaker())
+    endpoint = _endpoint("down.example")
+
+    started = time.perf_counter()
+    results = asyncio.run(dispatcher.dispatch(_event(), [endpoint]))
+
+    assert time.perf_counter() - started < 1
+    assert results[endpoint.id] == DeliveryStatus.RETRYING
+    (retry,) = queue.scheduled
+    assert retry["attempt_number"] == 2
+    assert retry["delay_seconds"] == 2
+    assert retry["extra"]["last_error"] == "HTTP 503"
+
+    # Last attempt gives up instead of rescheduling.
+    status = asyncio.run(dispatcher.redeliver({**retry, **retry["extra"], "attempt_number": 3}))
+    assert status == DeliveryStatus.ABANDONED
+    assert len(queue.scheduled) == 1
+
+
+def test_circuit_opens_after_consecutive_failures():
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("refused", request=request)
+
+    breaker = EndpointCircuitBreaker(failure_threshold=2, reset_timeout=30)
+    dispatcher, queue = _dispatcher(handler, breaker=breaker)
+    endpoint = _endpoint("flaky.example")
+    endpoint.max_retries = 10
+
+    for _ in range(3):
+        asyncio.run(dispatcher.dispatch(_event(), [endpoint]))
+
+    assert calls == 2
+    assert breaker.is_open(str(endpoint.id))
+    deferred = queue.scheduled[-1]
+    assert deferred["extra"]["last_error"] == "circuit_open"
+    assert deferred["attempt_number"] == 1
+    assert 1 <= deferred["delay_seconds"] <= 30
+
+
+def test_circuit_half_open_probe_closes_on_success():
+    now = [0.0]
+    breaker = EndpointCircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure("ep")
+    assert not breaker.allow("ep")
+
+    now[0] = 11.0
+    assert breaker.allow("ep")
+    assert not breaker.allow("ep")  # only one probe at a time
+    breaker.record_success("ep")
+    assert breaker.allow("ep")
+    assert not breaker.is_open("ep")
+
+
+class _MemoryRedis:
+    """Just the list/set/sorted-set commands WebhookEventQueue uses."""
+
+    def __init__(self):
+        self.lists: dict[str, list[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.sets: dict[str, set[str]] = {}
+
+    def ping(self):
+        return True
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def lpop(self, key):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high, start=0, num=None):
+        members = sorted((s, m) for m, s in self.zsets.get(key, {}).items() if s <= high)
+        return [m for _, m in members][start : None if num is None else start + num]
+
+    def zrem(self, key, member):
+        return self.zsets.get(key, {}).pop(member, None) is not None
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+
+def test_beat_task_delivers_due_retries(monkeypatch):
+    import celery_app as celery_module
+    from app.modules.webhooks import tasks
+    from app.modules.webhooks.infrastructure import event_queue, webhook_dispatcher
+
+    schedule = celery_module.get_celery_app().conf.beat_schedule
+    assert schedule["webhook-retries-30s"]["task"] == tasks.process_retries.name
+
+    memory = _MemoryRedis()
+    monkeypatch.setattr(event_queue.redis, "from_url", lambda *a, **kw: memory)
+    delivered: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delivered.append(str(request.url))
+        return httpx.Response(200)
+
+    async def mock_client():
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(webhook_dispatcher, "get_webhook_http_client", mock_client)
+
+    queue = event_queue.WebhookEventQueue()
+    for host, delay in (("due.example", 0.001), ("later.example", 3600)):
+        endpoint = _endpoint(host)
+        assert queue.enqueue(
+            delivery_id=uuid4(),
+            subscription_id=endpoint.id,
+            target_url=endpoint.url,
+            secret=endpoint.secret,
+            payload={"id": str(uuid4()), "event": "invoice.created", "data": {}},
+            attempt_number=2,
+            delay_seconds=delay,
+            extra={"tenant_id": "tenant-1", "max_retries": 3},
+        )
+    time.sleep(0.01)
+
+    assert tasks.process_retries() == {"processed": 1, "delivered": 1}
+    assert delivered == ["http://due.example/hook"]
+    # The retry whose backoff has not expired stays parked
+    assert len(memory.zsets[queue.delayed_key]) == 1
+    assert tasks.process_retries() == {"processed": 0}
@@ -1,24 +1,85 @@
-"""Event Outbox Poller Worker — Processes unpublished events"""
+"""Event Outbox Poller Worker — Processes unpublished events
+
+Handlers are registered here; ``outbox_dispatcher.OutboxDispatcher`` runs them
+from several workers that claim disjoint batches with ``FOR UPDATE SKIP
+LOCKED`` and wake up on ``NOTIFY event_outbox``. Batch handlers get their own
+lane (event types, concurrency and batch size); every other event type goes
+through the default lane.
+"""
 
 import logging
 import time
-from datetime import UTC
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
 
 from app.config.database import session_scope
 from app.models.core.event_outbox import EventOutbox
 from app.services.event_service import EventService
+from app.telemetry.metrics import record_outbox_batch
 
 logger = logging.getLogger(__name__)
 
 # Event handlers registry
 EVENT_HANDLERS: dict[str, list] = {}
 
+# Batch handlers get every event of their types in one poll batch plus the
+# poller's session, so their writes commit together with the acknowledgements.
+# They return {event_id: error} for the events that could not be applied.
+BatchHandler = Callable[[Session, list[EventOutbox]], dict[UUID, str]]
+BATCH_HANDLERS: dict[str, BatchHandler] = {}
+
+DEFAULT_LANE = "default"
+
+
+@dataclass(frozen=True)
+class Lane:
+    """Event types claimed together by ``concurrency`` dispatcher workers."""
+
+    name: str
+    event_types: frozenset[str]
+    concurrency: int = 1
+    batch_size: int = 50
+
+
+LANES: dict[str, Lane] = {}
+
+
+class BatchResult(NamedTuple):
+    claimed: int
+    published: int
+    failed: int
+
 
 def register_handler(event_type: str, handler):
     """Register a handler for an event type."""
     EVENT_HANDLERS.setdefault(event_type, []).append(handler)
 
 
+def register_batch_handler(
+    event_types: Iterable[str],
+    handler: BatchHandler,
+    *,
+    lane: str | None = None,
+    concurrency: int = 1,
+    batch_size: int = 200,
+) -> None:
+    """Register a handler that processes all events of ``event_types`` in a batch.
+
+    The event types get a dispatcher lane of their own, so a slow batch handler
+    does not hold back other events and its batches can be larger.
+    """
+    event_types = frozenset(event_types)
+    for event_type in event_types:
+        BATCH_HANDLERS[event_type] = handler
+    name = lane or handler.__name__
+    LANES[name] = Lane(name, event_types, concurrency=concurrency, batch_size=batch_size)
+
+
 def _process_event(event: EventOutbox) -> None:
     """Process a single event by calling registered handlers."""
     handlers = EVENT_HANDLERS.get(event.event_type, [])
@@ -40,104 +101,214 @@ def _process_event(event: EventOutbox) -> None:
             raise
 
 
-def poll_and_process(batch_size: int = 50, max_retries: int = 5) -> int:
-    """Poll for unpublished events and process them. Returns count processed."""
-    processed = 0
+def _lag_seconds(event: EventOutbox, now: datetime) -> float:
+    created_at = event.created_at
+    if created_at is None:
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    return max((now - created_at).total_seconds(), 0.0)
+
+
+def dispatch_batch(
+    batch_size: int = 50,
+    max_retries: int = 5,
+    *,
+    lane: str = DEFAULT_LANE,
+    event_types: frozenset[str] | None = None,
+    exclude_types: frozenset[str] | None = None,
+) -> BatchResult:
+    """Claim one batch of due events and process it in a single transaction."""
+    started = time.monotonic()
+    published = 0
     with session_scope() as db:
-        events = EventService.get_unpublished(db, limit=batch_size, max_retries=max_retries)
+        events = EventService.claim_batch(
+            db,
+            limit=batch_size,
+            max_retries=max_retries,
+            event_types=event_types,
+            exclude_types=exclude_types,
+        )
+        if not events:
+            return BatchResult(0, 0, 0)
+        now = datetime.now(UTC)
+        lags = [_lag_seconds(event, now) for event in events]
+        batches: dict[BatchHandler, list[EventOutbox]] = {}
         for event in events:
+            batch_handler = BATCH_HANDLERS.get(event.event_type)
+            if batch_handler is not None:
+                batches.setdefault(batch_handler, []).append(event)
+                continue
             try:
                 _process_event(event)
                 EventService.mark_published(db, event.id)
-                processed += 1
+                published += 1
             except Exception as e:
                 EventService.mark_failed(db, event.id, str(e))
                 logger.warning("Event %s failed: %s", event.id, e)
-    return processed
+        for batch_handler, batch in batches.items():
+            published += _process_batch(db, batch_handler, batch)
+    failed = len(events) - published
+    record_outbox_batch(lane, published, failed, lags, time.monotonic() - started)
+    return BatchResult(len(events), published, failed)
 
 
-def run_poller(interval_seconds: int = 30, batch_size: int = 50):
-    """Run the poller loop (blocking). For use in a standalone worker process."""
-    logger.info("Event outbox poller started (interval=%ds)", interval_seconds)
-    while True:
-        try:
-            count = poll_and_process(batch_size=batch_size)
-            if count > 0:
-                logger.info("Processed %d events", count)
-        except Exception as e:
-            logger.error("Poller cycle failed: %s", e)
-        time.sleep(interval_seconds)
-
-
-# Register default handlers for recalculation triggers
-def _handle_sale_posted(event: EventOutbox):
-    """Trigger profit recalculation when a sale is posted."""
-    from datetime import date as date_type
-
-    from app.config.database import session_scope
-    from app.modules.reports.application.recalculation_service import RecalculationService
-
-    payload = event.payload or {}
-    sale_date = payload.get("date")
-    if not sale_date:
-        return
-    if isinstance(sale_date, str):
-        sale_date = date_type.fromisoformat(sale_date)
-
-    with session_scope() as db:
-        svc = RecalculationService(db)
-        svc.recalculate_daily(event.tenant_id, sale_date)
-
-
-def _handle_expense_posted(event: EventOutbox):
-    """Trigger profit recalculation when an expense is posted."""
-    from datetime import date as date_type
-
-    from app.config.database import session_scope
-    from app.modules.reports.application.recalculation_service import RecalculationService
-
-    payload = event.payload or {}
-    expense_date = payload.get("date")
-    if not expense_date:
-        return
-    if isinstance(expense_date, str):
-        expense_date = date_type.fromisoformat(expense_date)
-
-    with session_scope() as db:
-        svc = RecalculationService(db)
-        svc.recalculate_daily(event.tenant_id, expense_date)
-
-
-def _handle_pos_receipt_completed(event: EventOutbox):
-    """Trigger profit recalculation when a POS receipt is completed.
-
-    Uses today's date because pos_receipts.paid_at is set to NOW() at checkout
-    time and is not forwarded in the payload (the receipt_id is available for
-    future handlers that need finer-grained processing).
+def poll_and_process(batch_size: int = 50, max_retries: int = 5) -> int:
+    """Poll for unpublished events and process them. Returns count processed."""
+    return dispatch_batch(batch_size=batch_size, max_retries=max_retries).published
+
+
+def _process_batch(db: Session, handler: BatchHandler, events: list[EventOutbox]) -> int:
+    try:
+        with db.begin_nested():
+            failures = handler(db, events)
+    except Exception as e:
+        logger.error("Batch handler %s failed: %s", handler.__name__, e)
+        failures = {event.id: str(e) for event in events}
+    for event in events:
+        error = failures.get(event.id)
+        if error is None:
+            EventService.mark_published(db, event.id)
+        else:
+            EventService.mark_failed(db, event.id, error)
+            logger.warning("Event %s failed: %s", event.id, error)
+    return len(events) - len(failures)
+
+
+def run_poller(
+    interval_seconds: int = 10,
+    batch_size: int = 50,
+    *,
+    workers: int = 2,
+    metrics_port: int | None = None,
+):
+    """Run the outbox dispatcher (blocking). For use in a standalone worker process.
+
+    ``interval_seconds`` is only the fallback poll: workers wake up on
+    ``NOTIFY event_outbox`` and also pick up retries whose backoff expired.
     """
+    from app.workers.outbox_dispatcher import OutboxDispatcher
+
+    dispatcher = OutboxDispatcher(
+        workers=workers,
+        batch_size=batch_size,
+        interval_seconds=interval_seconds,
+        metrics_port=metrics_port,
+    )
+    dispatcher.run_forever()
+
+
+def _handle_receipt_documents(db: Session, events: list[EventOutbox]) -> dict[UUID, str]:
+    """Create the invoice/sales order of completed POS receipts (off the checkout)."""
+    from app.modules.pos.application.receipt_documents import process_receipt_documents
+
+    return process_receipt_documents(db, events)
+
+
+# Several workers: receipts are independent and each document is idempotent.
+register_batch_handler(
+    {"pos.receipt.completed"},
+    _handle_receipt_documents,
+    lane="pos_documents",
+    concurrency=2,
+    batch_size=50,
+)
+
+
+# Profit snapshot recalculation triggers.
+#
+# Events are coalesced per (tenant, date) inside a poll batch: receipts (once
+# their sales order exists, see ``pos.receipt.documents_created``) and posted
+# sales fold the day's pending orders into the snapshots, expenses only
+# refresh the expense total, and edits to existing sales recalculate the day.
+_PROFIT_FULL = "full"
+_PROFIT_ORDERS = "orders"
+_PROFIT_EXPENSES = "expenses"
+
+PROFIT_EVENT_MODES: dict[str, str] = {
+    "sale.posted": _PROFIT_ORDERS,
+    "sale.updated": _PROFIT_FULL,
+    "expense.posted": _PROFIT_EXPENSES,
+    "expense.updated": _PROFIT_EXPENSES,
+    "pos.receipt.documents_created": _PROFIT_ORDERS,
+}
+
+
+def _receipt_order_dates(db: Session, events: list[EventOutbox]) -> dict[str, date]:
+    """Order date of the sales order created for each receipt, in one query."""
+    from app.models.sales.order import SalesOrder
+
+    receipt_ids = set()
+    for event in events:
+        payload = event.payload or {}
+        if event.event_type == "pos.receipt.documents_created" and not payload.get("date"):
+            try:
+                receipt_ids.add(UUID(str(payload.get("receipt_id"))))
+            except ValueError:
+                continue
+    if not receipt_ids:
+        return {}
+    rows = (
+        db.query(SalesOrder.pos_receipt_id, SalesOrder.order_date)
+        .filter(SalesOrder.pos_receipt_id.in_(receipt_ids))
+        .all()
+    )
+    return {str(receipt_id): order_date for receipt_id, order_date in rows}
+
+
+def _handle_profit_events(db: Session, events: list[EventOutbox]) -> dict[UUID, str]:
+    """Apply profit recalculation triggers once per (tenant, date)."""
     from datetime import date as date_type
+    from datetime import datetime
 
-    from app.config.database import session_scope
     from app.modules.reports.application.recalculation_service import RecalculationService
 
-    payload = event.payload or {}
-    sale_date_str = payload.get("date")
-    if sale_date_str:
-        sale_date = date_type.fromisoformat(sale_date_str)
-    else:
-        # paid_at is NOW() on the DB side; fall back to today in UTC
-        from datetime import datetime
-
-        sale_date = datetime.now(UTC).date()
-
-    with session_scope() as db:
-        svc = RecalculationService(db)
-        svc.recalculate_daily(event.tenant_id, sale_date)
-
-
-# Register handlers
-register_handler("sale.posted", _handle_sale_posted)
-register_handler("sale.updated", _handle_sale_posted)
-register_handler("expense.posted", _handle_expense_posted)
-register_handler("expense.updated", _handle_expense_posted)
-register_handler("pos.receipt.completed", _handle_pos_receipt_completed)
+    receipt_dates = _receipt_order_dates(db, events)
+    plans: dict[tuple[UUID, date_type], set[str]] = {}
+    plan_events: dict[tuple[UUID, date_type], list[EventOutbox]] = {}
+    for event in events:
+        payload = event.payload or {}
+        event_date = payload.get("date")
+        if not event_date and event.event_type == "pos.receipt.documents_created":
+            # paid_at is NOW() on the DB side; prefer the order the receipt
+            # produced and fall back to today in UTC
+            event_date = receipt_dates.get(str(payload.get("receipt_id"))) or (
+                datetime.now(UTC).date()
+            )
+        if not event_date:
+            continue
+        if isinstance(event_date, str):
+            event_date = date_type.fromisoformat(event_date)
+        key = (event.tenant_id, event_date)
+        plans.setdefault(key, set()).add(PROFIT_EVENT_MODES[event.event_type])
+        plan_events.setdefault(key, []).append(event)
+
+    svc = RecalculationService(db)
+    failures: dict[UUID, str] = {}
+    for (tenant_id, target_date), modes in plans.items():
+        try:
+            with db.begin_nested():
+                if _PROFIT_FULL in modes:
+                    svc.recalculate_daily(tenant_id, target_date)
+                    continue
+                if _PROFIT_ORDERS in modes:
+                    svc.apply_orders_delta(tenant_id, target_date)
+                if _PROFIT_EXPENSES in modes:
+                    svc.refresh_expenses(tenant_id, target_date)
+        except Exception as e:
+            for event in plan_events[(tenant_id, target_date)]:
+                failures[event.id] = str(e)
+    if plans:
+        logger.info(
+            "Profit snapshots: %d events coalesced into %d tenant-days",
+            len(events),
+            len(plans),
+        )
+    return failures
+
+
+# One profit worker per process: concurrent batches would recompute the same
+# tenant-days; larger batches coalesce more triggers per snapshot.
+register_batch_handler(
+    PROFIT_EVENT_MODES, _handle_profit_events, lane="profit", concurrency=1, batch_size=200
+)
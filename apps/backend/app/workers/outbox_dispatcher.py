@@ -0,0 +1,232 @@
+"""Outbox dispatcher — multi-worker runtime for the event outbox.
+
+Each lane (see ``event_outbox_worker.LANES``) runs ``concurrency`` worker
+threads; the default lane takes every event type without a lane of its own.
+Workers claim batches with ``FOR UPDATE SKIP LOCKED`` so several threads and
+processes can run side by side, and drain the backlog while batches come back
+full. A dedicated connection runs ``LISTEN event_outbox``: ``EventService.publish``
+notifies on commit with the event type as payload, which wakes only the lane
+that handles it. ``interval_seconds`` is the fallback poll (SQLite, lost
+listener connection) and picks up retries once their backoff expires.
+
+    python -m app.workers.outbox_dispatcher --workers 4 --metrics-port 9108
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import select
+import threading
+from dataclasses import dataclass, field
+
+from sqlalchemy.engine import Engine
+
+from app.config.database import engine as default_engine
+from app.services.event_service import OUTBOX_CHANNEL
+from app.workers.event_outbox_worker import DEFAULT_LANE, LANES, Lane, dispatch_batch
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxListener:
+    """``LISTEN event_outbox`` on a dedicated autocommit connection (psycopg2)."""
+
+    def __init__(self, engine: Engine, channel: str = OUTBOX_CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._conn = None
+
+    @property
+    def supported(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def connect(self) -> bool:
+        if self._conn is not None:
+            return True
+        if not self.supported:
+            return False
+        try:
+            raw = self.engine.raw_connection()
+            # Fuera del pool: la conexión vive lo que viva el listener
+            raw.detach()
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+        except Exception as e:
+            logger.warning("Outbox LISTEN unavailable, polling only: %s", e)
+            return False
+        self._conn = conn
+        return True
+
+    def wait(self, timeout: float) -> set[str] | None:
+        """Event types notified within ``timeout``; ``None`` when not listening."""
+        if not self.connect():
+            return None
+        conn = self._conn
+        try:
+            readable, _, _ = select.select([conn], [], [], timeout)
+            if not readable:
+                return set()
+            conn.poll()
+            payloads = {notify.payload for notify in conn.notifies}
+            conn.notifies.clear()
+            return payloads
+        except Exception as e:
+            logger.warning("Outbox listener connection lost: %s", e)
+            self.close()
+            return None
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+@dataclass
+class _LaneRunner:
+    lane: Lane
+    exclude_types: frozenset[str] | None = None
+    wake: threading.Event = field(default_factory=threading.Event)
+
+    def handles(self, event_type: str) -> bool:
+        if self.exclude_types is not None:
+            return event_type not in self.exclude_types
+        return event_type in self.lane.event_types
+
+
+class OutboxDispatcher:
+    """Runs the outbox lanes in worker threads until :meth:`stop`."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        batch_size: int = 50,
+        interval_seconds: float = 10,
+        max_retries: int = 5,
+        metrics_port: int | None = None,
+        engine: Engine | None = None,
+    ):
+        self.interval_seconds = interval_seconds
+        self.max_retries = max_retries
+        self.metrics_port = metrics_port
+        self.listener = OutboxListener(engine or default_engine)
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+        laned_types = frozenset().union(*(lane.event_types for lane in LANES.values()))
+        default = Lane(DEFAULT_LANE, frozenset(), concurrency=workers, batch_size=batch_size)
+        self.runners = [_LaneRunner(default, exclude_types=laned_types)]
+        self.runners += [_LaneRunner(lane) for lane in LANES.values()]
+
+    def start(self) -> None:
+        if self.metrics_port:
+            _start_metrics_server(self.metrics_port)
+        for runner in self.runners:
+            for n in range(runner.lane.concurrency):
+                self._spawn(f"outbox-{runner.lane.name}-{n}", self._work, runner)
+        self._spawn("outbox-listener", self._listen)
+        logger.info(
+            "Outbox dispatcher started: %s (fallback poll %ss)",
+            ", ".join(f"{r.lane.name}x{r.lane.concurrency}" for r in self.runners),
+            self.interval_seconds,
+        )
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        for runner in self.runners:
+            runner.wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.listener.close()
+
+    def run_forever(self) -> None:
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Outbox dispatcher stopping")
+        finally:
+            self.stop(timeout=self.interval_seconds)
+
+    def wake(self, event_types: set[str]) -> None:
+        """Wake the lanes that handle any of ``event_types``."""
+        for runner in self.runners:
+            if any(runner.handles(event_type) for event_type in event_types):
+                runner.wake.set()
+
+    def _spawn(self, name: str, target, *args) -> None:
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _work(self, runner: _LaneRunner) -> None:
+        lane = runner.lane
+        while not self._stop.is_set():
+            # Limpiar antes de reclamar: un NOTIFY durante el lote no se pierde
+            runner.wake.clear()
+            claimed = 0
+            try:
+                result = dispatch_batch(
+                    batch_size=lane.batch_size,
+                    max_retries=self.max_retries,
+                    lane=lane.name,
+                    event_types=None if runner.exclude_types is not None else lane.event_types,
+                    exclude_types=runner.exclude_types,
+                )
+                claimed = result.claimed
+                if claimed:
+                    logger.debug(
+                        "Outbox lane %s: %d published, %d failed",
+                        lane.name,
+                        result.published,
+                        result.failed,
+                    )
+            except Exception as e:
+                logger.error("Outbox lane %s cycle failed: %s", lane.name, e)
+            if claimed < lane.batch_size:
+                runner.wake.wait(self.interval_seconds)
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            notified = self.listener.wait(self.interval_seconds)
+            if notified is None:
+                # Sin LISTEN (SQLite o conexión caída): los workers sondean solos
+                self._stop.wait(self.interval_seconds)
+            elif notified:
+                self.wake(notified)
+
+
+def _start_metrics_server(port: int) -> None:
+    try:
+        from prometheus_client import start_http_server
+    except ImportError:
+        logger.warning("prometheus_client not installed; outbox metrics not exported")
+        return
+    start_http_server(port)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Event outbox dispatcher")
+    parser.add_argument("--workers", type=int, default=2, help="default lane workers")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=10, help="fallback poll seconds")
+    parser.add_argument("--metrics-port", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    OutboxDispatcher(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        interval_seconds=args.interval,
+        metrics_port=args.metrics_port,
+    ).run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,10 @@ Two tasks are exposed:
   ``cron_expression`` (when present) or ``frequency``.
 * ``recalculate_profit_snapshots``: nightly per-tenant recomputation of
   profit snapshots delegating to ``RecalculationService``.
+* ``reconcile_kpi_rollups``: nightly rebuild of the dashboard KPI rollups
+  (``kpi_hourly``/``kpi_daily``) for the day that just closed.
 
-Both tasks are registered unconditionally so they remain invokable from
+All tasks are registered unconditionally so they remain invokable from
 shells / management endpoints. Whether they are *scheduled* by Celery beat
 is gated by the ``REPORTS_SCHEDULER_ENABLED`` env flag (see
 ``apps/backend/celery_app.py``).
@@ -238,7 +240,48 @@ def recalculate_profit_snapshots(target_date: str | None = None) -> dict[str, An
     return summary
 
 
+@celery_app.task(name="apps.backend.app.workers.reports_tasks.reconcile_kpi_rollups")
+def reconcile_kpi_rollups(target_date: str | None = None) -> dict[str, Any]:
+    """Nightly rebuild of the dashboard KPI rollups for the day that closed.
+
+    ``kpi_hourly`` is maintained incrementally at checkout/refund/production
+    completion; this task recomputes *yesterday* from the source tables (so any
+    drift is healed) and stores the daily critical-stock snapshot.
+    """
+    from app.db.rls import set_tenant_guc
+    from app.modules.analytics.application.kpi_rollups import rebuild_day, snapshot_daily_stock
+
+    day = (
+        date.fromisoformat(target_date)
+        if target_date
+        else (datetime.now(UTC) - timedelta(days=1)).date()
+    )
+
+    session = _open_session()
+    summary: dict[str, Any] = {"date": day.isoformat(), "tenants": 0, "errors": 0}
+    try:
+        tenant_ids = [row[0] for row in session.execute(text("SELECT id FROM tenants")).fetchall()]
+        for tenant_id in tenant_ids:
+            try:
+                set_tenant_guc(session, str(tenant_id), persist=True)
+                rebuild_day(session, tenant_id, day)
+                snapshot_daily_stock(session, tenant_id, day)
+                session.commit()
+                summary["tenants"] += 1
+            except Exception as exc:  # pragma: no cover - defensive
+                session.rollback()
+                logger.exception(
+                    "Failed to reconcile KPI rollups tenant=%s date=%s: %s", tenant_id, day, exc
+                )
+                summary["errors"] += 1
+    finally:
+        session.close()
+
+    return summary
+
+
 __all__ = [
     "process_due_scheduled_reports",
     "recalculate_profit_snapshots",
+    "reconcile_kpi_rollups",
 ]
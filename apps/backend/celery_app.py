@@ -132,6 +132,7 @@ def create_celery_app() -> Celery:
             "apps.backend.app.modules.einvoicing.tasks.scheduled_build_sii": {"queue": "sii"},
             "apps.backend.app.modules.einvoicing.tasks.scheduled_retry": {"queue": "sii"},
             "apps.backend.app.modules.webhooks.tasks.deliver": {"queue": "default"},
+            "apps.backend.app.modules.webhooks.tasks.process_retries": {"queue": "default"},
             "importador.process_document": {"queue": "importador"},
         },
     }
@@ -148,8 +149,16 @@ def create_celery_app() -> Celery:
 
     _celery_app.conf.update(base_config)
 
+    # Webhook retries wait in a delayed set until this promotes and delivers them
+    beat_schedule: dict = {
+        "webhook-retries-30s": {
+            "task": "apps.backend.app.modules.webhooks.tasks.process_retries",
+            "schedule": 30.0,
+            "options": {"expires": 25},
+        },
+    }
+
     # Optional: enable beat schedule when requested (pilot-safe)
-    beat_schedule: dict = {}
     if os.getenv("ENABLE_EINVOICING_BEAT", "0").lower() in ("1", "true", "yes"):
         # Default: run at 03:30 UTC daily
         beat_schedule.update({
@@ -178,6 +187,10 @@ def create_celery_app() -> Celery:
                 "task": "apps.backend.app.workers.reports_tasks.recalculate_profit_snapshots",
                 "schedule": crontab(minute=0, hour=3),
             },
+            "reconcile-kpi-rollups-nightly": {
+                "task": "apps.backend.app.workers.reports_tasks.reconcile_kpi_rollups",
+                "schedule": crontab(minute=15, hour=3),
+            },
         })
 
     if beat_schedule:
@@ -257,6 +270,16 @@ def _import_task_modules():
         except Exception:
             continue
 
+    for task_module in (
+        "app.modules.webhooks.tasks",
+        "apps.backend.app.modules.webhooks.tasks",
+    ):
+        try:
+            __import__(task_module)
+            break
+        except Exception:
+            continue
+
 # Auto-import task modules when the app is created
 # This ensures tasks are registered in production/development
 if not _is_testing_environment():
@@ -0,0 +1,128 @@
+"""
+bench_middleware_stack.py
+=========================
+Microbenchmark del stack de middlewares HTTP sobre un endpoint trivial.
+
+Monta el mismo orden de middlewares que ``app.main`` (sin CORS) sobre una
+mini-app FastAPI con ``GET /ping`` y mide latencia p50/p99 y req/s vía
+``httpx.ASGITransport`` (sin red). Compara:
+
+- baseline: los mismos middlewares envueltos en ``BaseHTTPMiddleware``
+  (comportamiento anterior, una tarea + memory stream por capa);
+- asgi: el stack actual en ASGI puro con ``RequestContextMiddleware``.
+
+USO:
+  cd apps/backend
+  python scripts/bench_middleware_stack.py [--requests 3000] [--concurrency 1]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.sessions import InMemorySessionStore, SessionMiddlewareServerSide  # noqa: E402
+from app.middleware.endpoint_rate_limit import EndpointRateLimiter  # noqa: E402
+from app.middleware.rate_limit import RateLimitMiddleware  # noqa: E402
+from app.middleware.request_context import RequestContextMiddleware  # noqa: E402
+from app.middleware.request_log import RequestLogMiddleware  # noqa: E402
+from app.middleware.require_csrf import RequireCSRFMiddleware  # noqa: E402
+from app.middleware.security_headers import SecurityHeadersMiddleware  # noqa: E402
+from app.middleware.utf8_json import UTF8JSONMiddleware  # noqa: E402
+from app.middleware.v1_rewrite import V1PathRewriteMiddleware  # noqa: E402
+
+
+async def _passthrough(request, call_next):
+    return await call_next(request)
+
+
+def _build_app(*, legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    layers: list[tuple[type, dict]] = [
+        (V1PathRewriteMiddleware, {}),
+        (UTF8JSONMiddleware, {}),
+        (RequireCSRFMiddleware, {}),
+        (
+            SessionMiddlewareServerSide,
+            {
+                "cookie_name": "sess",
+                "secret_key": "bench",
+                "https_only": False,
+                "store": InMemorySessionStore(),
+            },
+        ),
+        (RequestLogMiddleware, {}),
+        # Sin REDIS_URL el limitador global deja pasar: mide solo su overhead.
+        (RateLimitMiddleware, {"redis_url": None}),
+        (EndpointRateLimiter, {"limits": {"/login": (10, 60)}, "redis_url": None}),
+    ]
+    if not legacy:
+        layers.append((RequestContextMiddleware, {}))
+    layers.append((SecurityHeadersMiddleware, {}))
+
+    for cls, kwargs in layers:
+        app.add_middleware(cls, **kwargs)
+        if legacy:
+            # Cada capa del stack anterior era un BaseHTTPMiddleware: se reproduce
+            # su coste añadiendo un BaseHTTPMiddleware de paso por capa.
+            app.add_middleware(BaseHTTPMiddleware, dispatch=_passthrough)
+    return app
+
+
+async def _run(app: FastAPI, total: int, concurrency: int) -> tuple[list[float], float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # warm-up
+            await client.get("/ping")
+
+        async def worker(n: int) -> None:
+            for _ in range(n):
+                t0 = time.perf_counter()
+                response = await client.get("/ping")
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert response.status_code == 200
+
+        per_worker = max(1, total // concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+
+def _report(label: str, latencies: list[float], elapsed: float) -> None:
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<9} p50={q[49]:.3f}ms p99={q[98]:.3f}ms "
+        f"req/s={len(latencies) / elapsed:,.0f} (n={len(latencies)})"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.pop("REDIS_URL", None)
+    for label, legacy in (("baseline", True), ("asgi", False)):
+        latencies, elapsed = await _run(_build_app(legacy=legacy), args.requests, args.concurrency)
+        _report(label, latencies, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+bench_rate_limit.py
+===================
+Benchmark del limitador global: ventana fija (``INCR``+``EXPIRE`` por request,
+comportamiento anterior de ``RateLimitMiddleware``) frente al token bucket Lua
+con pre-check local (``app.middleware.token_bucket``).
+
+Con ``--redis-url`` mide contra un Redis real. Sin él, usa el backend en
+memoria con una latencia simulada por round trip (``--rtt-ms``), que es lo que
+domina el coste del limitador en producción.
+
+Reporta req/s del limitador y round trips a Redis por request, para
+``--clients`` clientes concurrentes por debajo de su límite.
+
+USO:
+  cd apps/backend
+  python scripts/bench_rate_limit.py [--requests 20000] [--clients 50] [--rtt-ms 0.3]
+  python scripts/bench_rate_limit.py --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.middleware.token_bucket import (  # noqa: E402
+    LimitRule,
+    MemoryBucketBackend,
+    RedisBucketBackend,
+    TokenBucketLimiter,
+)
+
+
+class _SimulatedRTT:
+    """Backend en memoria que paga ``rtt`` segundos por round trip."""
+
+    def __init__(self, rtt: float) -> None:
+        self._inner = MemoryBucketBackend()
+        self._rtt = rtt
+        self._windows: dict[str, int] = {}
+        self.calls = 0
+
+    async def take(self, key, rule, *, debt=0):
+        self.calls += 1
+        await asyncio.sleep(self._rtt)
+        return await self._inner.take(key, rule, debt=debt)
+
+    async def incr(self, key: str) -> int:
+        self.calls += 1
+        await asyncio.sleep(self._rtt)
+        self._windows[key] = self._windows.get(key, 0) + 1
+        return self._windows[key]
+
+
+async def _fixed_window(redis, sim: _SimulatedRTT | None, ident: str, limit: int) -> bool:
+    key = f"bench:rl:{ident}:{int(time.time() // 60)}"
+    if sim is not None:
+        return await sim.incr(key) <= limit
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, 120)
+        count, _ = await pipe.execute()
+    return int(count) <= limit
+
+
+async def _drive(hit, total: int, clients: int) -> float:
+    per_client = total // clients
+
+    async def client(i: int) -> None:
+        for _ in range(per_client):
+            await hit(f"user-{i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=1000, help="req/min por cliente")
+    parser.add_argument("--rtt-ms", type=float, default=0.3)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    rule = LimitRule(args.limit, 60)
+    redis = None
+    if args.redis_url:
+        from redis import asyncio as aioredis
+
+        redis = aioredis.from_url(args.redis_url, decode_responses=True)
+        await redis.flushdb()
+
+    for label in ("fixed-window", "token-bucket"):
+        sim = None if redis is not None else _SimulatedRTT(args.rtt_ms / 1000)
+        calls = [0]
+        if label == "fixed-window":
+
+            async def hit(ident: str, sim=sim) -> None:
+                calls[0] += 1
+                await _fixed_window(redis, sim, ident, args.limit)
+
+        else:
+            backend = RedisBucketBackend(redis, prefix="bench:tb:") if redis else sim
+            limiter = TokenBucketLimiter(backend)
+
+            async def hit(ident: str, limiter=limiter) -> None:
+                await limiter.hit(ident, rule)
+
+        elapsed = await _drive(hit, args.requests, args.clients)
+        if label == "fixed-window":
+            round_trips = sim.calls if sim is not None else calls[0]
+        else:
+            round_trips = backend.calls
+        print(
+            f"{label:<13} req/s={args.requests / elapsed:,.0f} "
+            f"round_trips/request={round_trips / args.requests:.2f}"
+        )
+
+    if redis is not None:
+        await redis.flushdb()
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+bench_webhook_fanout.py
+=======================
+Benchmark de fan-out de webhooks contra un servidor HTTP stub local.
+
+Levanta un servidor asyncio mínimo que responde 200 tras ``--latency-ms`` y
+despacha un evento a ``--endpoints`` suscriptores (hosts distintos vía
+puertos distintos). Compara:
+
+- secuencial: un ``httpx.AsyncClient`` nuevo por entrega, await una a una
+  (comportamiento anterior de ``WebhookDispatcher.dispatch``);
+- dispatcher: ``WebhookDispatcher.dispatch`` con cliente compartido y
+  entregas concurrentes.
+
+USO:
+  cd apps/backend
+  python scripts/bench_webhook_fanout.py [--endpoints 20] [--latency-ms 100]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.modules.webhooks.domain.entities import (  # noqa: E402
+    WebhookEndpoint,
+    WebhookEvent,
+    WebhookEventType,
+)
+from app.modules.webhooks.infrastructure.circuit_breaker import (  # noqa: E402
+    EndpointCircuitBreaker,
+)
+from app.modules.webhooks.infrastructure.http_client import (  # noqa: E402
+    close_webhook_http_client,
+)
+from app.modules.webhooks.infrastructure.webhook_dispatcher import (  # noqa: E402
+    WebhookDispatcher,
+)
+
+_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok"
+
+
+async def _start_stub(latency: float) -> asyncio.AbstractServer:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(_RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def _sequential(endpoints: list[WebhookEndpoint], payload: dict) -> None:
+    for endpoint in endpoints:
+        async with httpx.AsyncClient(timeout=endpoint.timeout_seconds) as client:
+            response = await client.post(endpoint.url, json=payload)
+            response.raise_for_status()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--endpoints", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    servers = [await _start_stub(args.latency_ms / 1000) for _ in range(args.endpoints)]
+    endpoints = [
+        WebhookEndpoint(
+            id=uuid4(),
+            tenant_id="bench",
+            url=f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/hook",
+            events=[WebhookEventType.INVOICE_CREATED],
+            secret="bench",
+        )
+        for server in servers
+    ]
+    event = WebhookEvent(
+        id=uuid4(),
+        webhook_id=uuid4(),
+        tenant_id="bench",
+        event_type=WebhookEventType.INVOICE_CREATED,
+        resource_type="invoice",
+        resource_id="bench",
+        payload={"total": "10.00"},
+        timestamp=datetime.now(),
+    )
+
+    started = time.perf_counter()
+    await _sequential(endpoints, {"id": str(event.id)})
+    sequential_ms = (time.perf_counter() - started) * 1000
+
+    dispatcher = WebhookDispatcher(None, breaker=EndpointCircuitBreaker())
+    await dispatcher.dispatch(event, endpoints[:1])  # warm the pool
+    started = time.perf_counter()
+    results = await dispatcher.dispatch(event, endpoints)
+    concurrent_ms = (time.perf_counter() - started) * 1000
+
+    delivered = sum(1 for status in results.values() if status.value == "delivered")
+    print(f"endpoints={args.endpoints} latency={args.latency_ms}ms delivered={delivered}")
+    print(f"sequential={sequential_ms:.0f}ms dispatcher={concurrent_ms:.0f}ms")
+
+    await close_webhook_http_client()
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
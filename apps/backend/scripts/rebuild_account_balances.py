@@ -0,0 +1,78 @@
+"""
+rebuild_account_balances.py
+===========================
+Verificación de consistencia de los saldos contables.
+
+Los saldos de `chart_of_accounts` se mantienen por deltas al contabilizar o
+cancelar asientos, y los meses cerrados guardan sus totales en
+`account_period_balances`. Este script los recalcula desde cero a partir de
+las líneas POSTED y reporta las cuentas que difieren.
+
+QUÉ HACE:
+  1. Suma débitos/créditos POSTED por cuenta y los compara con los saldos.
+  2. Con --fix reescribe los saldos divergentes y regenera los snapshots de
+     todos los períodos CLOSED.
+
+USO:
+  cd apps/backend
+  python scripts/rebuild_account_balances.py [--fix] [--tenant-id UUID]
+
+  --fix         Corrige saldos y snapshots (por defecto solo informa).
+  --tenant-id   Limita la verificación a un tenant específico.
+
+Sale con código 1 si encontró diferencias y no se pasó --fix.
+"""
+
+import argparse
+import os
+import sys
+from uuid import UUID
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.config.database import engine  # noqa: E402
+from app.db.rls import set_tenant_guc  # noqa: E402
+from app.models.tenant import Tenant  # noqa: E402
+from app.modules.accounting.application.balances import rebuild_account_balances  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--fix", action="store_true")
+    parser.add_argument("--tenant-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    total_mismatches = 0
+    with Session(engine) as db:
+        if args.tenant_id:
+            tenants = [args.tenant_id]
+        else:
+            tenants = list(db.execute(select(Tenant.id)).scalars())
+
+        for tenant_id in tenants:
+            if engine.dialect.name == "postgresql":
+                set_tenant_guc(db, str(tenant_id), persist=True)
+            mismatches, regenerated = rebuild_account_balances(db, tenant_id, fix=args.fix)
+            total_mismatches += len(mismatches)
+            for m in mismatches:
+                print(
+                    f"[{tenant_id}] {m.code}: guardado debe={m.stored[0]} haber={m.stored[1]} "
+                    f"| esperado debe={m.expected[0]} haber={m.expected[1]}"
+                )
+            if args.fix:
+                print(
+                    f"[{tenant_id}] {len(mismatches)} cuentas corregidas, "
+                    f"{regenerated} períodos cerrados re-snapshot"
+                )
+        if args.fix:
+            db.commit()
+
+    print(f"Tenants: {len(tenants)} · cuentas con diferencias: {total_mismatches}")
+    return 1 if total_mismatches and not args.fix else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
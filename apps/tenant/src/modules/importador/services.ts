@@ -943,6 +943,11 @@ export type ImportBatch = {
   items?: ImportBatchItem[]
 }
 
+type ImportBatchStreamEvent = ImportBatch & {
+  type?: 'snapshot' | 'delta'
+  seq?: number
+}
+
 function getImportadorStreamToken(): string {
   // Order matches the shared HTTP client (httpTenant.ts):
   //   1) sessionStorage('access_token_tenant') = runtime source of truth
@@ -1013,10 +1018,27 @@ export function streamImportBatch(
   const streamUrl = `${TENANT_IMPORTADOR.batchStream(id)}?token=${encodeURIComponent(token)}`
   const source = new EventSource(streamUrl)
   let closed = false
+  let current: ImportBatch | null = null
 
   source.onmessage = (event) => {
     try {
-      handlers.onMessage(event.data ? JSON.parse(event.data) as ImportBatch : { id } as ImportBatch)
+      if (!event.data) {
+        handlers.onMessage(current ?? { id } as ImportBatch)
+        return
+      }
+      const { type, seq: _seq, items, ...summary } = JSON.parse(event.data) as ImportBatchStreamEvent
+      if (type === 'delta' && current) {
+        // Delta: resumen del lote + solo los ítems que cambiaron
+        const changed = new Map((items ?? []).map(item => [item.id, item]))
+        current = {
+          ...current,
+          ...summary,
+          items: current.items?.map(item => changed.get(item.id) ?? item),
+        }
+      } else {
+        current = { ...summary, items } as ImportBatch
+      }
+      handlers.onMessage(current)
     } catch {
       // Ignore malformed keep-alives or transient payloads.
     }
@@ -0,0 +1,7 @@
+BEGIN;
+
+DELETE FROM imp_config
+WHERE module = 'ocr_config'
+  AND key IN ('pdf_ocr_max_workers', 'pdf_ocr_parallel_min_pages');
+
+COMMIT;
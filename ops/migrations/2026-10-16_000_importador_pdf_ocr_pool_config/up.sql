@@ -0,0 +1,9 @@
+BEGIN;
+
+-- Page-parallel PDF OCR pool settings for the importador.
+INSERT INTO imp_config (id, module, key, value_text, value_list, label) VALUES
+    (gen_random_uuid(), 'ocr_config', 'pdf_ocr_max_workers', '2', NULL, 'PDF OCR pool max workers'),
+    (gen_random_uuid(), 'ocr_config', 'pdf_ocr_parallel_min_pages', '2', NULL, 'PDF OCR pool minimum pages')
+ON CONFLICT (module, key) DO NOTHING;
+
+COMMIT;
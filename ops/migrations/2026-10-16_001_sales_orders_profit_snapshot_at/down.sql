@@ -0,0 +1,6 @@
+BEGIN;
+
+DROP INDEX IF EXISTS idx_sales_orders_profit_snapshot_pending;
+ALTER TABLE sales_orders DROP COLUMN IF EXISTS profit_snapshot_at;
+
+COMMIT;
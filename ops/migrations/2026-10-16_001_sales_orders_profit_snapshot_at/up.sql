@@ -0,0 +1,20 @@
+BEGIN;
+
+-- Marks sales orders already folded into profit_snapshots_daily /
+-- product_profit_snapshots so the outbox poller can apply deltas.
+ALTER TABLE sales_orders ADD COLUMN IF NOT EXISTS profit_snapshot_at TIMESTAMPTZ;
+
+-- Existing snapshots were built by full recalculation: treat those days as applied.
+UPDATE sales_orders so
+   SET profit_snapshot_at = NOW()
+  FROM profit_snapshots_daily ps
+ WHERE ps.tenant_id = so.tenant_id
+   AND ps.date = so.order_date
+   AND so.created_at <= ps.updated_at
+   AND so.profit_snapshot_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_sales_orders_profit_snapshot_pending
+    ON sales_orders (tenant_id, order_date)
+    WHERE profit_snapshot_at IS NULL;
+
+COMMIT;
@@ -0,0 +1,4 @@
+-- Rollback for 2026-10-16_002_sequence_counters
+BEGIN;
+DROP TABLE IF EXISTS sequence_counters CASCADE;
+COMMIT;
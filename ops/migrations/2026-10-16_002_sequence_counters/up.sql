@@ -0,0 +1,34 @@
+-- Migration: 2026-10-16_002_sequence_counters
+-- Contadores de numeración sin huecos (app.services.sequences): una fila por
+-- (tenant, doc_type, scope, period) que se incrementa con UPDATE ... RETURNING.
+-- Sustituye los MAX()/ORDER BY sobre el histórico de recibos POS, series
+-- anuales y órdenes/lotes de producción.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sequence_counters (
+    tenant_id   UUID        NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    doc_type    VARCHAR(40) NOT NULL,
+    scope       VARCHAR(64) NOT NULL DEFAULT '',
+    period      VARCHAR(16) NOT NULL DEFAULT '',
+    last_number BIGINT      NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, doc_type, scope, period)
+);
+
+-- RLS: align with the rest of the schema (see 2026-03-14_002_comprehensive_rls).
+ALTER TABLE sequence_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sequence_counters FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_sequence_counters_modify ON sequence_counters;
+CREATE POLICY rls_sequence_counters_modify ON sequence_counters
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+COMMIT;
@@ -0,0 +1,5 @@
+-- Rollback for 2026-10-16_003_account_period_balances
+BEGIN;
+DROP INDEX IF EXISTS idx_journal_entries_tenant_status_date;
+DROP TABLE IF EXISTS account_period_balances CASCADE;
+COMMIT;
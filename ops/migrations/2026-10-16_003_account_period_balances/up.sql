@@ -0,0 +1,60 @@
+-- Migration: 2026-10-16_003_account_period_balances
+-- Totales mensuales por cuenta congelados al cerrar un período contable
+-- (app.modules.accounting.application.balances). Los reportes combinan estos
+-- snapshots con las líneas de los meses abiertos.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS account_period_balances (
+    id          UUID          PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id   UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    account_id  UUID          NOT NULL REFERENCES chart_of_accounts(id) ON DELETE CASCADE,
+    year        INTEGER       NOT NULL,
+    month       INTEGER       NOT NULL CHECK (month BETWEEN 1 AND 12),
+    debit       NUMERIC(14,2) NOT NULL DEFAULT 0,
+    credit      NUMERIC(14,2) NOT NULL DEFAULT 0,
+    frozen_at   TIMESTAMPTZ   NOT NULL DEFAULT NOW(),
+    CONSTRAINT uq_account_period_balances UNIQUE (tenant_id, account_id, year, month)
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_period_balances_tenant_period
+    ON account_period_balances(tenant_id, year, month);
+
+-- Rango de fechas por tenant/estado (saldos iniciales, reportes del período abierto)
+CREATE INDEX IF NOT EXISTS idx_journal_entries_tenant_status_date
+    ON journal_entries(tenant_id, status, date);
+
+-- Snapshots de los períodos ya cerrados
+INSERT INTO account_period_balances (tenant_id, account_id, year, month, debit, credit)
+SELECT p.tenant_id,
+       l.account_id,
+       p.year,
+       p.month,
+       COALESCE(SUM(l.debit), 0),
+       COALESCE(SUM(l.credit), 0)
+  FROM accounting_periods p
+  JOIN journal_entries e
+    ON e.tenant_id = p.tenant_id
+   AND e.status = 'POSTED'
+   AND e.date >= make_date(p.year, p.month, 1)
+   AND e.date < (make_date(p.year, p.month, 1) + INTERVAL '1 month')
+  JOIN journal_entry_lines l ON l.entry_id = e.id
+ WHERE p.status = 'CLOSED'
+ GROUP BY p.tenant_id, l.account_id, p.year, p.month
+ON CONFLICT (tenant_id, account_id, year, month) DO NOTHING;
+
+ALTER TABLE account_period_balances ENABLE ROW LEVEL SECURITY;
+ALTER TABLE account_period_balances FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_account_period_balances_modify ON account_period_balances;
+CREATE POLICY rls_account_period_balances_modify ON account_period_balances
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Rollback for 2026-10-16_004_kpi_rollups
+BEGIN;
+DROP INDEX IF EXISTS idx_production_orders_tenant_completed;
+DROP INDEX IF EXISTS idx_pos_receipts_tenant_created;
+DROP TABLE IF EXISTS kpi_daily CASCADE;
+DROP TABLE IF EXISTS kpi_hourly CASCADE;
+COMMIT;
@@ -0,0 +1,117 @@
+-- Migration: 2026-10-16_004_kpi_rollups
+-- Rollups de KPIs para los dashboards sectoriales
+-- (app.modules.analytics.application.kpi_rollups):
+--   * kpi_hourly: ventas POS y producción por tenant/día/hora, mantenidos de
+--     forma incremental en el checkout, los reembolsos y al completar órdenes.
+--   * kpi_daily: foto diaria del stock crítico (tarea nocturna).
+-- Índices de rango para el cálculo en vivo del día en curso y backfill de los
+-- últimos 90 días.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS kpi_hourly (
+    tenant_id          UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    day                DATE          NOT NULL,
+    hour               SMALLINT      NOT NULL CHECK (hour BETWEEN 0 AND 23),
+    sales_total        NUMERIC(14,2) NOT NULL DEFAULT 0,
+    receipts_count     INTEGER       NOT NULL DEFAULT 0,
+    batches_completed  INTEGER       NOT NULL DEFAULT 0,
+    produced_qty       NUMERIC(14,3) NOT NULL DEFAULT 0,
+    waste_qty          NUMERIC(14,3) NOT NULL DEFAULT 0,
+    waste_value        NUMERIC(14,2) NOT NULL DEFAULT 0,
+    updated_at         TIMESTAMPTZ   NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, day, hour)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_daily (
+    tenant_id             UUID        NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    day                   DATE        NOT NULL,
+    critical_stock_items  INTEGER     NOT NULL DEFAULT 0,
+    critical_sale_items   INTEGER     NOT NULL DEFAULT 0,
+    critical_raw_items    INTEGER     NOT NULL DEFAULT 0,
+    updated_at            TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, day)
+);
+
+-- Predicados de rango del día en curso (sustituyen DATE(col) = :today)
+CREATE INDEX IF NOT EXISTS idx_pos_receipts_tenant_created
+    ON pos_receipts(tenant_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_production_orders_tenant_completed
+    ON production_orders(tenant_id, completed_at)
+    WHERE status = 'COMPLETED';
+
+-- Backfill: últimos 90 días
+INSERT INTO kpi_hourly (tenant_id, day, hour, sales_total, receipts_count)
+SELECT tenant_id,
+       created_at::date,
+       EXTRACT(HOUR FROM created_at)::smallint,
+       COALESCE(SUM(gross_total), 0),
+       COUNT(*)
+FROM pos_receipts
+WHERE status IN ('paid', 'invoiced')
+  AND created_at >= CURRENT_DATE - INTERVAL '90 days'
+GROUP BY 1, 2, 3
+ON CONFLICT (tenant_id, day, hour) DO NOTHING;
+
+INSERT INTO kpi_hourly (
+    tenant_id, day, hour, batches_completed, produced_qty, waste_qty, waste_value
+)
+SELECT po.tenant_id,
+       po.completed_at::date,
+       EXTRACT(HOUR FROM po.completed_at)::smallint,
+       COUNT(*),
+       COALESCE(SUM(po.qty_produced), 0),
+       COALESCE(SUM(po.waste_qty), 0),
+       COALESCE(SUM(
+           CASE
+               WHEN COALESCE(po.waste_qty, 0) <= 0 OR COALESCE(c.material_cost, 0) <= 0 THEN 0
+               ELSE c.material_cost
+                    / NULLIF(COALESCE(po.qty_produced, 0) + po.waste_qty, 0)
+                    * po.waste_qty
+           END
+       ), 0)
+FROM production_orders po
+LEFT JOIN (
+    SELECT order_id, SUM(cost_total) AS material_cost
+    FROM production_order_lines
+    GROUP BY order_id
+) c ON c.order_id = po.id
+WHERE po.status = 'COMPLETED'
+  AND po.completed_at >= CURRENT_DATE - INTERVAL '90 days'
+GROUP BY 1, 2, 3
+ON CONFLICT (tenant_id, day, hour) DO UPDATE SET
+    batches_completed = EXCLUDED.batches_completed,
+    produced_qty = EXCLUDED.produced_qty,
+    waste_qty = EXCLUDED.waste_qty,
+    waste_value = EXCLUDED.waste_value;
+
+-- RLS: align with the rest of the schema (see 2026-03-14_002_comprehensive_rls).
+ALTER TABLE kpi_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE kpi_hourly FORCE ROW LEVEL SECURITY;
+ALTER TABLE kpi_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE kpi_daily FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_kpi_hourly_modify ON kpi_hourly;
+CREATE POLICY rls_kpi_hourly_modify ON kpi_hourly
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+DROP POLICY IF EXISTS rls_kpi_daily_modify ON kpi_daily;
+CREATE POLICY rls_kpi_daily_modify ON kpi_daily
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+COMMIT;
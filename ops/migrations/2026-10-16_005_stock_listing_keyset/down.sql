@@ -0,0 +1,7 @@
+-- Rollback for 2026-10-16_005_stock_listing_keyset
+BEGIN;
+DROP INDEX IF EXISTS idx_stock_items_tenant_product;
+DROP INDEX IF EXISTS idx_products_tenant_sku_key;
+DROP INDEX IF EXISTS idx_products_tenant_name;
+DROP TABLE IF EXISTS product_pack_info CASCADE;
+COMMIT;
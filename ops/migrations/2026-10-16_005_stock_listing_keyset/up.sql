@@ -0,0 +1,61 @@
+-- Migration: 2026-10-16_005_stock_listing_keyset
+-- Listado de stock paginado (GET /inventory/stock/page):
+--   * product_pack_info: presentación de compra por producto derivada de
+--     recipe_ingredients (MAX por campo). La mantiene el ORM al hacer flush de
+--     ingredientes (app.models.recipes); aquí solo se hace el backfill.
+--   * Índices para el keyset por nombre/código dentro del tenant.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS product_pack_info (
+    product_id  UUID          PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    tenant_id   UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    pack_size   NUMERIC(12,4),
+    pack_label  VARCHAR(100),
+    pack_unit   VARCHAR(10),
+    updated_at  TIMESTAMPTZ   DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_product_pack_info_tenant_id
+    ON product_pack_info(tenant_id);
+
+INSERT INTO product_pack_info (product_id, tenant_id, pack_size, pack_label, pack_unit)
+SELECT ri.product_id,
+       p.tenant_id,
+       MAX(ri.qty_per_package),
+       MAX(ri.purchase_packaging),
+       MAX(ri.package_unit)
+  FROM recipe_ingredients ri
+  JOIN products p ON p.id = ri.product_id
+ WHERE ri.qty_per_package > 0
+ GROUP BY ri.product_id, p.tenant_id
+ON CONFLICT (product_id) DO UPDATE SET
+    pack_size = EXCLUDED.pack_size,
+    pack_label = EXCLUDED.pack_label,
+    pack_unit = EXCLUDED.pack_unit,
+    updated_at = NOW();
+
+-- Keyset: (nombre | código) dentro del tenant, y stock por producto
+CREATE INDEX IF NOT EXISTS idx_products_tenant_name
+    ON products(tenant_id, name);
+CREATE INDEX IF NOT EXISTS idx_products_tenant_sku_key
+    ON products(tenant_id, (COALESCE(sku, '')));
+CREATE INDEX IF NOT EXISTS idx_stock_items_tenant_product
+    ON stock_items(tenant_id, product_id);
+
+-- RLS: align with the rest of the schema (see 2026-03-14_002_comprehensive_rls).
+ALTER TABLE product_pack_info ENABLE ROW LEVEL SECURITY;
+ALTER TABLE product_pack_info FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_product_pack_info_modify ON product_pack_info;
+CREATE POLICY rls_product_pack_info_modify ON product_pack_info
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+COMMIT;
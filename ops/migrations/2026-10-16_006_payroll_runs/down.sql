@@ -0,0 +1,6 @@
+-- Rollback for 2026-10-16_006_payroll_runs
+BEGIN;
+DROP INDEX IF EXISTS public.ix_time_entries_employee_date;
+DROP INDEX IF EXISTS public.ix_employee_salaries_employee_effective;
+DROP TABLE IF EXISTS public.payroll_runs CASCADE;
+COMMIT;
@@ -0,0 +1,49 @@
+-- Migration: 2026-10-16_006_payroll_runs
+-- Generación de nómina en segundo plano (app.modules.hr.application.payroll_jobs):
+--   * payroll_runs: estado y progreso (procesados/total) de cada ejecución.
+--   * Índices para las precargas por lote de salarios vigentes y fichajes.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.payroll_runs (
+    id             UUID         PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id      UUID         NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    payroll_month  VARCHAR(7)   NOT NULL,
+    payroll_date   DATE         NOT NULL,
+    status         VARCHAR(20)  NOT NULL DEFAULT 'pending',
+    processed      INTEGER      NOT NULL DEFAULT 0,
+    total          INTEGER      NOT NULL DEFAULT 0,
+    payroll_id     UUID         REFERENCES public.payrolls(id) ON DELETE SET NULL,
+    error          TEXT,
+    created_by     UUID,
+    created_at     TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+    updated_at     TIMESTAMPTZ  NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_payroll_runs_tenant_id
+    ON public.payroll_runs (tenant_id);
+CREATE INDEX IF NOT EXISTS ix_payroll_runs_tenant_month_active
+    ON public.payroll_runs (tenant_id, payroll_month)
+    WHERE status IN ('pending', 'running');
+
+CREATE INDEX IF NOT EXISTS ix_employee_salaries_employee_effective
+    ON public.employee_salaries (employee_id, effective_date DESC);
+CREATE INDEX IF NOT EXISTS ix_time_entries_employee_date
+    ON public.time_entries (employee_id, entry_date);
+
+-- RLS: align with the rest of the schema (see 2026-03-14_002_comprehensive_rls).
+ALTER TABLE public.payroll_runs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.payroll_runs FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_payroll_runs_modify ON public.payroll_runs;
+CREATE POLICY rls_payroll_runs_modify ON public.payroll_runs
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- Rollback for 2026-10-16_007_event_outbox_dispatch
+BEGIN;
+DROP INDEX IF EXISTS public.ix_event_outbox_pending_type_created;
+DROP INDEX IF EXISTS public.ix_event_outbox_pending_created;
+ALTER TABLE public.event_outbox DROP COLUMN IF EXISTS next_attempt_at;
+COMMIT;
@@ -0,0 +1,20 @@
+-- Migration: 2026-10-16_007_event_outbox_dispatch
+-- Dispatcher del outbox (app/workers/outbox_dispatcher.py):
+--   * next_attempt_at: reintentos con backoff exponencial (EventService.mark_failed).
+--   * Índices parciales para reclamar pendientes con FOR UPDATE SKIP LOCKED,
+--     global (created_at) y por lane (event_type, created_at).
+-- Los workers se despiertan con LISTEN event_outbox; EventService.publish
+-- encola pg_notify('event_outbox', <event_type>) en la transacción del emisor.
+BEGIN;
+
+ALTER TABLE public.event_outbox
+    ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS ix_event_outbox_pending_created
+    ON public.event_outbox (created_at)
+    WHERE published_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_event_outbox_pending_type_created
+    ON public.event_outbox (event_type, created_at)
+    WHERE published_at IS NULL;
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- Rollback for 2026-10-16_008_pos_receipt_documents_status
+BEGIN;
+DROP INDEX IF EXISTS public.ix_pos_receipts_documents_unfinished;
+ALTER TABLE public.pos_receipts DROP COLUMN IF EXISTS documents_error;
+ALTER TABLE public.pos_receipts DROP COLUMN IF EXISTS documents_status;
+COMMIT;
@@ -0,0 +1,17 @@
+-- Migration: 2026-10-16_008_pos_receipt_documents_status
+-- Factura y venta complementarias del checkout POS fuera de la respuesta:
+-- la etapa del outbox (pos.receipt.completed) las crea y deja el estado en
+-- pos_receipts.documents_status (pending | done | failed), que el POS consulta
+-- en GET /pos/receipts/{id}/documents.
+BEGIN;
+
+ALTER TABLE public.pos_receipts
+    ADD COLUMN IF NOT EXISTS documents_status VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS documents_error TEXT;
+
+-- Seguimiento/rescate de recibos con documentos sin terminar
+CREATE INDEX IF NOT EXISTS ix_pos_receipts_documents_unfinished
+    ON public.pos_receipts (tenant_id, created_at)
+    WHERE documents_status IN ('pending', 'failed');
+
+COMMIT;
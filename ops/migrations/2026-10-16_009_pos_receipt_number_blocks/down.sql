@@ -0,0 +1,5 @@
+-- Rollback for 2026-10-16_009_pos_receipt_number_blocks
+BEGIN;
+DROP INDEX IF EXISTS public.uq_pos_receipts_tenant_register_number;
+DROP TABLE IF EXISTS public.pos_receipt_number_blocks;
+COMMIT;
@@ -0,0 +1,45 @@
+-- Migration: 2026-10-16_009_pos_receipt_number_blocks
+-- Tickets offline con número pre-asignado (POST /pos/numbering/blocks):
+-- - pos_receipt_number_blocks registra cada bloque reservado a una caja;
+--   create_receipt solo acepta un `number` que caiga dentro de uno de ellos.
+-- - Índice único (tenant, caja, número): dos envíos simultáneos del mismo
+--   número ya no pueden insertar ambos (el segundo recibe 409).
+--   Si falla por duplicados históricos, localizarlos con:
+--     SELECT tenant_id, register_id, number, COUNT(*) FROM pos_receipts
+--     GROUP BY 1, 2, 3 HAVING COUNT(*) > 1;
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.pos_receipt_number_blocks (
+    id          UUID        PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id   UUID        NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    register_id UUID        NOT NULL REFERENCES pos_registers(id) ON DELETE CASCADE,
+    first_no    BIGINT      NOT NULL,
+    last_no     BIGINT      NOT NULL,
+    reserved_by UUID,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT ck_pos_receipt_number_blocks_range CHECK (0 < first_no AND first_no <= last_no)
+);
+
+CREATE INDEX IF NOT EXISTS ix_pos_receipt_number_blocks_register
+    ON public.pos_receipt_number_blocks (tenant_id, register_id, last_no);
+
+-- RLS: align with the rest of the schema (see 2026-03-14_002_comprehensive_rls).
+ALTER TABLE public.pos_receipt_number_blocks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.pos_receipt_number_blocks FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_pos_receipt_number_blocks_modify ON public.pos_receipt_number_blocks;
+CREATE POLICY rls_pos_receipt_number_blocks_modify ON public.pos_receipt_number_blocks
+    FOR ALL
+    USING (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    )
+    WITH CHECK (
+        tenant_id::text = current_setting('app.tenant_id', true)
+        OR current_setting('app.admin_bypass', true) = 'on'
+    );
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pos_receipts_tenant_register_number
+    ON public.pos_receipts (tenant_id, register_id, number);
+
+COMMIT;
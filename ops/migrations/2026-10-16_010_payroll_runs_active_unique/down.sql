@@ -0,0 +1,7 @@
+-- Rollback for 2026-10-16_010_payroll_runs_active_unique
+BEGIN;
+DROP INDEX IF EXISTS public.uq_payroll_runs_tenant_month_active;
+CREATE INDEX IF NOT EXISTS ix_payroll_runs_tenant_month_active
+    ON public.payroll_runs (tenant_id, payroll_month)
+    WHERE status IN ('pending', 'running');
+COMMIT;
@@ -0,0 +1,27 @@
+-- Migration: 2026-10-16_010_payroll_runs_active_unique
+-- Dos POST /hr/payroll/generate/jobs simultáneos podían pasar la comprobación
+-- de ejecución activa y crear dos payroll_runs para el mismo mes: el índice
+-- parcial pasa a ser UNIQUE. Antes se marcan como fallidas las activas
+-- duplicadas (se conserva la más reciente).
+BEGIN;
+
+UPDATE public.payroll_runs r
+SET status = 'failed',
+    error = 'Superseded by a newer run for the same month',
+    updated_at = NOW()
+WHERE r.status IN ('pending', 'running')
+  AND EXISTS (
+      SELECT 1
+      FROM public.payroll_runs newer
+      WHERE newer.tenant_id = r.tenant_id
+        AND newer.payroll_month = r.payroll_month
+        AND newer.status IN ('pending', 'running')
+        AND (newer.created_at, newer.id) > (r.created_at, r.id)
+  );
+
+DROP INDEX IF EXISTS public.ix_payroll_runs_tenant_month_active;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payroll_runs_tenant_month_active
+    ON public.payroll_runs (tenant_id, payroll_month)
+    WHERE status IN ('pending', 'running');
+
+COMMIT;